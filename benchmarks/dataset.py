@@ -0,0 +1,247 @@
+"""Gerador de bancos SQLite sintéticos para os benchmarks
+
+O schema é criado pelo próprio DatabaseService (create_tables e as
+verificações/migrações executadas pelo DataService), de modo que os dados
+gerados seguem exatamente as tabelas e índices usados pela aplicação.
+
+Como o DatabaseService grava em data/local_storage.db relativo ao diretório
+de execução, as funções deste módulo devem ser chamadas com o diretório de
+trabalho já apontando para a pasta temporária do benchmark.
+"""
+import os
+import random
+from datetime import datetime, timedelta
+
+# Tamanhos nomeados aceitos pela linha de comando (quantidade de produtos)
+SIZES = {"1k": 1000, "10k": 10000, "100k": 100000}
+
+# Anos de histórico de movimentações gerados
+HISTORY_YEARS = 3
+
+PRODUCT_GROUP_NAMES = [
+    "Luva", "Máscara", "Seringa", "Agulha", "Gaze", "Álcool", "Soro", "Cateter",
+    "Esparadrapo", "Algodão", "Avental", "Touca", "Sonda", "Equipo", "Atadura"
+]
+RESIDUE_GROUP_NAMES = ["Infectante", "Químico", "Perfurocortante", "Comum", "Reciclável"]
+EXIT_TYPES = ["venda", "consumo", "perda", "vencimento"]
+
+# Quantidade de grupos exibidos no dashboard do banco gerado
+DASHBOARD_PRODUCT_CARDS = 6
+DASHBOARD_RESIDUE_CARDS = 3
+
+INSERT_BATCH = 5000
+
+
+def dataset_counts(products):
+    """Calcula a quantidade de registros de cada tabela para N produtos"""
+    return {
+        "products": products,
+        "product_groups": max(5, products // 50),
+        "residues": max(50, products // 2),
+        "residue_groups": max(3, products // 200),
+        "notifications": max(200, products // 5),
+        "product_movements": products * 3,
+        "residue_movements": max(50, products // 2),
+        "usage_products": max(10, products // 10),
+    }
+
+
+def _format_date(day):
+    return day.strftime("%d/%m/%Y")
+
+
+def _insert_many(cursor, query, rows):
+    """Insere as linhas em lotes, para não manter listas enormes em memória"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            cursor.executemany(query, batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+
+
+def create_database(products, seed=42):
+    """
+    Cria data/local_storage.db no diretório atual com o schema real e dados sintéticos.
+
+    Args:
+        products (int): Quantidade de produtos; as demais tabelas são dimensionadas a partir dela.
+        seed (int, optional): Semente do gerador, para bancos reproduzíveis.
+
+    Returns:
+        dict: Quantidade de registros gerados por tabela.
+    """
+    from services.database_service import DatabaseService
+    from services.card_config_service import CardConfigService
+
+    os.makedirs("data", exist_ok=True)
+    if os.path.exists(os.path.join("data", "local_storage.db")):
+        raise FileExistsError("data/local_storage.db já existe no diretório atual")
+
+    rng = random.Random(seed)
+    counts = dataset_counts(products)
+    now = datetime.now()
+    history_days = HISTORY_YEARS * 365
+
+    # Schema criado pela aplicação, incluindo as tabelas verificadas pelo DataService
+    db = DatabaseService()
+    db.verify_products_table()
+    db.verify_product_history_table()
+    db.verify_stock_movements_table()
+    db.verify_daily_movements_table()
+    db.verify_usage_timeseries_table()
+
+    conn = db.conn
+    cursor = conn.cursor()
+    created_at = now.strftime("%Y-%m-%d %H:%M:%S")
+
+    product_groups = []
+    for i in range(counts["product_groups"]):
+        name = f"{PRODUCT_GROUP_NAMES[i % len(PRODUCT_GROUP_NAMES)]} {i // len(PRODUCT_GROUP_NAMES) + 1}"
+        product_groups.append((f"pg{i:05d}", name))
+    _insert_many(cursor, """
+        INSERT INTO product_groups (id, name, description, icon, color, created_at, last_updated)
+        VALUES (?, ?, '', 'INVENTORY_2_ROUNDED', 'blue', ?, ?)
+    """, ((group_id, name, created_at, created_at) for group_id, name in product_groups))
+
+    residue_groups = []
+    for i in range(counts["residue_groups"]):
+        name = f"{RESIDUE_GROUP_NAMES[i % len(RESIDUE_GROUP_NAMES)]} {i // len(RESIDUE_GROUP_NAMES) + 1}"
+        residue_groups.append((f"rg{i:05d}", name))
+    _insert_many(cursor, """
+        INSERT INTO residue_groups (id, name, description, icon, color, created_at, last_updated)
+        VALUES (?, ?, '', 'DELETE_OUTLINE', 'purple', ?, ?)
+    """, ((group_id, name, created_at, created_at) for group_id, name in residue_groups))
+
+    # Produtos: validade entre dois meses atrás e dois anos à frente
+    product_rows = []
+    for i in range(products):
+        group_id, group_name = product_groups[rng.randrange(len(product_groups))]
+        entry = now - timedelta(days=rng.randrange(history_days))
+        product_rows.append((
+            f"p{i:07d}", f"{group_name} {i}", rng.randint(0, 200), f"L{rng.randint(1000, 99999)}",
+            _format_date(now + timedelta(days=rng.randint(-60, 730))), _format_date(entry),
+            _format_date(entry - timedelta(days=rng.randint(0, 365))), "", "{}",
+            _format_date(entry), group_id
+        ))
+    _insert_many(cursor, """
+        INSERT INTO products (
+            id, name, quantity, lot, expiry, entryDate, fabDate, exitDate,
+            weeklyUsage, lastUpdateDate, group_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, product_rows)
+
+    residue_rows = []
+    for i in range(counts["residues"]):
+        group_id, group_name = residue_groups[rng.randrange(len(residue_groups))]
+        residue_rows.append((
+            f"r{i:07d}", f"{group_name} {i}", group_name.split()[0], rng.randint(1, 100),
+            _format_date(now - timedelta(days=rng.randrange(history_days))), "", "", "",
+            group_id, group_name
+        ))
+    _insert_many(cursor, """
+        INSERT INTO residues (
+            id, name, type, quantity, entryDate, exitDate, destination, notes, group_id, group_name
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, residue_rows)
+
+    # Histórico de produtos e movimentações de estoque (mesmo ID, como na aplicação)
+    def product_movements():
+        for i in range(counts["product_movements"]):
+            product = product_rows[rng.randrange(products)]
+            moment = now - timedelta(seconds=rng.randrange(history_days * 86400))
+            movement_type = "entry" if rng.random() < 0.4 else "exit"
+            exit_type = rng.choice(EXIT_TYPES) if movement_type == "exit" else None
+            yield (
+                f"{movement_type}_{product[0]}_{i}", product[0], product[1], rng.randint(1, 20),
+                "Entrada no estoque" if movement_type == "entry" else "Saída", _format_date(moment),
+                moment.timestamp(), movement_type, exit_type, moment.strftime("%Y-%m-%d")
+            )
+
+    movements = list(product_movements())
+    _insert_many(cursor, """
+        INSERT INTO product_history (
+            id, productId, productName, quantity, reason, date, timestamp, type, exit_type, day
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, movements)
+    _insert_many(cursor, """
+        INSERT INTO stock_movements (
+            id, kind, item_id, item_name, type, quantity, reason, exit_type, date, day, timestamp
+        ) VALUES (?, 'product', ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        (m[0], m[1], m[2], m[7], m[3], m[4], m[8], m[5], m[9], m[6])
+        for m in movements
+    ))
+    del movements
+
+    def residue_movements():
+        for i in range(counts["residue_movements"]):
+            residue = residue_rows[rng.randrange(len(residue_rows))]
+            moment = now - timedelta(seconds=rng.randrange(history_days * 86400))
+            yield (
+                f"exit_{residue[0]}_{i}", residue[0], residue[1], rng.randint(1, 10),
+                "Coleta", "", _format_date(moment), moment.timestamp(), "exit",
+                moment.strftime("%Y-%m-%d")
+            )
+
+    residue_history = list(residue_movements())
+    _insert_many(cursor, """
+        INSERT INTO residue_history (
+            id, residueId, residueName, quantity, destination, notes, date, timestamp, type
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (m[:9] for m in residue_history))
+    _insert_many(cursor, """
+        INSERT INTO stock_movements (
+            id, kind, item_id, item_name, type, quantity, reason, exit_type, date, day, timestamp
+        ) VALUES (?, 'residue', ?, ?, 'exit', ?, ?, NULL, ?, ?, ?)
+    """, (
+        (m[0], m[1], m[2], m[3], m[4], m[6], m[9], m[7])
+        for m in residue_history
+    ))
+    del residue_history
+
+    # Uso diário dos últimos 90 dias para uma parte dos produtos
+    def usage_rows():
+        for product in rng.sample(product_rows, min(products, counts["usage_products"])):
+            for offset in rng.sample(range(90), 20):
+                yield (product[0], (now - timedelta(days=offset)).strftime("%Y-%m-%d"), rng.randint(1, 10))
+
+    _insert_many(cursor, """
+        INSERT OR IGNORE INTO usage_timeseries (product_id, day, quantity) VALUES (?, ?, ?)
+    """, usage_rows())
+
+    # Notificações com IDs ordenados pela data, como as criadas pelo NotificationService
+    def notification_rows():
+        total = counts["notifications"]
+        for i in range(total):
+            moment = now - timedelta(minutes=(total - i) * 10)
+            product = product_rows[rng.randrange(products)]
+            kind = rng.choice(["LOW_STOCK", "EXPIRY", "PRODUCT_ADDED"])
+            yield (
+                f"{moment.strftime('%Y%m%d%H%M%S')}_{i % 1000:03d}_{rng.randint(1000, 9999)}",
+                kind, f"{kind}: {product[1]}", moment.strftime("%d/%m/%Y %H:%M"),
+                1 if rng.random() < 0.8 else 0, product[0]
+            )
+
+    _insert_many(cursor, """
+        INSERT INTO notifications (id, type, message, date, read, productId) VALUES (?, ?, ?, ?, ?, ?)
+    """, notification_rows())
+
+    conn.commit()
+
+    # Consolidação diária calculada pela própria aplicação
+    db.rebuild_daily_movements()
+
+    # Cards do dashboard gravados pelo serviço de configuração
+    card_configs = CardConfigService(None, db)
+    card_configs.save_dashboard_product_group_ids(
+        [group_id for group_id, _ in product_groups[:DASHBOARD_PRODUCT_CARDS]]
+    )
+    card_configs.save_dashboard_residue_group_ids(
+        [group_id for group_id, _ in residue_groups[:DASHBOARD_RESIDUE_CARDS]]
+    )
+
+    db.close()
+    return counts
@@ -0,0 +1,111 @@
+"""Memória retida pelos caches do DataService sobre bancos sintéticos
+
+Para cada tamanho pedido, gera um banco com benchmarks/dataset.py em uma pasta
+temporária, inicializa o DataService com o tracemalloc ligado e mede:
+
+- cache_bytes: memória liberada ao descartar as listas em cache (produtos,
+  estoque baixo, vencendo, resíduos e grupos), ou seja, o que elas retêm;
+- refresh_peak_bytes: pico de memória alocada durante um refresh_data().
+
+Uso:
+    python benchmarks/memory.py                    # 1k e 10k
+    python benchmarks/memory.py --sizes 100k --output memoria.json
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.dataset import SIZES, create_database
+
+DEFAULT_SIZES = ("1k", "10k")
+
+# Estruturas derivadas do instantâneo em cache, descartadas junto com ele
+DERIVED_ATTRIBUTES = ("_products_by_group", "_stock_columns", "_dashboard_view")
+
+
+def _traced():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def measure_size(label, products, seed):
+    """Gera o banco de um tamanho e mede a memória dos caches; retorna o resultado em dicionário"""
+    workdir = tempfile.mkdtemp(prefix=f"estoque_mem_{label}_")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        counts = create_database(products, seed=seed)
+
+        from services.data_service import DataService
+        from services.data_snapshot import DataSnapshot
+
+        tracemalloc.start()
+        data = DataService()
+
+        tracemalloc.reset_peak()
+        baseline = _traced()
+        data.refresh_data()
+        refresh_peak = tracemalloc.get_traced_memory()[1] - baseline
+
+        lists = {
+            "stock_products": len(data.stock_products),
+            "low_stock_products": len(data.low_stock_products),
+            "expiring_products": len(data.expiring_products),
+            "residues": len(data.residues),
+        }
+        with_cache = _traced()
+        data._snapshot = DataSnapshot()
+        for name in DERIVED_ATTRIBUTES:
+            setattr(data, name, None)
+        cache_bytes = with_cache - _traced()
+        tracemalloc.stop()
+
+        data.db.close()
+        result = {
+            "products": products,
+            "dataset": counts,
+            "lists": lists,
+            "cache_bytes": cache_bytes,
+            "bytes_per_product": round(cache_bytes / max(1, products), 1),
+            "refresh_peak_bytes": refresh_peak,
+        }
+        print(f"[{label}] caches: {cache_bytes / 1048576:.1f} MiB "
+              f"({result['bytes_per_product']:.0f} B/produto), "
+              f"pico do refresh: {refresh_peak / 1048576:.1f} MiB")
+        return result
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memória dos caches do controle de estoque")
+    parser.add_argument("--sizes", nargs="+", default=list(DEFAULT_SIZES), choices=sorted(SIZES),
+                        help="Tamanhos de banco a gerar (quantidade de produtos)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador de dados")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: imprime no console)")
+    args = parser.parse_args(argv)
+
+    result = {label: measure_size(label, SIZES[label], args.seed) for label in args.sizes}
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Resultado gravado em {args.output}")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
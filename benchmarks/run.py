@@ -0,0 +1,339 @@
+"""Benchmarks de desempenho sobre bancos sintéticos
+
+Para cada tamanho pedido, gera um banco com benchmarks/dataset.py em uma pasta
+temporária, inicializa o DataService sobre ele e mede as operações mais
+custosas da aplicação: carga de dados, consultas dos serviços, agregações dos
+relatórios, exportações CSV e o build() de cada tela (sem abrir janela).
+
+Uso:
+    python benchmarks/run.py                       # 1k e 10k, 5 repetições
+    python benchmarks/run.py --sizes 1k 10k 100k --repeat 3
+    python benchmarks/run.py --output atual.json --compare base.json
+
+Com --compare, as medianas são comparadas com um resultado anterior e o
+código de saída é 1 se algum caso ficar mais lento que o limite (--threshold).
+O código de saída também é 1 se algum caso falhar, inclusive quando a tela
+captura o erro e só o exibe na barra de notificações.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.dataset import SIZES, create_database
+
+DEFAULT_SIZES = ("1k", "10k")
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.25
+
+
+class HeadlessPage:
+    """Substitui o ft.Page para que as telas possam ser construídas sem janela"""
+
+    def __init__(self):
+        self.views = []
+        self.controls = []
+        self.overlay = []
+        self.dialog = None
+        self.snack_bar = None
+
+    def update(self, *controls):
+        pass
+
+    def go(self, route):
+        pass
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+
+    def open(self, control):
+        pass
+
+    def close(self, control):
+        pass
+
+
+class CaseFailed(Exception):
+    """Erro que uma tela tratou internamente e só exibiu na barra de notificações"""
+
+
+def _raise_on_error_snack_bar(show_snack_bar):
+    """
+    Envolve navigation.show_snack_bar para que as mensagens de erro falhem o caso.
+
+    As telas capturam as próprias exceções e só avisam o usuário pela barra de
+    notificações; sem isso um caso quebrado seria cronometrado como se tivesse
+    terminado normalmente.
+    """
+    def wrapper(message, color=None):
+        if str(message).startswith("Erro"):
+            raise CaseFailed(message)
+        return show_snack_bar(message, color)
+    return wrapper
+
+
+def _time_case(func, repeat):
+    """Executa `func` `repeat` vezes e retorna as estatísticas em milissegundos"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "runs": repeat,
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def _service_cases(data):
+    """Operações de serviço e agregações de relatório"""
+    from services.dashboard_view_model import build_dashboard_view
+    from services.stock_columns import StockColumns
+
+    return [
+        ("refresh_data", data.refresh_data),
+        ("get_all_products", data.product_service.get_all_products),
+        ("get_all_residues", data.residue_service.get_all_residues),
+        ("get_expiring_products", lambda: data.product_service.get_expiring_products(30)),
+        ("get_low_stock_products", lambda: data.product_service.get_low_stock_products(5)),
+        ("check_and_create_notifications", data.notification_service.check_and_create_notifications),
+        ("get_notifications_page", lambda: data.get_notifications_page()),
+        ("list_product_groups", data.group_service.get_all_product_groups),
+        ("list_residue_groups", data.group_service.get_all_residue_groups),
+        ("dashboard_view", lambda: build_dashboard_view(
+            data.stock_products, data.residues, data.product_groups, data.residue_groups,
+            data.card_config_service.get_dashboard_layout()
+        )),
+        ("report.movement_totals_365d", lambda: data.get_product_movement_totals(days=365)),
+        ("report.daily_totals_365d", lambda: data.get_daily_movement_totals(days=365)),
+        ("report.stock_movement_summary_365d", lambda: data.get_stock_movement_summary(days=365)),
+        ("report.stock_movement_page", lambda: data.get_stock_movement_page(days=365)),
+        ("report.usage_totals_30d", lambda: data.get_usage_totals(30)),
+        ("report.residue_stats", data.residue_service.get_residue_stats),
+        ("stock_columns.build", lambda: StockColumns(data.stock_products)),
+        ("stock_columns.group_totals", lambda: StockColumns(data.stock_products).group_totals()),
+        ("stock_columns.weekly_usage", lambda: StockColumns(data.stock_products).load_weekly_usage(
+            data.product_service.get_weekly_usage_rows()
+        )),
+    ]
+
+
+# Saídas registradas por repetição no caso de vazão de saídas
+EXITS_PER_RUN = 1000
+
+
+def _movement_cases(data):
+    """Vazão de saídas de estoque (cada repetição registra EXITS_PER_RUN saídas)"""
+    products = [p["id"] for p in data.stock_products[:EXITS_PER_RUN]]
+    if not products:
+        return []
+    # Saldo alto para que todas as saídas medidas sejam aceitas
+    data.db.conn.execute("UPDATE products SET quantity = 1000000")
+    data.db.conn.commit()
+    counter = iter(range(10 ** 9))
+
+    def register_exits():
+        for i in range(EXITS_PER_RUN):
+            data.product_service.register_product_exit(
+                products[i % len(products)], 1, "benchmark", idempotency_key=f"bench-{next(counter)}"
+            )
+
+    def register_exit_batches():
+        # Micro-lotes como os da leitura contínua (ScanExitQueue)
+        batch_size = 50
+        for start in range(0, EXITS_PER_RUN, batch_size):
+            data.product_service.register_exit_batch([
+                {"product_id": products[i % len(products)], "quantity": 1, "reason": "benchmark",
+                 "idempotency_key": f"bench-{next(counter)}"}
+                for i in range(start, start + batch_size)
+            ])
+
+    lots = [p["lot"] for p in data.stock_products[:EXITS_PER_RUN]]
+
+    def lookup_codes():
+        data.product_service.scan_lookup.invalidate()
+        for lot in lots:
+            data.product_service.lookup_code(lot)
+
+    return [
+        (f"register_product_exit_x{EXITS_PER_RUN}", register_exits),
+        (f"register_exit_batch_x{EXITS_PER_RUN}", register_exit_batches),
+        (f"scan.lookup_x{len(lots)}", lookup_codes),
+    ]
+
+
+def _screen_classes():
+    """Telas principais construídas apenas com (data, navigation)"""
+    from screens.dashboard_screen import DashboardScreen
+    from screens.stock_screen import StockScreen
+    from screens.residues_screen import ResiduesScreen
+    from screens.report_screen import ReportScreen
+    from screens.notifications_screen import NotificationsScreen
+    from screens.settings_screen import SettingsScreen
+    from screens.diagnostics_screen import DiagnosticsScreen
+    from screens.groups_screen import GroupsScreen
+    from screens.weekly_usage_screen import WeeklyUsageScreen
+    from screens.movement_report_screen import MovementReportScreen
+    from screens.entry_report_screen import EntryReportScreen
+    from screens.expiry_report_screen import ExpiryReportScreen
+    from screens.group_report_screen import GroupReportScreen
+
+    return [
+        ("dashboard", DashboardScreen),
+        ("stock", StockScreen),
+        ("residues", ResiduesScreen),
+        ("reports", ReportScreen),
+        ("notifications", NotificationsScreen),
+        ("settings", SettingsScreen),
+        ("diagnostics", DiagnosticsScreen),
+        ("groups", GroupsScreen),
+        ("weekly_usage", WeeklyUsageScreen),
+        ("movement_report", MovementReportScreen),
+        ("entry_report", EntryReportScreen),
+        ("expiry_report", ExpiryReportScreen),
+        ("group_report", GroupReportScreen),
+    ]
+
+
+def _screen_cases(data, navigation):
+    """build() de cada tela e exportações CSV dos relatórios"""
+    cases = []
+    screens = {}
+    for name, screen_class in _screen_classes():
+        screen = screens[name] = screen_class(data, navigation)
+        cases.append((f"screen.{name}.build", screen.build))
+
+    for name in ("movement_report", "entry_report", "expiry_report", "group_report"):
+        cases.append((f"export.{name}", lambda screen=screens[name]: screen._export_report(None)))
+    cases.append(("export.all_data", lambda: screens["reports"]._export_all_data(None)))
+    return cases
+
+
+def run_size(label, products, repeat, seed):
+    """Gera o banco de um tamanho e mede todos os casos; retorna o resultado em dicionário"""
+    workdir = tempfile.mkdtemp(prefix=f"estoque_bench_{label}_")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        start = time.perf_counter()
+        counts = create_database(products, seed=seed)
+        generation_s = time.perf_counter() - start
+        print(f"[{label}] banco gerado em {generation_s:.1f}s: {counts}")
+
+        from services.data_service import DataService
+        from navigation import Navigation
+
+        start = time.perf_counter()
+        data = DataService()
+        startup_ms = (time.perf_counter() - start) * 1000
+
+        navigation = Navigation(HeadlessPage(), data)
+        navigation.update_view = lambda refresh=True: None
+        navigation.show_snack_bar = _raise_on_error_snack_bar(navigation.show_snack_bar)
+        data.navigation = navigation
+
+        cases = {"data_service_startup": {"runs": 1, "min_ms": round(startup_ms, 3),
+                                          "median_ms": round(startup_ms, 3), "max_ms": round(startup_ms, 3)}}
+        errors = {}
+        for name, func in _service_cases(data) + _screen_cases(data, navigation) + _movement_cases(data):
+            try:
+                cases[name] = _time_case(func, repeat)
+                print(f"[{label}] {name}: mediana {cases[name]['median_ms']:.2f} ms")
+            except Exception as e:
+                errors[name] = f"{type(e).__name__}: {e}"
+                print(f"[{label}] {name}: erro {errors[name]}")
+                traceback.print_exc()
+
+        data.db.close()
+        return {
+            "products": products,
+            "dataset": counts,
+            "generation_s": round(generation_s, 3),
+            "cases": cases,
+            "errors": errors,
+        }
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(current, baseline, threshold):
+    """Lista os casos cuja mediana piorou mais que `threshold` vezes em relação à base"""
+    regressions = []
+    for label, result in current["results"].items():
+        base_cases = baseline.get("results", {}).get(label, {}).get("cases", {})
+        for name, stats in result["cases"].items():
+            base = base_cases.get(name)
+            if not base or not base.get("median_ms"):
+                continue
+            ratio = stats["median_ms"] / base["median_ms"]
+            if ratio > threshold:
+                regressions.append((label, name, base["median_ms"], stats["median_ms"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho do controle de estoque")
+    parser.add_argument("--sizes", nargs="+", default=list(DEFAULT_SIZES), choices=sorted(SIZES),
+                        help="Tamanhos de banco a gerar (quantidade de produtos)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Repetições de cada caso")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador de dados")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: imprime no console)")
+    parser.add_argument("--compare", help="Resultado anterior (JSON) para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Razão máxima aceita entre a mediana atual e a da base")
+    args = parser.parse_args(argv)
+
+    result = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": {},
+    }
+    failed = False
+    for label in args.sizes:
+        result["results"][label] = run_size(label, SIZES[label], args.repeat, args.seed)
+        failed = failed or bool(result["results"][label]["errors"])
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Resultado gravado em {args.output}")
+    else:
+        print(output)
+
+    if failed:
+        for label, size_result in result["results"].items():
+            for name, error in size_result["errors"].items():
+                print(f"FALHA [{label}] {name}: {error}")
+        return 1
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        for label, name, before, after, ratio in regressions:
+            print(f"REGRESSÃO [{label}] {name}: {before:.2f} ms -> {after:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print("Nenhuma regressão acima do limite")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
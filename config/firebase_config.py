@@ -2,8 +2,12 @@ import firebase_admin
 from firebase_admin import credentials, firestore
 import os
 import json
+from services.instrumentation import timed
 
 class FirebaseConfig:
+    # Limite de operações por lote de escrita do Firestore
+    BATCH_LIMIT = 500
+    
     def __init__(self):
         self.app = None
         self.db = None
@@ -41,6 +45,7 @@ class FirebaseConfig:
             print("Operando em modo offline.")
             self.online_mode = False
     
+    @timed("firestore.check_connection")
     def check_connection(self):
         """Verifica se a conexão com o Firebase está ativa"""
         if not self.online_mode:
@@ -63,4 +68,31 @@ class FirebaseConfig:
         """Obtém uma referência para uma coleção, verificando a conexão primeiro"""
         if self.check_connection():
             return self.db.collection(collection_name)
-        return None
\ No newline at end of file
+        return None
+    
+    @timed("firestore.commit_batch")
+    def commit_batch(self, collection_name, document_ids, fields=None):
+        """Aplica a mesma alteração a vários documentos usando lotes de escrita
+        
+        Se `fields` for None, os documentos são excluídos; caso contrário, os
+        campos informados são mesclados em cada documento.
+        """
+        self.commit_writes((collection_name, document_id, fields) for document_id in document_ids)
+    
+    @timed("firestore.commit_writes")
+    def commit_writes(self, writes):
+        """Aplica alterações em documentos de uma ou mais coleções usando lotes de escrita
+        
+        Cada item de `writes` é (coleção, ID do documento, campos): com campos
+        None o documento é excluído; caso contrário, os campos são mesclados nele.
+        """
+        writes = list(writes)
+        for start in range(0, len(writes), self.BATCH_LIMIT):
+            batch = self.db.batch()
+            for collection_name, document_id, fields in writes[start:start + self.BATCH_LIMIT]:
+                ref = self.db.collection(collection_name).document(document_id)
+                if fields is None:
+                    batch.delete(ref)
+                else:
+                    batch.set(ref, fields, merge=True)
+            batch.commit()
@@ -0,0 +1,103 @@
+import collections
+import logging
+import os
+import threading
+from logging.handlers import RotatingFileHandler
+
+# Diretório e arquivo de log (relativos ao diretório de execução, como data/ e reports/)
+LOG_DIR = "logs"
+LOG_FILE = "estoque.log"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Quantidade de registros mantidos em memória para exibição na interface
+RING_BUFFER_SIZE = 500
+
+DEFAULT_LEVEL = "INFO"
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+
+class RingBufferHandler(logging.Handler):
+    """Mantém os últimos registros de log em memória para a tela de diagnóstico"""
+
+    def __init__(self, capacity=RING_BUFFER_SIZE):
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+        self._buffer_lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._buffer_lock:
+            self.records.append(line)
+
+    def get_lines(self, limit=None):
+        """Retorna as linhas mais recentes, da mais antiga para a mais nova"""
+        with self._buffer_lock:
+            lines = list(self.records)
+        return lines[-limit:] if limit else lines
+
+
+_ring_buffer = None
+
+
+def setup_logging(level=DEFAULT_LEVEL, log_dir=LOG_DIR, console=True):
+    """
+    Configura o logging da aplicação: console, arquivo rotativo e buffer em memória.
+
+    Pode ser chamada mais de uma vez; os handlers são instalados apenas na primeira.
+
+    Args:
+        level (str, optional): Nível inicial ("DEBUG", "INFO", ...). Padrão é "INFO".
+        log_dir (str, optional): Diretório do arquivo de log. Padrão é "logs".
+        console (bool, optional): Se True, também escreve no console.
+    """
+    global _ring_buffer
+    root = logging.getLogger()
+
+    if _ring_buffer is None:
+        formatter = logging.Formatter(LOG_FORMAT, "%d/%m/%Y %H:%M:%S")
+
+        _ring_buffer = RingBufferHandler()
+        _ring_buffer.setFormatter(formatter)
+        root.addHandler(_ring_buffer)
+
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            file_handler = RotatingFileHandler(
+                os.path.join(log_dir, LOG_FILE),
+                maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+            file_handler.setFormatter(formatter)
+            root.addHandler(file_handler)
+        except OSError as e:
+            print(f"Não foi possível criar o arquivo de log: {e}")
+
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            root.addHandler(console_handler)
+
+    set_log_level(level)
+    return root
+
+
+def set_log_level(level):
+    """Altera o nível de log da aplicação em tempo de execução"""
+    level = str(level or DEFAULT_LEVEL).upper()
+    if level not in LEVELS:
+        level = DEFAULT_LEVEL
+    logging.getLogger().setLevel(level)
+    return level
+
+
+def get_recent_logs(limit=None):
+    """Retorna os registros mais recentes mantidos em memória"""
+    if _ring_buffer is None:
+        return []
+    return _ring_buffer.get_lines(limit)
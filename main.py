@@ -7,11 +7,15 @@ from screens.residues_screen import ResiduesScreen
 from screens.report_screen import ReportScreen
 from navigation import Navigation
 from services.data_service import DataService
+from config.logging_config import setup_logging
+from services import instrumentation
+import logging
 import threading
 import time
 
 # Importar todas as telas no início para evitar problemas de escopo
 from screens.settings_screen import SettingsScreen
+from screens.diagnostics_screen import DiagnosticsScreen
 from screens.notifications_screen import NotificationsScreen
 from screens.dashboard_detail_screen import DashboardDetailScreen
 from screens.add_product_screen import AddProductScreen
@@ -33,6 +37,10 @@ from screens.entry_report_screen import EntryReportScreen
 from screens.group_report_screen import GroupReportScreen
 from screens.register_exit_screen import RegisterExitScreen
 
+logger = logging.getLogger(__name__)
+
+# Nome das telas principais de cada aba, usado nas métricas de build()
+TAB_NAMES = {0: "dashboard", 1: "stock", 2: "residues", 3: "reports"}
 
 def main(page: ft.Page):
     # Configurações da página
@@ -42,6 +50,9 @@ def main(page: ft.Page):
     page.window_width = 800
     page.window_height = 600
     
+    # Configurar logs antes de inicializar os serviços
+    setup_logging()
+    
     # Inicializar serviços
     data = DataService()
     
@@ -113,21 +124,23 @@ def main(page: ft.Page):
         navigation.detail_title = None
         update_view()
     
-    # Função para atualizar a tela
-    def update_view():
-        # Atualizar dados
-        data.refresh_data()
-        
+    # Função que monta o conteúdo da tela atual (sem alterar a página)
+    def build_view():
         # Selecionar tela atual com base no índice da aba e no current_screen
         current_content = None
+        build_start = time.perf_counter()
         
-        print(f"Atualizando view: tab={navigation.current_tab}, screen={navigation.current_screen}")
+        logger.debug("Atualizando view: tab=%s, screen=%s", navigation.current_tab, navigation.current_screen)
 
         if navigation.current_tab == 0:  # Dashboard
             if navigation.current_screen == "settings":
                 if not hasattr(navigation, 'settings_screen'):
                     navigation.settings_screen = SettingsScreen(data, navigation)
                 current_content = navigation.settings_screen.build()
+            elif navigation.current_screen == "diagnostics":
+                if not hasattr(navigation, 'diagnostics_screen'):
+                    navigation.diagnostics_screen = DiagnosticsScreen(data, navigation)
+                current_content = navigation.diagnostics_screen.build()
             elif navigation.current_screen == "notifications":
                 if not hasattr(navigation, 'notifications_screen'):
                     navigation.notifications_screen = NotificationsScreen(data, navigation)
@@ -284,22 +297,47 @@ def main(page: ft.Page):
             else:
                 current_content = report_screen.build()
         
+        # Tempo de build() da tela exibida (registrado apenas com a instrumentação ligada)
+        screen_name = navigation.current_screen or TAB_NAMES.get(navigation.current_tab, navigation.current_tab)
+        instrumentation.record(f"screen.build:{screen_name}", time.perf_counter() - build_start)
+        
          # Fallback para conteúdo vazio se build retornar None
         if current_content is None:
-            print("ERRO: build() retornou None")
+            logger.error("build() retornou None")
             current_content = ft.Container(
                 content=ft.Text("Erro ao carregar conteúdo"),
                 alignment=ft.alignment.center,
                 padding=20
             )
         
+        return current_content
+    
+    # Função que exibe um conteúdo já montado por build_view
+    def show_view(current_content):
         # Atualizar apenas o conteúdo, não a página inteira
         content.content = current_content
         page.update()
-        print("View atualizada com sucesso")
+        logger.debug("View atualizada com sucesso")
     
-    # Adicionar método update_view à navegação
+    # Função para atualizar a tela
+    def update_view(refresh=True):
+        # refresh=False quando o instantâneo acabou de ser carregado
+        if not refresh:
+            show_view(build_view())
+            return
+        
+        # Recarregar os dados e montar a tela no pool de tarefas, sem travar a
+        # interface; uma navegação nova substitui a que ainda não terminou
+        def refresh_and_build():
+            data.refresh_data()
+            return build_view()
+        
+        navigation.tasks.submit(refresh_and_build, key="view", on_done=show_view)
+    
+    # Adicionar métodos de atualização à navegação
     navigation.update_view = update_view
+    navigation.build_view = build_view
+    navigation.show_view = show_view
     
     # Carregar tela inicial (dashboard)
     update_view()
@@ -308,13 +346,18 @@ def main(page: ft.Page):
     def periodic_update():
         while True:
             time.sleep(60)  # Espera 60 segundos
-            # Executar atualização na thread principal
-            update_view()
-            page.update()
+            # Carrega o novo instantâneo em segundo plano e só depois redesenha a
+            # tela; até a troca, a tela continua lendo os dados anteriores
+            data.refresh_data_in_background(
+                on_done=lambda success: navigation.refresh_view_in_background(key="view")
+            )
     
     # Iniciar thread de atualização
     update_thread = threading.Thread(target=periodic_update, daemon=True)
     update_thread.start()
+    
+    # Encerrar as tarefas de fundo junto com a janela
+    page.on_disconnect = lambda _: navigation.tasks.shutdown()
 
 if __name__ == "__main__":
     ft.app(target=main)
\ No newline at end of file
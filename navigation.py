@@ -1,4 +1,7 @@
 import flet as ft
+from collections.abc import Mapping
+
+from services.task_runner import TaskRunner
 
 from screens.register_exit_screen import RegisterExitScreen
 from screens.weekly_usage_screen import WeeklyUsageScreen
@@ -20,6 +23,8 @@ class Navigation:
         # Propriedades para tela de confirmação de exclusão
         self.item_type_to_delete = None
         self.item_to_delete = None
+        # Chamadas de serviço executadas fora da thread da interface
+        self.tasks = TaskRunner(page, on_busy_change=self._show_progress)
     
     def change_tab(self, tab_index):
         """Muda para a aba especificada e limpa seleções"""
@@ -39,8 +44,13 @@ class Navigation:
         self.selected_residue = residue
         self.update_view()
     
-    def go_back(self):
-        """Volta para a tela anterior"""
+    def go_back(self, refresh=True):
+        """Volta para a tela anterior
+        
+        Args:
+            refresh (bool, optional): False quando os dados já foram recarregados
+                por quem chamou (ex.: depois de uma exclusão).
+        """
         if len(self.page.views) > 1:
             # Se estiver em uma view adicional, remover a view atual
             self.page.views.pop()
@@ -53,7 +63,7 @@ class Navigation:
             self.detail_type = None
             self.detail_items = None
             self.detail_title = None
-            self.update_view()
+            self.update_view(refresh=refresh)
     
     def go_to_add_product(self):
         """Navega para a tela de adicionar produto"""
@@ -106,6 +116,11 @@ class Navigation:
         self.current_screen = "settings"
         self.update_view()
     
+    def go_to_diagnostics(self):
+        """Navega para a tela de diagnóstico (acessada a partir das configurações)"""
+        self.current_screen = "diagnostics"
+        self.update_view()
+    
     def go_to_select_group_for_card(self, group_type, all_groups, card_id=None):
         """Navega para a tela de seleção de grupo para adicionar ao dashboard"""
         self.current_screen = "select_group_for_card"
@@ -173,7 +188,7 @@ class Navigation:
         
         # Adicione logs para debug
         print(f"Navegando para detalhes: tipo={detail_type}, título={title}")
-        if isinstance(items, dict) and "id" in items:
+        if isinstance(items, Mapping) and "id" in items:
             print(f"ID do grupo: {items['id']}")
         elif isinstance(items, list):
             print(f"Número de itens: {len(items)}")
@@ -234,9 +249,8 @@ class Navigation:
 
     def go_to_register_exit(self, item, item_type):
         """Navega para a tela de registro de saída"""
-        # Criar uma cópia profunda do item para evitar referências compartilhadas
-        import copy
-        item_copy = copy.deepcopy(item) if item else {}
+        # Cópia rasa: os campos são valores simples, e os registros do cache são imutáveis
+        item_copy = dict(item) if item else {}
         
         print(f"Navigation: Navegando para registro de saída: {item_copy.get('name')}, ID: {item_copy.get('id')}, Tipo: {item_type}")
         
@@ -253,7 +267,42 @@ class Navigation:
         self.page.go(f"/register_exit/{item_type}/{item_copy.get('id', '')}")
         self.page.update()
 
-    def update_view(self):
+    def go_to_scan_exit(self):
+        """Navega para a saída por leitura contínua de códigos de barras"""
+        register_exit_screen = RegisterExitScreen(self.data, self, None, "scan")
+        self.page.views.append(
+            ft.View(
+                route="/register_exit/scan",
+                controls=[register_exit_screen.build()]
+            )
+        )
+        self.page.go("/register_exit/scan")
+        self.page.update()
+
+    def _show_progress(self, busy):
+        """Exibe uma barra de progresso no topo da página enquanto há tarefas em andamento"""
+        self.page.splash = ft.ProgressBar(color="#4A6FFF") if busy else None
+        self.page.update()
+    
+    def refresh_view_in_background(self, key=None, delay=0):
+        """
+        Monta a tela atual no pool de tarefas e a exibe ao terminar, sem recarregar os dados.
+        
+        Args:
+            key (str, optional): Chamadas com a mesma chave se substituem (ex.: pesquisa).
+            delay (float, optional): Espera em segundos antes de montar a tela.
+        """
+        return self.tasks.submit(self.build_view, key=key, delay=delay, on_done=self.show_view)
+    
+    def update_view(self, refresh=True):
         """Atualiza a visualização atual (será substituído em main.py)"""
         print("Método update_view chamado na navegação")
+        pass
+    
+    def build_view(self):
+        """Monta o conteúdo da tela atual (será substituído em main.py)"""
+        return None
+    
+    def show_view(self, content):
+        """Exibe um conteúdo montado por build_view (será substituído em main.py)"""
         pass
\ No newline at end of file
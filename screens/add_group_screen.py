@@ -1,5 +1,6 @@
 import flet as ft
 from datetime import datetime
+from services.ids import new_id
 
 class AddGroupScreen:
     def __init__(self, data, navigation):
@@ -75,7 +76,7 @@ class AddGroupScreen:
             
             # Preparar dados do novo grupo
             now = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-            group_id = f"{'group' if self.is_product_group else 'resgroup'}_{int(datetime.now().timestamp())}"
+            group_id = new_id("group" if self.is_product_group else "resgroup")
             
             new_group = {
                 "id": group_id,
@@ -88,8 +89,7 @@ class AddGroupScreen:
             }
             
             # Adicionar grupo usando o serviço apropriado
-            from services.group_service import GroupService
-            group_service = GroupService(self.data.firebase, self.data.db)
+            group_service = self.data.group_service
             
             # Salvar no banco de dados local
             cursor = self.data.db.conn.cursor()
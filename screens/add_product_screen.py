@@ -51,6 +51,15 @@ class AddProductScreen:
             border_radius=8,
         )
         
+        barcode_field = ft.TextField(
+            label="Código de Barras (EAN)",
+            value=self.data.new_product.get("barcode", ""),
+            on_change=lambda e: self.data.update_new_product("barcode", e.control.value),
+            keyboard_type=ft.KeyboardType.NUMBER,
+            prefix_icon=ft.icons.QR_CODE_SCANNER,
+            border_radius=8,
+        )
+        
         def add_product(_):
             if not all([
                 name_field.value, 
@@ -104,6 +113,7 @@ class AddProductScreen:
                                 expiry_field,
                                 fab_date_field,
                                 manufacturer_field,
+                                barcode_field,
                                 ft.Text(
                                     "* Campos obrigatórios: Nome, Quantidade, Lote e Data de Validade",
                                     size=12,
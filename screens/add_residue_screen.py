@@ -70,8 +70,7 @@ class AddResidueScreen:
                 return
             
             # Identificar grupo automaticamente com base no nome
-            from services.residue_service import ResidueService
-            residue_service = ResidueService(self.data.firebase, self.data.db)
+            residue_service = self.data.residue_service
             
             # Criar dados do resíduo
             residue_data = {
@@ -1,4 +1,7 @@
 import flet as ft
+import logging
+
+logger = logging.getLogger(__name__)
 
 class ConfirmDeleteScreen:
     def __init__(self, data, navigation):
@@ -39,19 +42,15 @@ class ConfirmDeleteScreen:
             icon = ft.icons.FOLDER_DELETE
             color = ft.colors.ORANGE
             
-            # Verificar se há itens no grupo
-            from services.group_service import GroupService
-            group_service = GroupService(self.data.firebase, self.data.db)
-            
             # Verificar se é grupo de produtos ou resíduos
             is_product_group = self.item.get("group_type", "product") == "product"
             
             # Contar itens no grupo
             if is_product_group:
-                items = group_service.get_products_in_group(self.item["id"])
+                items = self.data.get_products_in_group(self.item["id"])
                 item_type_name = "produtos"
             else:
-                items = group_service.get_residues_in_group(self.item["id"])
+                items = self.data.get_residues_in_group(self.item["id"])
                 item_type_name = "resíduos"
             
             if len(items) > 0:
@@ -161,18 +160,15 @@ class ConfirmDeleteScreen:
             ]
         elif self.item_type == "group":
             # Adicionar detalhes para grupos
-            from services.group_service import GroupService
-            group_service = GroupService(self.data.firebase, self.data.db)
-            
             # Verificar se é grupo de produtos ou resíduos
             is_product_group = self.item.get("type", "product") == "product"
             
             # Contar itens no grupo
             if is_product_group:
-                items = group_service.get_products_in_group(self.item["id"])
+                items = self.data.get_products_in_group(self.item["id"])
                 item_type = "produtos"
             else:
-                items = group_service.get_residues_in_group(self.item["id"])
+                items = self.data.get_residues_in_group(self.item["id"])
                 item_type = "resíduos"
             
             details = [
@@ -198,93 +194,67 @@ class ConfirmDeleteScreen:
             spacing=8,
         )   
 
-    def _confirm_delete(self, _):
+    def _confirm_delete(self, e):
         """Confirma a exclusão do item"""
-        success = False
+        print(f"Confirmando exclusão de {self.item_type}: {self.item.get('name', 'Desconhecido')}")
         
-        try:
-            print(f"Confirmando exclusão de {self.item_type}: {self.item.get('name', 'Desconhecido')}")
-            
-            if self.item_type == "product":
-                success = self.data.delete_product(self.item["id"])
-            elif self.item_type == "residue":
-                success = self.data.delete_residue(self.item["id"])
-            elif self.item_type == "group":
-                # Verificar se é grupo de produtos ou resíduos
-                from services.group_service import GroupService
-                group_service = GroupService(self.data.firebase, self.data.db)
-                
-                # Obter todos os grupos de resíduos
-                residue_groups = group_service.get_all_residue_groups()
-                residue_group_ids = [g["id"] for g in residue_groups]
-                
-                # Verificar se o ID do grupo está na lista de IDs de grupos de resíduos
-                is_residue_group = self.item["id"] in residue_group_ids
-                is_product_group = not is_residue_group
-                
-                print(f"ID do grupo: {self.item['id']}, is_residue_group: {is_residue_group}")
-                
-                # Obter itens do grupo
-                if is_product_group:
-                    items = group_service.get_products_in_group(self.item["id"])
-                    print(f"Encontrados {len(items)} produtos no grupo")
-                    
-                    # MODIFICAÇÃO: Excluir todos os produtos do grupo
-                    print(f"Excluindo {len(items)} produtos do grupo {self.item['name']}")
-                    from services.product_service import ProductService
-                    product_service = ProductService(self.data.firebase, self.data.db)
-                    
-                    for item in items:
-                        try:
-                            product_id = item["id"]
-                            print(f"Excluindo produto {item['name']} (ID: {product_id})")
-                            product_service.delete_product(product_id)
-                        except Exception as e:
-                            print(f"Erro ao excluir produto {item.get('name', 'desconhecido')}: {e}")
-                else:
-                    items = group_service.get_residues_in_group(self.item["id"])
-                    print(f"Encontrados {len(items)} resíduos no grupo")
-                    
-                    # MODIFICAÇÃO: Excluir todos os resíduos do grupo
-                    print(f"Excluindo {len(items)} resíduos do grupo {self.item['name']}")
-                    from services.residue_service import ResidueService
-                    residue_service = ResidueService(self.data.firebase, self.data.db)
-                    
-                    for item in items:
-                        try:
-                            residue_id = item["id"]
-                            print(f"Excluindo resíduo {item['name']} (ID: {residue_id})")
-                            residue_service.delete_residue(residue_id)
-                        except Exception as e:
-                            print(f"Erro ao excluir resíduo {item.get('name', 'desconhecido')}: {e}")
-                
-                # Excluir o grupo
-                is_residue_group = not is_product_group
-                print(f"Chamando delete_group com id: {self.item['id']}, is_residue: {is_residue_group}")
-                success = self.data.delete_group(self.item["id"], is_product_group)  # Use o método do data_service
-                print(f"Resultado da exclusão do grupo: {success}")
-            
+        # Bloquear o botão até a exclusão terminar
+        button = e.control if e is not None else None
+        if button is not None:
+            button.disabled = True
+            self.navigation.page.update()
+        
+        def on_deleted(success):
             if success:
                 self.navigation.show_snack_bar(
                     f"{self.item_type.capitalize()} excluído com sucesso!",
                     ft.colors.GREEN_500
                 )
-                # Atualizar dados
-                self.data.refresh_data()
-                # Voltar para a tela anterior
-                self.navigation.go_back()
-                # Forçar atualização da interface
-                self.navigation.update_view()
+                # Voltar para a tela anterior (os dados já foram recarregados)
+                self.navigation.go_back(refresh=False)
             else:
+                if button is not None:
+                    button.disabled = False
                 self.navigation.show_snack_bar(
                     f"Erro ao excluir {self.item_type}. Tente novamente.",
                     ft.colors.RED_500
                 )
-        except Exception as e:
-            print(f"Erro ao confirmar exclusão: {e}")
-            import traceback
-            traceback.print_exc()
+        
+        def on_error(error):
+            logger.error("Erro ao confirmar exclusão: %s", error)
+            if button is not None:
+                button.disabled = False
             self.navigation.show_snack_bar(
-                f"Erro ao excluir: {str(e)}",
+                f"Erro ao excluir: {str(error)}",
                 ft.colors.RED_500
-            )
\ No newline at end of file
+            )
+        
+        self.navigation.tasks.submit(self._delete_item, on_done=on_deleted, on_error=on_error)
+    
+    def _delete_item(self):
+        """Exclui o item e recarrega os dados (executado fora da thread da interface)"""
+        success = False
+        if self.item_type == "product":
+            success = self.data.delete_product(self.item["id"])
+        elif self.item_type == "residue":
+            success = self.data.delete_residue(self.item["id"])
+        elif self.item_type == "group":
+            # Verificar se é grupo de produtos ou resíduos
+            group_type = self.item.get("group_type")
+            if group_type:
+                is_residue_group = group_type == "residue"
+            else:
+                residue_group_ids = {g["id"] for g in self.data.residue_groups}
+                is_residue_group = self.item["id"] in residue_group_ids
+            is_product_group = not is_residue_group
+            
+            print(f"ID do grupo: {self.item['id']}, is_residue_group: {is_residue_group}")
+            
+            # Excluir o grupo e todos os seus itens em uma única transação
+            success = self.data.delete_group(self.item["id"], is_product_group, delete_items=True)
+            print(f"Resultado da exclusão do grupo: {success}")
+        
+        # Atualizar dados (a exclusão de grupo já atualiza o cache)
+        if success and self.item_type != "group":
+            self.data.refresh_data()
+        return success
\ No newline at end of file
@@ -1,5 +1,5 @@
 import flet as ft
-import uuid
+from services.ids import new_id
 
 class CreateGroupScreen:
     """Tela para criar um novo grupo de produtos ou resíduos"""
@@ -146,7 +146,7 @@ class CreateGroupScreen:
                 return
             
             # Criar ID único para o grupo
-            group_id = f"{self.group_type}_{uuid.uuid4().hex[:8]}"
+            group_id = new_id(self.group_type)
             
             # Criar objeto do grupo
             group = {
@@ -159,8 +159,7 @@ class CreateGroupScreen:
             }
             
             # Salvar grupo no banco de dados
-            from services.group_service import GroupService
-            group_service = GroupService(self.data.firebase, self.data.db)
+            group_service = self.data.group_service
             
             if self.group_type == "product":
                 success = group_service.create_product_group(group)
@@ -169,8 +168,7 @@ class CreateGroupScreen:
             
             if success:
                 # Adicionar grupo ao dashboard
-                from services.card_config_service import CardConfigService
-                card_config_service = CardConfigService(self.data.firebase, self.data.db)
+                card_config_service = self.data.card_config_service
                 
                 if self.group_type == "product":
                     card_config_service.add_product_group_to_dashboard(group)
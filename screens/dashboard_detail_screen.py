@@ -1,4 +1,6 @@
 import flet as ft
+import uuid
+from collections.abc import Mapping
 from datetime import datetime
 
 class DashboardDetailScreen:
@@ -26,12 +28,12 @@ class DashboardDetailScreen:
                 return
             
             # Se for um grupo de produtos, buscar os produtos do grupo
-            if detail_type == "productGroup" and isinstance(items, dict) and "id" in items:
+            if detail_type == "productGroup" and isinstance(items, Mapping) and "id" in items:
                 group_id = items["id"]
                 print(f"set_data: buscando produtos do grupo {group_id}")
                 
                 try:
-                    products = self.data.group_service.get_products_in_group(group_id)
+                    products = self.data.get_products_in_group(group_id)
                     
                     # Verificar se a lista de produtos é válida
                     if isinstance(products, list):
@@ -45,7 +47,7 @@ class DashboardDetailScreen:
                     traceback.print_exc()
             
             # Se for um grupo de resíduos, buscar os resíduos do grupo
-            elif detail_type == "residueGroup" and isinstance(items, dict) and "id" in items:
+            elif detail_type == "residueGroup" and isinstance(items, Mapping) and "id" in items:
                 group_id = items["id"]
                 print(f"set_data: buscando resíduos do grupo {group_id}")
                 
@@ -130,7 +132,7 @@ class DashboardDetailScreen:
                 for item in self.items:
                     try:
                         # Verificar se o item é um dicionário antes de processá-lo
-                        if isinstance(item, dict):
+                        if isinstance(item, Mapping):
                             if is_product:
                                 items_list_items.append(self._build_product_item(item))
                             else:
@@ -223,7 +225,7 @@ class DashboardDetailScreen:
     def _build_product_item(self, product):
         """Constrói um item de produto para a lista"""
         # Verificar se product é um dicionário
-        if not isinstance(product, dict):
+        if not isinstance(product, Mapping):
             return ft.Container(
                 content=ft.Text(f"Erro: item inválido ({type(product).__name__})", color=ft.colors.RED),
                 padding=10,
@@ -382,6 +384,9 @@ class DashboardDetailScreen:
     
     def _register_product_exit(self, product):
         """Abre diálogo para registrar saída de produto"""
+        # Mesma chave para todas as confirmações deste diálogo (evita saída duplicada)
+        exit_key = uuid.uuid4().hex
+        
         def close_dialog():
             self.navigation.page.dialog.open = False
             self.navigation.page.update()
@@ -405,7 +410,7 @@ class DashboardDetailScreen:
                 
                 # Registrar saída
                 success, message = self.data.product_service.register_product_exit(
-                    product["id"], quantity, reason
+                    product["id"], quantity, reason, idempotency_key=exit_key
                 )
                 
                 close_dialog()
@@ -476,6 +481,9 @@ class DashboardDetailScreen:
     
     def _register_residue_exit(self, residue):
         """Abre diálogo para registrar saída de resíduo"""
+        # Mesma chave para todas as confirmações deste diálogo (evita saída duplicada)
+        exit_key = uuid.uuid4().hex
+        
         def close_dialog():
             self.navigation.page.dialog.open = False
             self.navigation.page.update()
@@ -500,7 +508,7 @@ class DashboardDetailScreen:
                 
                 # Registrar saída
                 success, message = self.data.residue_service.register_residue_exit(
-                    residue["id"], quantity, destination, notes
+                    residue["id"], quantity, destination, notes, idempotency_key=exit_key
                 )
                 
                 close_dialog()
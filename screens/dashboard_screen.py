@@ -1,6 +1,9 @@
 import flet as ft
+import logging
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 class DashboardScreen:
     def __init__(self, data, navigation):
         self.data = data
@@ -15,147 +18,28 @@ class DashboardScreen:
             current_date = datetime.now().strftime("%d/%m/%Y %H:%M")
             
             # Obter dados com segurança
-            stock_products = getattr(self.data, 'stock_products', []) or []
-            residues = getattr(self.data, 'residues', []) or []
             expiring_products = getattr(self.data, 'expiring_products', []) or []
             notifications = getattr(self.data, 'notifications', []) or []
             
-            # Debug para verificar os dados
-            print(f"Dashboard - Total de produtos: {len(stock_products)}")
-            print(f"Dashboard - Total de resíduos: {len(residues)}")
-            print(f"Dashboard - Produtos expirando: {len(expiring_products)}")
-            
-            # Obter grupos configurados para o dashboard
-            from services.card_config_service import CardConfigService
-            from services.group_service import GroupService
-            
-            card_config_service = CardConfigService(self.data.firebase, self.data.db)
-            group_service = GroupService(self.data.firebase, self.data.db)
-            
-            # Obter IDs dos grupos configurados para o dashboard
-            product_group_ids = card_config_service.get_dashboard_product_group_ids()
-            residue_group_ids = card_config_service.get_dashboard_residue_group_ids()
-            
-            # Obter informações dos grupos
-            product_groups = group_service.get_all_product_groups()
-            residue_groups = group_service.get_all_residue_groups()
-            
-            # Mapear grupos por ID para acesso rápido
-            product_groups_map = {g["id"]: g for g in product_groups}
-            residue_groups_map = {g["id"]: g for g in residue_groups}
-            
-            # Preparar dados dos grupos de produtos para o dashboard
-            dashboard_product_groups = {}
-            for group_id in product_group_ids:
-                if group_id in product_groups_map:
-                    group = product_groups_map[group_id]
-                    dashboard_product_groups[group_id] = {
-                        "name": group.get("name", ""),
-                        "quantity": 0,  # Inicializar com zero
-                        "products": [],
-                        "group_id": group_id,
-                        "group_data": group
-                    }
-
-            # Adicionar logs para depuração
-            print(f"Grupos de produtos inicializados: {len(dashboard_product_groups)}")
-            for group_id, group_data in dashboard_product_groups.items():
-                print(f"Grupo {group_id}: {group_data['name']}")
-
-            # Preencher dados dos produtos nos grupos
-            for product in stock_products:
-                group_id = product.get("group_id", "")
-                if group_id in dashboard_product_groups:
-                    # Adicionar produto ao grupo
-                    dashboard_product_groups[group_id]["products"].append(product)
-                    try:
-                        # Converter para inteiro antes de somar
-                        product_quantity = int(product.get("quantity", 0))
-                        dashboard_product_groups[group_id]["quantity"] += product_quantity
-                        print(f"Adicionado produto {product.get('name')} ao grupo {group_id}. Quantidade: {product_quantity}")
-                    except (ValueError, TypeError):
-                        print(f"Erro ao converter quantidade do produto {product.get('name')}: {product.get('quantity')}")
-                elif group_id:  # Se o produto tem um grupo_id, mas o grupo não está no dashboard
-                    print(f"Produto {product.get('name')} tem grupo_id {group_id}, mas este grupo não está configurado para o dashboard")
-
-            # Verificar os dados finais dos grupos
-            for group_id, group_data in dashboard_product_groups.items():
-                products = group_data.get("products", [])
-                total_quantity = group_data.get("quantity", 0)
-                print(f"Verificação final - Grupo {group_id}: {len(products)} produtos, quantidade total: {total_quantity}")
-                
-                # Verificar cada produto no grupo
-                for product in products:
-                    print(f"  - Produto no grupo {group_id}: {product.get('name')}, Quantidade: {product.get('quantity')}")
-            
-            # Cálculo de uso semanal
-            weekly_usage_total = 0
-            for p in stock_products:
-                try:
-                    usage = p.get("weeklyUsage", [0] * 7)
-                    if isinstance(usage, list):
-                        weekly_usage_total += sum(usage)
-                except Exception as e:
-                    print(f"Erro ao calcular uso semanal: {e}")
-            
-            # Estatísticas gerais - Garantir que são números inteiros
-            total_stock_quantity = 0
-            for p in stock_products:
-                try:
-                    total_stock_quantity += int(p.get("quantity", 0))
-                except (ValueError, TypeError):
-                    pass
-                    
-            total_residue_quantity = 0
-            for r in residues:
-                try:
-                    total_residue_quantity += int(r.get("quantity", 0))
-                except (ValueError, TypeError):
-                    pass
-
-            dashboard_residue_groups = {}
-            for group_id in residue_group_ids:
-                if group_id in residue_groups_map:
-                    group = residue_groups_map[group_id]
-                    dashboard_residue_groups[group_id] = {
-                        "name": group.get("name", ""),
-                        "quantity": 0,  # Inicializar com zero
-                        "residues": [],
-                        "group_id": group_id,
-                        "group_data": group
-                    }
-
-            # Preencher dados dos resíduos nos grupos
-            for residue in residues:
-                group_id = residue.get("group_id", "")
-                if group_id in dashboard_residue_groups:
-                    # Adicionar resíduo ao grupo
-                    dashboard_residue_groups[group_id]["residues"].append(residue)
-                    try:
-                        # Converter para inteiro antes de somar
-                        residue_quantity = int(residue.get("quantity", 0))
-                        dashboard_residue_groups[group_id]["quantity"] += residue_quantity
-                    except (ValueError, TypeError):
-                        print(f"Erro ao converter quantidade do resíduo {residue.get('name')}: {residue.get('quantity')}")
-                        pass
-
+            # Agregados dos cards calculados em uma única passagem (reaproveitados
+            # enquanto os dados em cache não mudarem)
+            view = self.data.get_dashboard_view()
             
-            print(f"Dashboard - Total estoque: {total_stock_quantity}")
-            print(f"Dashboard - Total resíduos: {total_residue_quantity}")
-            print(f"Dashboard - Uso semanal: {weekly_usage_total}")
+            # Uso dos últimos 7 dias, somado no banco
+            weekly_usage_total = self.data.get_total_usage(7)
             
             # Construir o dashboard
             return self._build_dashboard(
                 current_date,
-                dashboard_product_groups,
-                dashboard_residue_groups,
+                view["product_cards"],
+                view["residue_cards"],
                 weekly_usage_total,
                 expiring_products,
                 len(notifications),
-                total_stock_quantity,
-                total_residue_quantity,
-                product_groups,
-                residue_groups
+                view["total_stock"],
+                view["total_residues"],
+                self.data.product_groups,
+                self.data.residue_groups
             )
             
         except Exception as e:
@@ -397,47 +281,14 @@ class DashboardScreen:
         group_id = data.get("group_id", "")
         group_data = data.get("group_data", {})
         
-        # Obter produtos do grupo
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
-        products = group_service.get_products_in_group(group_id)
+        # Agregados calculados pelo view-model do dashboard
+        products = data.get("items", [])
+        low_stock_count = data.get("low_stock_count", 0)
+        total_quantity = data.get("quantity", 0)
+        expiring_soon = data.get("expiring_soon", [])
         
-        # Calcular estatísticas importantes
-        total_quantity = 0
-        total_value = 0
-        low_stock_count = 0
-        
-        for product in products:
-            try:
-                quantity = int(product.get('quantity', 0))
-                total_quantity += quantity
-                
-                # Verificar produtos com estoque baixo
-                min_stock = int(product.get('minStock', 0) or 0)
-                if min_stock > 0 and quantity <= min_stock:
-                    low_stock_count += 1
-                    
-            except (ValueError, TypeError):
-                pass
-        
-        # Ordenar produtos por data de validade
-        from datetime import datetime
-        
-        def parse_date(date_str):
-            try:
-                if not date_str:
-                    return datetime.max
-                return datetime.strptime(date_str, "%d/%m/%Y")
-            except Exception:
-                return datetime.max
-        
-        sorted_products = sorted(products, key=lambda p: parse_date(p.get("expiry", "")))
-        expiring_soon = sorted_products[:3]
-        
-        # Obter configuração do card
-        from services.card_config_service import CardConfigService
-        card_config_service = CardConfigService(self.data.firebase, self.data.db)
-        config = card_config_service.get_product_group_config(group_id)
+        # Obter configuração do card (já carregada junto com o layout do dashboard)
+        config = data.get("config") or self.data.card_config_service.get_product_group_config(group_id)
         
         # Obter ícone e cor
         icon_name = group_data.get("icon", config.get("icon", "INVENTORY_2_ROUNDED"))
@@ -537,7 +388,7 @@ class DashboardScreen:
                             ft.Row([
                                 ft.Container(
                                     content=ft.Text(
-                                        f"{(parse_date(p.get('expiry', '')) - datetime.now()).days}",
+                                        f"{days}",
                                         size=12, weight="bold", color="#FFFFFF"
                                     ),
                                     width=30, height=30,
@@ -564,7 +415,7 @@ class DashboardScreen:
                                     color="#505050",
                                 ),
                             ], spacing=8, alignment=ft.MainAxisAlignment.SPACE_BETWEEN) 
-                            for p in expiring_soon[:2]
+                            for p, days in expiring_soon[:2]
                         ] if expiring_soon else [
                             ft.Text("Nenhum produto próximo ao vencimento", size=12, color="#909090")
                         ],
@@ -608,45 +459,13 @@ class DashboardScreen:
         group_id = data.get("group_id", "")
         group_data = data.get("group_data", {})
         
-        # Obter resíduos do grupo
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
-        residues = group_service.get_residues_in_group(group_id)
-        
-        # Calcular estatísticas importantes
-        total_quantity = 0
-        total_value = 0
+        # Agregados calculados pelo view-model do dashboard
+        residues = data.get("items", [])
+        total_quantity = data.get("quantity", 0)
+        recent_residues = data.get("recent", [])
         
-        for residue in residues:
-            try:
-                quantity = int(residue.get('quantity', 0))
-                total_quantity += quantity
-                
-                # Calcular valor total (preço unitário * quantidade)
-                unit_price = float(residue.get('unitPrice', 0) or 0)
-                total_value += unit_price * quantity
-                    
-            except (ValueError, TypeError):
-                pass
-        
-        # Ordenar resíduos por data de entrada (do mais recente ao mais antigo)
-        from datetime import datetime
-        
-        def parse_date(date_str):
-            try:
-                if not date_str:
-                    return datetime.min
-                return datetime.strptime(date_str, "%d/%m/%Y")
-            except Exception:
-                return datetime.min
-        
-        sorted_residues = sorted(residues, key=lambda r: parse_date(r.get("entryDate", "")), reverse=True)
-        recent_residues = sorted_residues[:3]
-        
-        # Obter configuração do card
-        from services.card_config_service import CardConfigService
-        card_config_service = CardConfigService(self.data.firebase, self.data.db)
-        config = card_config_service.get_residue_group_config(group_id)
+        # Obter configuração do card (já carregada junto com o layout do dashboard)
+        config = data.get("config") or self.data.card_config_service.get_residue_group_config(group_id)
         
         # Obter ícone e cor
         icon_name = group_data.get("icon", config.get("icon", "DELETE_OUTLINE"))
@@ -962,42 +781,23 @@ class DashboardScreen:
             if not date_str:
                 return datetime.now() + timedelta(days=365)  # Data futura distante
             
-            # Adicionar log para verificar a conversão de data
-            print(f"Convertendo data: '{date_str}'")
-            date_obj = datetime.strptime(date_str, "%d/%m/%Y")
-            print(f"Data convertida: {date_obj}")
-            return date_obj
+            return datetime.strptime(date_str, "%d/%m/%Y")
         except Exception as e:
-            print(f"Erro ao converter data '{date_str}': {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Erro ao converter data '%s': %s", date_str, e)
             return datetime.now() + timedelta(days=365)  # Data futura distante em caso de erro
     
     def _delete_dashboard_card(self, card_type, group_id, group_name):
         """Exclui um card do dashboard imediatamente e mostra uma mensagem de confirmação"""
         try:
             # Usar o CardConfigService para remover o card do dashboard
-            from services.card_config_service import CardConfigService
-            card_config_service = CardConfigService(self.data.firebase, self.data.db)
+            card_config_service = self.data.card_config_service
             
             if card_type == "product":
-                # Obter os IDs dos grupos de produtos atuais
-                product_group_ids = card_config_service.get_dashboard_product_group_ids()
-                # Remover o ID do grupo
-                if group_id in product_group_ids:
-                    product_group_ids.remove(group_id)
-                    # Atualizar a configuração
-                    card_config_service.save_dashboard_product_group_ids(product_group_ids)
+                if card_config_service.remove_product_group_from_dashboard(group_id):
                     print(f"Card de produto '{group_name}' removido com sucesso")
             
             elif card_type == "residue":
-                # Obter os IDs dos grupos de resíduos atuais
-                residue_group_ids = card_config_service.get_dashboard_residue_group_ids()
-                # Remover o ID do grupo
-                if group_id in residue_group_ids:
-                    residue_group_ids.remove(group_id)
-                    # Atualizar a configuração
-                    card_config_service.save_dashboard_residue_group_ids(residue_group_ids)
+                if card_config_service.remove_residue_group_from_dashboard(group_id):
                     print(f"Card de resíduo '{group_name}' removido com sucesso")
             
             # Mostrar mensagem de confirmação
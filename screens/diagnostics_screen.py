@@ -0,0 +1,163 @@
+import flet as ft
+import logging
+
+from config.logging_config import get_recent_logs
+from services import instrumentation
+
+logger = logging.getLogger(__name__)
+
+class DiagnosticsScreen:
+    """Tela oculta de diagnóstico (pressione e segure "Diagnóstico" nas configurações)
+
+    Mostra as métricas de tempo coletadas pelo módulo de instrumentação e os
+    registros de log mais recentes.
+    """
+    
+    # Quantidade de linhas de log exibidas
+    LOG_LINES = 100
+    
+    def __init__(self, data, navigation):
+        self.data = data
+        self.navigation = navigation
+    
+    def build(self):
+        metrics = instrumentation.snapshot()
+        
+        if metrics:
+            metrics_view = ft.Row(
+                controls=[
+                    ft.DataTable(
+                        columns=[
+                            ft.DataColumn(ft.Text("Operação")),
+                            ft.DataColumn(ft.Text("Chamadas"), numeric=True),
+                            ft.DataColumn(ft.Text("Total (ms)"), numeric=True),
+                            ft.DataColumn(ft.Text("p50"), numeric=True),
+                            ft.DataColumn(ft.Text("p95"), numeric=True),
+                            ft.DataColumn(ft.Text("p99"), numeric=True),
+                            ft.DataColumn(ft.Text("Máx"), numeric=True),
+                            ft.DataColumn(ft.Text("Linhas"), numeric=True),
+                        ],
+                        rows=[self._build_metric_row(metric) for metric in metrics],
+                        column_spacing=20,
+                        data_row_min_height=32,
+                    )
+                ],
+                scroll=ft.ScrollMode.AUTO,
+            )
+        else:
+            metrics_view = ft.Text(
+                "Nenhuma métrica coletada" if instrumentation.is_enabled()
+                else "Ative a coleta para registrar os tempos de execução",
+                color=ft.colors.GREY_500
+            )
+        
+        logs = get_recent_logs(self.LOG_LINES)
+        log_view = ft.Column(
+            controls=[
+                ft.Text(line, size=11, font_family="monospace", selectable=True)
+                for line in reversed(logs)
+            ] if logs else [ft.Text("Nenhum registro de log", color=ft.colors.GREY_500)],
+            spacing=2,
+        )
+        
+        return ft.Container(
+            content=ft.Column(
+                controls=[
+                    # Cabeçalho
+                    ft.Container(
+                        content=ft.Row(
+                            controls=[
+                                ft.IconButton(
+                                    icon=ft.icons.ARROW_BACK,
+                                    on_click=lambda _: self.navigation.go_to_settings()
+                                ),
+                                ft.Text("Diagnóstico", size=20, weight="bold"),
+                                ft.IconButton(
+                                    icon=ft.icons.REFRESH,
+                                    tooltip="Atualizar",
+                                    on_click=lambda _: self.navigation.update_view()
+                                ),
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
+                        padding=10,
+                    ),
+                    
+                    ft.Container(
+                        content=ft.Column(
+                            controls=[
+                                ft.Switch(
+                                    label="Coletar métricas de desempenho",
+                                    value=instrumentation.is_enabled(),
+                                    on_change=lambda e: self._toggle_collection(e.control.value)
+                                ),
+                                ft.Row(
+                                    controls=[
+                                        ft.ElevatedButton(
+                                            "Zerar métricas",
+                                            icon=ft.icons.DELETE_SWEEP,
+                                            on_click=lambda _: self._reset_metrics()
+                                        ),
+                                        ft.ElevatedButton(
+                                            "Exportar JSON",
+                                            icon=ft.icons.SAVE_ALT,
+                                            on_click=lambda _: self._export_metrics()
+                                        ),
+                                    ],
+                                    spacing=10,
+                                ),
+                                
+                                ft.Divider(),
+                                ft.Text("Tempos de execução", size=16, weight="bold"),
+                                metrics_view,
+                                
+                                ft.Divider(),
+                                ft.Text("Logs recentes", size=16, weight="bold"),
+                                log_view,
+                            ],
+                            spacing=10,
+                            scroll=ft.ScrollMode.AUTO,
+                        ),
+                        padding=20,
+                        expand=True,
+                    ),
+                ],
+                spacing=0,
+                expand=True,
+            ),
+            expand=True,
+        )
+    
+    def _build_metric_row(self, metric):
+        """Constrói a linha da tabela de uma métrica"""
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(metric["name"], size=12)),
+                ft.DataCell(ft.Text(str(metric["count"]), size=12)),
+                ft.DataCell(ft.Text(f"{metric['total_ms']:.1f}", size=12)),
+                ft.DataCell(ft.Text(f"{metric['p50_ms']:.2f}", size=12)),
+                ft.DataCell(ft.Text(f"{metric['p95_ms']:.2f}", size=12)),
+                ft.DataCell(ft.Text(f"{metric['p99_ms']:.2f}", size=12)),
+                ft.DataCell(ft.Text(f"{metric['max_ms']:.2f}", size=12)),
+                ft.DataCell(ft.Text(str(metric["rows"]), size=12)),
+            ]
+        )
+    
+    def _toggle_collection(self, enabled):
+        """Liga ou desliga a coleta de métricas"""
+        instrumentation.enable(enabled)
+        self.navigation.update_view()
+    
+    def _reset_metrics(self):
+        """Descarta as métricas coletadas"""
+        instrumentation.reset()
+        self.navigation.update_view()
+    
+    def _export_metrics(self):
+        """Grava as métricas em JSON"""
+        try:
+            path = instrumentation.dump_json()
+            self.navigation.show_snack_bar(f"Métricas exportadas para {path}", ft.colors.GREEN_500)
+        except OSError as e:
+            logger.error("Erro ao exportar métricas: %s", e)
+            self.navigation.show_snack_bar("Erro ao exportar métricas", ft.colors.RED_500)
@@ -19,8 +19,7 @@ class EditCardScreen:
         )
         
         # Obter configuração atual do card
-        from services.card_config_service import CardConfigService
-        self.card_config_service = CardConfigService(self.data.firebase, self.data.db)
+        self.card_config_service = self.data.card_config_service
         
         if card_type == "product_group":
             self.config = self.card_config_service.get_product_group_config(self.group_id)
@@ -76,7 +76,16 @@ class EditGroupScreen:
             border_radius=8,
         )
         
+        # Valores iniciais do formulário, para não gravar (nem sincronizar) sem alterações
+        form_fields = [name_field, description_field, icon_dropdown, color_dropdown]
+        initial_values = [field.value for field in form_fields]
+        
         def update_group(_):
+            if [field.value for field in form_fields] == initial_values:
+                self.navigation.show_snack_bar("Nenhuma alteração para salvar")
+                self.navigation.go_back()
+                return
+            
             if not name_field.value:
                 self.navigation.show_snack_bar(
                     "O nome do grupo é obrigatório",
@@ -96,8 +105,7 @@ class EditGroupScreen:
             }
             
             # Atualizar grupo usando o serviço apropriado
-            from services.group_service import GroupService
-            group_service = GroupService(self.data.firebase, self.data.db)
+            group_service = self.data.group_service
             
             success = group_service.update_group(
                 self.group["id"], 
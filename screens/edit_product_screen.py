@@ -56,6 +56,14 @@ class EditProductScreen:
             border_radius=8,
         )
         
+        barcode_field = ft.TextField(
+            label="Código de Barras (EAN)",
+            value=self.data.product_service.get_product_barcode(self.product["id"]),
+            keyboard_type=ft.KeyboardType.NUMBER,
+            prefix_icon=ft.icons.QR_CODE_SCANNER,
+            border_radius=8,
+        )
+        
         group_info = ft.Container(
             content=ft.Row(
                 controls=[
@@ -69,7 +77,19 @@ class EditProductScreen:
             bgcolor=ft.colors.BLUE_50,
         )
         
+        # Valores iniciais do formulário, para não gravar (nem sincronizar) sem alterações
+        form_fields = [
+            name_field, quantity_field, lot_field, expiry_field,
+            fab_date_field, manufacturer_field, barcode_field
+        ]
+        initial_values = [field.value for field in form_fields]
+        
         def update_product(_):
+            if [field.value for field in form_fields] == initial_values:
+                self.navigation.show_snack_bar("Nenhuma alteração para salvar")
+                self.navigation.go_back()
+                return
+            
             if not all([
                 name_field.value, 
                 quantity_field.value, 
@@ -90,9 +110,9 @@ class EditProductScreen:
                 "expiry": expiry_field.value,
                 "fabDate": fab_date_field.value,
                 "manufacturer": manufacturer_field.value,
+                "barcode": barcode_field.value or "",
                 "entryDate": self.product["entryDate"],
                 "exitDate": self.product["exitDate"],
-                "weeklyUsage": self.product["weeklyUsage"],
                 "lastUpdateDate": datetime.now().strftime("%d/%m/%Y"),
                 "group_id": self.product.get("group_id", ""),
                 "group_name": self.product.get("group_name", "")
@@ -135,6 +155,7 @@ class EditProductScreen:
                                 expiry_field,
                                 fab_date_field,
                                 manufacturer_field,
+                                barcode_field,
                             ],
                             spacing=10,
                             scroll=ft.ScrollMode.AUTO,
@@ -20,8 +20,7 @@ class EditResidueScreen:
             )
         
         # Obter tipos de resíduos para o dropdown
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
+        group_service = self.data.group_service
         residue_groups = group_service.get_all_residue_groups()
         
         # Criar opções para o dropdown
@@ -83,7 +82,16 @@ class EditResidueScreen:
             border_radius=8,
         )
         
+        # Valores iniciais do formulário, para não gravar (nem sincronizar) sem alterações
+        form_fields = [name_field, type_dropdown, new_type_field, quantity_field, destination_field]
+        initial_values = [field.value for field in form_fields]
+        
         def update_residue(_):
+            if [field.value for field in form_fields] == initial_values:
+                self.navigation.show_snack_bar("Nenhuma alteração para salvar")
+                self.navigation.go_back()
+                return
+            
             if not all([
                 name_field.value, 
                 (type_dropdown.value and type_dropdown.value != "__new__") or (type_dropdown.value == "__new__" and new_type_field.value), 
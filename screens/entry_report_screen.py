@@ -2,6 +2,16 @@ import flet as ft
 from datetime import datetime, timedelta
 
 class EntryReportScreen:
+    # Quantidade de entradas carregadas por página
+    PAGE_SIZE = 100
+    
+    # Tipos de item incluídos em cada opção do filtro
+    KINDS_BY_FILTER = {
+        "all": ("product", "residue"),
+        "products": ("product",),
+        "residues": ("residue",),
+    }
+    
     def __init__(self, data, navigation):
         self.data = data
         self.navigation = navigation
@@ -9,6 +19,14 @@ class EntryReportScreen:
         self.filter_type = "all"  # Padrão: todos (produtos e resíduos)
         self.search_text = ""
         self.show_details = False  # Controla se mostra detalhes expandidos
+        # Entradas já carregadas, cursor da próxima página e controles da lista
+        self.entries = []
+        self.next_cursor = None
+        self._entries_list = None
+        self._load_more_control = None
+        self._date_headers = {}
+        self._last_date = None
+        self._total_entries = 0
     
     def build(self):
         # Filtros
@@ -62,55 +80,31 @@ class EntryReportScreen:
             on_click=self._toggle_details,
         )
         
-        # Obter dados de entradas
+        # Obter uma página de entradas (busca e tipo filtrados no banco)
         days = int(self.filter_days)
-        entries = self._get_entries(days, self.filter_type)
+        kinds = self.KINDS_BY_FILTER.get(self.filter_type, self.KINDS_BY_FILTER["all"])
+        search = self.search_text if self.search_text else None
         
-        # Filtrar por texto de busca
-        if self.search_text:
-            search_lower = self.search_text.lower()
-            entries = [
-                entry for entry in entries
-                if search_lower in entry.get("name", "").lower()
-            ]
-        
-        # Agrupar entradas por data
-        grouped_entries = self._group_by_date(entries)
+        # Recarrega a partir do início as páginas já exibidas (ao menos uma)
+        page, self.next_cursor = self.data.get_stock_movement_page(
+            kinds, "entry", days, search, limit=max(self.PAGE_SIZE, len(self.entries))
+        )
+        entries = self.entries = [self._to_entry(movement) for movement in page]
+        summary = self.data.get_stock_movement_summary(kinds, "entry", days, search)
+        self._total_entries = summary["count"]
         
-        # Construir lista de entradas
+        # Construir lista de entradas, agrupadas por data (a página já vem ordenada)
         entry_items = []
+        self._date_headers = {}
+        self._last_date = None
         
-        if grouped_entries:
-            for date, date_entries in grouped_entries.items():
-                # Cabeçalho da data
-                entry_items.append(
-                    ft.Container(
-                        content=ft.Row(
-                            [
-                                ft.Icon(ft.icons.CALENDAR_TODAY, size=20, color=ft.colors.BLUE_500),
-                                ft.Text(
-                                    date,
-                                    size=16,
-                                    weight="bold",
-                                    color=ft.colors.BLUE_500,
-                                ),
-                                ft.Text(
-                                    f"({len(date_entries)} entradas)",
-                                    size=12,
-                                    color=ft.colors.GREY_700,
-                                ),
-                            ],
-                            spacing=10,
-                        ),
-                        padding=ft.padding.only(left=10, top=15, bottom=5),
-                        margin=ft.margin.only(top=10),
-                        border=ft.border.only(bottom=ft.BorderSide(1, ft.colors.BLUE_500)),
-                    )
-                )
-                
-                # Entradas da data
-                for entry in date_entries:
-                    entry_items.append(self._build_entry_item(entry))
+        if entries:
+            self._append_entry_items(entry_items, entries)
+            
+            # Botão para carregar a próxima página
+            self._load_more_control = self._build_load_more()
+            if self._load_more_control:
+                entry_items.append(self._load_more_control)
         else:
             entry_items.append(
                 ft.Container(
@@ -129,8 +123,8 @@ class EntryReportScreen:
             )
         
         # Estatísticas
-        total_entries = len(entries)
-        total_quantity = sum(entry.get("quantity", 0) for entry in entries)
+        total_entries = summary["count"]
+        total_quantity = summary["quantity"]
         
         stats_row = ft.Container(
             content=ft.Row(
@@ -164,7 +158,7 @@ class EntryReportScreen:
             entry_chart = self._build_entry_chart(entries)
         
         # Lista de entradas
-        entries_list = ft.ListView(
+        entries_list = self._entries_list = ft.ListView(
             controls=entry_items,
             spacing=10,
             padding=10,
@@ -235,138 +229,116 @@ class EntryReportScreen:
     def _on_days_filter_change(self, e):
         """Atualiza o filtro de dias"""
         self.filter_days = e.control.value
+        self.entries = []
         self.navigation.update_view()
     
     def _on_type_filter_change(self, e):
         """Atualiza o filtro de tipo"""
         self.filter_type = e.control.value
+        self.entries = []
         self.navigation.update_view()
     
     def _on_search_change(self, e):
         """Atualiza o texto de busca"""
         self.search_text = e.control.value
+        self.entries = []
         self.navigation.update_view()
     
+    def _load_more(self, e):
+        """Acrescenta a próxima página de entradas à lista, a partir do cursor da anterior"""
+        if not self.next_cursor or self._entries_list is None:
+            return
+        kinds = self.KINDS_BY_FILTER.get(self.filter_type, self.KINDS_BY_FILTER["all"])
+        page, self.next_cursor = self.data.get_stock_movement_page(
+            kinds, "entry", int(self.filter_days), self.search_text if self.search_text else None,
+            limit=self.PAGE_SIZE, before=self.next_cursor
+        )
+        entries = [self._to_entry(movement) for movement in page]
+        self.entries.extend(entries)
+        
+        controls = self._entries_list.controls
+        if self._load_more_control in controls:
+            controls.remove(self._load_more_control)
+        self._append_entry_items(controls, entries)
+        self._load_more_control = self._build_load_more()
+        if self._load_more_control:
+            controls.append(self._load_more_control)
+        self.navigation.page.update()
+    
+    def _build_load_more(self):
+        """Botão "Carregar mais", ou None se não há próxima página"""
+        if not self.next_cursor:
+            return None
+        return ft.Container(
+            content=ft.TextButton(
+                f"Carregar mais ({len(self.entries)} de {self._total_entries})",
+                icon=ft.icons.EXPAND_MORE,
+                on_click=self._load_more,
+            ),
+            alignment=ft.alignment.center,
+        )
+    
+    def _append_entry_items(self, items, entries):
+        """Acrescenta as entradas, com um cabeçalho a cada nova data
+        
+        Se a página continua uma data já exibida, apenas a contagem do
+        cabeçalho dessa data é atualizada.
+        """
+        for entry in entries:
+            date = entry.get("date", "Data desconhecida")
+            if date != self._last_date:
+                self._last_date = date
+                if date not in self._date_headers:
+                    count_text = ft.Text("", size=12, color=ft.colors.GREY_700)
+                    self._date_headers[date] = [count_text, 0]
+                    items.append(self._build_date_header(date, count_text))
+            header = self._date_headers[date]
+            header[1] += 1
+            header[0].value = f"({header[1]} entradas)"
+            items.append(self._build_entry_item(entry))
+    
+    def _build_date_header(self, date, count_text):
+        """Cabeçalho de uma data da lista de entradas"""
+        return ft.Container(
+            content=ft.Row(
+                [
+                    ft.Icon(ft.icons.CALENDAR_TODAY, size=20, color=ft.colors.BLUE_500),
+                    ft.Text(
+                        date,
+                        size=16,
+                        weight="bold",
+                        color=ft.colors.BLUE_500,
+                    ),
+                    count_text,
+                ],
+                spacing=10,
+            ),
+            padding=ft.padding.only(left=10, top=15, bottom=5),
+            margin=ft.margin.only(top=10),
+            border=ft.border.only(bottom=ft.BorderSide(1, ft.colors.BLUE_500)),
+        )
+    
     def _toggle_details(self, e):
         """Alterna a exibição de detalhes"""
         self.show_details = not self.show_details
         self.navigation.update_view()
     
     def _get_entries(self, days, entry_type):
-        """Obtém as entradas de acordo com os filtros"""
-        entries = []
-        
-        # Calcular data limite
-        cutoff_date = datetime.now() - timedelta(days=days)
-        cutoff_timestamp = cutoff_date.timestamp()
-        
-        # Obter entradas de produtos
-        if entry_type in ["all", "products"]:
-            product_entries = self._get_product_entries(cutoff_timestamp)
-            entries.extend(product_entries)
-        
-        # Obter entradas de resíduos
-        if entry_type in ["all", "residues"]:
-            residue_entries = self._get_residue_entries(cutoff_timestamp)
-            entries.extend(residue_entries)
-        
-        # Ordenar por data (mais recente primeiro)
-        entries.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
-        
-        return entries
-    
-    def _get_product_entries(self, cutoff_timestamp):
-        """Obtém entradas de produtos"""
-        try:
-            cursor = self.data.db.conn.cursor()
-            cursor.execute('''
-            SELECT * FROM product_history 
-            WHERE type = 'entry' AND timestamp >= ? 
-            ORDER BY timestamp DESC
-            ''', (cutoff_timestamp,))
-            
-            results = cursor.fetchall()
-            entries = []
-            
-            for row in results:
-                try:
-                    entry = {
-                        "id": row[0],
-                        "itemId": row[1],
-                        "name": row[2],
-                        "quantity": row[3],
-                        "reason": row[4],
-                        "date": row[5],
-                        "timestamp": row[6],
-                        "type": "product",
-                        "icon": ft.icons.INVENTORY_2_ROUNDED,
-                        "color": ft.colors.BLUE_500
-                    }
-                    entries.append(entry)
-                except Exception as e:
-                    print(f"Erro ao processar entrada de produto: {e}")
-                    continue
-            
-            return entries
-        except Exception as e:
-            print(f"Erro ao buscar entradas de produtos: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
-    
-    def _get_residue_entries(self, cutoff_timestamp):
-        """Obtém entradas de resíduos"""
-        try:
-            cursor = self.data.db.conn.cursor()
-            cursor.execute('''
-            SELECT * FROM residue_history 
-            WHERE type = 'entry' AND timestamp >= ? 
-            ORDER BY timestamp DESC
-            ''', (cutoff_timestamp,))
-            
-            results = cursor.fetchall()
-            entries = []
-            
-            for row in results:
-                try:
-                    entry = {
-                        "id": row[0],
-                        "itemId": row[1],
-                        "name": row[2],
-                        "quantity": row[3],
-                        "reason": row[4],
-                        "date": row[5],
-                        "timestamp": row[6],
-                        "type": "residue",
-                        "icon": ft.icons.DELETE_OUTLINE,
-                        "color": ft.colors.PURPLE_500
-                    }
-                    entries.append(entry)
-                except Exception as e:
-                    print(f"Erro ao processar entrada de resíduo: {e}")
-                    continue
-            
-            return entries
-        except Exception as e:
-            print(f"Erro ao buscar entradas de resíduos: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+        """Percorre as entradas de acordo com os filtros, da mais recente para a mais antiga"""
+        kinds = self.KINDS_BY_FILTER.get(entry_type, self.KINDS_BY_FILTER["all"])
+        movements = self.data.iter_stock_movements(
+            kinds, "entry", days, self.search_text if self.search_text else None
+        )
+        return (self._to_entry(movement) for movement in movements)
     
-    def _group_by_date(self, entries):
-        """Agrupa entradas por data"""
-        grouped = {}
-        
-        for entry in entries:
-            date = entry.get("date", "Data desconhecida")
-            
-            if date not in grouped:
-                grouped[date] = []
-            
-            grouped[date].append(entry)
-        
-        # Ordenar datas (mais recente primeiro)
-        return dict(sorted(grouped.items(), key=lambda x: self._parse_date(x[0]), reverse=True))
+    def _to_entry(self, movement):
+        """Converte uma movimentação de estoque em uma entrada do relatório"""
+        is_product = movement["kind"] == "product"
+        entry = dict(movement)
+        entry["type"] = movement["kind"]
+        entry["icon"] = ft.icons.INVENTORY_2_ROUNDED if is_product else ft.icons.DELETE_OUTLINE
+        entry["color"] = ft.colors.BLUE_500 if is_product else ft.colors.PURPLE_500
+        return entry
     
     def _parse_date(self, date_str):
         """Converte string de data para objeto datetime"""
@@ -553,18 +525,10 @@ class EntryReportScreen:
             # Nome do arquivo com timestamp
             filename = f"reports/entry_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
             
-            # Obter dados para o relatório
+            # Entradas lidas do banco sob demanda
             days = int(self.filter_days)
             entries = self._get_entries(days, self.filter_type)
             
-            # Filtrar por texto de busca
-            if self.search_text:
-                search_lower = self.search_text.lower()
-                entries = [
-                    entry for entry in entries
-                    if search_lower in entry.get("name", "").lower()
-                ]
-            
             # Escrever arquivo CSV
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
@@ -598,119 +562,43 @@ class EntryReportScreen:
     def _print_report(self, e):
         """Prepara o relatório para impressão"""
         try:
-            import tempfile
-            import webbrowser
-            import os
-            from datetime import datetime
+            from services.report_renderer import ReportRenderer
             
-            # Obter dados para o relatório
+            # Estatísticas calculadas no banco e entradas lidas sob demanda
             days = int(self.filter_days)
+            kinds = self.KINDS_BY_FILTER.get(self.filter_type, self.KINDS_BY_FILTER["all"])
+            summary = self.data.get_stock_movement_summary(
+                kinds, "entry", days, self.search_text if self.search_text else None
+            )
             entries = self._get_entries(days, self.filter_type)
             
-            # Filtrar por texto de busca
-            if self.search_text:
-                search_lower = self.search_text.lower()
-                entries = [
-                    entry for entry in entries
-                    if search_lower in entry.get("name", "").lower()
-                ]
-            
-            # Agrupar por data
-            grouped_entries = self._group_by_date(entries)
-            
-            # Calcular estatísticas
-            total_entries = len(entries)
-            total_quantity = sum(entry.get("quantity", 0) for entry in entries)
+            total_entries = summary["count"]
+            total_quantity = summary["quantity"]
             avg_per_entry = round(total_quantity / total_entries, 1) if total_entries > 0 else 0
             
-            # Criar arquivo HTML temporário
-            fd, path = tempfile.mkstemp(suffix='.html')
+            type_filter = self.filter_type.capitalize() if self.filter_type != "all" else "Todos"
+            subtitles = [
+                f"Período: Últimos {days} dias • Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+                f"Tipo: {type_filter}" + (f" • Busca: {self.search_text}" if self.search_text else "")
+            ]
             
-            with os.fdopen(fd, 'w') as tmp:
-                # Escrever cabeçalho HTML
-                tmp.write(f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <title>Relatório de Entradas</title>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                        .header {{ text-align: center; margin-bottom: 20px; }}
-                        .stats {{ display: flex; justify-content: space-between; margin-bottom: 20px; }}
-                        .stat-card {{ border: 1px solid #ddd; padding: 10px; text-align: center; width: 30%; }}
-                        .date-header {{ background-color: #f2f2f2; padding: 10px; margin-top: 20px; }}
-                        .entry-item {{ border: 1px solid #ddd; padding: 10px; margin-bottom: 5px; }}
-                        .product {{ border-left: 5px solid #2196F3; }}
-                        .residue {{ border-left: 5px solid #9C27B0; }}
-                        .footer {{ text-align: center; margin-top: 30px; font-size: 12px; color: #777; }}
-                        @media print {{
-                            .no-print {{ display: none; }}
-                            button {{ display: none; }}
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="header">
-                        <h1>Relatório de Entradas</h1>
-                        <p>Período: Últimos {days} dias • Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-                        <p>Tipo: {self.filter_type.capitalize() if self.filter_type != "all" else "Todos"} 
-                           {f"• Busca: {self.search_text}" if self.search_text else ""}</p>
-                    </div>
-                    
-                    <div class="no-print">
-                        <button onclick="window.print()">Imprimir</button>
-                        <button onclick="window.close()">Fechar</button>
-                    </div>
-                    
-                    <div class="stats">
-                        <div class="stat-card">
-                            <h3>Total de Entradas</h3>
-                            <p>{total_entries}</p>
-                        </div>
-                        <div class="stat-card">
-                            <h3>Quantidade Total</h3>
-                            <p>{total_quantity}</p>
-                        </div>
-                        <div class="stat-card">
-                            <h3>Média por Entrada</h3>
-                            <p>{avg_per_entry}</p>
-                        </div>
-                    </div>
-                ''')
-                
-                # Adicionar entradas agrupadas por data
-                for date, date_entries in grouped_entries.items():
-                    tmp.write(f'''
-                    <div class="date-header">
-                        <h2>{date} ({len(date_entries)} entradas)</h2>
-                    </div>
-                    ''')
-                    
-                    for entry in date_entries:
-                        # Definir classe CSS com base no tipo
-                        css_class = "product" if entry.get("type") == "product" else "residue"
-                        type_text = "Produto" if entry.get("type") == "product" else "Resíduo"
-                        
-                        tmp.write(f'''
-                        <div class="entry-item {css_class}">
-                            <h3>{entry.get("name", "")}</h3>
-                            <p>Quantidade: {entry.get("quantity", 0)} • Tipo: {type_text}</p>
-                            <p>Motivo: {entry.get("reason", "Entrada no estoque")}</p>
-                        </div>
-                        ''')
+            with ReportRenderer("Relatório de Entradas", subtitles, rows_per_page=200) as report:
+                report.write_stats([
+                    ("Total de Entradas", total_entries),
+                    ("Quantidade Total", total_quantity),
+                    ("Média por Entrada", avg_per_entry),
+                ])
                 
-                # Escrever rodapé HTML
-                tmp.write(f'''
-                    <div class="footer">
-                        <p>Relatório gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-                    </div>
-                </body>
-                </html>
-                ''')
+                # Entradas agrupadas por data (já ordenadas por timestamp)
+                report.write_grouped_items(
+                    entries,
+                    lambda entry: entry.get("date") or "Data desconhecida",
+                    lambda date, count: f"{date} ({count} entradas)",
+                    self._render_print_item
+                )
             
             # Abrir o arquivo no navegador
-            webbrowser.open('file://' + path)
+            report.open_in_browser()
             
             self.navigation.show_snack_bar(
                 "Relatório aberto no navegador para impressão",
@@ -723,4 +611,13 @@ class EntryReportScreen:
             self.navigation.show_snack_bar(
                 f"Erro ao preparar relatório: {str(e)}",
                 ft.colors.RED_500
-            )
\ No newline at end of file
+            )
+    
+    def _render_print_item(self, entry):
+        """Converte uma entrada em um item do relatório impresso"""
+        is_product = entry.get("type") == "product"
+        
+        return "product" if is_product else "residue", entry.get("name", ""), [
+            f"Quantidade: {entry.get('quantity', 0)} • Tipo: {'Produto' if is_product else 'Resíduo'}",
+            f"Motivo: {entry.get('reason') or 'Entrada no estoque'}",
+        ]
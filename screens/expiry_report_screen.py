@@ -559,10 +559,7 @@ class ExpiryReportScreen:
     def _print_report(self, e):
         """Prepara o relatório para impressão"""
         try:
-            import tempfile
-            import webbrowser
-            import os
-            from datetime import datetime
+            from services.report_renderer import ReportRenderer
             
             # Obter dados para o relatório
             days = int(self.filter_days)
@@ -588,128 +585,28 @@ class ExpiryReportScreen:
             total_value = sum(p.get("value", 0) * p.get("quantity", 0) for p in expiring_products)
             critical_products = [p for p in expiring_products if self._days_until_expiry(p) <= 7]
             
-            # Criar arquivo HTML temporário
-            fd, path = tempfile.mkstemp(suffix='.html')
+            subtitles = [
+                f"Período: Próximos {days} dias • Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+                f"Filtro: {self.search_text}" if self.search_text else ""
+            ]
             
-            with os.fdopen(fd, 'w') as tmp:
-                # Escrever cabeçalho HTML
-                tmp.write(f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <title>Relatório de Validade</title>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                        .header {{ text-align: center; margin-bottom: 20px; }}
-                        .stats {{ display: flex; justify-content: space-between; margin-bottom: 20px; }}
-                        .stat-card {{ border: 1px solid #ddd; padding: 10px; text-align: center; width: 30%; }}
-                        .chart {{ margin: 20px 0; text-align: center; }}
-                        .chart-bar {{ display: inline-block; margin: 0 5px; text-align: center; }}
-                        .bar {{ background-color: #FF9800; border-radius: 5px 5px 0 0; }}
-                        .product-item {{ border: 1px solid #ddd; padding: 10px; margin-bottom: 10px; }}
-                        .critical {{ border-left: 5px solid #F44336; }}
-                        .warning {{ border-left: 5px solid #FF9800; }}
-                        .normal {{ border-left: 5px solid #4CAF50; }}
-                        .footer {{ text-align: center; margin-top: 30px; font-size: 12px; color: #777; }}
-                        @media print {{
-                            .no-print {{ display: none; }}
-                            button {{ display: none; }}
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="header">
-                        <h1>Relatório de Validade</h1>
-                        <p>Período: Próximos {days} dias • Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-                        {f"<p>Filtro: {self.search_text}</p>" if self.search_text else ""}
-                    </div>
-                    
-                    <div class="no-print">
-                        <button onclick="window.print()">Imprimir</button>
-                        <button onclick="window.close()">Fechar</button>
-                    </div>
-                    
-                    <div class="stats">
-                        <div class="stat-card">
-                            <h3>Vencendo em {days} dias</h3>
-                            <p>{total_expiring}</p>
-                        </div>
-                        <div class="stat-card">
-                            <h3>Críticos (7 dias)</h3>
-                            <p>{len(critical_products)}</p>
-                        </div>
-                        <div class="stat-card">
-                            <h3>Valor Total</h3>
-                            <p>R$ {total_value:.2f}</p>
-                        </div>
-                    </div>
-                    
-                    <div class="chart">
-                        <h2>Distribuição por Mês de Vencimento</h2>
-                ''')
-                
-                # Adicionar gráfico de barras
-                max_count = max(group["count"] for group in expiry_groups) if expiry_groups else 0
-                
-                for group in expiry_groups:
-                    # Calcular altura relativa da barra (máximo 100px)
-                    height = int((group["count"] / max_count) * 100) if max_count > 0 else 0
-                    
-                    tmp.write(f'''
-                    <div class="chart-bar">
-                        <div class="bar" style="height: {max(height, 20)}px; width: 40px;">{group["count"]}</div>
-                        <div>{group["name"]}</div>
-                    </div>
-                    ''')
-                
-                tmp.write('</div>')  # Fechar div do gráfico
-                
-                # Adicionar lista de produtos
-                tmp.write('<h2>Produtos por Data de Validade</h2>')
+            with ReportRenderer("Relatório de Validade", subtitles, rows_per_page=200) as report:
+                report.write_stats([
+                    (f"Vencendo em {days} dias", total_expiring),
+                    ("Críticos (7 dias)", len(critical_products)),
+                    ("Valor Total", f"R$ {total_value:.2f}"),
+                ])
                 
-                for product in sorted_products:
-                    # Calcular dias até o vencimento
-                    days_remaining = "N/A"
-                    css_class = "normal"
-                    
-                    try:
-                        expiry_date = datetime.strptime(product["expiry"], "%d/%m/%Y")
-                        days = (expiry_date - datetime.now()).days
-                        days_remaining = days
-                        
-                        if days <= 7:
-                            css_class = "critical"
-                        elif days <= 30:
-                            css_class = "warning"
-                    except:
-                        pass
-                    
-                    # Calcular valor total
-                    value = product.get("value", 0)
-                    quantity = product.get("quantity", 0)
-                    total_value = value * quantity
-                    
-                    tmp.write(f'''
-                    <div class="product-item {css_class}">
-                        <h3>{product.get("name", "")}</h3>
-                        <p>Lote: {product.get("lot", "N/A")} • Quantidade: {product.get("quantity", 0)}</p>
-                        <p>Validade: {product.get("expiry", "N/A")} • Dias restantes: {days_remaining}</p>
-                        <p>Grupo: {product.get("group_name", "N/A")} • Valor total: R$ {total_value:.2f}</p>
-                    </div>
-                    ''')
+                report.write_bar_chart(
+                    "Distribuição por Mês de Vencimento",
+                    [(group["name"], group["count"]) for group in expiry_groups]
+                )
                 
-                # Escrever rodapé HTML
-                tmp.write(f'''
-                    <div class="footer">
-                        <p>Relatório gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-                    </div>
-                </body>
-                </html>
-                ''')
+                report.write_section("Produtos por Data de Validade")
+                report.write_items(sorted_products, self._render_print_item)
             
             # Abrir o arquivo no navegador
-            webbrowser.open('file://' + path)
+            report.open_in_browser()
             
             self.navigation.show_snack_bar(
                 "Relatório aberto no navegador para impressão",
@@ -722,4 +619,28 @@ class ExpiryReportScreen:
             self.navigation.show_snack_bar(
                 f"Erro ao preparar relatório: {str(e)}",
                 ft.colors.RED_500
-            )
\ No newline at end of file
+            )
+    
+    def _render_print_item(self, product):
+        """Converte um produto em um item do relatório impresso"""
+        days_remaining = "N/A"
+        css_class = "normal"
+        
+        try:
+            expiry_date = datetime.strptime(product["expiry"], "%d/%m/%Y")
+            days_remaining = (expiry_date - datetime.now()).days
+            
+            if days_remaining <= 7:
+                css_class = "critical"
+            elif days_remaining <= 30:
+                css_class = "warning"
+        except:
+            pass
+        
+        total_value = product.get("value", 0) * product.get("quantity", 0)
+        
+        return css_class, product.get("name", ""), [
+            f"Lote: {product.get('lot', 'N/A')} • Quantidade: {product.get('quantity', 0)}",
+            f"Validade: {product.get('expiry', 'N/A')} • Dias restantes: {days_remaining}",
+            f"Grupo: {product.get('group_name', 'N/A')} • Valor total: R$ {total_value:.2f}",
+        ]
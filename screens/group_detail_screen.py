@@ -48,11 +48,10 @@ class GroupDetailScreen:
             )
         
         # Obter itens do grupo
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
+        group_service = self.data.group_service
         
         if self.is_product_group:
-            items = group_service.get_products_in_group(self.group["id"])
+            items = self.data.get_products_in_group(self.group["id"])
         else:
             items = group_service.get_residues_in_group(self.group["id"])  
         
@@ -335,23 +334,8 @@ class GroupDetailScreen:
         product_expiry = product.get("expiry", "N/A")
         product_entry_date = product.get("entryDate", "N/A")
         
-        # Calcular uso semanal total
-        weekly_usage = product.get("weeklyUsage", [0] * 7)
-        weekly_usage_total = 0
-        
-        # Garantir que weekly_usage seja uma lista
-        if not isinstance(weekly_usage, list):
-            weekly_usage = [0] * 7
-        
-        # Calcular o total
-        for usage in weekly_usage:
-            try:
-                if isinstance(usage, str) and usage.isdigit():
-                    weekly_usage_total += int(usage)
-                elif isinstance(usage, (int, float)):
-                    weekly_usage_total += usage
-            except (ValueError, TypeError):
-                continue
+        # Uso dos últimos 7 dias (totais calculados uma vez por atualização)
+        weekly_usage_total = self.data.get_product_usage(product.get("id"), 7)
         
         # Calcular dias até o vencimento
         days_left = None
@@ -646,8 +630,7 @@ class GroupDetailScreen:
             updated_group["color"] = color_dropdown.value
             
             # Salvar grupo
-            from services.group_service import GroupService
-            group_service = GroupService(self.data.firebase, self.data.db)
+            group_service = self.data.group_service
             success = group_service.update_group(
                 self.group["id"], 
                 updated_group, 
@@ -824,18 +807,11 @@ class GroupDetailScreen:
             self.navigation.page.dialog.open = False
             self.navigation.page.update()
         
-        # Preparar dados de uso semanal
-        weekly_usage = product.get("weeklyUsage", [0] * 7)
-        if not isinstance(weekly_usage, list):
-            weekly_usage = [0] * 7
-
-        while len(weekly_usage) < 7:
-            weekly_usage.append(0)
-
-        weekly_usage = weekly_usage[:7]
+        # Preparar dados de uso semanal (derivados da série temporal)
+        weekly_usage = self.data.get_weekly_usage(product.get("id"))
 
         days = ["Domingo", "Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado"]
-        weekly_usage_total = sum([int(u) if isinstance(u, str) and u.isdigit() else u if isinstance(u, (int, float)) else 0 for u in weekly_usage])
+        weekly_usage_total = sum(weekly_usage)
 
         # Obter informações do produto
         product_name = product.get("name", "Sem nome")
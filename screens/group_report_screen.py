@@ -12,8 +12,7 @@ class GroupReportScreen:
     
     def build(self):
         # Obter grupos de produtos ou resíduos
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
+        group_service = self.data.group_service
         
         if self.group_type == "product":
             groups = group_service.get_all_product_groups()
@@ -84,10 +83,15 @@ class GroupReportScreen:
         # Construir cards de grupos
         group_cards = []
         
+        # Conjuntos de IDs para classificar os produtos sem buscas lineares
+        if self.group_type == "product":
+            expiring_ids = {p["id"] for p in self.data.expiring_products}
+            low_stock_ids = {p["id"] for p in self.data.low_stock_products}
+        
         for group in groups:
             # Obter itens deste grupo
             if self.group_type == "product":
-                items = group_service.get_products_in_group(group["id"])
+                items = self.data.get_products_in_group(group["id"])
             else:
                 items = group_service.get_residues_by_group(group["id"])
             
@@ -95,10 +99,10 @@ class GroupReportScreen:
                 # Calcular estatísticas do grupo
                 if self.group_type == "product":
                     # Estatísticas para produtos
-                    total_quantity = sum(p.get("quantity", 0) for p in items)
+                    total_quantity = self.data.get_group_totals(group["id"])["quantity"]
                     total_value = sum(p.get("value", 0) * p.get("quantity", 0) for p in items)
-                    expiring_count = len([p for p in items if p in self.data.expiring_products])
-                    low_stock_count = len([p for p in items if p in self.data.low_stock_products])
+                    expiring_count = sum(1 for p in items if p["id"] in expiring_ids)
+                    low_stock_count = sum(1 for p in items if p["id"] in low_stock_ids)
                     
                     # Calcular uso no período selecionado
                     period_days = int(self.selected_period)
@@ -141,8 +145,9 @@ class GroupReportScreen:
         # Estatísticas gerais
         stats_row = None
         if self.group_type == "product":
-            total_products = sum(len(group_service.get_products_in_group(g["id"])) for g in groups)
-            total_stock = sum(sum(p.get("quantity", 0) for p in group_service.get_products_in_group(g["id"])) for g in groups)
+            group_totals = [self.data.get_group_totals(g["id"]) for g in groups]
+            total_products = sum(totals["count"] for totals in group_totals)
+            total_stock = sum(totals["quantity"] for totals in group_totals)
             total_groups = len(groups)
             
             stats_row = ft.Container(
@@ -279,15 +284,12 @@ class GroupReportScreen:
     def _calculate_group_usage(self, products, period_days):
         """Calcula o uso de produtos de um grupo no período especificado"""
         try:
-            # Obter histórico de movimentação
-            history = self.data.get_product_movement_history(days=period_days)
-            
-            # Filtrar para produtos deste grupo
+            # Totais do período lidos da consolidação diária
             product_ids = [p["id"] for p in products]
-            group_history = [h for h in history if h["productId"] in product_ids]
+            totals = self.data.get_item_movement_totals(product_ids, days=period_days)
             
             # Calcular uso total
-            total_usage = sum(h["quantity"] for h in group_history if h["type"] == "exit")
+            total_usage = totals["exit"]
             
             # Calcular uso médio diário
             avg_daily_usage = total_usage / period_days if period_days > 0 else 0
@@ -314,32 +316,12 @@ class GroupReportScreen:
     def _calculate_residue_movement(self, residues, period_days):
         """Calcula a movimentação de resíduos de um grupo no período especificado"""
         try:
-            # Obter histórico de movimentação
-            cursor = self.data.db.conn.cursor()
-            
-            # Calcular data limite
-            cutoff_date = datetime.now() - timedelta(days=period_days)
-            cutoff_timestamp = cutoff_date.timestamp()
-            
-            # Obter IDs dos resíduos
+            # Totais do período lidos da consolidação diária
             residue_ids = [r["id"] for r in residues]
-            residue_ids_str = ",".join(f"'{rid}'" for rid in residue_ids)
-            
-            # Consultar entradas
-            cursor.execute(f'''
-            SELECT SUM(quantity) FROM residue_history 
-            WHERE type = 'entry' AND timestamp >= ? AND itemId IN ({residue_ids_str})
-            ''', (cutoff_timestamp,))
-            
-            total_entries = cursor.fetchone()[0] or 0
-            
-            # Consultar saídas
-            cursor.execute(f'''
-            SELECT SUM(quantity) FROM residue_history 
-            WHERE type = 'exit' AND timestamp >= ? AND itemId IN ({residue_ids_str})
-            ''', (cutoff_timestamp,))
+            totals = self.data.get_item_movement_totals(residue_ids, days=period_days, item_kind="residue")
             
-            total_exits = cursor.fetchone()[0] or 0
+            total_entries = totals["entry"]
+            total_exits = totals["exit"]
             
             return {
                 "total_entries": total_entries,
@@ -632,8 +614,7 @@ class GroupReportScreen:
             filename = f"reports/group_report_{self.group_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
             
             # Obter dados para o relatório
-            from services.group_service import GroupService
-            group_service = GroupService(self.data.firebase, self.data.db)
+            group_service = self.data.group_service
             
             if self.group_type == "product":
                 groups = group_service.get_all_product_groups()
@@ -663,7 +644,7 @@ class GroupReportScreen:
                     
                     # Dados de cada grupo
                     for group in groups:
-                        products = group_service.get_products_by_group(group["id"])
+                        products = self.data.get_products_in_group(group["id"])
                         
                         if products:
                             total_quantity = sum(p.get("quantity", 0) for p in products)
@@ -730,8 +711,7 @@ class GroupReportScreen:
             from datetime import datetime
             
             # Obter dados para o relatório
-            from services.group_service import GroupService
-            group_service = GroupService(self.data.firebase, self.data.db)
+            group_service = self.data.group_service
             
             if self.group_type == "product":
                 groups = group_service.get_all_product_groups()
@@ -792,7 +772,7 @@ class GroupReportScreen:
                 # Adicionar cards de grupos
                 for group in groups:
                     if self.group_type == "product":
-                        products = group_service.get_products_by_group(group["id"])
+                        products = self.data.get_products_in_group(group["id"])
                         
                         if products:
                             total_quantity = sum(p.get("quantity", 0) for p in products)
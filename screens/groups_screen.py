@@ -9,8 +9,7 @@ class GroupsScreen:
     
     def build(self):
         # Obter grupos
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
+        group_service = self.data.group_service
         
         if self.show_product_groups:
             groups = group_service.get_all_product_groups()
@@ -2,6 +2,9 @@ import flet as ft
 from datetime import datetime, timedelta
 
 class MovementReportScreen:
+    # Quantidade de movimentações detalhadas carregadas por página
+    PAGE_SIZE = 100
+    
     def __init__(self, data, navigation):
         self.data = data
         self.navigation = navigation
@@ -9,18 +12,32 @@ class MovementReportScreen:
         self.selected_type = "all"   # Padrão: todos os tipos
         self.search_text = ""
         self.show_details = False    # Controla se mostra detalhes expandidos
+        # Movimentações já carregadas e controles da lista, usados para acrescentar páginas
+        self.movements = []
+        self._movement_list = None
+        self._load_more_control = None
+        self._counts_by_day = {}
+        self._last_day = None
+        self._total_movements = 0
 
     def build(self):
-        # Obter histórico de movimentação
+        # Totais por dia calculados no banco (base para estatísticas, cabeçalhos e gráfico)
         period_days = int(self.selected_period)
-        movement_history = self.data.get_product_movement_history(
-            product_name=self.search_text if self.search_text else None,
-            days=period_days
+        product_name = self.search_text if self.search_text else None
+        daily_totals = self.data.get_daily_movement_totals(
+            product_name=product_name,
+            days=period_days,
+            movement_type=self.selected_type
         )
         
-        # Filtrar por tipo se necessário
-        if self.selected_type != "all":
-            movement_history = [m for m in movement_history if m["type"] == self.selected_type]
+        # Recarrega a partir do início as páginas já exibidas (ao menos uma)
+        self.movements = self.data.get_product_movement_page(
+            product_name=product_name,
+            days=period_days,
+            movement_type=self.selected_type,
+            limit=max(self.PAGE_SIZE, len(self.movements))
+        )
+        self._total_movements = sum(day["count"] for day in daily_totals)
         
         # Filtros
         period_dropdown = ft.Dropdown(
@@ -75,8 +92,8 @@ class MovementReportScreen:
         )
         
         # Estatísticas resumidas
-        total_entries = sum(m["quantity"] for m in movement_history if m["type"] == "entry")
-        total_exits = sum(m["quantity"] for m in movement_history if m["type"] == "exit")
+        total_entries = sum(day["entry"] for day in daily_totals)
+        total_exits = sum(day["exit"] for day in daily_totals)
         net_change = total_entries - total_exits
         
         stats_row = ft.Row(
@@ -103,42 +120,16 @@ class MovementReportScreen:
             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
         )
         
-        # Construir lista de movimentações
+        # Construir lista de movimentações (agrupadas por dia; a página já vem ordenada)
         movement_items = []
+        self._counts_by_day = {day["day"]: day["count"] for day in daily_totals}
+        self._last_day = None
+        self._append_movement_items(movement_items, self.movements)
         
-        # Agrupar por data para melhor visualização
-        grouped_movements = self._group_by_date(movement_history)
-        
-        for date, movements in grouped_movements.items():
-            # Adicionar cabeçalho da data
-            movement_items.append(
-                ft.Container(
-                    content=ft.Row(
-                        [
-                            ft.Icon(ft.icons.CALENDAR_TODAY, size=20, color=ft.colors.BLUE_500),
-                            ft.Text(
-                                date,
-                                size=16,
-                                weight="bold",
-                                color=ft.colors.BLUE_500,
-                            ),
-                            ft.Text(
-                                f"({len(movements)} movimentações)",
-                                size=12,
-                                color=ft.colors.GREY_700,
-                            ),
-                        ],
-                        spacing=10,
-                    ),
-                    padding=ft.padding.only(left=10, top=15, bottom=5),
-                    margin=ft.margin.only(top=10),
-                    border=ft.border.only(bottom=ft.BorderSide(1, ft.colors.BLUE_500)),
-                )
-            )
-            
-            # Adicionar movimentações do dia
-            for movement in movements:
-                movement_items.append(self._build_movement_item(movement))
+        # Botão para carregar a próxima página
+        self._load_more_control = self._build_load_more()
+        if self._load_more_control:
+            movement_items.append(self._load_more_control)
         
         # Verificar se há movimentações
         if not movement_items:
@@ -154,10 +145,16 @@ class MovementReportScreen:
                 )
             )
         
+        self._movement_list = ft.Column(
+            movement_items,
+            spacing=10,
+            scroll=ft.ScrollMode.AUTO,
+        )
+        
         # Gráfico de movimentação (se mostrar detalhes)
         movement_chart = None
         if self.show_details:
-            movement_chart = self._build_movement_chart(movement_history)
+            movement_chart = self._build_movement_chart(daily_totals)
         
         return ft.Column(
             [
@@ -219,11 +216,7 @@ class MovementReportScreen:
                 
                 # Lista de movimentações
                 ft.Container(
-                    content=ft.Column(
-                        movement_items,
-                        spacing=10,
-                        scroll=ft.ScrollMode.AUTO,
-                    ),
+                    content=self._movement_list,
                     padding=20,
                     expand=True,
                 ),
@@ -234,18 +227,91 @@ class MovementReportScreen:
     def _on_period_change(self, e):
         """Atualiza o período selecionado e reconstrói o relatório"""
         self.selected_period = e.control.value
+        self.movements = []
         self.navigation.update_view()
     
     def _on_type_change(self, e):
         """Atualiza o tipo selecionado e reconstrói o relatório"""
         self.selected_type = e.control.value
+        self.movements = []
         self.navigation.update_view()
     
     def _on_search_change(self, e):
         """Atualiza o texto de busca e reconstrói o relatório"""
         self.search_text = e.control.value
+        self.movements = []
         self.navigation.update_view()
     
+    def _load_more(self, e):
+        """Acrescenta a próxima página de movimentações à lista, sem reconstruir a tela"""
+        if not self.movements or self._movement_list is None:
+            return
+        last = self.movements[-1]
+        page = self.data.get_product_movement_page(
+            product_name=self.search_text if self.search_text else None,
+            days=int(self.selected_period),
+            movement_type=self.selected_type,
+            limit=self.PAGE_SIZE,
+            before=(last["timestamp"], last["id"])
+        )
+        self.movements.extend(page)
+        
+        controls = self._movement_list.controls
+        if self._load_more_control in controls:
+            controls.remove(self._load_more_control)
+        self._append_movement_items(controls, page)
+        self._load_more_control = self._build_load_more() if page else None
+        if self._load_more_control:
+            controls.append(self._load_more_control)
+        self.navigation.page.update()
+    
+    def _build_load_more(self):
+        """Botão "Carregar mais", ou None se todas as movimentações já foram carregadas"""
+        if len(self.movements) >= self._total_movements:
+            return None
+        return ft.Container(
+            content=ft.TextButton(
+                f"Carregar mais ({len(self.movements)} de {self._total_movements})",
+                icon=ft.icons.EXPAND_MORE,
+                on_click=self._load_more,
+            ),
+            alignment=ft.alignment.center,
+        )
+    
+    def _append_movement_items(self, items, movements):
+        """Acrescenta os itens de movimentação, com um cabeçalho a cada novo dia"""
+        for movement in movements:
+            day = movement.get("day")
+            if day != self._last_day:
+                self._last_day = day
+                items.append(self._build_day_header(movement))
+            items.append(self._build_movement_item(movement))
+    
+    def _build_day_header(self, movement):
+        """Cabeçalho da data com a contagem total de movimentações do dia"""
+        return ft.Container(
+            content=ft.Row(
+                [
+                    ft.Icon(ft.icons.CALENDAR_TODAY, size=20, color=ft.colors.BLUE_500),
+                    ft.Text(
+                        movement.get("date") or "Data desconhecida",
+                        size=16,
+                        weight="bold",
+                        color=ft.colors.BLUE_500,
+                    ),
+                    ft.Text(
+                        f"({self._counts_by_day.get(movement.get('day'), 0)} movimentações)",
+                        size=12,
+                        color=ft.colors.GREY_700,
+                    ),
+                ],
+                spacing=10,
+            ),
+            padding=ft.padding.only(left=10, top=15, bottom=5),
+            margin=ft.margin.only(top=10),
+            border=ft.border.only(bottom=ft.BorderSide(1, ft.colors.BLUE_500)),
+        )
+    
     def _toggle_details(self, e):
         """Alterna a exibição de detalhes"""
         self.show_details = not self.show_details
@@ -326,77 +392,24 @@ class MovementReportScreen:
             border=ft.border.all(1, ft.colors.GREY_300),
         )
     
-    def _group_by_date(self, movements):
-        """Agrupa movimentações por data"""
-        grouped = {}
-        
-        for movement in movements:
-            date = movement.get("date", "Data desconhecida")
-            
-            if date not in grouped:
-                grouped[date] = []
-            
-            grouped[date].append(movement)
-        
-        # Ordenar datas (mais recente primeiro)
-        return dict(sorted(grouped.items(), key=lambda x: self._parse_date(x[0]), reverse=True))
-    
-    def _parse_date(self, date_str):
-        """Converte string de data para objeto datetime"""
-        try:
-            return datetime.strptime(date_str, "%d/%m/%Y")
-        except:
-            return datetime.min
-    
-    def _build_movement_chart(self, movements):
-        """Constrói um gráfico de movimentação"""
+    def _build_movement_chart(self, daily_totals):
+        """Constrói um gráfico de movimentação a partir dos totais diários"""
         # Se não houver movimentações suficientes, não mostrar gráfico
-        if len(movements) < 2:
+        if sum(day["count"] for day in daily_totals) < 2:
             return None
         
-        # Agrupar por data e tipo
-        entries_by_date = {}
-        exits_by_date = {}
-        
-        # Obter datas únicas ordenadas
-        all_dates = set()
-        for movement in movements:
-            date = movement.get("date", "")
-            all_dates.add(date)
-        
-        # Ordenar datas
-        sorted_dates = sorted(list(all_dates), key=lambda x: self._parse_date(x))
-        
-        # Limitar a 10 datas mais recentes para o gráfico não ficar muito grande
-        if len(sorted_dates) > 10:
-            sorted_dates = sorted_dates[-10:]
-        
-        # Inicializar contadores
-        for date in sorted_dates:
-            entries_by_date[date] = 0
-            exits_by_date[date] = 0
-        
-        # Contar entradas e saídas por data
-        for movement in movements:
-            date = movement.get("date", "")
-            if date in sorted_dates:
-                if movement["type"] == "entry":
-                    entries_by_date[date] += movement["quantity"]
-                elif movement["type"] == "exit":
-                    exits_by_date[date] += movement["quantity"]
+        # Limitar aos 10 dias mais recentes, em ordem cronológica
+        chart_days = list(reversed(daily_totals[:10]))
         
         # Criar barras para o gráfico
         chart_bars = []
         
         # Encontrar o valor máximo para escala
-        max_value = max(
-            max(entries_by_date.values()) if entries_by_date else 0,
-            max(exits_by_date.values()) if exits_by_date else 0
-        )
+        max_value = max(max(day["entry"], day["exit"]) for day in chart_days)
         
-        for date in sorted_dates:
-            entry_value = entries_by_date[date]
-            exit_value = exits_by_date[date]
+        for day in chart_days:
+            entry_value = day["entry"]
+            exit_value = day["exit"]
             
             # Calcular alturas relativas (máximo 100)
             entry_height = (entry_value / max_value) * 100 if max_value > 0 else 0
@@ -422,7 +435,7 @@ class MovementReportScreen:
                             alignment=ft.alignment.center,
                             margin=ft.margin.only(top=5),
                         ),
-                        ft.Text(date[-5:], size=10, text_align=ft.TextAlign.CENTER),  # Mostrar apenas MM/DD
+                        ft.Text(day["date"][:5], size=10, text_align=ft.TextAlign.CENTER),  # Mostrar apenas DD/MM
                     ],
                     horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                     alignment=ft.MainAxisAlignment.END,
@@ -477,17 +490,14 @@ class MovementReportScreen:
             # Nome do arquivo com timestamp
             filename = f"reports/movement_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
             
-            # Obter dados para o relatório
+            # Movimentações lidas do cursor sob demanda, já filtradas por tipo
             period_days = int(self.selected_period)
-            movement_history = self.data.get_product_movement_history(
+            movement_history = self.data.iter_product_movement_history(
                 product_name=self.search_text if self.search_text else None,
-                days=period_days
+                days=period_days,
+                movement_type=self.selected_type
             )
             
-            # Filtrar por tipo se necessário
-            if self.selected_type != "all":
-                movement_history = [m for m in movement_history if m["type"] == self.selected_type]
-            
             # Escrever arquivo CSV
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
@@ -528,126 +538,51 @@ class MovementReportScreen:
     def _print_report(self, e):
         """Prepara o relatório para impressão"""
         try:
-            import tempfile
-            import webbrowser
-            import os
-            from datetime import datetime
+            from services.report_renderer import ReportRenderer
             
-            # Obter dados para o relatório
             period_days = int(self.selected_period)
-            movement_history = self.data.get_product_movement_history(
-                product_name=self.search_text if self.search_text else None,
-                days=period_days
-            )
-            
-            # Filtrar por tipo se necessário
-            if self.selected_type != "all":
-                movement_history = [m for m in movement_history if m["type"] == self.selected_type]
+            product_name = self.search_text if self.search_text else None
             
-            # Agrupar por data
-            grouped_movements = self._group_by_date(movement_history)
-            
-            # Calcular estatísticas
-            total_entries = sum(m["quantity"] for m in movement_history if m["type"] == "entry")
-            total_exits = sum(m["quantity"] for m in movement_history if m["type"] == "exit")
+            # Totais calculados no banco, antes de percorrer as linhas
+            totals = self.data.get_product_movement_totals(
+                product_name=product_name,
+                days=period_days,
+                movement_type=self.selected_type
+            )
+            total_entries = totals.get("entry", 0)
+            total_exits = totals.get("exit", 0)
             net_change = total_entries - total_exits
             
-            # Criar arquivo HTML temporário
-            fd, path = tempfile.mkstemp(suffix='.html')
+            # Movimentações lidas do cursor sob demanda
+            movements = self.data.iter_product_movement_history(
+                product_name=product_name,
+                days=period_days,
+                movement_type=self.selected_type
+            )
             
-            with os.fdopen(fd, 'w') as tmp:
-                # Escrever cabeçalho HTML
-                tmp.write(f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <title>Relatório de Movimentação</title>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                        .header {{ text-align: center; margin-bottom: 20px; }}
-                        .stats {{ display: flex; justify-content: space-between; margin-bottom: 20px; }}
-                        .stat-card {{ border: 1px solid #ddd; padding: 10px; text-align: center; width: 30%; }}
-                        .date-header {{ background-color: #f2f2f2; padding: 10px; margin-top: 20px; }}
-                        .movement-item {{ border: 1px solid #ddd; padding: 10px; margin-bottom: 5px; }}
-                        .entry {{ border-left: 5px solid #4CAF50; }}
-                        .exit {{ border-left: 5px solid #F44336; }}
-                        .adjustment {{ border-left: 5px solid #FF9800; }}
-                        .footer {{ text-align: center; margin-top: 30px; font-size: 12px; color: #777; }}
-                        @media print {{
-                            .no-print {{ display: none; }}
-                            button {{ display: none; }}
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="header">
-                        <h1>Relatório de Movimentação</h1>
-                        <p>Período: Últimos {period_days} dias • Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-                        <p>Filtro: {self.selected_type.capitalize() if self.selected_type != "all" else "Todos os tipos"} 
-                           {f"• Busca: {self.search_text}" if self.search_text else ""}</p>
-                    </div>
-                    
-                    <div class="no-print">
-                        <button onclick="window.print()">Imprimir</button>
-                        <button onclick="window.close()">Fechar</button>
-                    </div>
-                    
-                    <div class="stats">
-                        <div class="stat-card">
-                            <h3>Entradas Totais</h3>
-                            <p>{total_entries}</p>
-                        </div>
-                        <div class="stat-card">
-                            <h3>Saídas Totais</h3>
-                            <p>{total_exits}</p>
-                        </div>
-                        <div class="stat-card">
-                            <h3>Saldo Líquido</h3>
-                            <p>{net_change}</p>
-                        </div>
-                    </div>
-                ''')
-                
-                # Adicionar movimentações agrupadas por data
-                for date, movements in grouped_movements.items():
-                    tmp.write(f'''
-                    <div class="date-header">
-                        <h2>{date} ({len(movements)} movimentações)</h2>
-                    </div>
-                    ''')
-                    
-                    for movement in movements:
-                        # Definir classe CSS com base no tipo
-                        css_class = "entry"
-                        type_text = "Entrada"
-                        
-                        if movement["type"] == "exit":
-                            css_class = "exit"
-                            type_text = "Saída"
-                        elif movement["type"] == "adjustment":
-                            css_class = "adjustment"
-                            type_text = "Ajuste"
-                        
-                        tmp.write(f'''
-                        <div class="movement-item {css_class}">
-                            <h3>{movement["productName"]}</h3>
-                            <p>Quantidade: {movement["quantity"]} • Tipo: {type_text}</p>
-                            <p>Motivo: {movement.get("reason", "N/A")}</p>
-                        </div>
-                        ''')
+            type_filter = self.selected_type.capitalize() if self.selected_type != "all" else "Todos os tipos"
+            subtitles = [
+                f"Período: Últimos {period_days} dias • Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+                f"Filtro: {type_filter}" + (f" • Busca: {self.search_text}" if self.search_text else "")
+            ]
+            
+            with ReportRenderer("Relatório de Movimentação", subtitles, rows_per_page=200) as report:
+                report.write_stats([
+                    ("Entradas Totais", total_entries),
+                    ("Saídas Totais", total_exits),
+                    ("Saldo Líquido", net_change),
+                ])
                 
-                # Escrever rodapé HTML
-                tmp.write(f'''
-                    <div class="footer">
-                        <p>Relatório gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-                    </div>
-                </body>
-                </html>
-                ''')
+                # Movimentações agrupadas por data (cursor já ordenado por timestamp)
+                report.write_grouped_items(
+                    movements,
+                    lambda m: m.get("date") or "Data desconhecida",
+                    lambda date, count: f"{date} ({count} movimentações)",
+                    self._render_print_item
+                )
             
             # Abrir o arquivo no navegador
-            webbrowser.open('file://' + path)
+            report.open_in_browser()
             
             self.navigation.show_snack_bar(
                 "Relatório aberto no navegador para impressão",
@@ -660,4 +595,21 @@ class MovementReportScreen:
             self.navigation.show_snack_bar(
                 f"Erro ao preparar relatório: {str(e)}",
                 ft.colors.RED_500
-            )
\ No newline at end of file
+            )
+    
+    def _render_print_item(self, movement):
+        """Converte uma movimentação em um item do relatório impresso"""
+        css_class = "entry"
+        type_text = "Entrada"
+        
+        if movement["type"] == "exit":
+            css_class = "exit"
+            type_text = "Saída"
+        elif movement["type"] == "adjustment":
+            css_class = "adjustment"
+            type_text = "Ajuste"
+        
+        return css_class, movement["productName"], [
+            f"Quantidade: {movement['quantity']} • Tipo: {type_text}",
+            f"Motivo: {movement.get('reason') or 'N/A'}",
+        ]
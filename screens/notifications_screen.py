@@ -4,21 +4,44 @@ class NotificationsScreen:
     def __init__(self, data, navigation):
         self.data = data
         self.navigation = navigation
+        self.extra_pages = 0  # Páginas carregadas além da primeira
     
     def build(self):
-        notifications = self.data.notifications
+        # Primeira página (em cache no DataService) e as páginas seguintes pedidas
+        notifications = list(self.data.notifications)
+        next_cursor = notifications[-1]["id"] if len(notifications) == self.data.NOTIFICATIONS_PAGE_SIZE else None
         
-        notification_list = ft.ListView(
-            spacing=5,
-            controls=[
-                self._build_notification_item(notification)
-                for notification in notifications
-            ] if notifications else [
+        for _ in range(self.extra_pages):
+            if not next_cursor:
+                break
+            page, next_cursor = self.data.get_notifications_page(before=next_cursor)
+            notifications.extend(page)
+        
+        controls = [
+            self._build_notification_item(notification)
+            for notification in notifications
+        ] if notifications else [
+            ft.Container(
+                padding=10,
+                content=ft.Text("Nenhuma notificação", color=ft.colors.GREY_500)
+            )
+        ]
+        
+        if next_cursor:
+            controls.append(
                 ft.Container(
-                    padding=10,
-                    content=ft.Text("Nenhuma notificação", color=ft.colors.GREY_500)
+                    content=ft.TextButton(
+                        "Carregar mais",
+                        icon=ft.icons.EXPAND_MORE,
+                        on_click=lambda _: self._load_more(),
+                    ),
+                    alignment=ft.alignment.center,
                 )
-            ],
+            )
+        
+        notification_list = ft.ListView(
+            spacing=5,
+            controls=controls,
             expand=True,
         )
         
@@ -103,16 +126,18 @@ class NotificationsScreen:
             )
         )
     
+    def _load_more(self):
+        """Carrega mais uma página de notificações"""
+        self.extra_pages += 1
+        self.navigation.update_view()
+    
     def _mark_as_read(self, notification_id):
         """Marca uma notificação como lida"""
-        self.data.notification_service.mark_as_read(notification_id)
-        self.data.refresh_data()
+        self.data.mark_notification_as_read(notification_id)
         self.navigation.update_view()
     
     def _mark_all_as_read(self):
         """Marca todas as notificações como lidas"""
-        for notification in self.data.notifications:
-            if not notification["read"]:
-                self.data.notification_service.mark_as_read(notification["id"])
-        self.data.refresh_data()
+        self.data.mark_all_notifications_as_read()
+        self.extra_pages = 0
         self.navigation.update_view()
\ No newline at end of file
@@ -1,4 +1,5 @@
 import flet as ft
+import uuid
 from datetime import datetime
 
 class ProductExitScreen:
@@ -8,10 +9,13 @@ class ProductExitScreen:
         self.product = None
         self.exit_quantity = ""
         self.exit_reason = ""
+        self.exit_key = None
     
     def set_product(self, product):
         """Define o produto para registrar saída"""
         self.product = product
+        # Nova chave de idempotência a cada saída iniciada
+        self.exit_key = uuid.uuid4().hex
     
     def build(self):
         if not self.product:
@@ -86,7 +90,8 @@ class ProductExitScreen:
                 success, message = self.data.product_service.register_product_exit(
                     self.product["id"],
                     exit_qty,
-                    self.exit_reason or "Saída de estoque"
+                    self.exit_reason or "Saída de estoque",
+                    idempotency_key=self.exit_key
                 )
                 
                 if success:
@@ -1,23 +1,37 @@
 import flet as ft
+import logging
+import uuid
 from datetime import datetime
 
+from services.lot_allocation import parse_expiry
+
+logger = logging.getLogger(__name__)
+
 class RegisterExitScreen:
     
     def __init__(self, data, navigation, item, item_type):
         self.data = data
         self.navigation = navigation
         
-        # Garantir que estamos usando uma cópia do item
-        import copy
-        self.item = copy.deepcopy(item) if item else {}
+        # Garantir que estamos usando uma cópia do item (rasa: os campos são valores simples)
+        self.item = dict(item) if item else {}
         
         # Imprimir informações para depuração
         print(f"RegisterExitScreen inicializada com: {self.item.get('name')}, ID: {self.item.get('id')}, Tipo: {item_type}")
         
-        self.item_type = item_type  # "product" ou "residue"
+        self.item_type = item_type  # "product", "residue" ou "scan" (leitura contínua)
+        
+        # Chave de idempotência desta saída: cliques repetidos não duplicam o lançamento
+        self.exit_key = uuid.uuid4().hex
         
         # Definir cores e textos com base no tipo
-        if self.item_type == "product":
+        if self.item_type == "scan":
+            self.primary_color = "#4A6FFF"
+            self.title = "Saída por Leitura de Código"
+            self.icon = ft.icons.QR_CODE_SCANNER
+            self.quantity_label = "Quantidade por leitura"
+            self.reason_label = "Motivo da Saída"
+        elif self.item_type == "product":
             self.primary_color = "#4A6FFF"  # Azul para produtos
             self.title = f"Registrar Saída: {self.item.get('name')}"  # Incluir nome do produto no título
             self.icon = ft.icons.INVENTORY_2_ROUNDED
@@ -31,6 +45,9 @@ class RegisterExitScreen:
             self.reason_label = "Destino"
     
     def build(self):
+        if self.item_type == "scan":
+            return self._build_scan_mode()
+        
         # Verificar se temos um item válido
         if not self.item or not self.item.get("id"):
             print(f"ERRO: Item inválido na tela RegisterExitScreen: {self.item}")
@@ -94,6 +111,37 @@ class RegisterExitScreen:
                     italic=True
                 )
         
+        # Produtos com vários lotes (mesmo nome) podem ter a saída distribuída
+        # entre os lotes, do que vence primeiro para o que vence por último.
+        # Lotes vencidos só entram na distribuição em saídas de descarte.
+        today = datetime.now().date()
+        lots_expired = []
+        if self.item_type == "product":
+            lots_expired = [
+                parse_expiry(p.get("expiry")) < today for p in self.data.stock_products
+                if p.get("name") == item_name and int(p.get("quantity") or 0) > 0
+            ]
+        selected_expired = parse_expiry(self.item.get("expiry")) < today
+        fefo_switch = ft.Switch(
+            # Se o lote escolhido está vencido, a saída fica nele por padrão
+            value=not selected_expired,
+            active_color=self.primary_color,
+        )
+        
+        def update_fefo_switch(exit_type):
+            lot_count = sum(
+                1 for expired in lots_expired if exit_type == "descarte" or not expired
+            )
+            fefo_switch.label = f"Distribuir entre lotes por validade (FEFO) - {lot_count} lotes"
+            fefo_switch.visible = lot_count > 1
+        
+        def on_exit_type_change(e):
+            update_fefo_switch(exit_type_dropdown.value)
+            self.navigation.page.update()
+        
+        exit_type_dropdown.on_change = on_exit_type_change
+        update_fefo_switch(exit_type_dropdown.value)
+        
         # Campo de motivo/destino
         reason_field = ft.TextField(
             label=self.reason_label,
@@ -126,8 +174,39 @@ class RegisterExitScreen:
             visible=False,
         )
         
+        # Grava a saída e recarrega os dados (executada fora da thread da interface)
+        def save_exit(quantity, reason, exit_type, notes, use_fefo):
+            if self.item_type == "product":
+                print(f"Registrando saída de produto: {self.item.get('name')}, ID: {self.item.get('id')}, Quantidade: {quantity}, Tipo: {exit_type}")
+                
+                # Registrar saída de produto com o tipo selecionado
+                if use_fefo:
+                    success, message, allocations = self.data.product_service.register_fefo_exit(
+                        item_name, quantity, reason, exit_type, idempotency_key=self.exit_key,
+                        include_expired=exit_type == "descarte"
+                    )
+                    if success and allocations:
+                        lots = ", ".join(f"{a['lot'] or a['id']}: {a['quantity']}" for a in allocations)
+                        message = f"{message} ({lots})"
+                else:
+                    success, message = self.data.product_service.register_product_exit(
+                        self.item["id"], quantity, reason, exit_type, idempotency_key=self.exit_key
+                    )
+                
+                print(f"Resultado do registro de saída: {success}, Mensagem: {message}")
+            else:
+                # Registrar saída de resíduo
+                success, message = self.data.residue_service.register_residue_exit(
+                    self.item["id"], quantity, reason, notes, idempotency_key=self.exit_key
+                )
+            
+            if success:
+                # Atualizar dados
+                self.data.refresh_data()
+            return success, message
+        
         # Função para registrar a saída
-        def register_exit(_):
+        def register_exit(e):
             try:
                 quantity = int(quantity_field.value)
                 reason = reason_field.value
@@ -144,38 +223,32 @@ class RegisterExitScreen:
                     self.navigation.page.update()
                     return
                 
-                # Registrar saída com base no tipo
-                if self.item_type == "product":
-                    # Obter o tipo de saída selecionado
-                    exit_type = exit_type_dropdown.value
-                    
-                    print(f"Registrando saída de produto: {self.item.get('name')}, ID: {self.item.get('id')}, Quantidade: {quantity}, Tipo: {exit_type}")
-                    
-                    # Verificar se o produto tem um ID válido
-                    product_id = self.item.get("id")
-                    if not product_id:
-                        error_text.value = "ID do produto inválido"
-                        error_text.visible = True
-                        self.navigation.page.update()
-                        return
-                    
-                    # Registrar saída de produto com o tipo selecionado
-                    success, message = self.data.product_service.register_product_exit(
-                        product_id, quantity, reason, exit_type
-                    )
-                    
-                    print(f"Resultado do registro de saída: {success}, Mensagem: {message}")
-                else:
-                    # Registrar saída de resíduo
-                    notes = notes_field.value
-                    success, message = self.data.residue_service.register_residue_exit(
-                        self.item["id"], quantity, reason, notes
-                    )
+                # Obter o tipo de saída selecionado
+                exit_type = exit_type_dropdown.value if self.item_type == "product" else None
+                
+                # Verificar se o produto tem um ID válido
+                if self.item_type == "product" and not self.item.get("id"):
+                    error_text.value = "ID do produto inválido"
+                    error_text.visible = True
+                    self.navigation.page.update()
+                    return
                 
+            except ValueError:
+                error_text.value = "Quantidade inválida. Digite um número inteiro."
+                error_text.visible = True
+                self.navigation.page.update()
+                return
+            
+            # Bloquear o botão até a gravação terminar, evitando saídas em dobro
+            button = e.control if e is not None else None
+            if button is not None:
+                button.disabled = True
+            error_text.visible = False
+            self.navigation.page.update()
+            
+            def on_saved(result):
+                success, message = result
                 if success:
-                    # Atualizar dados
-                    self.data.refresh_data()
-                    
                     # Mostrar mensagem de sucesso
                     self.navigation.show_snack_bar(message, "#2ED573")
                     
@@ -188,24 +261,27 @@ class RegisterExitScreen:
                     
                     # Voltar para a tela anterior
                     self.navigation.go_back()
+                    return
                 
-                else:
-                    self.navigation.show_snack_bar(message, "#FF6B6B")
-                    error_text.value = message
-                    error_text.visible = True
-                    self.navigation.page.update()
-                
-            except ValueError:
-                error_text.value = "Quantidade inválida. Digite um número inteiro."
-                error_text.visible = True
-                self.navigation.page.update()
-            except Exception as e:
-                error_text.value = f"Erro: {str(e)}"
+                self.navigation.show_snack_bar(message, "#FF6B6B")
+                show_failure(message)
+            
+            def on_error(error):
+                logger.error("Erro ao registrar saída: %s", error)
+                show_failure(f"Erro: {str(error)}")
+            
+            def show_failure(message):
+                if button is not None:
+                    button.disabled = False
+                error_text.value = message
                 error_text.visible = True
                 self.navigation.page.update()
-                print(f"Erro ao registrar saída: {e}")
-                import traceback
-                traceback.print_exc()
+            
+            self.navigation.tasks.submit(
+                save_exit, quantity, reason, exit_type, notes_field.value,
+                fefo_switch.visible and fefo_switch.value,
+                on_done=on_saved, on_error=on_error
+            )
         
         # Layout principal
         return ft.Container(
@@ -283,6 +359,7 @@ class RegisterExitScreen:
                                 ),
                                 quantity_field,
                                 exit_type_dropdown,  # Novo campo para tipo de saída
+                                fefo_switch,
                                 reason_field,
                                 notes_field,
                                 error_text,
@@ -326,11 +403,165 @@ class RegisterExitScreen:
             expand=True,
         )
     
+    def _build_scan_mode(self):
+        """Leitura contínua: cada código lido vira uma saída gravada em segundo plano"""
+        from services.scan_exit_queue import ScanExitQueue
+        
+        card_bg = "#FFFFFF"
+        self.scan_rows = {}
+        self.scan_counts = {"read": 0, "saved": 0, "errors": 0}
+        self.scan_queue = ScanExitQueue(self.data.product_service, self._on_scan_result)
+        
+        code_field = ft.TextField(
+            label="Código de barras ou lote",
+            autofocus=True,
+            border_radius=8,
+            filled=True,
+            prefix_icon=ft.icons.QR_CODE_SCANNER,
+            hint_text="Aponte o leitor ou digite e pressione Enter",
+            expand=True
+        )
+        quantity_field = ft.TextField(
+            label=self.quantity_label,
+            value="1",
+            keyboard_type=ft.KeyboardType.NUMBER,
+            border_radius=8,
+            filled=True,
+            width=180
+        )
+        exit_type_dropdown = ft.Dropdown(
+            label="Tipo de Saída",
+            border_radius=8,
+            filled=True,
+            options=[
+                ft.dropdown.Option("venda", "Venda"),
+                ft.dropdown.Option("descarte", "Descarte"),
+                ft.dropdown.Option("uso_semanal", "Uso Semanal (Atualiza o gráfico de uso)"),
+            ],
+            value="venda"
+        )
+        reason_field = ft.TextField(
+            label=self.reason_label,
+            value="Leitura de código de barras",
+            border_radius=8,
+            filled=True,
+            prefix_icon=ft.icons.DESCRIPTION
+        )
+        self.scan_status = ft.Text("Nenhum código lido", color="#505050", weight="w500")
+        self.scan_list = ft.ListView(spacing=4, height=320)
+        
+        def on_scan(_):
+            code = (code_field.value or "").strip()
+            code_field.value = ""
+            if code:
+                try:
+                    quantity = int(quantity_field.value)
+                except (ValueError, TypeError):
+                    quantity = 0
+                if quantity <= 0:
+                    self._add_scan_row(None, f"{code}: quantidade inválida", "#FF6B6B")
+                else:
+                    entry = self.scan_queue.submit(code, quantity, reason_field.value, exit_type_dropdown.value)
+                    if entry is None:
+                        self._add_scan_row(None, f"{code}: código não encontrado", "#FF6B6B")
+                    else:
+                        self.scan_counts["read"] += 1
+                        self._add_scan_row(entry, f"{entry['name']} ({code}) x{quantity}: na fila", "#909090")
+            code_field.focus()
+            self.navigation.page.update()
+        
+        code_field.on_submit = on_scan
+        
+        def close_and_refresh():
+            # Grava o que ainda estiver na fila antes de sair
+            self.scan_queue.close()
+            self.data.refresh_data()
+        
+        def close_scan_mode(_):
+            self.navigation.tasks.submit(
+                close_and_refresh, on_done=lambda _: self.navigation.go_back()
+            )
+        
+        return ft.Container(
+            content=ft.Column([
+                ft.Container(
+                    content=ft.Row([
+                        ft.IconButton(
+                            icon=ft.icons.ARROW_BACK,
+                            icon_color="#505050",
+                            on_click=close_scan_mode
+                        ),
+                        ft.Text(self.title, size=20, weight="bold", color="#505050"),
+                    ], alignment=ft.MainAxisAlignment.START, spacing=10),
+                    padding=10,
+                    bgcolor=card_bg,
+                ),
+                ft.Container(
+                    content=ft.Column([
+                        ft.Row([code_field, quantity_field], spacing=10),
+                        exit_type_dropdown,
+                        reason_field,
+                        self.scan_status,
+                        self.scan_list,
+                        ft.Row([
+                            ft.FilledButton(
+                                "Concluir",
+                                style=ft.ButtonStyle(
+                                    bgcolor=self.primary_color,
+                                    color="#FFFFFF",
+                                    shape=ft.RoundedRectangleBorder(radius=8)
+                                ),
+                                on_click=close_scan_mode
+                            ),
+                        ], alignment=ft.MainAxisAlignment.END),
+                    ], spacing=15, scroll=ft.ScrollMode.AUTO),
+                    padding=20,
+                    bgcolor=card_bg,
+                    border_radius=12,
+                    margin=20,
+                    expand=True
+                ),
+            ]),
+            bgcolor="#F8F9FD",
+            expand=True,
+        )
+    
+    # Quantidade de leituras mantidas na lista da tela
+    SCAN_HISTORY = 50
+    
+    def _add_scan_row(self, entry, text, color):
+        """Adiciona uma leitura no topo da lista da leitura contínua"""
+        row = ft.Text(text, color=color, size=13)
+        self.scan_list.controls.insert(0, row)
+        del self.scan_list.controls[self.SCAN_HISTORY:]
+        if entry is not None:
+            self.scan_rows[entry["idempotency_key"]] = (row, text.rsplit(":", 1)[0])
+        self._update_scan_status()
+    
+    def _update_scan_status(self):
+        counts = self.scan_counts
+        self.scan_status.value = (
+            f"Lidos: {counts['read']} | Gravados: {counts['saved']} | "
+            f"Erros: {counts['errors']} | Na fila: {self.scan_queue.pending()}"
+        )
+    
+    def _on_scan_result(self, entry, success, message):
+        """Resultado de uma leitura gravada (chamado pela thread da fila)"""
+        row, label = self.scan_rows.pop(entry["idempotency_key"], (None, entry["name"]))
+        self.scan_counts["saved" if success else "errors"] += 1
+        if row is not None:
+            row.value = f"{label}: {message}"
+            row.color = "#2ED573" if success else "#FF6B6B"
+        self._update_scan_status()
+        try:
+            self.navigation.page.update()
+        except Exception as e:
+            logger.error("Erro ao atualizar a leitura contínua: %s", e)
+    
     def go_to_register_exit(self, item, item_type):
         """Navega para a tela de registro de saída"""
-        # Criar uma cópia profunda do item para evitar referências compartilhadas
-        import copy
-        item_copy = copy.deepcopy(item) if item else {}
+        # Cópia rasa: os campos são valores simples, e os registros do cache são imutáveis
+        item_copy = dict(item) if item else {}
         
         print(f"Navegando para registro de saída: {item_copy.get('name')}, ID: {item_copy.get('id')}, Tipo: {item_type}")
         
@@ -17,32 +17,8 @@ class ReportScreen:
         bg_color = "#F8F9FD"  # Fundo claro
         card_bg = "#FFFFFF"  # Branco para cards
         
-        # Corrigindo o cálculo do uso semanal para lidar com diferentes tipos de dados
-        weekly_usage_total = 0
-        for product in self.data.stock_products:
-            weekly_usage = product.get("weeklyUsage", [0] * 7)
-            
-            # Verificar se weekly_usage é uma lista
-            if not isinstance(weekly_usage, list):
-                # Se não for uma lista, criar uma lista padrão
-                weekly_usage = [0] * 7
-            
-            # Processar cada item na lista com tratamento de erro
-            weekly_usage_sum = 0
-            for usage in weekly_usage:
-                try:
-                    if isinstance(usage, str):
-                        # Ignorar strings que não podem ser convertidas para números
-                        if usage.isdigit():
-                            weekly_usage_sum += int(usage)
-                    else:
-                        # Se já for um número, adicionar diretamente
-                        weekly_usage_sum += usage if isinstance(usage, (int, float)) else 0
-                except (ValueError, TypeError):
-                    # Ignorar valores que causam erros
-                    continue
-            
-            weekly_usage_total += weekly_usage_sum
+        # Uso dos últimos 7 dias, somado no banco
+        weekly_usage_total = self._calculate_weekly_usage()
         
         # Calcular estatísticas adicionais
         total_products = len(self.data.stock_products)
@@ -587,205 +563,91 @@ class ReportScreen:
     def _print_report(self, e=None):
         """Prepara o relatório para impressão"""
         try:
-            import tempfile
-            import webbrowser
-            import os
+            from services.report_renderer import ReportRenderer
             
-            # Criar arquivo HTML temporário
-            fd, path = tempfile.mkstemp(suffix='.html')
+            low_stock_products = self.data.low_stock_products
+            expiring_products = self.data.expiring_products
+            weekly_usage = self._calculate_weekly_usage()
             
-            with os.fdopen(fd, 'w') as tmp:
-                # Escrever cabeçalho HTML
-                tmp.write(f'''
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <title>Relatório de Estoque e Resíduos</title>
-                    <style>
-                        body {{ font-family: 'Segoe UI', Arial, sans-serif; margin: 20px; color: #303030; }}
-                        .header {{ text-align: center; margin-bottom: 30px; padding-bottom: 20px; border-bottom: 1px solid #eee; }}
-                        .section {{ margin-bottom: 30px; }}
-                        .section-title {{ background-color: #f8f9fd; padding: 10px 15px; border-radius: 8px; font-size: 18px; color: #4A6FFF; }}
-                        .card {{ border: 1px solid #eee; padding: 15px; margin-bottom: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); }}
-                        .footer {{ text-align: center; margin-top: 40px; padding-top: 20px; border-top: 1px solid #eee; font-size: 12px; color: #707070; }}
-                        table {{ width: 100%; border-collapse: collapse; margin-bottom: 20px; }}
-                        th, td {{ border: 1px solid #eee; padding: 12px; text-align: left; }}
-                        th {{ background-color: #f8f9fd; color: #4A6FFF; font-weight: 600; }}
-                        tr:nth-child(even) {{ background-color: #f9f9f9; }}
-                        .summary {{ display: flex; justify-content: space-between; margin-bottom: 30px; flex-wrap: wrap; }}
-                        .summary-item {{ text-align: center; padding: 15px; border-radius: 8px; background-color: #fff; box-shadow: 0 2px 4px rgba(0,0,0,0.05); width: 22%; margin-bottom: 15px; }}
-                        .summary-item h3 {{ color: #4A6FFF; margin-bottom: 5px; }}
-                        .summary-item p {{ font-size: 24px; font-weight: bold; margin: 5px 0; }}
-                        .alert {{ background-color: #fff0f0; color: #FF6B6B; }}
-                        .expiring {{ background-color: #FFF8E1; color: #FFA502; }}
-                        @media print {{
-                            .no-print {{ display: none; }}
-                            button {{ display: none; }}
-                            body {{ font-size: 12px; }}
-                            .summary-item {{ box-shadow: none; border: 1px solid #eee; }}
-                            .card {{ box-shadow: none; }}
-                        }}
-                        @media (max-width: 768px) {{
-                            .summary-item {{ width: 45%; }}
-                        }}
-                        @media (max-width: 480px) {{
-                            .summary-item {{ width: 100%; }}
-                        }}
-                        .btn {{ display: inline-block; padding: 10px 15px; background-color: #4A6FFF; color: white; text-decoration: none; border-radius: 4px; margin-right: 10px; }}
-                    </style>
-                </head>
-                <body>
-                    <div class="header">
-                        <h1>Relatório de Estoque e Resíduos</h1>
-                        <p>Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-                    </div>
-                    
-                    <div class="no-print" style="margin-bottom: 20px; text-align: center;">
-                        <button class="btn" onclick="window.print()">Imprimir Relatório</button>
-                        <button class="btn" style="background-color: #6C5CE7;" onclick="window.close()">Fechar</button>
-                    </div>
-                    
-                    <div class="summary">
-                        <div class="summary-item">
-                            <h3>Produtos</h3>
-                            <p>{len(self.data.stock_products)}</p>
-                        </div>
-                        <div class="summary-item">
-                            <h3>Resíduos</h3>
-                            <p>{len(self.data.residues)}</p>
-                        </div>
-                        <div class="summary-item">
-                            <h3>Alertas</h3>
-                            <p>{len(self.data.low_stock_products) + len(self.data.expiring_products)}</p>
-                        </div>
-                        <div class="summary-item">
-                            <h3>Uso Semanal</h3>
-                            <p>{self._calculate_weekly_usage()}</p>
-                        </div>
-                    </div>
-                    
-                    <div class="section">
-                        <h2 class="section-title">Produtos em Estoque</h2>
-                        <table>
-                            <tr>
-                                <th>Nome</th>
-                                <th>Quantidade</th>
-                                <th>Lote</th>
-                                <th>Validade</th>
-                                <th>Grupo</th>
-                                <th>Valor</th>
-                            </tr>
-                ''')
-                
-                # Adicionar produtos
-                for product in self.data.stock_products:
-                    is_low_stock = product in self.data.low_stock_products
-                    is_expiring = product in self.data.expiring_products
-                    row_class = "alert" if is_low_stock else "expiring" if is_expiring else ""
-                    
-                    tmp.write(f'''
-                            <tr class="{row_class}">
-                                <td>{product.get("name", "")}</td>
-                                <td>{product.get("quantity", 0)}</td>
-                                <td>{product.get("lot", "N/A")}</td>
-                                <td>{product.get("expiry", "N/A")}</td>
-                                <td>{product.get("group_name", "")}</td>
-                                <td>R$ {float(product.get("value", 0)):.2f}</td>
-                            </tr>
-                    ''')
-                
-                tmp.write('''
-                        </table>
-                    </div>
-                    
-                    <div class="section">
-                        <h2 class="section-title">Resíduos Gerados</h2>
-                        <table>
-                            <tr>
-                                <th>Nome</th>
-                                <th>Quantidade</th>
-                                <th>Tipo</th>
-                                <th>Destino</th>
-                                <th>Grupo</th>
-                                <th>Data de Entrada</th>
-                            </tr>
-                ''')
-                
-                # Adicionar resíduos
-                for residue in self.data.residues:
-                    tmp.write(f'''
-                            <tr>
-                                <td>{residue.get("name", "")}</td>
-                                <td>{residue.get("quantity", 0)}</td>
-                                <td>{residue.get("type", "N/A")}</td>
-                                <td>{residue.get("destination", "N/A")}</td>
-                                <td>{residue.get("group_name", "")}</td>
-                                <td>{residue.get("entryDate", "N/A")}</td>
-                            </tr>
-                    ''')
+            # Conjuntos de IDs para classificar as linhas sem buscas lineares
+            low_stock_ids = {p.get("id") for p in low_stock_products}
+            expiring_ids = {p.get("id") for p in expiring_products}
+            
+            def render_product(product):
+                product_id = product.get("id")
+                row_class = "alert" if product_id in low_stock_ids else "expiring" if product_id in expiring_ids else ""
+                return row_class, [
+                    product.get("name", ""),
+                    product.get("quantity", 0),
+                    product.get("lot", "N/A"),
+                    product.get("expiry", "N/A"),
+                    product.get("group_name", ""),
+                    f"R$ {float(product.get('value', 0)):.2f}",
+                ]
+            
+            def render_residue(residue):
+                return "", [
+                    residue.get("name", ""),
+                    residue.get("quantity", 0),
+                    residue.get("type", "N/A"),
+                    residue.get("destination", "N/A"),
+                    residue.get("group_name", ""),
+                    residue.get("entryDate", "N/A"),
+                ]
+            
+            def render_low_stock(product):
+                return "alert", [
+                    product.get("name", ""),
+                    "Estoque Baixo",
+                    product.get("quantity", 0),
+                    f"Abaixo do mínimo recomendado ({product.get('minStock', 'N/A')})",
+                ]
+            
+            def render_expiring(product):
+                return "expiring", [
+                    product.get("name", ""),
+                    "Próximo ao Vencimento",
+                    product.get("quantity", 0),
+                    f"Validade: {product.get('expiry', 'N/A')}",
+                ]
+            
+            subtitles = [f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}"]
+            
+            with ReportRenderer("Relatório de Estoque e Resíduos", subtitles, rows_per_page=300) as report:
+                report.write_stats([
+                    ("Produtos", len(self.data.stock_products)),
+                    ("Resíduos", len(self.data.residues)),
+                    ("Alertas", len(low_stock_products) + len(expiring_products)),
+                    ("Uso Semanal", weekly_usage),
+                ])
                 
-                tmp.write('''
-                        </table>
-                    </div>
-                    
-                    <div class="section">
-                        <h2 class="section-title">Alertas Ativos</h2>
-                        <table>
-                            <tr>
-                                <th>Nome</th>
-                                <th>Tipo de Alerta</th>
-                                <th>Quantidade</th>
-                                <th>Detalhes</th>
-                            </tr>
-                ''')
+                report.write_section("Produtos em Estoque")
+                report.write_table(
+                    ["Nome", "Quantidade", "Lote", "Validade", "Grupo", "Valor"],
+                    self.data.stock_products,
+                    render_product
+                )
                 
-                # Adicionar alertas
-                for product in self.data.low_stock_products:
-                    tmp.write(f'''
-                            <tr class="alert">
-                                <td>{product.get("name", "")}</td>
-                                <td>Estoque Baixo</td>
-                                <td>{product.get("quantity", 0)}</td>
-                                <td>Abaixo do mínimo recomendado ({product.get("minStock", "N/A")})</td>
-                            </tr>
-                    ''')
+                report.write_section("Resíduos Gerados")
+                report.write_table(
+                    ["Nome", "Quantidade", "Tipo", "Destino", "Grupo", "Data de Entrada"],
+                    self.data.residues,
+                    render_residue
+                )
                 
-                for product in self.data.expiring_products:
-                    tmp.write(f'''
-                            <tr class="expiring">
-                                <td>{product.get("name", "")}</td>
-                                <td>Próximo ao Vencimento</td>
-                                <td>{product.get("quantity", 0)}</td>
-                                <td>Validade: {product.get("expiry", "N/A")}</td>
-                            </tr>
-                    ''')
+                report.write_section("Alertas Ativos")
+                columns = ["Nome", "Tipo de Alerta", "Quantidade", "Detalhes"]
+                report.write_table(columns, low_stock_products, render_low_stock)
+                report.write_table(columns, expiring_products, render_expiring)
                 
-                tmp.write('''
-                        </table>
-                    </div>
-                    
-                    <div class="section">
-                        <h2 class="section-title">Uso Semanal de Produtos</h2>
-                        <div class="card">
-                            <p>Total de unidades usadas na semana: <strong>{}</strong></p>
-                            <p>Média diária de uso: <strong>{}</strong></p>
-                        </div>
-                    </div>
-                    
-                    <div class="footer">
-                        <p>Relatório gerado em {} pelo Sistema de Gestão de Estoque e Resíduos</p>
-                    </div>
-                </body>
-                </html>
-                '''.format(
-                    self._calculate_weekly_usage(),
-                    round(self._calculate_weekly_usage() / 7, 1),
-                    datetime.now().strftime('%d/%m/%Y %H:%M')
-                ))
+                report.write_section("Uso Semanal de Produtos")
+                report.write_card([
+                    f"Total de unidades usadas na semana: {weekly_usage}",
+                    f"Média diária de uso: {round(weekly_usage / 7, 1)}",
+                ])
             
             # Abrir o arquivo no navegador
-            webbrowser.open('file://' + path)
+            report.open_in_browser()
             
             self.navigation.show_snack_bar(
                 "Relatório aberto no navegador para impressão",
@@ -801,27 +663,5 @@ class ReportScreen:
             )
     
     def _calculate_weekly_usage(self):
-        """Calcula o uso semanal total com tratamento de erros"""
-        weekly_usage_total = 0
-        for product in self.data.stock_products:
-            weekly_usage = product.get("weeklyUsage", [0] * 7)
-            
-            # Verificar se weekly_usage é uma lista
-            if not isinstance(weekly_usage, list):
-                weekly_usage = [0] * 7
-            
-            # Processar cada item na lista com tratamento de erro
-            weekly_usage_sum = 0
-            for usage in weekly_usage:
-                try:
-                    if isinstance(usage, str):
-                        if usage.isdigit():
-                            weekly_usage_sum += int(usage)
-                    else:
-                        weekly_usage_sum += usage if isinstance(usage, (int, float)) else 0
-                except (ValueError, TypeError):
-                    continue
-            
-            weekly_usage_total += weekly_usage_sum
-        
-        return weekly_usage_total
\ No newline at end of file
+        """Calcula o uso total dos últimos 7 dias"""
+        return self.data.get_total_usage(7)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import flet as ft
+import uuid
 from datetime import datetime
 
 class ResidueExitScreen:
@@ -9,10 +10,13 @@ class ResidueExitScreen:
         self.exit_quantity = ""
         self.exit_destination = ""
         self.exit_notes = ""
+        self.exit_key = None
     
     def set_residue(self, residue):
         """Define o resíduo para registrar saída"""
         self.residue = residue
+        # Nova chave de idempotência a cada saída iniciada
+        self.exit_key = uuid.uuid4().hex
     
     def build(self):
         if not self.residue:
@@ -95,7 +99,8 @@ class ResidueExitScreen:
                     self.residue["id"],
                     exit_qty,
                     self.exit_destination or "Saída de resíduo",
-                    self.exit_notes
+                    self.exit_notes,
+                    idempotency_key=self.exit_key
                 )
                 
                 if success:
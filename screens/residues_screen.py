@@ -1,6 +1,9 @@
 import flet as ft
 from datetime import datetime
 
+# Espera (segundos) após a última digitação antes de filtrar
+SEARCH_DELAY = 0.2
+
 class ResiduesScreen:
     def __init__(self, data, navigation):
         self.data = data
@@ -179,8 +182,7 @@ class ResiduesScreen:
     def _build_groups_view(self, primary_color, card_bg):
         """Constrói a visualização por grupos com layout responsivo"""
         # Obter grupos de resíduos
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
+        group_service = self.data.group_service
         groups = group_service.get_all_residue_groups()
         
         # Filtrar grupos com base na pesquisa
@@ -242,8 +244,7 @@ class ResiduesScreen:
         color = getattr(ft.colors, f"{color_name}_500", primary_color)
         
         # Obter resíduos do grupo usando GroupService
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
+        group_service = self.data.group_service
         group_id = group.get("id", "")
         group_residues = group_service.get_residues_in_group(group_id)
         
@@ -454,7 +455,9 @@ class ResiduesScreen:
     
     def _on_search_change(self, e):
         self.search_text = e.control.value
-        self.navigation.update_view()
+        # Filtra e monta a tela fora da thread da interface; cada digitação
+        # substitui a busca anterior, cujo resultado é descartado
+        self.navigation.refresh_view_in_background(key="residue_search", delay=SEARCH_DELAY)
     
     def _build_residue_item(self, residue, primary_color, card_bg):
         """Constrói um item de resíduo com design moderno"""
@@ -611,8 +614,7 @@ class ResiduesScreen:
                 updated_group["icon"] = icon_dropdown.value
                 
                 # Salvar grupo
-                from services.group_service import GroupService
-                group_service = GroupService(self.data.firebase, self.data.db)
+                group_service = self.data.group_service
                 success = group_service.update_group(group["id"], updated_group, is_residue=True)
                 
                 close_dialog()
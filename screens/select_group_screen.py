@@ -12,8 +12,7 @@ class SelectGroupScreen:
         
     def build(self):
         # Obter serviço de configuração de cards
-        from services.card_config_service import CardConfigService
-        self.card_config_service = CardConfigService(self.data.firebase, self.data.db)
+        self.card_config_service = self.data.card_config_service
         
         # Obter IDs de grupos já no dashboard
         if self.group_type == "product":
@@ -52,6 +52,19 @@ class SettingsScreen:
                 value=self.settings["backupEnabled"],
                 on_change=lambda e: self._update_setting("backupEnabled", e.control.value)
             ),
+            
+            "log_level": ft.Dropdown(
+                label="Nível de log",
+                value=self.settings.get("logLevel", "INFO"),
+                options=[
+                    ft.dropdown.Option("DEBUG", "Depuração"),
+                    ft.dropdown.Option("INFO", "Informação"),
+                    ft.dropdown.Option("WARNING", "Avisos"),
+                    ft.dropdown.Option("ERROR", "Erros"),
+                ],
+                border_radius=8,
+                on_change=lambda e: self._update_setting("logLevel", e.control.value)
+            ),
         }
         
         # Adicionar campos de tema se existirem nas configurações
@@ -147,6 +160,16 @@ class SettingsScreen:
                     ft.Text("Backup", size=16, weight="bold"),
                     self.form_fields["backup_enabled"],
                     
+                    ft.Divider(),
+                    
+                    # Seção de diagnóstico
+                    # Pressionar e segurar abre a tela oculta de diagnóstico
+                    ft.GestureDetector(
+                        content=ft.Text("Diagnóstico", size=16, weight="bold"),
+                        on_long_press_start=lambda _: self.navigation.go_to_diagnostics(),
+                    ),
+                    self.form_fields["log_level"],
+                    
                     # Seção de tema (se disponível)
                     *([
                         ft.Divider(),
@@ -167,6 +190,14 @@ class SettingsScreen:
         return ft.Container(
             content=ft.Row(
                 controls=[
+                    ft.ElevatedButton(
+                        "Recalcular Relatórios",
+                        on_click=lambda _: self._rebuild_reports(),
+                        style=ft.ButtonStyle(
+                            color=ft.colors.BLACK,
+                            bgcolor=ft.colors.GREY_300,
+                        ),
+                    ),
                     ft.ElevatedButton(
                         "Restaurar Padrões",
                         on_click=lambda _: self._reset_to_defaults(),
@@ -241,14 +272,28 @@ class SettingsScreen:
             print(f"Erro ao validar configurações: {e}")
             return False
     
+    def _rebuild_reports(self):
+        """Reconstrói a consolidação diária usada pelos relatórios"""
+        total = self.data.rebuild_daily_movements()
+        
+        if total >= 0:
+            self.navigation.show_snack_bar(
+                f"Relatórios recalculados ({total} registros consolidados)",
+                ft.colors.GREEN_500
+            )
+        else:
+            self.navigation.show_snack_bar(
+                "Erro ao recalcular relatórios. Tente novamente.",
+                ft.colors.RED_500
+            )
+    
     def _reset_to_defaults(self):
         """Restaura as configurações para os valores padrão"""
         # Confirmar antes de restaurar
         def confirm_reset(e):
             if e.control.result:
                 # Obter configurações padrão do serviço
-                from services.settings_service import SettingsService
-                settings_service = SettingsService(self.data.firebase, self.data.db)
+                settings_service = self.data.settings_service
                 default_settings = settings_service.get_default_settings()
                 
                 # Atualizar configurações
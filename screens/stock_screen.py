@@ -1,4 +1,10 @@
 import flet as ft
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Espera (segundos) após a última digitação antes de filtrar
+SEARCH_DELAY = 0.2
 
 class StockScreen:
     def __init__(self, data, navigation):
@@ -39,6 +45,14 @@ class StockScreen:
             height=48
         )
         
+        scan_button = ft.IconButton(
+            icon=ft.icons.QR_CODE_SCANNER,
+            icon_color=primary_color,
+            icon_size=30,
+            tooltip="Saída por Leitura de Código",
+            on_click=lambda _: self.navigation.go_to_scan_exit()
+        )
+        
         add_button = ft.IconButton(
             icon=ft.icons.ADD_CIRCLE,
             icon_color=primary_color,
@@ -103,6 +117,7 @@ class StockScreen:
                         content=ft.Row(
                             controls=[
                                 search_field,
+                                scan_button,
                                 add_button,
                             ],
                             spacing=10,
@@ -151,7 +166,7 @@ class StockScreen:
     
     def _toggle_view(self, selected):
         """Alterna entre visualização por grupos e lista completa"""
-        print(f"Toggle view chamado com valor: {selected}")  # Debug
+        logger.debug("Toggle view chamado com valor: %s", selected)
         
         # Verificar o tipo de 'selected' e converter se necessário
         if isinstance(selected, set):
@@ -166,7 +181,7 @@ class StockScreen:
         
         # Definir o modo de visualização com base no valor selecionado
         self.view_mode = "groups" if selected == 0 else "list"
-        print(f"Modo de visualização alterado para: {self.view_mode}")  # Debug
+        logger.debug("Modo de visualização alterado para: %s", self.view_mode)
         
         # Atualizar a interface
         self.navigation.update_view()
@@ -174,8 +189,7 @@ class StockScreen:
     def _build_groups_view(self, primary_color, card_bg):
         """Constrói a visualização por grupos com layout responsivo"""
         # Obter grupos de produtos
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
+        group_service = self.data.group_service
         groups = group_service.get_all_product_groups()
         
         # Filtrar grupos com base na pesquisa
@@ -236,37 +250,18 @@ class StockScreen:
         color_name = group.get("color", "blue").upper()
         color = getattr(ft.colors, f"{color_name}_500", primary_color)
         
-        # Obter produtos do grupo usando GroupService
-        from services.group_service import GroupService
-        group_service = GroupService(self.data.firebase, self.data.db)
+        # Quantidade de produtos, estoque total e produtos abaixo do mínimo,
+        # calculados de uma vez para todos os grupos no instantâneo colunar
         group_id = group.get("id", "")
-        group_products = group_service.get_products_in_group(group_id)
-        
-        # Calcular quantidade total
-        total_quantity = 0
-        for product in group_products:
-            try:
-                if 'quantity' in product and product['quantity'] is not None:
-                    total_quantity += int(product['quantity'])
-            except (ValueError, TypeError):
-                print(f"Erro ao converter quantidade do produto {product.get('name')}: {product.get('quantity')}")
-        
-        # Número real de produtos no grupo
-        actual_product_count = len(group_products)
-        
-        # Calcular produtos com estoque baixo
-        low_stock_count = 0
-        for product in group_products:
-            try:
-                quantity = int(product.get('quantity', 0))
-                min_stock = int(product.get('minStock', 0) or 0)
-                if min_stock > 0 and quantity <= min_stock:
-                    low_stock_count += 1
-            except (ValueError, TypeError):
-                pass
-        
-        # Para depuração
-        print(f"Grupo: {group.get('name')}, ID: {group_id}, Produtos: {actual_product_count}, Total: {total_quantity}")
+        totals = self.data.get_group_totals(group_id)
+        total_quantity = totals["quantity"]
+        actual_product_count = totals["count"]
+        low_stock_count = totals["low_stock"]
+        
+        logger.debug(
+            "Grupo: %s, ID: %s, Produtos: %s, Total: %s",
+            group.get('name'), group_id, actual_product_count, total_quantity
+        )
         
         return ft.Container(
             content=ft.Column([
@@ -442,7 +437,9 @@ class StockScreen:
     
     def _on_search_change(self, e):
         self.search_text = e.control.value
-        self.navigation.update_view()
+        # Filtra e monta a tela fora da thread da interface; cada digitação
+        # substitui a busca anterior, cujo resultado é descartado
+        self.navigation.refresh_view_in_background(key="stock_search", delay=SEARCH_DELAY)
     
     def _build_product_item(self, product, primary_color, card_bg, warning_color, danger_color):
         """Constrói um item de produto com design moderno"""
@@ -460,23 +457,8 @@ class StockScreen:
         product_group = product.get("group_name", "Sem grupo")
         product_location = product.get("location", "N/A")
         
-        # Calcular uso semanal total
-        weekly_usage = product.get("weeklyUsage", [0] * 7)
-        weekly_usage_total = 0
-        
-        # Garantir que weekly_usage seja uma lista
-        if not isinstance(weekly_usage, list):
-            weekly_usage = [0] * 7
-        
-        # Calcular o total
-        for usage in weekly_usage:
-            try:
-                if isinstance(usage, str) and usage.isdigit():
-                    weekly_usage_total += int(usage)
-                elif isinstance(usage, (int, float)):
-                    weekly_usage_total += usage
-            except (ValueError, TypeError):
-                continue
+        # Uso dos últimos 7 dias (totais calculados uma vez por atualização)
+        weekly_usage_total = self.data.get_product_usage(product.get("id"), 7)
         
         # Calcular dias até o vencimento
         days_left = None
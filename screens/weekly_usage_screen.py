@@ -1,7 +1,9 @@
-import json
 import flet as ft
+import logging
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 class WeeklyUsageScreen:
     def __init__(self, data, navigation):
         self.data = data
@@ -23,7 +25,6 @@ class WeeklyUsageScreen:
                 # Converter para dicionário usando o método do serviço de produtos
                 self.product = self.data.product_service._convert_to_dict([product_data])[0]
                 print(f"Produto carregado do banco de dados: {self.product['name']}")
-                print(f"Uso semanal: {self.product.get('weeklyUsage', [])}")
             else:
                 # Se não encontrar no banco de dados, usar o produto fornecido
                 self.product = product
@@ -75,38 +76,11 @@ class WeeklyUsageScreen:
                 # Atualizar o produto com dados frescos do banco de dados
                 self.product = self.data.product_service._convert_to_dict([product_data])[0]
                 print(f"Produto recarregado do banco de dados para exibição")
-                print(f"Uso semanal atualizado: {self.product.get('weeklyUsage', [])}")
         except Exception as e:
             print(f"Erro ao recarregar produto: {e}")
         
-        # Verificar e preparar os dados de uso semanal
-        weekly_usage = self.product.get("weeklyUsage", [0] * 7)
-        
-        # Garantir que weekly_usage seja uma lista
-        if not isinstance(weekly_usage, list):
-            try:
-                weekly_usage = json.loads(weekly_usage)
-                print(f"Convertido weekly_usage de JSON para lista: {weekly_usage}")
-            except Exception as e:
-                print(f"Erro ao converter weekly_usage: {e}")
-                weekly_usage = [0] * 7
-    
-        # Garantir que a lista tenha 7 elementos
-        while len(weekly_usage) < 7:
-            weekly_usage.append(0)
-        
-        # Limitar a 7 elementos se tiver mais
-        weekly_usage = weekly_usage[:7]
-        
-        # Garantir que todos os elementos sejam números
-        for i in range(7):
-            try:
-                if isinstance(weekly_usage[i], str) and weekly_usage[i].isdigit():
-                    weekly_usage[i] = int(weekly_usage[i])
-                elif not isinstance(weekly_usage[i], (int, float)):
-                    weekly_usage[i] = 0
-            except (ValueError, TypeError):
-                weekly_usage[i] = 0
+        # Uso dos últimos 7 dias por dia da semana, derivado da série temporal
+        weekly_usage = self.data.get_weekly_usage(self.product["id"])
         
         # Calcular estatísticas
         total_usage = sum(weekly_usage)
@@ -199,64 +173,34 @@ class WeeklyUsageScreen:
                 
                 print(f"Dados de uso coletados: {usage_data}")
                 
-                # Atualizar o produto diretamente no banco de dados
-                try:
-                    # Obter o produto atual do banco de dados
-                    cursor = self.data.db.conn.cursor()
-                    cursor.execute('SELECT * FROM products WHERE id = ?', (self.product["id"],))
-                    product_data = cursor.fetchone()
-                    
-                    if not product_data:
-                        raise Exception(f"Produto com ID {self.product['id']} não encontrado no banco de dados")
-                    
-                    # Atualizar o campo weeklyUsage diretamente
-                    cursor.execute('''
-                    UPDATE products SET 
-                        weeklyUsage = ?,
-                        lastUpdateDate = ?
-                    WHERE id = ?
-                    ''', (
-                        json.dumps(usage_data),
-                        datetime.now().strftime("%d/%m/%Y"),
-                        self.product["id"]
-                    ))
+                # Gravar o uso na série temporal do produto fora da thread da interface
+                def save_usage():
+                    if not self.data.update_weekly_usage(self.product["id"], usage_data):
+                        raise Exception(f"Não foi possível atualizar o uso do produto {self.product['id']}")
                     
-                    # Commit da transação
-                    self.data.db.conn.commit()
-                    
-                    print(f"Produto atualizado diretamente no banco de dados")
-                    
-                    # Adicionar à fila de sincronização
-                    updated_product = self.product.copy()
-                    updated_product["weeklyUsage"] = usage_data
-                    updated_product["lastUpdateDate"] = datetime.now().strftime("%d/%m/%Y")
-                    
-                    self.data.db.add_sync_operation('update', 'products', self.product["id"], updated_product)
+                    logger.debug("Uso semanal gravado na série temporal")
                     
                     # Forçar atualização dos dados em cache
                     self.data.refresh_data()
-                    
+                
+                def on_saved(_):
                     # Mostrar mensagem de sucesso
                     self.navigation.show_snack_bar(
                         "Uso semanal atualizado com sucesso!",
                         "#2ED573"
                     )
                     
-                    # Atualizar o produto na tela atual
-                    self.product = updated_product
-                    
-                    # Atualizar a tela atual em vez de voltar
-                    self.navigation.update_view()
-                    
-                except Exception as db_error:
+                    # Atualizar a tela atual em vez de voltar (os dados já foram recarregados)
+                    self.navigation.update_view(refresh=False)
+                
+                def on_error(db_error):
                     print(f"Erro ao atualizar banco de dados: {db_error}")
-                    import traceback
-                    traceback.print_exc()
-                    
                     self.navigation.show_snack_bar(
                         f"Erro ao atualizar banco de dados: {str(db_error)}",
                         "#FF6B6B"
                     )
+                
+                self.navigation.tasks.submit(save_usage, on_done=on_saved, on_error=on_error)
             except Exception as e:
                 # Mostrar mensagem de erro detalhada
                 print(f"Erro ao salvar uso semanal: {e}")
@@ -744,7 +688,6 @@ class WeeklyUsageScreen:
                 # Atualizar o produto com dados frescos do banco de dados
                 self.product = self.data.product_service._convert_to_dict([product_data])[0]
                 print(f"Produto recarregado do banco de dados após saída")
-                print(f"Uso semanal atualizado: {self.product.get('weeklyUsage', [])}")
                 
                 # Atualizar a tela
                 self.navigation.update_view()
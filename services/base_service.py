@@ -2,6 +2,11 @@ import json
 import traceback
 from datetime import datetime
 from contextlib import contextmanager
+import logging
+from .instrumentation import timed
+from .records import Record
+
+logger = logging.getLogger(__name__)
 
 class BaseService:
     """Classe base para serviços com funcionalidades compartilhadas"""
@@ -29,22 +34,62 @@ class BaseService:
         traceback.print_exc()
         return error_msg
     
+    def _sync_batch(self, operation_type, collection, document_ids, fields=None):
+        """Sincroniza a mesma alteração em vários documentos de uma coleção de uma só vez"""
+        if self.firebase and getattr(self.firebase, 'online_mode', False):
+            try:
+                self.firebase.commit_batch(collection, document_ids, fields)
+                logger.debug("Lote de %d documentos de %s sincronizado com o Firebase", len(document_ids), collection)
+                return
+            except Exception as e:
+                logger.error("Erro ao sincronizar lote de %s com o Firebase: %s", collection, e)
+        
+        # Adicionar à fila de sincronização para quando ficar online
+        self.db.add_batch_sync_operation(operation_type, collection, document_ids, fields)
+    
+    def _sync_writes(self, collection, writes):
+        """
+        Sincroniza escritas em documentos de várias coleções em um único lote.
+        
+        Args:
+            collection (str): Coleção principal do lote (identifica a operação na fila).
+            writes (list): Tuplas (coleção, ID do documento, campos ou None para excluir).
+        """
+        if self.firebase and getattr(self.firebase, 'online_mode', False):
+            try:
+                self.firebase.commit_writes(writes)
+                logger.debug("Lote de %d escritas sincronizado com o Firebase", len(writes))
+                return
+            except Exception as e:
+                logger.error("Erro ao sincronizar lote de %s com o Firebase: %s", collection, e)
+        
+        # Adicionar à fila de sincronização para quando ficar online
+        self.db.add_write_batch_sync_operation(collection, writes)
+    
+    @timed("firestore.sync_with_firebase")
     def sync_with_firebase(self, collection, doc_id, data, operation):
         """Sincroniza dados com o Firebase ou adiciona à fila de sincronização"""
+        if isinstance(data, Record):
+            data = data.copy()
         try:
             if self.firebase.online_mode:
                 if operation in ['add', 'update']:
                     self.firebase.db.collection(collection).document(doc_id).set(data)
-                    print(f"Dados sincronizados com Firebase: {collection}/{doc_id}")
+                    logger.debug("Dados sincronizados com Firebase: %s/%s", collection, doc_id)
+                    return True
+                elif operation == 'merge':
+                    # Apenas os campos alterados, mesclados no documento existente
+                    self.firebase.db.collection(collection).document(doc_id).set(data, merge=True)
+                    logger.debug("Campos mesclados no Firebase: %s/%s %s", collection, doc_id, list(data))
                     return True
                 elif operation == 'delete':
                     self.firebase.db.collection(collection).document(doc_id).delete()
-                    print(f"Documento excluído do Firebase: {collection}/{doc_id}")
+                    logger.debug("Documento excluído do Firebase: %s/%s", collection, doc_id)
                     return True
             else:
                 # Adicionar à fila de sincronização
                 self.db.add_sync_operation(operation, collection, doc_id, data)
-                print(f"Operação adicionada à fila de sincronização: {operation} {collection}/{doc_id}")
+                logger.debug("Operação adicionada à fila de sincronização: %s %s/%s", operation, collection, doc_id)
                 return True
         except Exception as e:
             self.log_error(f"Erro ao sincronizar com Firebase", e)
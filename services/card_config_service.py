@@ -1,10 +1,45 @@
+import json
+import traceback
+import logging
+
+logger = logging.getLogger(__name__)
+
 class CardConfigService:
-    """Serviço para gerenciar configurações de cards no dashboard"""
+    """Serviço para gerenciar configurações de cards no dashboard
+    
+    Todas as linhas de `dashboard_config` são lidas uma única vez e mantidas em
+    memória; as operações de escrita gravam no banco e atualizam o cache.
+    """
+    
+    DASHBOARD_PRODUCT_GROUPS = "dashboard_product_groups"
+    DASHBOARD_RESIDUE_GROUPS = "dashboard_residue_groups"
+    
+    # Configuração usada quando um grupo ainda não tem card personalizado
+    DEFAULT_PRODUCT_CONFIG = {
+        "icon": "INVENTORY_2_ROUNDED",
+        "color": "BLUE_500",
+        "bgcolor": "#FFFFFF",
+        "show_quantity": True,
+        "show_details": True,
+        "custom_title": "",
+        "priority": "normal"
+    }
+    DEFAULT_RESIDUE_CONFIG = {
+        "icon": "DELETE_OUTLINE",
+        "color": "PURPLE_500",
+        "bgcolor": "#FFFFFF",
+        "show_quantity": True,
+        "show_details": True,
+        "custom_title": "",
+        "priority": "normal"
+    }
     
     def __init__(self, firebase, db):
         self.firebase = firebase
         self.db = db
         self.collection_name = "dashboard_config"
+        # Cache {id da configuração: dicionário}, carregado sob demanda
+        self._configs = None
         
         # Garantir que a tabela exista se estiver usando SQLite
         if not hasattr(self.db, 'collection'):
@@ -34,535 +69,183 @@ class CardConfigService:
                 self._insert_default_configs()
             else:
                 print(f"Tabela {self.collection_name} já existe")
-                
+            
             return True
         except Exception as e:
             print(f"Erro ao criar tabela de configuração: {e}")
-            import traceback
             traceback.print_exc()
             return False
     
     def _insert_default_configs(self):
         """Insere configurações padrão na tabela"""
         try:
-            import json
-            
-            # Configuração padrão para grupos de produtos do dashboard
-            product_groups_config = {"group_ids": []}
-            self.db.execute_query(
-                f"INSERT INTO {self.collection_name} (id, config_data) VALUES (?, ?)",
-                ("dashboard_product_groups", json.dumps(product_groups_config))
-            )
-            
-            # Configuração padrão para grupos de resíduos do dashboard
-            residue_groups_config = {"group_ids": []}
-            self.db.execute_query(
-                f"INSERT INTO {self.collection_name} (id, config_data) VALUES (?, ?)",
-                ("dashboard_residue_groups", json.dumps(residue_groups_config))
-            )
+            for config_id in (self.DASHBOARD_PRODUCT_GROUPS, self.DASHBOARD_RESIDUE_GROUPS):
+                self.db.execute_query(
+                    f"INSERT INTO {self.collection_name} (id, config_data) VALUES (?, ?)",
+                    (config_id, json.dumps({"group_ids": []}))
+                )
             
             print("Configurações padrão inseridas com sucesso")
             return True
         except Exception as e:
             print(f"Erro ao inserir configurações padrão: {e}")
-            import traceback
             traceback.print_exc()
             return False
     
-    def get_product_group_config(self, group_id):
-        """Obtém a configuração de um grupo de produtos pelo ID"""
+    def _load_configs(self):
+        """Carrega todas as configurações para o cache, se ainda não estiverem carregadas"""
+        if self._configs is not None:
+            return self._configs
+        
+        configs = {}
         try:
-            config_id = f"product_{group_id}"
-            
             if hasattr(self.db, 'collection'):
                 # Usando Firebase
-                doc = self.db.collection(self.collection_name).document(config_id).get()
-                
-                if doc.exists:
-                    return doc.to_dict()
+                for doc in self.db.collection(self.collection_name).get():
+                    configs[doc.id] = doc.to_dict() or {}
             else:
                 # Usando SQLite
-                cursor = self.db.execute_query(
-                    f"SELECT * FROM {self.collection_name} WHERE id = ?",
-                    (config_id,)
-                )
-                
-                if cursor:
-                    row = cursor.fetchone()
-                    if row:
-                        # Converter a linha em um dicionário
-                        cursor.execute(f"PRAGMA table_info({self.collection_name})")
-                        columns = [info[1] for info in cursor.fetchall()]
-                        
-                        config = {}
-                        for i, col in enumerate(columns):
-                            if col == "config_data":
-                                # Se tiver um campo JSON, fazer parse
-                                import json
-                                try:
-                                    config = json.loads(row[i])
-                                except:
-                                    pass
-                            else:
-                                config[col] = row[i]
-                        
-                        return config
-            
-            # Configuração padrão se não encontrar
-            return {
-                "icon": "INVENTORY_2_ROUNDED",
-                "color": "BLUE_500",
-                "bgcolor": "#FFFFFF",
-                "show_quantity": True,
-                "show_details": True,
-                "custom_title": "",
-                "priority": "normal"
-            }
+                cursor = self.db.execute_query(f"SELECT id, config_data FROM {self.collection_name}")
+                for config_id, config_data in (cursor.fetchall() if cursor else []):
+                    try:
+                        configs[config_id] = json.loads(config_data) if config_data else {}
+                    except (ValueError, TypeError):
+                        logger.warning("Configuração inválida ignorada: %s", config_id)
+            logger.debug("%d configurações de cards carregadas", len(configs))
         except Exception as e:
-            print(f"Erro ao obter configuração do grupo de produtos: {e}")
-            return {
-                "icon": "INVENTORY_2_ROUNDED",
-                "color": "BLUE_500",
-                "bgcolor": "#FFFFFF",
-                "show_quantity": True,
-                "show_details": True,
-                "custom_title": "",
-                "priority": "normal"
-            }
+            logger.exception("Erro ao carregar configurações do dashboard: %s", e)
+            # Não guardar o cache em caso de erro, para tentar novamente depois
+            return configs
+        
+        self._configs = configs
+        return configs
     
-    def get_residue_group_config(self, group_id):
-        """Obtém a configuração de um grupo de resíduos pelo ID"""
-        try:
-            config_id = f"residue_{group_id}"
-            
-            if hasattr(self.db, 'collection'):
-                # Usando Firebase
-                doc = self.db.collection(self.collection_name).document(config_id).get()
-                
-                if doc.exists:
-                    return doc.to_dict()
-            else:
-                # Usando SQLite
-                cursor = self.db.execute_query(
-                    f"SELECT * FROM {self.collection_name} WHERE id = ?",
-                    (config_id,)
-                )
-                
-                if cursor:
-                    row = cursor.fetchone()
-                    if row:
-                        # Converter a linha em um dicionário
-                        cursor.execute(f"PRAGMA table_info({self.collection_name})")
-                        columns = [info[1] for info in cursor.fetchall()]
-                        
-                        config = {}
-                        for i, col in enumerate(columns):
-                            if col == "config_data":
-                                # Se tiver um campo JSON, fazer parse
-                                import json
-                                try:
-                                    config = json.loads(row[i])
-                                except:
-                                    pass
-                            else:
-                                config[col] = row[i]
-                        
-                        return config
-            
-            # Configuração padrão se não encontrar
-            return {
-                "icon": "DELETE_OUTLINE",
-                "color": "PURPLE_500",
-                "bgcolor": "#FFFFFF",
-                "show_quantity": True,
-                "show_details": True,
-                "custom_title": "",
-                "priority": "normal"
-            }
-        except Exception as e:
-            print(f"Erro ao obter configuração do grupo de resíduos: {e}")
-            return {
-                "icon": "DELETE_OUTLINE",
-                "color": "PURPLE_500",
-                "bgcolor": "#FFFFFF",
-                "show_quantity": True,
-                "show_details": True,
-                "custom_title": "",
-                "priority": "normal"
-            }
+    def invalidate_cache(self):
+        """Descarta o cache, forçando uma nova leitura na próxima consulta"""
+        self._configs = None
     
-    def save_product_group_config(self, group_id, config):
-        """Salva a configuração de um grupo de produtos pelo ID"""
+    def _get_config(self, config_id, default):
+        """Retorna uma cópia da configuração em cache (ou do padrão informado)"""
+        config = self._load_configs().get(config_id)
+        return dict(config if config is not None else default)
+    
+    def _save_config(self, config_id, config):
+        """Grava uma configuração no banco e atualiza o cache
+        
+        Uma configuração igual à que já está em cache não é gravada de novo.
+        """
+        if self._configs is not None and self._configs.get(config_id) == config:
+            return True
         try:
-            config_id = f"product_{group_id}"
-            
             if hasattr(self.db, 'collection'):
                 # Usando Firebase
                 self.db.collection(self.collection_name).document(config_id).set(config)
             else:
                 # Usando SQLite
-                # Verificar se a tabela existe
-                self._ensure_config_table_exists()
-                
-                # Converter config para JSON
-                import json
-                config_json = json.dumps(config)
-                
-                # Verificar se o registro já existe
                 cursor = self.db.execute_query(
-                    f"SELECT id FROM {self.collection_name} WHERE id = ?",
-                    (config_id,)
+                    f"""INSERT INTO {self.collection_name} (id, config_data) VALUES (?, ?)
+                    ON CONFLICT(id) DO UPDATE SET config_data = excluded.config_data""",
+                    (config_id, json.dumps(config))
                 )
-                
-                if cursor and cursor.fetchone():
-                    # Atualizar registro existente
-                    self.db.execute_query(
-                        f"UPDATE {self.collection_name} SET config_data = ? WHERE id = ?",
-                        (config_json, config_id)
-                    )
-                else:
-                    # Inserir novo registro
-                    self.db.execute_query(
-                        f"INSERT INTO {self.collection_name} (id, config_data) VALUES (?, ?)",
-                        (config_id, config_json)
-                    )
+                if cursor is None:
+                    self.invalidate_cache()
+                    return False
             
+            if self._configs is not None:
+                self._configs[config_id] = dict(config)
             return True
         except Exception as e:
-            print(f"Erro ao salvar configuração do grupo de produtos: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Erro ao salvar configuração '%s': %s", config_id, e)
+            self.invalidate_cache()
             return False
     
+    def get_product_group_config(self, group_id):
+        """Obtém a configuração de um grupo de produtos pelo ID"""
+        return self._get_config(f"product_{group_id}", self.DEFAULT_PRODUCT_CONFIG)
+    
+    def get_residue_group_config(self, group_id):
+        """Obtém a configuração de um grupo de resíduos pelo ID"""
+        return self._get_config(f"residue_{group_id}", self.DEFAULT_RESIDUE_CONFIG)
+    
+    def save_product_group_config(self, group_id, config):
+        """Salva a configuração de um grupo de produtos pelo ID"""
+        return self._save_config(f"product_{group_id}", config)
+    
     def save_residue_group_config(self, group_id, config):
         """Salva a configuração de um grupo de resíduos pelo ID"""
-        try:
-            config_id = f"residue_{group_id}"
-            
-            if hasattr(self.db, 'collection'):
-                # Usando Firebase
-                self.db.collection(self.collection_name).document(config_id).set(config)
-            else:
-                # Usando SQLite
-                # Verificar se a tabela existe
-                self._ensure_config_table_exists()
-                
-                # Converter config para JSON
-                import json
-                config_json = json.dumps(config)
-                
-                # Verificar se o registro já existe
-                cursor = self.db.execute_query(
-                    f"SELECT id FROM {self.collection_name} WHERE id = ?",
-                    (config_id,)
-                )
-                
-                if cursor and cursor.fetchone():
-                    # Atualizar registro existente
-                    self.db.execute_query(
-                        f"UPDATE {self.collection_name} SET config_data = ? WHERE id = ?",
-                        (config_json, config_id)
-                    )
-                else:
-                    # Inserir novo registro
-                    self.db.execute_query(
-                        f"INSERT INTO {self.collection_name} (id, config_data) VALUES (?, ?)",
-                        (config_id, config_json)
-                    )
-            
-            return True
-        except Exception as e:
-            print(f"Erro ao salvar configuração do grupo de resíduos: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
+        return self._save_config(f"residue_{group_id}", config)
     
     def get_dashboard_product_group_ids(self):
         """Obtém a lista de IDs de grupos de produtos configurados para o dashboard"""
-        try:
-            config_id = "dashboard_product_groups"
-            
-            if hasattr(self.db, 'collection'):
-                # Usando Firebase
-                doc = self.db.collection(self.collection_name).document(config_id).get()
-                
-                if doc.exists:
-                    return doc.to_dict().get("group_ids", [])
-            else:
-                # Usando SQLite
-                # Garantir que a tabela existe
-                self._ensure_config_table_exists()
-                
-                cursor = self.db.execute_query(
-                    f"SELECT config_data FROM {self.collection_name} WHERE id = ?",
-                    (config_id,)
-                )
-                
-                if cursor:
-                    row = cursor.fetchone()
-                    if row and row[0]:
-                        # Converter JSON para dicionário
-                        import json
-                        try:
-                            config = json.loads(row[0])
-                            return config.get("group_ids", [])
-                        except:
-                            pass
-            
-            return []
-        except Exception as e:
-            print(f"Erro ao obter grupos de produtos do dashboard: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+        return list(self._get_config(self.DASHBOARD_PRODUCT_GROUPS, {}).get("group_ids", []))
     
     def get_dashboard_residue_group_ids(self):
         """Obtém a lista de IDs de grupos de resíduos configurados para o dashboard"""
-        try:
-            config_id = "dashboard_residue_groups"
-            
-            if hasattr(self.db, 'collection'):
-                # Usando Firebase
-                doc = self.db.collection(self.collection_name).document(config_id).get()
-                
-                if doc.exists:
-                    return doc.to_dict().get("group_ids", [])
-            else:
-                # Usando SQLite
-                # Garantir que a tabela existe
-                self._ensure_config_table_exists()
-                
-                cursor = self.db.execute_query(
-                    f"SELECT config_data FROM {self.collection_name} WHERE id = ?",
-                    (config_id,)
-                )
-                
-                if cursor:
-                    row = cursor.fetchone()
-                    if row and row[0]:
-                        # Converter JSON para dicionário
-                        import json
-                        try:
-                            config = json.loads(row[0])
-                            return config.get("group_ids", [])
-                        except:
-                            pass
-            
-            return []
-        except Exception as e:
-            print(f"Erro ao obter grupos de resíduos do dashboard: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+        return list(self._get_config(self.DASHBOARD_RESIDUE_GROUPS, {}).get("group_ids", []))
     
-    def get_dashboard_residue_group_ids(self):
-        """Obtém a lista de IDs de grupos de resíduos configurados para o dashboard"""
-        try:
-            config_id = "dashboard_residue_groups"
-            
-            if hasattr(self.db, 'collection'):
-                # Usando Firebase
-                doc = self.db.collection(self.collection_name).document(config_id).get()
-                
-                if doc.exists:
-                    return doc.to_dict().get("group_ids", [])
-            else:
-                # Usando SQLite
-                cursor = self.db.execute_query(
-                    f"SELECT config_data FROM {self.collection_name} WHERE id = ?",
-                    (config_id,)
-                )
-                
-                if cursor:
-                    row = cursor.fetchone()
-                    if row and row[0]:
-                        # Converter JSON para dicionário
-                        import json
-                        try:
-                            config = json.loads(row[0])
-                            return config.get("group_ids", [])
-                        except:
-                            pass
-            
-            return []
-        except Exception as e:
-            print(f"Erro ao obter grupos de resíduos do dashboard: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+    def get_dashboard_layout(self):
+        """
+        Retorna, em uma única chamada, tudo o que o dashboard precisa para montar os cards.
+        
+        Returns:
+            dict: IDs dos grupos exibidos ("product_group_ids", "residue_group_ids") e
+                a configuração do card de cada um ("product_configs", "residue_configs").
+        """
+        product_group_ids = self.get_dashboard_product_group_ids()
+        residue_group_ids = self.get_dashboard_residue_group_ids()
+        return {
+            "product_group_ids": product_group_ids,
+            "residue_group_ids": residue_group_ids,
+            "product_configs": {
+                group_id: self.get_product_group_config(group_id) for group_id in product_group_ids
+            },
+            "residue_configs": {
+                group_id: self.get_residue_group_config(group_id) for group_id in residue_group_ids
+            }
+        }
     
     def save_dashboard_product_group_ids(self, group_ids):
         """Salva a lista de IDs de grupos de produtos configurados para o dashboard"""
-        try:
-            config_id = "dashboard_product_groups"
-            config = {"group_ids": group_ids}
-            
-            if hasattr(self.db, 'collection'):
-                # Usando Firebase
-                self.db.collection(self.collection_name).document(config_id).set(config)
-            else:
-                # Usando SQLite
-                # Verificar se a tabela existe
-                self._ensure_config_table_exists()
-                
-                # Converter config para JSON
-                import json
-                config_json = json.dumps(config)
-                
-                # Verificar se o registro já existe
-                cursor = self.db.execute_query(
-                    f"SELECT id FROM {self.collection_name} WHERE id = ?",
-                    (config_id,)
-                )
-                
-                if cursor and cursor.fetchone():
-                    # Atualizar registro existente
-                    self.db.execute_query(
-                        f"UPDATE {self.collection_name} SET config_data = ? WHERE id = ?",
-                        (config_json, config_id)
-                    )
-                else:
-                    # Inserir novo registro
-                    self.db.execute_query(
-                        f"INSERT INTO {self.collection_name} (id, config_data) VALUES (?, ?)",
-                        (config_id, config_json)
-                    )
-            
-            return True
-        except Exception as e:
-            print(f"Erro ao salvar grupos de produtos do dashboard: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
+        return self._save_config(self.DASHBOARD_PRODUCT_GROUPS, {"group_ids": list(group_ids)})
     
     def save_dashboard_residue_group_ids(self, group_ids):
         """Salva a lista de IDs de grupos de resíduos configurados para o dashboard"""
-        try:
-            config_id = "dashboard_residue_groups"
-            config = {"group_ids": group_ids}
-            
-            if hasattr(self.db, 'collection'):
-                # Usando Firebase
-                self.db.collection(self.collection_name).document(config_id).set(config)
-            else:
-                # Usando SQLite
-                # Verificar se a tabela existe
-                self._ensure_config_table_exists()
-                
-                # Converter config para JSON
-                import json
-                config_json = json.dumps(config)
-                
-                # Verificar se o registro já existe
-                cursor = self.db.execute_query(
-                    f"SELECT id FROM {self.collection_name} WHERE id = ?",
-                    (config_id,)
-                )
-                
-                if cursor and cursor.fetchone():
-                    # Atualizar registro existente
-                    self.db.execute_query(
-                        f"UPDATE {self.collection_name} SET config_data = ? WHERE id = ?",
-                        (config_json, config_id)
-                    )
-                else:
-                    # Inserir novo registro
-                    self.db.execute_query(
-                        f"INSERT INTO {self.collection_name} (id, config_data) VALUES (?, ?)",
-                        (config_id, config_json)
-                    )
-            
-            return True
-        except Exception as e:
-            print(f"Erro ao salvar grupos de resíduos do dashboard: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
+        return self._save_config(self.DASHBOARD_RESIDUE_GROUPS, {"group_ids": list(group_ids)})
     
     def add_product_group_to_dashboard(self, group):
         """Adiciona um grupo de produtos ao dashboard"""
-        try:
-            group_id = group.get("id", "")
-            if not group_id:
-                return False
-                
-            # Obter IDs de grupos atuais
-            current_group_ids = self.get_dashboard_product_group_ids()
-            
-            # Verificar se o grupo já existe
-            if group_id in current_group_ids:
-                return False
-            
-            # Adicionar novo ID de grupo
-            current_group_ids.append(group_id)
-            
-            # Salvar IDs de grupos atualizados
-            return self.save_dashboard_product_group_ids(current_group_ids)
-        except Exception as e:
-            print(f"Erro ao adicionar grupo de produtos ao dashboard: {e}")
-            import traceback
-            traceback.print_exc()
+        group_id = group.get("id", "")
+        current_group_ids = self.get_dashboard_product_group_ids()
+        if not group_id or group_id in current_group_ids:
             return False
+        
+        current_group_ids.append(group_id)
+        return self.save_dashboard_product_group_ids(current_group_ids)
     
     def add_residue_group_to_dashboard(self, group):
         """Adiciona um grupo de resíduos ao dashboard"""
-        try:
-            group_id = group.get("id", "")
-            if not group_id:
-                return False
-                
-            # Obter IDs de grupos atuais
-            current_group_ids = self.get_dashboard_residue_group_ids()
-            
-            # Verificar se o grupo já existe
-            if group_id in current_group_ids:
-                return False
-            
-            # Adicionar novo ID de grupo
-            current_group_ids.append(group_id)
-            
-            # Salvar IDs de grupos atualizados
-            return self.save_dashboard_residue_group_ids(current_group_ids)
-        except Exception as e:
-            print(f"Erro ao adicionar grupo de resíduos ao dashboard: {e}")
-            import traceback
-            traceback.print_exc()
+        group_id = group.get("id", "")
+        current_group_ids = self.get_dashboard_residue_group_ids()
+        if not group_id or group_id in current_group_ids:
             return False
+        
+        current_group_ids.append(group_id)
+        return self.save_dashboard_residue_group_ids(current_group_ids)
     
     def remove_product_group_from_dashboard(self, group_id):
         """Remove um grupo de produtos do dashboard"""
-        try:
-            # Obter IDs de grupos atuais
-            current_group_ids = self.get_dashboard_product_group_ids()
-            
-            # Filtrar ID de grupo a ser removido
-            if group_id in current_group_ids:
-                current_group_ids.remove(group_id)
-                
-                # Salvar IDs de grupos atualizados
-                return self.save_dashboard_product_group_ids(current_group_ids)
-            return False
-        except Exception as e:
-            print(f"Erro ao remover grupo de produtos do dashboard: {e}")
-            import traceback
-            traceback.print_exc()
+        current_group_ids = self.get_dashboard_product_group_ids()
+        if group_id not in current_group_ids:
             return False
+        
+        current_group_ids.remove(group_id)
+        return self.save_dashboard_product_group_ids(current_group_ids)
     
     def remove_residue_group_from_dashboard(self, group_id):
         """Remove um grupo de resíduos do dashboard"""
-        try:
-            # Obter IDs de grupos atuais
-            current_group_ids = self.get_dashboard_residue_group_ids()
-            
-            # Filtrar ID de grupo a ser removido
-            if group_id in current_group_ids:
-                current_group_ids.remove(group_id)
-                
-                # Salvar IDs de grupos atualizados
-                return self.save_dashboard_residue_group_ids(current_group_ids)
+        current_group_ids = self.get_dashboard_residue_group_ids()
+        if group_id not in current_group_ids:
             return False
-        except Exception as e:
-            print(f"Erro ao remover grupo de resíduos do dashboard: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
\ No newline at end of file
+        
+        current_group_ids.remove(group_id)
+        return self.save_dashboard_residue_group_ids(current_group_ids)
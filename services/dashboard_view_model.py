@@ -0,0 +1,119 @@
+import heapq
+from datetime import datetime
+
+from .stock_columns import StockColumns, _to_int
+
+# Quantidade de itens destacados em cada card (vencimento próximo / registros recentes)
+TOP_ITEMS = 3
+
+
+def _parse_date(date_str, default):
+    """Converte uma data no formato DD/MM/AAAA, retornando `default` se inválida"""
+    if not date_str:
+        return default
+    try:
+        return datetime.strptime(date_str, "%d/%m/%Y")
+    except (ValueError, TypeError):
+        return default
+
+
+def build_dashboard_view(products, residues, product_groups, residue_groups, layout, top_items=TOP_ITEMS,
+                         columns=None):
+    """
+    Calcula, a partir dos dados em cache, tudo o que os cards do dashboard exibem.
+
+    Args:
+        products (list): Produtos em estoque, com group_id (linhas do
+            ProductService.PRODUCT_SELECT); os cards agrupam por ele.
+        residues (list): Resíduos.
+        product_groups (list): Todos os grupos de produtos.
+        residue_groups (list): Todos os grupos de resíduos.
+        layout (dict): Resultado de CardConfigService.get_dashboard_layout().
+        top_items (int, optional): Itens destacados por card.
+        columns (StockColumns, optional): Instantâneo colunar de `products`;
+            criado aqui se omitido.
+
+    Returns:
+        dict: {
+            "product_cards": {group_id: card}, "residue_cards": {group_id: card},
+            "total_stock": int, "total_residues": int
+        }
+        Cada card traz name, group_id, group_data, config, items, quantity e,
+        para produtos, low_stock_count e expiring_soon [(produto, dias)];
+        para resíduos, recent (lista de resíduos mais recentes).
+    """
+    product_groups_map = {g["id"]: g for g in product_groups}
+    residue_groups_map = {g["id"]: g for g in residue_groups}
+
+    product_cards = {}
+    for group_id in layout["product_group_ids"]:
+        group = product_groups_map.get(group_id)
+        if group:
+            product_cards[group_id] = {
+                "name": group.get("name", ""),
+                "group_id": group_id,
+                "group_data": group,
+                "config": layout["product_configs"].get(group_id)
+            }
+
+    residue_cards = {}
+    for group_id in layout["residue_group_ids"]:
+        group = residue_groups_map.get(group_id)
+        if group:
+            residue_cards[group_id] = {
+                "name": group.get("name", ""),
+                "group_id": group_id,
+                "group_data": group,
+                "config": layout["residue_configs"].get(group_id),
+                "items": [],
+                "quantity": 0,
+                "_recent_heap": []
+            }
+
+    # Produtos: totais por grupo vetorizados no instantâneo colunar; só os
+    # produtos dos grupos exibidos nos cards são visitados
+    if columns is None:
+        columns = StockColumns(products)
+    group_totals = columns.group_totals()
+    total_stock = columns.total_quantity()
+    now = datetime.now()
+    for group_id, card in product_cards.items():
+        positions = columns.members(group_id)
+        totals = group_totals.get(group_id, {})
+        card["items"] = [products[i] for i in positions]
+        card["quantity"] = totals.get("quantity", 0)
+        card["low_stock_count"] = totals.get("low_stock", 0)
+        card["expiring_soon"] = [
+            (products[i], (_parse_date(products[i].get("expiry"), datetime.max) - now).days)
+            for i in columns.nearest_expiry(positions, top_items)
+        ]
+
+    # Resíduos: total geral e agregados por card, mantendo apenas os N com
+    # entrada mais recente em um heap de tamanho fixo
+    total_residues = 0
+    for index, residue in enumerate(residues):
+        quantity = _to_int(residue.get("quantity"))
+        total_residues += quantity
+
+        card = residue_cards.get(residue.get("group_id", ""))
+        if card is None:
+            continue
+        card["items"].append(residue)
+        card["quantity"] += quantity
+
+        entry = (_parse_date(residue.get("entryDate"), datetime.min).toordinal(), -index, residue)
+        heap = card["_recent_heap"]
+        if len(heap) < top_items:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    for card in residue_cards.values():
+        card["recent"] = [residue for _, _, residue in sorted(card.pop("_recent_heap"), reverse=True)]
+
+    return {
+        "product_cards": product_cards,
+        "residue_cards": residue_cards,
+        "total_stock": total_stock,
+        "total_residues": total_residues
+    }
@@ -1,13 +1,23 @@
 import flet as ft
 from datetime import datetime
+from itertools import islice
+import heapq
 import json
 import time
 import threading
+import logging
 import traceback
+from services.instrumentation import timed
+from services.data_snapshot import DataSnapshot
+
+logger = logging.getLogger(__name__)
 
 class DataService:
     """Serviço central para gerenciamento de dados da aplicação"""
     
+    # Quantidade de notificações carregadas por página
+    NOTIFICATIONS_PAGE_SIZE = 50
+    
     def __init__(self):
         """Inicializa o serviço de dados"""
         # Importar serviços
@@ -18,6 +28,9 @@ class DataService:
         from services.notification_service import NotificationService
         from services.settings_service import SettingsService
         from services.group_service import GroupService
+        from services.card_config_service import CardConfigService
+        from services.service_registry import ServiceRegistry
+        from config.logging_config import set_log_level
         
         # Inicializar serviços
         self.firebase = FirebaseConfig()
@@ -29,24 +42,47 @@ class DataService:
         # Verificar tabelas específicas
         self.db.verify_products_table()
         self.db.verify_product_history_table()
+        self.db.verify_stock_movements_table()
+        self.db.verify_daily_movements_table()
+        self.db.verify_usage_timeseries_table()
+        
+        # Inicializar serviços específicos (uma única instância de cada, compartilhada
+        # pelas telas e pelos próprios serviços)
+        self.services = ServiceRegistry(self.firebase, self.db)
+        self.product_service = self.services.get(ProductService)
+        self.residue_service = self.services.get(ResidueService)
+        self.notification_service = self.services.get(NotificationService)
+        self.settings_service = self.services.get(SettingsService)
+        self.group_service = self.services.get(GroupService)
+        self.card_config_service = self.services.get(CardConfigService)
+        
+        # Recalcular estoque baixo/vencimento apenas quando os limites mudarem
+        self.settings_service.add_observer(
+            self._on_alert_settings_changed,
+            ("notifications.lowStockThreshold", "notifications.expiryWarningDays")
+        )
         
-        # Inicializar serviços específicos
-        self.product_service = ProductService(self.firebase, self.db)
-        self.residue_service = ResidueService(self.firebase, self.db)
-        self.notification_service = NotificationService(self.firebase, self.db)
-        self.settings_service = SettingsService(self.firebase, self.db)
-        self.group_service = GroupService(self.firebase, self.db)
-        
-        # Cache local
-        self._stock_products = []
-        self._low_stock_products = []
-        self._expiring_products = []
-        self._residues = []
-        self._notifications = []
-        self._settings = None
-        self._weekly_usage_data = []
-        self._product_groups = []
-        self._residue_groups = []
+        # Nível de log definido nas configurações
+        set_log_level(self.settings_service.get_snapshot().log_level)
+        self.settings_service.add_observer(
+            lambda settings, previous, changed: set_log_level(settings.log_level),
+            ("logLevel",)
+        )
+        
+        # Cache local: as listas são publicadas juntas em um DataSnapshot
+        # imutável, substituído por inteiro a cada carga (ver refresh_data)
+        self._snapshot = DataSnapshot()
+        self._snapshot_lock = threading.Lock()
+        self._refresh_generation = 0
+        self._refresh_running = False
+        self._refresh_queued = None
+        self._notifications = None
+        self._weekly_usage_data = None
+        self._usage_totals = {}
+        self._dashboard_view = None
+        self._products_by_group = None
+        self._residues_by_group = None
+        self._stock_columns = None
         
         # Dados para novos itens
         self.new_product = self._get_empty_product()
@@ -58,6 +94,9 @@ class DataService:
         # Referência à navegação (será definida em main.py)
         self.navigation = None
         
+        # Arquivar notificações lidas antigas antes da primeira carga
+        self.notification_service.archive_old_notifications()
+        
         # Carregar dados iniciais
         self.refresh_data()
         
@@ -107,7 +146,7 @@ class DataService:
                     time.sleep(24 * 60 * 60)  # 24 horas
                     
                     # Verificar se backup está habilitado nas configurações
-                    if self._settings and self._settings.get("backupEnabled", True):
+                    if self.settings_service.get_snapshot().backup_enabled:
                         self.db.backup_database()
                 except Exception as e:
                     print(f"Erro na thread de backup: {e}")
@@ -119,22 +158,23 @@ class DataService:
         backup_thread.start()
         print("Thread de backup automático iniciada")
     
+    @timed("firestore.sync_pending")
     def sync_with_firebase(self):
         """Sincroniza dados locais com o Firebase"""
         if not self.firebase.check_connection():
-            print("Firebase indisponível, sincronização adiada")
+            logger.debug("Firebase indisponível, sincronização adiada")
             return False
         
-        print("Iniciando sincronização com Firebase...")
+        logger.debug("Iniciando sincronização com Firebase...")
         self.online_mode = True
         
         # Buscar operações pendentes
         pending_ops = self.db.get_pending_sync_operations()
         if not pending_ops:
-            print("Nenhuma operação pendente para sincronizar")
+            logger.debug("Nenhuma operação pendente para sincronizar")
             return True
         
-        print(f"Encontradas {len(pending_ops)} operações pendentes")
+        logger.info("Encontradas %d operações pendentes", len(pending_ops))
         success_count = 0
         
         for op in pending_ops:
@@ -143,16 +183,32 @@ class DataService:
                 doc_id = op['document_id']
                 data = op['data']
                 
-                print(f"Processando operação: {op['operation_type']} para {collection}/{doc_id}")
+                logger.debug("Processando operação: %s para %s/%s", op['operation_type'], collection, doc_id)
                 
                 if op['operation_type'] == 'add' or op['operation_type'] == 'update':
                     # Adicionar ou atualizar documento
                     self.firebase.db.collection(collection).document(doc_id).set(data)
-                    print(f"Documento {doc_id} adicionado/atualizado no Firebase")
+                    logger.debug("Documento %s adicionado/atualizado no Firebase", doc_id)
+                elif op['operation_type'] == 'merge':
+                    # Apenas os campos alterados
+                    self.firebase.db.collection(collection).document(doc_id).set(data, merge=True)
+                    logger.debug("Campos mesclados no documento %s do Firebase", doc_id)
                 elif op['operation_type'] == 'delete':
                     # Excluir documento
                     self.firebase.db.collection(collection).document(doc_id).delete()
-                    print(f"Documento {doc_id} excluído do Firebase")
+                    logger.debug("Documento %s excluído do Firebase", doc_id)
+                elif op['operation_type'] == 'batch_update':
+                    # Mesclar os mesmos campos em vários documentos
+                    self.firebase.commit_batch(collection, data["ids"], data.get("fields") or {})
+                    logger.debug("%d documentos atualizados em lote no Firebase", len(data['ids']))
+                elif op['operation_type'] == 'batch_delete':
+                    # Excluir vários documentos
+                    self.firebase.commit_batch(collection, data["ids"])
+                    logger.debug("%d documentos excluídos em lote do Firebase", len(data['ids']))
+                elif op['operation_type'] == 'batch_write':
+                    # Escritas em documentos de várias coleções, em um único lote
+                    self.firebase.commit_writes(data["writes"])
+                    logger.debug("Lote de %d escritas aplicado no Firebase", len(data['writes']))
                 
                 # Marcar como sincronizado
                 self.db.mark_sync_operation_completed(op['id'])
@@ -163,59 +219,174 @@ class DataService:
                 import traceback
                 traceback.print_exc()
         
-        print(f"Sincronização concluída: {success_count}/{len(pending_ops)} operações processadas")
+        logger.info("Sincronização concluída: %d/%d operações processadas", success_count, len(pending_ops))
         
         # Atualizar dados após sincronização
         self.refresh_data()
         return True
         
+    @timed()
     def refresh_data(self):
-        """Atualiza todos os dados do cache local"""
+        """Atualiza todos os dados do cache local
+        
+        A nova carga é montada por completo em variáveis locais e só então
+        publicada, com uma única troca de referência: quem lê o cache em
+        outra thread continua vendo o instantâneo anterior, inteiro, até a
+        troca. Pode ser chamado de qualquer thread (cada uma usa a própria
+        conexão SQLite); veja também refresh_data_in_background.
+        """
         try:
-            print("Atualizando dados do cache local...")
+            logger.debug("Atualizando dados do cache local...")
+            generation = self._next_refresh_generation()
             
             # Verificar conexão com Firebase
             self.online_mode = self.firebase.check_connection()
             
-            # Limpar cache atual
-            self._stock_products = []
-            self._residues = []
-            self._product_groups = []
-            self._residue_groups = []
-            
             # Buscar dados locais
-            self._stock_products = self.product_service.get_all_products()
-            print(f"Produtos carregados: {len(self._stock_products)}")
-            
-            self._residues = self.residue_service.get_all_residues()
-            print(f"Resíduos carregados: {len(self._residues)}")
+            stock_products = self.product_service.get_all_products()
+            logger.debug("Produtos carregados: %d", len(stock_products))
+            # Produtos podem ter mudado fora do ProductService (sincronização, exclusão de grupo)
+            self.product_service.scan_lookup.invalidate()
             
-            self._notifications = self.notification_service.get_unread_notifications()
-            self._settings = self.settings_service.get_settings()
+            residues = self.residue_service.get_all_residues()
+            logger.debug("Resíduos carregados: %d", len(residues))
             
             # Carregar grupos
-            self._product_groups = self.group_service.get_all_product_groups()
-            print(f"Grupos de produtos carregados: {len(self._product_groups)}")
+            product_groups = self.group_service.get_all_product_groups()
+            logger.debug("Grupos de produtos carregados: %d", len(product_groups))
             
-            self._residue_groups = self.group_service.get_all_residue_groups()
-            print(f"Grupos de resíduos carregados: {len(self._residue_groups)}")
+            residue_groups = self.group_service.get_all_residue_groups()
+            logger.debug("Grupos de resíduos carregados: %d", len(residue_groups))
             
-            # Atualizar listas filtradas
-            self._update_filtered_lists()
+            # Listas filtradas, com os limites de alerta atuais
+            settings = self.settings_service.get_snapshot()
+            low_stock_products, expiring_products = self._build_alert_lists(stock_products, settings)
             
-            # Atualizar dados de uso semanal
-            self._weekly_usage_data = self.product_service.get_weekly_usage_data()
+            # Se uma alteração local foi publicada durante a carga, a geração
+            # avançou e esta carga (lida antes dela) é descartada
+            self._publish_snapshot(DataSnapshot(
+                stock_products, low_stock_products, expiring_products, residues,
+                product_groups, residue_groups, settings, generation
+            ))
             
             # Verificar e criar notificações automáticas
             self.notification_service.check_and_create_notifications()
             
-            print(f"Dados atualizados: {len(self._stock_products)} produtos, {len(self._residues)} resíduos")
+            logger.info("Dados atualizados: %d produtos, %d resíduos", len(stock_products), len(residues))
             return True
         except Exception as e:
             print(f"ERRO ao atualizar dados: {e}")
             import traceback
             traceback.print_exc()
             return False
+    
+    def _next_refresh_generation(self):
+        """Número de ordem de uma nova carga (compartilhado com as atualizações locais)"""
+        with self._snapshot_lock:
+            self._refresh_generation += 1
+            return self._refresh_generation
+    
+    def _publish_snapshot(self, snapshot):
+        """
+        Publica um instantâneo completo com uma única troca de referência.
+        
+        A trava só serializa os publicadores; os leitores não a usam. Uma carga
+        que termina depois de outra iniciada mais tarde, ou depois de uma
+        atualização local (_update_snapshot), é descartada, para que dados
+        antigos não substituam os mais novos.
+        
+        Returns:
+            bool: True se o instantâneo foi publicado.
+        """
+        with self._snapshot_lock:
+            if snapshot.generation < self._snapshot.generation:
+                logger.debug("Carga %d descartada: a %d já foi publicada",
+                             snapshot.generation, self._snapshot.generation)
+                return False
+            self._snapshot = snapshot
+            # Caches derivados da carga anterior; notificações e uso são lidos sob demanda
+            self._notifications = None
+            self._weekly_usage_data = None
+            self._usage_totals = {}
+        return True
+    
+    def _update_snapshot(self, **changes):
+        """
+        Publica uma cópia do instantâneo atual com alguns campos substituídos.
+        
+        Se os produtos ou as configurações mudarem, as listas de estoque baixo e
+        de vencimento são recalculadas no novo instantâneo. A cópia recebe uma
+        nova geração, então uma carga em andamento, iniciada antes desta
+        alteração, não a sobrescreve ao terminar.
+        """
+        with self._snapshot_lock:
+            self._refresh_generation += 1
+            snapshot = self._snapshot.replace(generation=self._refresh_generation, **changes)
+            if "stock_products" in changes or "settings" in changes:
+                settings = snapshot.settings or self.settings_service.get_snapshot()
+                low_stock_products, expiring_products = self._build_alert_lists(snapshot.stock_products, settings)
+                snapshot = snapshot.replace(low_stock_products=low_stock_products, expiring_products=expiring_products)
+            self._snapshot = snapshot
+        return snapshot
+    
+    def refresh_data_in_background(self, on_done=None):
+        """
+        Executa refresh_data em uma thread de fundo, sem bloquear quem chamou.
+        
+        Pedidos feitos enquanto uma carga está em andamento são agrupados em uma
+        única nova carga ao final dela, e seus callbacks esperam por ela.
+        
+        Args:
+            on_done (callable, optional): Chamado na thread de fundo com o
+                resultado (bool) depois que o novo instantâneo é publicado.
+        
+        Returns:
+            bool: True se uma nova thread de atualização foi iniciada.
+        """
+        with self._snapshot_lock:
+            if self._refresh_running:
+                if self._refresh_queued is None:
+                    self._refresh_queued = []
+                if on_done:
+                    self._refresh_queued.append(on_done)
+                return False
+            self._refresh_running = True
+        
+        callbacks = [on_done] if on_done else []
+        threading.Thread(target=self._refresh_worker, args=(callbacks,), daemon=True).start()
+        return True
+    
+    def _refresh_worker(self, callbacks):
+        """Laço da thread de refresh_data_in_background"""
+        while True:
+            try:
+                success = self.refresh_data()
+            except Exception as e:
+                logger.exception("Erro na atualização em segundo plano: %s", e)
+                success = False
+            for callback in callbacks:
+                try:
+                    callback(success)
+                except Exception as e:
+                    logger.exception("Erro no retorno da atualização em segundo plano: %s", e)
+            
+            with self._snapshot_lock:
+                callbacks = self._refresh_queued
+                self._refresh_queued = None
+                if callbacks is None:
+                    self._refresh_running = False
+                    return
+    
+    @property
+    def snapshot(self):
+        """
+        Instantâneo atual do cache (DataSnapshot).
+        
+        Para combinar várias listas de forma consistente (ex.: produtos e
+        estoque baixo), leia-as do mesmo instantâneo em vez de usar as
+        propriedades uma a uma, que podem cair em cargas diferentes.
+        """
+        return self._snapshot
 
     def _add_sample_data(self):
         """Adiciona dados de exemplo para teste"""
@@ -322,31 +493,50 @@ class DataService:
                 self.add_residue()
             
             # Atualizar dados novamente
-            self._stock_products = self.product_service.get_all_products()
-            self._residues = self.residue_service.get_all_residues()
-            self._update_filtered_lists()
+            self.refresh_data()
             
-            print(f"Dados de exemplo adicionados: {len(self._stock_products)} produtos, {len(self._residues)} resíduos")
+            logger.info("Dados de exemplo adicionados: %d produtos, %d resíduos", len(self.stock_products), len(self.residues))
             return True
         except Exception as e:
             print(f"Erro ao adicionar dados de exemplo: {e}")
             traceback.print_exc()
             return False
     
-    def _update_filtered_lists(self):
-        """Atualiza as listas de produtos com estoque baixo e próximos ao vencimento"""
+    def _build_alert_lists(self, products, settings):
+        """Filtra as listas de produtos com estoque baixo e próximos ao vencimento
+        
+        As listas reaproveitam os mesmos registros (imutáveis) de `products`
+        em vez de carregar os produtos de novo.
+        
+        Returns:
+            tuple: (estoque baixo, vencendo)
+        """
         try:
-            settings = self._settings or {}
-            threshold = settings.get("notifications", {}).get("lowStockThreshold", 5)
-            expiry_days = settings.get("notifications", {}).get("expiryWarningDays", 30)
+            threshold = settings.low_stock_threshold
+            low_stock_products = sorted(
+                (p for p in products if p["quantity"] <= threshold), key=lambda p: p["quantity"]
+            )
+            
+            # As validades se repetem entre produtos: cada data é avaliada uma vez
+            days = settings.expiry_warning_days
+            is_expiring_soon = self.product_service._is_expiring_soon
+            expiring_by_date = {}
+            
+            def is_expiring(expiry):
+                result = expiring_by_date.get(expiry)
+                if result is None:
+                    result = expiring_by_date[expiry] = is_expiring_soon(expiry, days)
+                return result
             
-            self._low_stock_products = self.product_service.get_low_stock_products(threshold)
-            self._expiring_products = self.product_service.get_expiring_products(expiry_days)
+            return low_stock_products, [p for p in products if is_expiring(p["expiry"])]
         except Exception as e:
             print(f"Erro ao atualizar listas filtradas: {e}")
             traceback.print_exc()
-            self._low_stock_products = []
-            self._expiring_products = []
+            return [], []
+    
+    def _on_alert_settings_changed(self, settings, previous, changed):
+        """Observador das configurações de alerta"""
+        self._update_snapshot(settings=settings)
     
     def _get_empty_product(self):
         """Retorna um produto vazio com a data atual"""
@@ -362,7 +552,8 @@ class DataService:
             "category": "",
             "location": "",
             "weeklyUsage": [0] * 7,
-            "group_id": ""
+            "group_id": "",
+            "barcode": ""
         }
     
     def _get_empty_residue(self):
@@ -382,39 +573,136 @@ class DataService:
     # Getters para acesso aos dados em cache
     @property
     def stock_products(self):
-        return self._stock_products or []
+        return self._snapshot.stock_products
     
     @property
     def low_stock_products(self):
-        return self._low_stock_products or []
+        return self._snapshot.low_stock_products
     
     @property
     def expiring_products(self):
-        return self._expiring_products or []
+        return self._snapshot.expiring_products
     
     @property
     def residues(self):
-        return self._residues or []
+        return self._snapshot.residues
     
     @property
     def notifications(self):
+        if self._notifications is None:
+            self._notifications, _ = self.notification_service.get_notifications_page(
+                limit=self.NOTIFICATIONS_PAGE_SIZE, unread_only=True
+            )
         return self._notifications or []
     
     @property
     def settings(self):
-        return self._settings or self.settings_service.get_settings()
+        """Cópia editável das configurações (o instantâneo em cache não é alterado)"""
+        return self.settings_service.get_settings()
+    
+    @timed()
+    def get_dashboard_view(self):
+        """
+        Retorna os agregados dos cards do dashboard (ver build_dashboard_view).
+        
+        O resultado é reaproveitado entre reconstruções da tela enquanto as
+        listas em cache e o layout do dashboard não mudarem; como refresh_data
+        e as exclusões substituem as listas, basta comparar as referências.
+        """
+        from services.dashboard_view_model import build_dashboard_view
+        
+        layout = self.card_config_service.get_dashboard_layout()
+        snapshot = self._snapshot
+        sources = (snapshot.stock_products, snapshot.residues, snapshot.product_groups, snapshot.residue_groups)
+        cached = self._dashboard_view
+        if cached and cached[1] == layout and all(a is b for a, b in zip(cached[0], sources)):
+            return cached[2]
+        
+        view = build_dashboard_view(*sources, layout, columns=self.get_stock_columns(snapshot))
+        self._dashboard_view = (sources, layout, view)
+        return view
+    
+    def get_products_in_group(self, group_id):
+        """
+        Produtos do cache pertencentes a um grupo, sem consultar o banco.
+        
+        O agrupamento é feito uma vez por carga da lista de produtos (o
+        carregamento já traz o group_id de cada produto) e reaproveitado
+        até a lista ser substituída.
+        """
+        products = self.stock_products
+        cached = self._products_by_group
+        if cached is None or cached[0] is not products:
+            cached = self._products_by_group = (products, self._index_by_group(products))
+        return cached[1].get(group_id, [])
+    
+    def get_residues_in_group(self, group_id):
+        """Resíduos do cache pertencentes a um grupo, sem consultar o banco (ver get_products_in_group)"""
+        residues = self.residues
+        cached = self._residues_by_group
+        if cached is None or cached[0] is not residues:
+            cached = self._residues_by_group = (residues, self._index_by_group(residues))
+        return cached[1].get(group_id, [])
+    
+    @staticmethod
+    def _index_by_group(items):
+        """Agrupa os itens por group_id"""
+        by_group = {}
+        for item in items:
+            by_group.setdefault(item.get("group_id", ""), []).append(item)
+        return by_group
+    
+    def get_stock_columns(self, snapshot=None):
+        """
+        Instantâneo colunar (StockColumns) da lista de produtos em cache.
+        
+        Criado uma vez por carga da lista e reaproveitado pelos agregados do
+        dashboard, da tela de estoque e dos relatórios até a lista ser substituída.
+        """
+        from services.stock_columns import StockColumns
+        
+        products = (snapshot or self._snapshot).stock_products
+        columns = self._stock_columns
+        if columns is None or columns.products is not products:
+            columns = self._stock_columns = StockColumns(products)
+        return columns
+    
+    def get_group_totals(self, group_id):
+        """Quantidade de produtos, soma do estoque e produtos abaixo do mínimo de um grupo"""
+        return self.get_stock_columns().group_totals().get(group_id, {"count": 0, "quantity": 0, "low_stock": 0})
+    
+    def _get_usage_columns(self):
+        """Instantâneo colunar com a matriz de uso semanal carregada (uma consulta para todos os produtos)"""
+        columns = self.get_stock_columns()
+        if columns.weekly_usage is None:
+            columns.load_weekly_usage(self.product_service.get_weekly_usage_rows())
+        return columns
     
     @property
     def weekly_usage_data(self):
+        if self._weekly_usage_data is None:
+            columns = self._get_usage_columns()
+            products = columns.products
+            self._weekly_usage_data = sorted(
+                (
+                    {
+                        "id": products[i]["id"],
+                        "name": products[i]["name"],
+                        "weeklyUsage": columns.weekly_usage_of(products[i]["id"])
+                    }
+                    for i in columns.used_positions()
+                ),
+                key=lambda item: item["name"]
+            )
         return self._weekly_usage_data or []
     
     @property
     def product_groups(self):
-        return self._product_groups or []
+        return self._snapshot.product_groups
     
     @property
     def residue_groups(self):
-        return self._residue_groups or []
+        return self._snapshot.residue_groups
     
     # Métodos para adicionar novos itens
     def add_product(self):
@@ -511,7 +799,7 @@ class DataService:
     def _update_ui(self):
         """Atualiza a interface do usuário se a navegação estiver disponível"""
         if hasattr(self, 'navigation') and self.navigation:
-            print("Chamando update_view da navegação")
+            logger.debug("Chamando update_view da navegação")
             self.navigation.update_view()
         else:
             print("Navegação não disponível para atualizar a interface")
@@ -541,13 +829,64 @@ class DataService:
         self.new_residue = self._get_empty_residue()
     
     # Métodos para atualizar configurações
+    def get_notifications_page(self, before=None, unread_only=True):
+        """Retorna uma página de notificações e o cursor da próxima"""
+        return self.notification_service.get_notifications_page(
+            limit=self.NOTIFICATIONS_PAGE_SIZE, before=before, unread_only=unread_only
+        )
+    
+    def mark_notification_as_read(self, notification_id):
+        """Marca uma notificação como lida"""
+        success = self.notification_service.mark_as_read(notification_id)
+        self._notifications = None
+        return success
+    
+    def mark_all_notifications_as_read(self):
+        """Marca todas as notificações como lidas em uma única operação"""
+        count = self.notification_service.mark_all_as_read()
+        self._notifications = None
+        return count
+    
+    def get_usage_totals(self, days=7):
+        """Uso por produto em uma janela móvel de dias, calculado sob demanda até o próximo refresh"""
+        if days not in self._usage_totals:
+            self._usage_totals[days] = self.product_service.get_usage_totals(days)
+        return self._usage_totals[days]
+    
+    def get_total_usage(self, days=7):
+        """Uso total de todos os produtos na janela de dias"""
+        return sum(self.get_usage_totals(days).values())
+    
+    def get_product_usage(self, product_id, days=7):
+        """Uso de um produto na janela de dias"""
+        return self.get_usage_totals(days).get(product_id, 0)
+    
+    def get_weekly_usage(self, product_id):
+        """Uso dos últimos 7 dias de um produto por dia da semana (0 = domingo)"""
+        weekly_usage = self._get_usage_columns().weekly_usage_of(product_id)
+        if weekly_usage is None:
+            # Produto fora do cache (ex.: recém-criado): consulta direta
+            return self.product_service.get_weekly_usage(product_id)
+        return weekly_usage
+    
+    def update_weekly_usage(self, product_id, usage_data):
+        """Substitui o uso semanal de um produto e descarta os totais em cache"""
+        success = self.product_service.update_weekly_usage(product_id, usage_data)
+        self._weekly_usage_data = None
+        self._usage_totals = {}
+        # Só a matriz de uso é recarregada; as colunas de estoque continuam valendo
+        if self._stock_columns is not None:
+            self._stock_columns.weekly_usage = None
+        return success
+    
     def update_settings(self, settings):
-        """Atualiza as configurações do usuário"""
+        """Atualiza as configurações do usuário
+        
+        As listas filtradas são recalculadas pelo observador registrado no
+        SettingsService, apenas quando os limites de alerta mudam.
+        """
         try:
-            self.settings_service.update_settings(settings)
-            self._settings = settings
-            self._update_filtered_lists()
-            return True
+            return self.settings_service.update_settings(settings)
         except Exception as e:
             print(f"Erro ao atualizar configurações: {e}")
             traceback.print_exc()
@@ -560,7 +899,7 @@ class DataService:
             print(f"DataService: Iniciando exclusão do produto com ID: {product_id}")
             
             # Buscar produto antes de excluir
-            product = next((p for p in self._stock_products if p["id"] == product_id), None)
+            product = next((p for p in self.stock_products if p["id"] == product_id), None)
             if not product:
                 print(f"DataService: Produto com ID {product_id} não encontrado no cache")
                 return False
@@ -583,12 +922,12 @@ class DataService:
                 except Exception as e:
                     print(f"Erro ao criar notificação de exclusão de produto: {e}")
                 
-                # Atualizar cache local - remover o produto excluído da lista
-                self._stock_products = [p for p in self._stock_products if p["id"] != product_id]
-                print(f"DataService: Produto removido do cache. Restantes: {len(self._stock_products)}")
-                
-                # Atualizar listas filtradas
-                self._update_filtered_lists()
+                # Atualizar cache local - publicar um instantâneo sem o produto excluído
+                # (as listas filtradas são recalculadas junto)
+                snapshot = self._update_snapshot(
+                    stock_products=[p for p in self.stock_products if p["id"] != product_id]
+                )
+                logger.debug("Produto removido do cache. Restantes: %d", len(snapshot.stock_products))
                 
                 # Forçar atualização completa dos dados
                 self.refresh_data()
@@ -607,7 +946,7 @@ class DataService:
             print(f"DataService: Iniciando exclusão do resíduo com ID: {residue_id}")
             
             # Buscar resíduo antes de excluir
-            residue = next((r for r in self._residues if r["id"] == residue_id), None)
+            residue = next((r for r in self.residues if r["id"] == residue_id), None)
             if not residue:
                 print(f"DataService: Resíduo com ID {residue_id} não encontrado no cache")
                 return False
@@ -653,8 +992,8 @@ class DataService:
                 print(f"Erro ao criar notificação de exclusão de resíduo: {e}")
             
             # Atualizar cache local - remover o resíduo excluído da lista
-            self._residues = [r for r in self._residues if r["id"] != residue_id]
-            print(f"DataService: Resíduo removido do cache. Restantes: {len(self._residues)}")
+            snapshot = self._update_snapshot(residues=[r for r in self.residues if r["id"] != residue_id])
+            logger.debug("Resíduo removido do cache. Restantes: %d", len(snapshot.residues))
             
             # Forçar atualização completa dos dados
             self.refresh_data()
@@ -724,21 +1063,20 @@ class DataService:
         
         return self.online_mode
     
-    def delete_group(self, group_id, is_product_group=True):
-        """Exclui um grupo"""
+    def delete_group(self, group_id, is_product_group=True, delete_items=False):
+        """Exclui um grupo
+        
+        Se `delete_items` for True, os itens do grupo também são excluídos, na
+        mesma transação; caso contrário, apenas deixam de pertencer ao grupo.
+        """
         try:
             print(f"DataService: Iniciando exclusão do grupo com ID: {group_id}, is_product_group: {is_product_group}")
             
-            # Importar serviço de grupo se ainda não estiver disponível
-            from services.group_service import GroupService
-            if not hasattr(self, 'group_service'):
-                self.group_service = GroupService(self.firebase, self.db)
-            
             # Buscar grupo antes de excluir
             if is_product_group:
-                groups = self._product_groups
+                groups = self.product_groups
             else:
-                groups = self._residue_groups
+                groups = self.residue_groups
                     
             group = next((g for g in groups if g["id"] == group_id), None)
             if not group:
@@ -749,16 +1087,21 @@ class DataService:
             print(f"DataService: Excluindo grupo: {group_name}, is_product_group: {is_product_group}")
             
             # Chamar o método de exclusão no serviço de grupo
-            success = self.group_service.delete_group(group_id, not is_product_group)
+            affected = self.group_service.delete_group_cascade(group_id, not is_product_group, delete_items)
+            success = affected is not None
                     
             print(f"DataService: Resultado da exclusão do grupo: {success}")
             
             if success:
-                # Criar notificação
+                # Criar uma única notificação resumindo a exclusão
+                message = f"Grupo '{group_name}' foi excluído"
+                if delete_items and affected:
+                    item_label = "produtos" if is_product_group else "resíduos"
+                    message += f" junto com {affected} {item_label}"
                 try:
                     self.notification_service.create_notification(
                         "GROUP_DELETED",
-                        f"Grupo '{group_name}' foi excluído",
+                        message,
                         None
                     )
                 except Exception as e:
@@ -766,11 +1109,15 @@ class DataService:
             
                 # Atualizar cache local - remover o grupo excluído da lista
                 if is_product_group:
-                    self._product_groups = [g for g in self._product_groups if g["id"] != group_id]
-                    print(f"DataService: Grupo de produtos removido do cache. Restantes: {len(self._product_groups)}")
+                    snapshot = self._update_snapshot(
+                        product_groups=[g for g in self.product_groups if g["id"] != group_id]
+                    )
+                    logger.debug("Grupo de produtos removido do cache. Restantes: %d", len(snapshot.product_groups))
                 else:
-                    self._residue_groups = [g for g in self._residue_groups if g["id"] != group_id]
-                    print(f"DataService: Grupo de resíduos removido do cache. Restantes: {len(self._residue_groups)}")
+                    snapshot = self._update_snapshot(
+                        residue_groups=[g for g in self.residue_groups if g["id"] != group_id]
+                    )
+                    logger.debug("Grupo de resíduos removido do cache. Restantes: %d", len(snapshot.residue_groups))
                 
                 # Forçar atualização completa dos dados
                 print("DataService: Iniciando atualização completa dos dados após exclusão")
@@ -796,37 +1143,85 @@ class DataService:
         Returns:
             list: Lista de movimentações de produtos.
         """
+        return list(self.iter_product_movement_history(product_name=product_name, days=days))
+    
+    def _movement_history_filter(self, product_name=None, days=30, movement_type=None):
+        """Monta a cláusula WHERE e os parâmetros das consultas de movimentação"""
+        from datetime import datetime, timedelta
+        
+        # O filtro de período usa a coluna indexada `day` (AAAA-MM-DD); o mesmo
+        # limite em `timestamp` permite percorrer apenas o trecho do índice usado
+        # pelo ORDER BY timestamp, em vez do histórico inteiro
+        cutoff = (datetime.now() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        clauses = ["day >= ?", "timestamp >= ?"]
+        params = [cutoff.strftime("%Y-%m-%d"), cutoff.timestamp()]
+        
+        if product_name:
+            clauses.append("productName LIKE ?")
+            params.append(f'%{product_name}%')
+        
+        if movement_type and movement_type != "all":
+            clauses.append("type = ?")
+            params.append(movement_type)
+        
+        return " AND ".join(clauses), params
+    
+    def _rollup_filter(self, item_kind="product", days=30, movement_type=None, item_ids=None):
+        """Monta a cláusula WHERE e os parâmetros das consultas à consolidação diária"""
+        from datetime import datetime, timedelta
+        
+        cutoff_day = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        clauses = ["item_kind = ?", "day >= ?"]
+        params = [item_kind, cutoff_day]
+        
+        if movement_type and movement_type != "all":
+            clauses.append("type = ?")
+            params.append(movement_type)
+        
+        if item_ids is not None:
+            clauses.append(f"item_id IN ({','.join('?' for _ in item_ids)})")
+            params.extend(str(item_id) for item_id in item_ids)
+        
+        return " AND ".join(clauses), params
+    
+    def _movement_source(self, product_name=None, days=30, movement_type=None):
+        """Escolhe a origem das agregações de movimentação de produtos
+        
+        Sem filtro por nome, os totais vêm da consolidação diária; a busca por
+        nome precisa do histórico detalhado.
+        
+        Returns:
+            tuple: (tabela, expressão de contagem, cláusula WHERE, parâmetros)
+        """
+        if product_name:
+            where, params = self._movement_history_filter(product_name, days, movement_type)
+            return "product_history", "COUNT(*)", where, params
+        where, params = self._rollup_filter("product", days, movement_type)
+        return "daily_movements", "SUM(count)", where, params
+    
+    def iter_product_movement_history(self, product_name=None, days=30, movement_type=None, batch_size=500):
+        """
+        Percorre o histórico de movimentação sem carregá-lo inteiro em memória.
+        
+        As linhas são lidas do cursor em lotes de `batch_size`, ordenadas da mais
+        recente para a mais antiga, e entregues uma a uma como dicionários.
+        """
         try:
-            from datetime import datetime, timedelta
-            
-            # Calcular data limite
-            cutoff_date = datetime.now() - timedelta(days=days)
-            cutoff_timestamp = cutoff_date.timestamp()
-            
-            # Consultar histórico de movimentação
+            where, params = self._movement_history_filter(product_name, days, movement_type)
             cursor = self.db.conn.cursor()
+            cursor.execute(f'''
+            SELECT id, productId, productName, quantity, reason, date, timestamp, type
+            FROM product_history
+            WHERE {where}
+            ORDER BY timestamp DESC
+            ''', params)
             
-            if product_name:
-                # Filtrar por nome do produto
-                cursor.execute('''
-                SELECT * FROM product_history 
-                WHERE product_name LIKE ? AND timestamp >= ? 
-                ORDER BY timestamp DESC
-                ''', (f'%{product_name}%', cutoff_timestamp))
-            else:
-                # Todos os produtos
-                cursor.execute('''
-                SELECT * FROM product_history 
-                WHERE timestamp >= ? 
-                ORDER BY timestamp DESC
-                ''', (cutoff_timestamp,))
-            
-            results = cursor.fetchall()
-            movement_history = []
-            
-            for row in results:
-                try:
-                    movement = {
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
                         "id": row[0],
                         "productId": row[1],
                         "productName": row[2],
@@ -834,16 +1229,270 @@ class DataService:
                         "reason": row[4],
                         "date": row[5],
                         "timestamp": row[6],
-                        "type": row[7]  # entry, exit, adjustment
+                        "type": row[7]
                     }
-                    movement_history.append(movement)
-                except Exception as e:
-                    print(f"Erro ao processar movimento: {e}")
-                    continue
+        except Exception as e:
+            logger.exception("Erro ao percorrer histórico de movimentação: %s", e)
+    
+    def get_product_movement_totals(self, product_name=None, days=30, movement_type=None):
+        """Retorna a soma das quantidades movimentadas no período, por tipo"""
+        totals = {"entry": 0, "exit": 0, "adjustment": 0}
+        try:
+            table, _, where, params = self._movement_source(product_name, days, movement_type)
+            cursor = self.db.conn.cursor()
+            cursor.execute(f'''
+            SELECT type, COALESCE(SUM(quantity), 0)
+            FROM {table}
+            WHERE {where}
+            GROUP BY type
+            ''', params)
+            for movement_type_value, total in cursor.fetchall():
+                totals[movement_type_value] = total
+        except Exception as e:
+            logger.exception("Erro ao calcular totais de movimentação: %s", e)
+        return totals
+    
+    def get_daily_movement_totals(self, product_name=None, days=30, movement_type=None):
+        """
+        Retorna os totais de movimentação por dia, calculados no banco.
+        
+        Returns:
+            list: Um dicionário por dia (mais recente primeiro) com as chaves
+            "day" (AAAA-MM-DD), "date" (DD/MM/AAAA), "entry", "exit",
+            "adjustment" e "count".
+        """
+        try:
+            table, count_expr, where, params = self._movement_source(product_name, days, movement_type)
+            cursor = self.db.conn.cursor()
+            cursor.execute(f'''
+            SELECT day,
+                COALESCE(SUM(CASE WHEN type = 'entry' THEN quantity END), 0),
+                COALESCE(SUM(CASE WHEN type = 'exit' THEN quantity END), 0),
+                COALESCE(SUM(CASE WHEN type = 'adjustment' THEN quantity END), 0),
+                {count_expr}
+            FROM {table}
+            WHERE {where}
+            GROUP BY day
+            ORDER BY day DESC
+            ''', params)
             
-            return movement_history
+            return [
+                {
+                    "day": day,
+                    "date": f"{day[8:10]}/{day[5:7]}/{day[0:4]}",
+                    "entry": entry,
+                    "exit": exit_total,
+                    "adjustment": adjustment,
+                    "count": count
+                }
+                for day, entry, exit_total, adjustment, count in cursor.fetchall()
+            ]
         except Exception as e:
-            print(f"Erro ao obter histórico de movimentação: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
\ No newline at end of file
+            logger.exception("Erro ao calcular totais diários de movimentação: %s", e)
+            return []
+    
+    def get_product_movement_page(self, product_name=None, days=30, movement_type=None, limit=100, before=None):
+        """
+        Retorna uma página de movimentações detalhadas (mais recentes primeiro).
+        
+        Args:
+            limit (int, optional): Tamanho da página. Padrão é 100.
+            before (tuple, optional): Cursor (timestamp, id) da última movimentação
+                da página anterior; a leitura continua a partir dele no índice.
+        """
+        try:
+            where, params = self._movement_history_filter(product_name, days, movement_type)
+            if before:
+                where += " AND timestamp <= ? AND (timestamp < ? OR id < ?)"
+                params.extend([before[0], before[0], before[1]])
+            cursor = self.db.conn.cursor()
+            cursor.execute(f'''
+            SELECT id, productId, productName, quantity, reason, date, timestamp, type, day
+            FROM product_history
+            WHERE {where}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+            ''', params + [limit])
+            
+            return [
+                {
+                    "id": row[0],
+                    "productId": row[1],
+                    "productName": row[2],
+                    "quantity": row[3],
+                    "reason": row[4],
+                    "date": row[5],
+                    "timestamp": row[6],
+                    "type": row[7],
+                    "day": row[8]
+                }
+                for row in cursor.fetchall()
+            ]
+        except Exception as e:
+            logger.exception("Erro ao buscar página de movimentações: %s", e)
+            return []
+    
+    def get_item_movement_totals(self, item_ids, days=30, item_kind="product"):
+        """
+        Soma as movimentações de um conjunto de itens a partir da consolidação diária.
+        
+        Args:
+            item_ids (list): IDs dos produtos ou resíduos.
+            days (int, optional): Número de dias do período. Padrão é 30.
+            item_kind (str, optional): "product" ou "residue".
+            
+        Returns:
+            dict: Quantidade total por tipo ("entry", "exit", "adjustment").
+        """
+        totals = {"entry": 0, "exit": 0, "adjustment": 0}
+        if not item_ids:
+            return totals
+        try:
+            where, params = self._rollup_filter(item_kind, days, item_ids=item_ids)
+            cursor = self.db.conn.cursor()
+            cursor.execute(f'''
+            SELECT type, COALESCE(SUM(quantity), 0)
+            FROM daily_movements
+            WHERE {where}
+            GROUP BY type
+            ''', params)
+            for movement_type, total in cursor.fetchall():
+                totals[movement_type] = total
+        except Exception as e:
+            logger.exception("Erro ao calcular movimentação dos itens: %s", e)
+        return totals
+    
+    def rebuild_daily_movements(self):
+        """Reconstrói a consolidação diária de movimentações a partir dos históricos"""
+        return self.db.rebuild_daily_movements()
+    
+    def _stock_movement_filter(self, kind, movement_type=None, days=30, search=None, before=None):
+        """Monta a cláusula WHERE e os parâmetros das consultas de movimentações de estoque"""
+        from datetime import timedelta
+        
+        cutoff_timestamp = (datetime.now() - timedelta(days=days)).timestamp()
+        clauses = ["kind = ?"]
+        params = [kind]
+        
+        if movement_type and movement_type != "all":
+            clauses.append("type = ?")
+            params.append(movement_type)
+        
+        clauses.append("timestamp >= ?")
+        params.append(cutoff_timestamp)
+        
+        if search:
+            clauses.append("item_name LIKE ?")
+            params.append(f'%{search}%')
+        
+        # Paginação por chave: apenas registros anteriores ao último da página anterior
+        if before:
+            clauses.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+            params.extend([before[0], before[0], before[1]])
+        
+        return " AND ".join(clauses), params
+    
+    def _iter_stock_movements_of_kind(self, kind, movement_type=None, days=30, search=None,
+                                      before=None, limit=None, batch_size=500):
+        """Percorre as movimentações de um tipo de item, da mais recente para a mais antiga"""
+        where, params = self._stock_movement_filter(kind, movement_type, days, search, before)
+        query = f'''
+        SELECT id, kind, item_id, item_name, type, quantity, reason, exit_type, date, day, timestamp
+        FROM stock_movements
+        WHERE {where}
+        ORDER BY timestamp DESC, id DESC
+        '''
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        cursor = self.db.conn.cursor()
+        cursor.execute(query, params)
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield {
+                    "id": row[0],
+                    "kind": row[1],
+                    "itemId": row[2],
+                    "name": row[3],
+                    "type": row[4],
+                    "quantity": row[5],
+                    "reason": row[6],
+                    "exitType": row[7],
+                    "date": row[8],
+                    "day": row[9],
+                    "timestamp": row[10]
+                }
+    
+    def iter_stock_movements(self, kinds=("product", "residue"), movement_type=None, days=30, search=None):
+        """
+        Percorre as movimentações de produtos e resíduos em ordem cronológica inversa.
+        
+        Cada tipo de item é lido com uma varredura do índice (kind, timestamp) e
+        os fluxos são intercalados com heapq.merge, sem ordenar em memória.
+        
+        Args:
+            kinds (tuple): Tipos de item a incluir ("product", "residue").
+            movement_type (str, optional): "entry", "exit", "adjustment" ou None para todos.
+            days (int, optional): Número de dias do período. Padrão é 30.
+            search (str, optional): Trecho do nome do item.
+        """
+        streams = [
+            self._iter_stock_movements_of_kind(kind, movement_type, days, search)
+            for kind in kinds
+        ]
+        return heapq.merge(*streams, key=lambda m: (m["timestamp"], m["id"]), reverse=True)
+    
+    def get_stock_movement_page(self, kinds=("product", "residue"), movement_type=None, days=30,
+                                search=None, limit=100, before=None):
+        """
+        Retorna uma página de movimentações de produtos e resíduos.
+        
+        Args:
+            limit (int, optional): Tamanho da página. Padrão é 100.
+            before (tuple, optional): Cursor (timestamp, id) devolvido pela página anterior.
+            
+        Returns:
+            tuple: (lista de movimentações, cursor da próxima página ou None)
+        """
+        try:
+            streams = [
+                self._iter_stock_movements_of_kind(kind, movement_type, days, search, before, limit)
+                for kind in kinds
+            ]
+            page = list(islice(
+                heapq.merge(*streams, key=lambda m: (m["timestamp"], m["id"]), reverse=True),
+                limit
+            ))
+            
+            next_cursor = None
+            if len(page) == limit:
+                next_cursor = (page[-1]["timestamp"], page[-1]["id"])
+            
+            return page, next_cursor
+        except Exception as e:
+            logger.exception("Erro ao buscar página de movimentações de estoque: %s", e)
+            return [], None
+    
+    def get_stock_movement_summary(self, kinds=("product", "residue"), movement_type=None, days=30, search=None):
+        """Retorna o número de movimentações e a quantidade total no período"""
+        summary = {"count": 0, "quantity": 0}
+        try:
+            cursor = self.db.conn.cursor()
+            for kind in kinds:
+                where, params = self._stock_movement_filter(kind, movement_type, days, search)
+                cursor.execute(f'''
+                SELECT COUNT(*), COALESCE(SUM(quantity), 0)
+                FROM stock_movements
+                WHERE {where}
+                ''', params)
+                count, quantity = cursor.fetchone()
+                summary["count"] += count
+                summary["quantity"] += quantity
+        except Exception as e:
+            logger.exception("Erro ao resumir movimentações de estoque: %s", e)
+        return summary
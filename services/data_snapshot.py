@@ -0,0 +1,40 @@
+class DataSnapshot:
+    """
+    Conjunto imutável das listas em cache do DataService.
+
+    Todas as listas de uma carga são publicadas juntas, trocando a referência
+    DataService._snapshot em uma única atribuição (atômica no CPython). Quem
+    lê pega a referência uma vez e trabalha sobre ela sem trava: uma
+    atualização em outra thread monta um instantâneo novo e nunca altera o que
+    já foi publicado, então não há listas vazias ou pela metade durante o
+    refresh. As listas não devem ser alteradas; para mudar algo, publique um
+    novo instantâneo com replace().
+    """
+
+    __slots__ = (
+        "stock_products", "low_stock_products", "expiring_products", "residues",
+        "product_groups", "residue_groups", "settings", "generation"
+    )
+
+    def __init__(self, stock_products=None, low_stock_products=None, expiring_products=None,
+                 residues=None, product_groups=None, residue_groups=None, settings=None, generation=0):
+        set_value = object.__setattr__
+        set_value(self, "stock_products", stock_products if stock_products is not None else [])
+        set_value(self, "low_stock_products", low_stock_products if low_stock_products is not None else [])
+        set_value(self, "expiring_products", expiring_products if expiring_products is not None else [])
+        set_value(self, "residues", residues if residues is not None else [])
+        set_value(self, "product_groups", product_groups if product_groups is not None else [])
+        set_value(self, "residue_groups", residue_groups if residue_groups is not None else [])
+        set_value(self, "settings", settings)
+        # Ordem das publicações (cargas e atualizações locais): um refresh
+        # iniciado antes de outra publicação não a substitui
+        set_value(self, "generation", generation)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DataSnapshot é imutável; use replace()")
+
+    def replace(self, **changes):
+        """Retorna um novo instantâneo com os campos informados substituídos"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return DataSnapshot(**values)
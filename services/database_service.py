@@ -4,7 +4,22 @@ from datetime import datetime
 import os
 import threading
 import time
+import logging
 import traceback
+from .instrumentation import TimedConnection
+from .ids import new_id
+
+logger = logging.getLogger(__name__)
+
+# UPDATE ... RETURNING está disponível a partir do SQLite 3.35
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def _same_value(current, new):
+    """Compara um valor gravado com o novo como o SQLite os armazenaria (NULL e "" são iguais)"""
+    if current in (None, "") and new in (None, ""):
+        return True
+    return str(current) == str(new)
 
 class DatabaseService:
     """Serviço para gerenciamento do banco de dados local"""
@@ -40,7 +55,8 @@ class DatabaseService:
         """Obtém uma conexão para a thread atual"""
         if not hasattr(self.thread_local, "conn") or self.thread_local.conn is None:
             try:
-                self.thread_local.conn = sqlite3.connect('data/local_storage.db')
+                # TimedConnection mede as consultas quando a instrumentação está ligada
+                self.thread_local.conn = sqlite3.connect('data/local_storage.db', factory=TimedConnection)
                 # Habilitar suporte a chaves estrangeiras
                 self.thread_local.conn.execute("PRAGMA foreign_keys = ON")
                 # Configurar timeout para evitar bloqueios
@@ -119,7 +135,8 @@ class DatabaseService:
                 category TEXT,
                 location TEXT,
                 group_id TEXT,
-                manufacturer TEXT
+                manufacturer TEXT,
+                barcode TEXT
             )
             ''')
             
@@ -164,16 +181,16 @@ class DatabaseService:
              # Verificar se a tabela de resíduos existe
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='residues'")
             if cursor.fetchone():
-                print("Tabela 'residues' existe")
+                logger.debug("Tabela 'residues' existe")
                 # Verificar se tem dados
                 cursor.execute("SELECT COUNT(*) FROM residues")
                 count = cursor.fetchone()[0]
-                print(f"Tabela 'residues' contém {count} registros")
+                logger.debug("Tabela 'residues' contém %d registros", count)
                 
                 # Verificar se a tabela tem as colunas necessárias
                 cursor.execute("PRAGMA table_info(residues)")
                 columns = [info[1] for info in cursor.fetchall()]
-                print(f"Colunas na tabela 'residues': {columns}")
+                logger.debug("Colunas na tabela 'residues': %s", columns)
                 
                 # Adicionar colunas faltantes se necessário
                 if "destination" not in columns:
@@ -217,6 +234,20 @@ class DatabaseService:
                 productId TEXT
             )
             ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_read_id ON notifications (read, id)")
+            
+            # Notificações lidas antigas são movidas para o arquivo
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notifications_archive (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                message TEXT NOT NULL,
+                date TEXT NOT NULL,
+                read INTEGER NOT NULL DEFAULT 1,
+                productId TEXT,
+                archivedAt TEXT
+            )
+            ''')
             
             # Tabela de configurações
             cursor.execute('''
@@ -251,6 +282,8 @@ class DatabaseService:
                 type TEXT
             )
             ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_residue_history_residue_timestamp ON residue_history (residueId, timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_residue_history_timestamp ON residue_history (timestamp)")
             
             # Tabela de histórico de produtos
             cursor.execute('''
@@ -273,6 +306,15 @@ class DatabaseService:
                 config_data TEXT NOT NULL
             )
             ''')
+            
+            # Chaves de idempotência das saídas (evitam lançamentos duplicados)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS movement_requests (
+                idempotency_key TEXT PRIMARY KEY,
+                movement_id TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            ''')
 
             self.conn.commit()
             print("Todas as tabelas criadas/verificadas com sucesso")
@@ -286,7 +328,7 @@ class DatabaseService:
     def migrate_legacy_data(self):
         """Migra dados antigos para o novo formato"""
         try:
-            print("Iniciando migração de dados antigos...")
+            logger.info("Iniciando migração de dados antigos...")
             cursor = self.conn.cursor()
             
             # Migrar produtos antigos
@@ -332,9 +374,9 @@ class DatabaseService:
                             product_id
                         ))
                     
-                    print(f"Produto {product_id} migrado")
+                    logger.debug("Produto %s migrado", product_id)
                 except Exception as e:
-                    print(f"Erro ao migrar produto: {e}")
+                    logger.warning("Erro ao migrar produto: %s", e)
             
             # Migrar resíduos antigos
             cursor.execute("SELECT * FROM residues")
@@ -382,12 +424,12 @@ class DatabaseService:
                             residue_id
                         ))
                     
-                    print(f"Resíduo {residue_id} migrado")
+                    logger.debug("Resíduo %s migrado", residue_id)
                 except Exception as e:
-                    print(f"Erro ao migrar resíduo: {e}")
+                    logger.warning("Erro ao migrar resíduo: %s", e)
             
             self.conn.commit()
-            print("Migração de dados concluída")
+            logger.info("Migração de dados concluída")
             return True
         except Exception as e:
             print(f"Erro durante migração de dados: {e}")
@@ -420,7 +462,9 @@ class DatabaseService:
     def add_sync_operation(self, operation_type, collection, document_id, data):
         """Adiciona uma operação à fila de sincronização"""
         try:
-            operation_id = f"{collection}_{document_id}_{int(time.time())}"
+            # ULID: várias operações do mesmo documento podem ser enfileiradas no
+            # mesmo milissegundo, e a fila continua na ordem de criação
+            operation_id = new_id(collection)
             cursor = self.conn.cursor()
             cursor.execute('''
             INSERT INTO sync_operations (id, operation_type, collection, document_id, data, timestamp, synced)
@@ -441,6 +485,32 @@ class DatabaseService:
             traceback.print_exc()
             return False
     
+    def add_batch_sync_operation(self, operation_type, collection, document_ids, fields=None):
+        """Adiciona à fila uma única operação que afeta vários documentos
+        
+        Args:
+            operation_type (str): "update" ou "delete".
+            document_ids (list): IDs dos documentos afetados.
+            fields (dict, optional): Campos mesclados em cada documento (apenas "update").
+        """
+        batch_id = new_id("batch")
+        return self.add_sync_operation(
+            f"batch_{operation_type}", collection, batch_id,
+            {"ids": list(document_ids), "fields": fields}
+        )
+    
+    def add_write_batch_sync_operation(self, collection, writes):
+        """Adiciona à fila um único lote de escritas em documentos de várias coleções
+        
+        Args:
+            collection (str): Coleção principal do lote (identifica a operação na fila).
+            writes (list): Tuplas (coleção, ID do documento, campos ou None para excluir).
+        """
+        return self.add_sync_operation(
+            "batch_write", collection, new_id("batch"),
+            {"writes": [list(write) for write in writes]}
+        )
+    
     def get_pending_sync_operations(self):
         """Retorna operações pendentes de sincronização"""
         try:
@@ -499,9 +569,9 @@ class DatabaseService:
             self.conn.commit()
             return cursor
         except sqlite3.Error as e:
-            print(f"Erro SQLite ao executar consulta: {e}")
-            print(f"Query: {query}")
-            print(f"Params: {params}")
+            logger.error("Erro SQLite ao executar consulta: %s", e)
+            logger.debug("Query: %s", query)
+            logger.debug("Params: %s", params)
             self.conn.rollback()
             return None
         except Exception as e:
@@ -597,7 +667,7 @@ class DatabaseService:
                         try:
                             cursor.execute(f"INSERT OR IGNORE INTO {table} ({columns_str}) VALUES ({placeholders})", row)
                         except Exception as e:
-                            print(f"Erro ao restaurar linha: {e}")
+                            logger.warning("Erro ao restaurar linha: %s", e)
                             continue
                     
                     self.conn.commit()
@@ -728,7 +798,8 @@ class DatabaseService:
                     category TEXT,
                     location TEXT,
                     group_id TEXT,
-                    manufacturer TEXT
+                    manufacturer TEXT,
+                    barcode TEXT
                 )
                 ''')
                 self.conn.commit()
@@ -742,7 +813,7 @@ class DatabaseService:
             required_columns = [
                 "id", "name", "quantity", "lot", "expiry", "entryDate", 
                 "fabDate", "exitDate", "weeklyUsage", "lastUpdateDate",
-                "category", "location", "group_id", "manufacturer"
+                "category", "location", "group_id", "manufacturer", "barcode"
             ]
             
             for column in required_columns:
@@ -751,6 +822,14 @@ class DatabaseService:
                     cursor.execute(f"ALTER TABLE products ADD COLUMN {column} TEXT")
                     self.conn.commit()
             
+            # Índices para as consultas de produtos por grupo e dos lotes de um produto
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_group_id ON products (group_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products (name)")
+            # Índices da leitura por código de barras (EAN) e por lote
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_barcode ON products (barcode)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_lot ON products (lot)")
+            self.conn.commit()
+            
             return True
         except Exception as e:
             print(f"Erro ao verificar tabela de produtos: {e}")
@@ -777,7 +856,8 @@ class DatabaseService:
                     date TEXT,
                     timestamp REAL,
                     type TEXT,
-                    exit_type TEXT DEFAULT 'venda'
+                    exit_type TEXT DEFAULT 'venda',
+                    day TEXT
                 )
                 ''')
                 self.conn.commit()
@@ -794,9 +874,393 @@ class DatabaseService:
                 self.conn.commit()
                 print("Coluna exit_type adicionada com sucesso")
             
+            # Coluna com o dia (AAAA-MM-DD) da movimentação, usada nas agregações por data
+            if "day" not in column_names:
+                logger.info("Adicionando coluna day à tabela product_history")
+                cursor.execute("ALTER TABLE product_history ADD COLUMN day TEXT")
+                self.conn.commit()
+            
+            # Preencher o dia de registros antigos a partir do timestamp
+            cursor.execute('''
+            UPDATE product_history
+            SET day = date(timestamp, 'unixepoch', 'localtime')
+            WHERE day IS NULL AND timestamp IS NOT NULL
+            ''')
+            
+            # Índices para consultas por período
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_history_day_type ON product_history (day, type)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_history_timestamp ON product_history (timestamp)")
+            self.conn.commit()
+            
             return True
         except Exception as e:
             print(f"Erro ao verificar tabela de histórico de produtos: {e}")
             import traceback
             traceback.print_exc()
-            return False
\ No newline at end of file
+            return False
+
+    def verify_stock_movements_table(self):
+        """Verifica a tabela de movimentações de estoque
+        
+        A tabela `stock_movements` é o registro único de todas as entradas,
+        saídas e ajustes de produtos e resíduos, indexado por (kind, timestamp).
+        """
+        try:
+            cursor = self.conn.cursor()
+            
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='stock_movements'")
+            table_exists = cursor.fetchone() is not None
+            
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stock_movements (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                item_name TEXT,
+                type TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                reason TEXT,
+                exit_type TEXT,
+                date TEXT,
+                day TEXT,
+                timestamp REAL NOT NULL
+            )
+            ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_kind_timestamp ON stock_movements (kind, timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_movements_kind_type_timestamp ON stock_movements (kind, type, timestamp)")
+            
+            # Na primeira execução, copiar os históricos já existentes
+            if not table_exists:
+                logger.info("Tabela stock_movements criada, importando históricos existentes...")
+                cursor.execute('''
+                INSERT OR IGNORE INTO stock_movements (
+                    id, kind, item_id, item_name, type, quantity, reason, exit_type, date, day, timestamp
+                )
+                SELECT id, 'product', productId, productName, type, quantity, reason,
+                       CASE WHEN type = 'exit' THEN exit_type END, date, day, timestamp
+                FROM product_history
+                WHERE productId IS NOT NULL AND type IS NOT NULL AND timestamp IS NOT NULL
+                ''')
+                cursor.execute('''
+                INSERT OR IGNORE INTO stock_movements (
+                    id, kind, item_id, item_name, type, quantity, reason, exit_type, date, day, timestamp
+                )
+                SELECT id, 'residue', residueId, residueName, 'exit', quantity, destination, NULL, date,
+                       date(timestamp, 'unixepoch', 'localtime'), timestamp
+                FROM residue_history
+                WHERE residueId IS NOT NULL AND timestamp IS NOT NULL
+                ''')
+            
+            self.conn.commit()
+            return True
+        except Exception as e:
+            logger.exception("Erro ao verificar tabela de movimentações de estoque: %s", e)
+            return False
+    
+    def record_stock_movement(self, kind, item_id, item_name, movement_type, quantity,
+                              reason="", exit_type=None, group_id="", movement_id=None):
+        """Registra uma movimentação de estoque e acumula na consolidação diária
+        
+        Não faz commit: deve ser chamado dentro da mesma transação que altera o
+        estoque do item.
+        
+        Args:
+            kind (str): "product" ou "residue".
+            movement_type (str): "entry", "exit" ou "adjustment".
+            movement_id (str, optional): ID do registro de histórico correspondente.
+            
+        Returns:
+            dict: A movimentação registrada.
+        """
+        now = datetime.now()
+        record = {
+            "id": movement_id or new_id(movement_type),
+            "kind": kind,
+            "item_id": str(item_id),
+            "item_name": item_name,
+            "type": movement_type,
+            "quantity": int(quantity),
+            "reason": reason,
+            "exit_type": exit_type if movement_type == "exit" else None,
+            "date": now.strftime("%d/%m/%Y"),
+            "day": now.strftime("%Y-%m-%d"),
+            "timestamp": now.timestamp()
+        }
+        
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        INSERT INTO stock_movements (
+            id, kind, item_id, item_name, type, quantity, reason, exit_type, date, day, timestamp
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            record["id"], record["kind"], record["item_id"], record["item_name"],
+            record["type"], record["quantity"], record["reason"], record["exit_type"],
+            record["date"], record["day"], record["timestamp"]
+        ))
+        
+        self.record_daily_movement(
+            kind, item_id, group_id, movement_type, quantity, record["exit_type"], record["day"]
+        )
+        
+        return record
+    
+    def verify_usage_timeseries_table(self):
+        """Verifica a tabela de série temporal de uso de produtos
+        
+        A tabela `usage_timeseries` guarda a quantidade usada por produto e por
+        dia (AAAA-MM-DD). Na primeira execução, os valores da antiga coluna JSON
+        `products.weeklyUsage` são distribuídos pelos últimos 7 dias, de acordo
+        com o dia da semana de cada posição (0 = domingo).
+        """
+        try:
+            cursor = self.conn.cursor()
+            
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='usage_timeseries'")
+            table_exists = cursor.fetchone() is not None
+            
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS usage_timeseries (
+                product_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                quantity INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (product_id, day)
+            )
+            ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_timeseries_day ON usage_timeseries (day)")
+            
+            if not table_exists:
+                logger.info("Tabela usage_timeseries criada, migrando uso semanal existente...")
+                from datetime import timedelta
+                
+                # Dia (AAAA-MM-DD) dos últimos 7 dias para cada posição da semana
+                today = datetime.now()
+                day_by_index = {}
+                for offset in range(7):
+                    date = today - timedelta(days=offset)
+                    day_by_index[(date.weekday() + 1) % 7] = date.strftime("%Y-%m-%d")
+                
+                cursor.execute("SELECT id, weeklyUsage FROM products WHERE weeklyUsage IS NOT NULL")
+                migrated = []
+                for product_id, weekly_usage in cursor.fetchall():
+                    try:
+                        values = json.loads(weekly_usage)
+                    except (ValueError, TypeError):
+                        continue
+                    if not isinstance(values, list):
+                        continue
+                    for index, value in enumerate(values[:7]):
+                        try:
+                            quantity = int(value)
+                        except (ValueError, TypeError):
+                            continue
+                        if quantity > 0:
+                            migrated.append((product_id, day_by_index[index], quantity))
+                
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO usage_timeseries (product_id, day, quantity) VALUES (?, ?, ?)",
+                    migrated
+                )
+                logger.info("%d registros de uso semanal migrados", len(migrated))
+            
+            self.conn.commit()
+            return True
+        except Exception as e:
+            logger.exception("Erro ao verificar tabela de uso: %s", e)
+            return False
+    
+    def verify_daily_movements_table(self):
+        """Verifica a tabela de consolidação diária de movimentações
+        
+        A tabela `daily_movements` guarda a soma das quantidades movimentadas por
+        item, dia, tipo e tipo de saída. Ela é atualizada a cada movimentação e
+        permite que os relatórios por período leiam poucos registros em vez de
+        percorrer todo o histórico.
+        """
+        try:
+            cursor = self.conn.cursor()
+            
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='daily_movements'")
+            table_exists = cursor.fetchone() is not None
+            
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_movements (
+                item_kind TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                group_id TEXT NOT NULL DEFAULT '',
+                day TEXT NOT NULL,
+                type TEXT NOT NULL,
+                exit_type TEXT NOT NULL DEFAULT '',
+                quantity INTEGER NOT NULL DEFAULT 0,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (item_kind, item_id, day, type, exit_type)
+            )
+            ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_movements_day ON daily_movements (item_kind, day, type)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_movements_group ON daily_movements (group_id, day)")
+            self.conn.commit()
+            
+            # Na primeira execução, consolidar o histórico já existente
+            if not table_exists:
+                logger.info("Tabela daily_movements criada, consolidando histórico existente...")
+                self.rebuild_daily_movements()
+            
+            return True
+        except Exception as e:
+            logger.exception("Erro ao verificar tabela de movimentações diárias: %s", e)
+            return False
+    
+    def claim_movement_key(self, idempotency_key, movement_id):
+        """Reserva a chave de idempotência de uma movimentação (sem commit)
+        
+        Deve ser chamado na mesma transação que registra a movimentação: se ela
+        for desfeita, a chave também é liberada.
+        
+        Returns:
+            str: None se a chave é nova; caso contrário, o ID da movimentação
+                já registrada com ela.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        INSERT OR IGNORE INTO movement_requests (idempotency_key, movement_id, created_at)
+        VALUES (?, ?, ?)
+        ''', (idempotency_key, movement_id, time.time()))
+        if cursor.rowcount == 1:
+            return None
+        cursor.execute(
+            "SELECT movement_id FROM movement_requests WHERE idempotency_key = ?",
+            (idempotency_key,)
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def debit_stock(self, table, item_id, quantity, columns="*", updates=None):
+        """Debita a quantidade de um item somente se houver saldo suficiente (sem commit)
+        
+        Um único UPDATE condicional (quantity >= ?) substitui a leitura seguida
+        de gravação, de modo que duas saídas simultâneas nunca deixam o saldo
+        negativo.
+        
+        Args:
+            table (str): "products" ou "residues".
+            columns (str, optional): Colunas retornadas após o débito.
+            updates (dict, optional): Outras colunas alteradas no mesmo UPDATE.
+            
+        Returns:
+            tuple: A linha com `columns` após o débito, ou None se o item não
+                existe ou o saldo é insuficiente.
+        """
+        updates = updates or {}
+        assignments = ", ".join(["quantity = quantity - ?"] + [f"{column} = ?" for column in updates])
+        params = [int(quantity), *updates.values(), item_id, int(quantity)]
+        
+        cursor = self.conn.cursor()
+        if SUPPORTS_RETURNING:
+            cursor.execute(
+                f"UPDATE {table} SET {assignments} WHERE id = ? AND quantity >= ? RETURNING {columns}",
+                params
+            )
+            rows = cursor.fetchall()
+            return rows[0] if rows else None
+        
+        cursor.execute(f"UPDATE {table} SET {assignments} WHERE id = ? AND quantity >= ?", params)
+        if cursor.rowcount != 1:
+            return None
+        cursor.execute(f"SELECT {columns} FROM {table} WHERE id = ?", (item_id,))
+        return cursor.fetchone()
+    
+    def get_stock_quantity(self, table, item_id):
+        """Retorna o saldo atual de um item, ou None se ele não existir"""
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT quantity FROM {table} WHERE id = ?", (item_id,))
+        row = cursor.fetchone()
+        return int(row[0] or 0) if row else None
+    
+    def update_changed_columns(self, table, row_id, values, touch=None):
+        """
+        Grava apenas as colunas de `values` cujo conteúdo difere do que está no banco (sem commit).
+        
+        Args:
+            table (str): Tabela com chave primária `id`.
+            values (dict): Valores desejados, por coluna.
+            touch (dict, optional): Colunas gravadas somente se alguma outra mudou
+                (ex.: data da última atualização).
+            
+        Returns:
+            dict: Colunas alteradas, incluindo `touch`; {} se nada mudou, ou None
+                se a linha não existir.
+        """
+        columns = list(values)
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE id = ?", (row_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        
+        changed = {
+            column: values[column]
+            for column, current in zip(columns, row)
+            if not _same_value(current, values[column])
+        }
+        if not changed:
+            return {}
+        if touch:
+            changed.update(touch)
+        
+        set_clause = ", ".join(f"{column} = ?" for column in changed)
+        cursor.execute(f"UPDATE {table} SET {set_clause} WHERE id = ?", tuple(changed.values()) + (row_id,))
+        return changed
+    
+    def record_daily_movement(self, item_kind, item_id, group_id, movement_type, quantity, exit_type="", day=None):
+        """Acumula uma movimentação na tabela de consolidação diária
+        
+        Não faz commit: deve ser chamado dentro da mesma transação que grava a
+        movimentação, para que o histórico e a consolidação fiquem consistentes.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        INSERT INTO daily_movements (item_kind, item_id, group_id, day, type, exit_type, quantity, count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT (item_kind, item_id, day, type, exit_type) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            count = count + 1,
+            group_id = excluded.group_id
+        ''', (
+            item_kind, str(item_id), group_id or "",
+            day or datetime.now().strftime("%Y-%m-%d"),
+            movement_type, exit_type or "", int(quantity)
+        ))
+    
+    def rebuild_daily_movements(self):
+        """Reconstrói a tabela de consolidação diária a partir das movimentações de estoque
+        
+        Returns:
+            int: Número de registros consolidados, ou -1 em caso de erro.
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM daily_movements")
+            
+            # Consolidar a partir do registro único de movimentações
+            cursor.execute('''
+            INSERT INTO daily_movements (item_kind, item_id, group_id, day, type, exit_type, quantity, count)
+            SELECT m.kind, m.item_id,
+                   COALESCE(MAX(CASE WHEN m.kind = 'product' THEN p.group_id ELSE r.group_id END), ''),
+                   m.day, m.type, COALESCE(m.exit_type, ''),
+                   COALESCE(SUM(m.quantity), 0), COUNT(*)
+            FROM stock_movements m
+            LEFT JOIN products p ON m.kind = 'product' AND p.id = m.item_id
+            LEFT JOIN residues r ON m.kind = 'residue' AND r.id = m.item_id
+            WHERE m.day IS NOT NULL
+            GROUP BY m.kind, m.item_id, m.day, m.type, COALESCE(m.exit_type, '')
+            ''')
+            
+            self.conn.commit()
+            
+            cursor.execute("SELECT COUNT(*) FROM daily_movements")
+            total = cursor.fetchone()[0]
+            logger.info("Tabela daily_movements reconstruída com %d registros", total)
+            return total
+        except Exception as e:
+            self.conn.rollback()
+            logger.exception("Erro ao reconstruir movimentações diárias: %s", e)
+            return -1
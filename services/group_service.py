@@ -1,15 +1,22 @@
 from datetime import datetime
+import logging
 import traceback
+from .base_service import BaseService
+from .instrumentation import timed
+from .ids import new_id
+from .records import Group
 
-class GroupService:
+logger = logging.getLogger(__name__)
+
+class GroupService(BaseService):
     """Serviço para gerenciar grupos de produtos e resíduos"""
     
     def __init__(self, firebase, db):
-        self.firebase = firebase
-        self.db = db
+        super().__init__(firebase, db)
         self.product_groups_collection = "product_groups"
         self.residue_groups_collection = "residue_groups"
     
+    @timed()
     def get_all_product_groups(self):
         """Obtém todos os grupos de produtos"""
         try:
@@ -25,23 +32,12 @@ class GroupService:
                     group["id"] = doc.id
                     groups.append(group)
             else:
-                # Usando SQLite
-                cursor = self.db.execute_query(f"SELECT * FROM {self.product_groups_collection}")
+                # Usando SQLite (colunas nomeadas na ordem dos slots de Group)
+                cursor = self.db.execute_query(
+                    f"SELECT {', '.join(Group.__slots__)} FROM {self.product_groups_collection}"
+                )
                 if cursor:
-                    for row in cursor.fetchall():
-                        # Converter a linha em um dicionário
-                        cursor.execute(f"PRAGMA table_info({self.product_groups_collection})")
-                        columns = [info[1] for info in cursor.fetchall()]
-                        
-                        group = {}
-                        for i, col in enumerate(columns):
-                            group[col] = row[i]
-                        
-                        # Garantir que o ID esteja presente
-                        if "id" not in group and len(row) > 0:
-                            group["id"] = row[0]
-                            
-                        groups.append(group)
+                    groups = [Group(*row) for row in cursor.fetchall()]
             
             return groups
         except Exception as e:
@@ -50,6 +46,7 @@ class GroupService:
             traceback.print_exc()
             return []
     
+    @timed()
     def get_all_residue_groups(self):
         """Obtém todos os grupos de resíduos"""
         try:
@@ -65,23 +62,12 @@ class GroupService:
                     group["id"] = doc.id
                     groups.append(group)
             else:
-                # Usando SQLite
-                cursor = self.db.execute_query(f"SELECT * FROM {self.residue_groups_collection}")
+                # Usando SQLite (colunas nomeadas na ordem dos slots de Group)
+                cursor = self.db.execute_query(
+                    f"SELECT {', '.join(Group.__slots__)} FROM {self.residue_groups_collection}"
+                )
                 if cursor:
-                    for row in cursor.fetchall():
-                        # Converter a linha em um dicionário
-                        cursor.execute(f"PRAGMA table_info({self.residue_groups_collection})")
-                        columns = [info[1] for info in cursor.fetchall()]
-                        
-                        group = {}
-                        for i, col in enumerate(columns):
-                            group[col] = row[i]
-                        
-                        # Garantir que o ID esteja presente
-                        if "id" not in group and len(row) > 0:
-                            group["id"] = row[0]
-                            
-                        groups.append(group)
+                    groups = [Group(*row) for row in cursor.fetchall()]
             
             return groups
         except Exception as e:
@@ -265,14 +251,9 @@ class GroupService:
                 # Usando Firebase
                 self.db.collection(self.product_groups_collection).document(group_id).update(group_data)
             else:
-                # Usando SQLite
-                set_clause = ", ".join([f"{k} = ?" for k in group_data.keys()])
-                values = tuple(group_data.values())
-                
-                self.db.execute_query(
-                    f"UPDATE {self.product_groups_collection} SET {set_clause} WHERE id = ?",
-                    values + (group_id,)
-                )
+                # Usando SQLite: apenas as colunas que mudaram
+                if self.db.update_changed_columns(self.product_groups_collection, group_id, group_data):
+                    self.db.conn.commit()
             
             return True
         except Exception as e:
@@ -291,14 +272,9 @@ class GroupService:
                 # Usando Firebase
                 self.db.collection(self.residue_groups_collection).document(group_id).update(group_data)
             else:
-                # Usando SQLite
-                set_clause = ", ".join([f"{k} = ?" for k in group_data.keys()])
-                values = tuple(group_data.values())
-                
-                self.db.execute_query(
-                    f"UPDATE {self.residue_groups_collection} SET {set_clause} WHERE id = ?",
-                    values + (group_id,)
-                )
+                # Usando SQLite: apenas as colunas que mudaram
+                if self.db.update_changed_columns(self.residue_groups_collection, group_id, group_data):
+                    self.db.conn.commit()
             
             return True
         except Exception as e:
@@ -328,51 +304,64 @@ class GroupService:
             return False
     
     def delete_group(self, group_id, is_residue=False):
-        """Exclui um grupo do banco de dados"""
+        """Exclui um grupo do banco de dados, desassociando seus itens"""
+        return self.delete_group_cascade(group_id, is_residue, delete_items=False) is not None
+    
+    @timed()
+    def delete_group_cascade(self, group_id, is_residue=False, delete_items=True):
+        """
+        Exclui um grupo e todos os seus itens (ou apenas os desassocia) em uma única transação.
+        
+        Cada tabela recebe um único comando baseado em conjunto, em vez de uma
+        exclusão por item, e a sincronização com o Firebase é feita em um único lote.
+        
+        Args:
+            group_id (str): ID do grupo.
+            is_residue (bool, optional): Se o grupo é de resíduos. Padrão é False.
+            delete_items (bool, optional): Se True, exclui os itens do grupo; caso
+                contrário, apenas desassocia os produtos (os resíduos não são
+                alterados nem sincronizados). Padrão é True.
+            
+        Returns:
+            int: Número de itens excluídos ou desassociados, ou None em caso de erro.
+        """
+        table = self.residue_groups_collection if is_residue else self.product_groups_collection
+        items_table = "residues" if is_residue else "products"
         try:
-            print(f"GroupService: Excluindo grupo com ID {group_id}, is_residue={is_residue}")
+            logger.info("Excluindo grupo %s (is_residue=%s, delete_items=%s)", group_id, is_residue, delete_items)
             
-            # Determinar a tabela correta
-            table = "residue_groups" if is_residue else "product_groups"
-            
-            # Primeiro, remover a associação de produtos/resíduos com o grupo
-            if not is_residue:
-                self.remove_products_from_group(group_id)
-            else:
-                # Implementar método similar para resíduos se necessário
-                pass
-            
-            # Excluir do banco de dados
             cursor = self.db.conn.cursor()
-            cursor.execute(f'DELETE FROM {table} WHERE id = ?', (group_id,))
-            rows_affected = cursor.rowcount
-            self.db.conn.commit()
+            item_ids = []
+            # Sem excluir os itens, resíduos ficam como antes da exclusão em lote: só a
+            # chave estrangeira (ON DELETE SET NULL) limpa o group_id local
+            if delete_items or not is_residue:
+                cursor.execute(f"SELECT id FROM {items_table} WHERE group_id = ?", (group_id,))
+                item_ids = [row[0] for row in cursor.fetchall()]
+            
+            if delete_items:
+                if not is_residue:
+                    cursor.execute(
+                        "DELETE FROM usage_timeseries WHERE product_id IN (SELECT id FROM products WHERE group_id = ?)",
+                        (group_id,)
+                    )
+                cursor.execute(f"DELETE FROM {items_table} WHERE group_id = ?", (group_id,))
+            elif not is_residue:
+                cursor.execute("UPDATE products SET group_id = NULL WHERE group_id = ?", (group_id,))
             
-            print(f"GroupService: Grupo excluído do banco de dados. Linhas afetadas: {rows_affected}")
+            cursor.execute(f"DELETE FROM {table} WHERE id = ?", (group_id,))
+            group_rows = cursor.rowcount
+            self.db.conn.commit()
             
-            # Verificar se a exclusão foi bem-sucedida
-            cursor.execute(f'SELECT COUNT(*) FROM {table} WHERE id = ?', (group_id,))
-            count = cursor.fetchone()[0]
-            if count > 0:
-                print(f"ERRO: Grupo ainda existe no banco de dados após exclusão!")
-                return False
+            action = "excluídos" if delete_items else "desassociados"
+            logger.info("Grupo excluído (%d linha(s)); %d itens %s", group_rows, len(item_ids), action)
             
-            # Sincronizar com Firebase
-            if self.firebase and hasattr(self.firebase, 'online_mode') and self.firebase.online_mode:
-                try:
-                    collection = "residue_groups" if is_residue else "product_groups"
-                    self.firebase.db.collection(collection).document(group_id).delete()
-                    print(f"Grupo excluído do Firebase")
-                except Exception as e:
-                    print(f"Erro ao excluir grupo do Firebase: {e}")
-                    # Adicionar à fila de sincronização
-                    self.db.add_sync_operation('delete', collection, group_id, {})
-            else:
-                # Adicionar à fila de sincronização
-                collection = "residue_groups" if is_residue else "product_groups"
-                self.db.add_sync_operation('delete', collection, group_id, {})
+            # Itens e grupo sincronizados em um único lote
+            item_fields = None if delete_items else {"group_id": None}
+            writes = [(items_table, item_id, item_fields) for item_id in item_ids]
+            writes.append((table, group_id, None))
+            self._sync_writes(table, writes)
             
-            return True
+            return len(item_ids)
         except Exception as e:
             print(f"Erro ao excluir grupo: {e}")
             import traceback
@@ -381,11 +370,12 @@ class GroupService:
                 self.db.conn.rollback()
             except:
                 pass
-            return False
+            return None
+    
     def remove_products_from_group(self, group_id):
         """Remove a associação de produtos com o grupo"""
         try:
-            print(f"GroupService: Removendo associação de produtos com o grupo {group_id}")
+            logger.debug("Removendo associação de produtos com o grupo %s", group_id)
             
             # Atualizar produtos no banco de dados
             cursor = self.db.conn.cursor()
@@ -393,7 +383,7 @@ class GroupService:
             rows_affected = cursor.rowcount
             self.db.conn.commit()
             
-            print(f"GroupService: {rows_affected} produtos desassociados do grupo")
+            logger.debug("%d produtos desassociados do grupo", rows_affected)
             return True
         except Exception as e:
             print(f"Erro ao remover produtos do grupo: {e}")
@@ -454,7 +444,7 @@ class GroupService:
         try:
             products = []
             # Adicionar log para depuração
-            print(f"Buscando produtos do grupo {group_id}")
+            logger.debug("Buscando produtos do grupo %s", group_id)
             
             # Verificar se estamos usando o Firebase ou o SQLite
             if hasattr(self, 'db') and hasattr(self.db, 'conn'):
@@ -472,7 +462,7 @@ class GroupService:
                     product["id"] = product.get("id", "")  # Garantir que o ID esteja presente
                     products.append(product)
                 
-                print(f"SQLite: Encontrados {len(products)} produtos para o grupo {group_id}")
+                logger.debug("SQLite: Encontrados %d produtos para o grupo %s", len(products), group_id)
             else:
                 # Usando Firebase
                 docs = self.db.collection("stock_products").where("group_id", "==", group_id).get()
@@ -482,7 +472,7 @@ class GroupService:
                     product["id"] = doc.id
                     products.append(product)
                 
-                print(f"Firebase: Encontrados {len(products)} produtos para o grupo {group_id}")
+                logger.debug("Firebase: Encontrados %d produtos para o grupo %s", len(products), group_id)
             
             return products
         except Exception as e:
@@ -588,11 +578,7 @@ class GroupService:
                         return group
             
             # Se não existir, criar um novo grupo
-            import uuid
-            import time
-            from datetime import datetime
-            
-            group_id = str(uuid.uuid4())
+            group_id = new_id()
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             new_group = {
@@ -672,11 +658,7 @@ class GroupService:
                         return group
             
             # Se não existir, criar um novo grupo
-            import uuid
-            import time
-            from datetime import datetime
-            
-            group_id = str(uuid.uuid4())
+            group_id = new_id()
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             new_group = {
@@ -701,43 +683,38 @@ class GroupService:
             return None
 
     def update_group(self, group_id, group_data, is_residue=False):
-        """Atualiza um grupo existente"""
+        """Atualiza um grupo existente
+        
+        Só os campos alterados são gravados e enviados ao Firebase; se nada
+        mudou, não há escrita nem sincronização.
+        """
         try:
             # Determinar a tabela com base no tipo de grupo
             table = "residue_groups" if is_residue else "product_groups"
             
-            # Atualizar no banco de dados local
-            cursor = self.db.conn.cursor()
-            cursor.execute(f'''
-            UPDATE {table} SET
-                name = ?,
-                description = ?,
-                icon = ?,
-                color = ?,
-                last_updated = ?
-            WHERE id = ?
-            ''', (
-                group_data["name"],
-                group_data.get("description", ""),
-                group_data.get("icon", "FOLDER"),
-                group_data.get("color", "blue"),
-                datetime.now().strftime("%d/%m/%Y"),
-                group_id
-            ))
+            # Atualizar no banco de dados local apenas as colunas que mudaram
+            changed = self.db.update_changed_columns(table, group_id, {
+                "name": group_data["name"],
+                "description": group_data.get("description", ""),
+                "icon": group_data.get("icon", "FOLDER"),
+                "color": group_data.get("color", "blue")
+            }, touch={"last_updated": datetime.now().strftime("%d/%m/%Y")})
+            if not changed:
+                return changed is not None
             self.db.conn.commit()
             
-            # Sincronizar com Firebase
+            # Sincronizar com Firebase apenas os campos alterados
             collection = "residue_groups" if is_residue else "product_groups"
             if self.firebase and self.firebase.online_mode:
                 try:
-                    self.firebase.db.collection(collection).document(group_id).update(group_data)
+                    self.firebase.db.collection(collection).document(group_id).set(changed, merge=True)
                 except Exception as e:
                     print(f"Erro ao sincronizar atualização de grupo com Firebase: {e}")
                     # Adicionar à fila de sincronização
-                    self.db.add_sync_operation('update', collection, group_id, group_data)
+                    self.db.add_sync_operation('merge', collection, group_id, changed)
             else:
                 # Adicionar à fila de sincronização
-                self.db.add_sync_operation('update', collection, group_id, group_data)
+                self.db.add_sync_operation('merge', collection, group_id, changed)
             
             return True
         except Exception as e:
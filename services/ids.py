@@ -0,0 +1,49 @@
+import os
+import threading
+import time
+
+# Alfabeto Base32 de Crockford (sem I, L, O e U), usado pelo formato ULID
+_ENCODING = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+
+def new_ulid():
+    """
+    Gera um ULID: 48 bits de milissegundos desde a época + 80 bits aleatórios,
+    em 26 caracteres Base32.
+
+    Os IDs ordenam na ordem de criação (inclusive como texto), o que mantém as
+    inserções no fim do índice da chave primária. Dentro do mesmo
+    milissegundo, a parte aleatória é incrementada em vez de sorteada de novo,
+    então IDs gerados em sequência nunca colidem e continuam em ordem.
+    """
+    global _last_ms, _last_random
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms <= _last_ms:
+            # Mesmo milissegundo (ou relógio atrasado): continua a sequência anterior
+            ms = _last_ms
+            random_part = _last_random + 1
+            if random_part >> _RANDOM_BITS:
+                ms += 1
+                random_part = int.from_bytes(os.urandom(10), "big")
+        else:
+            random_part = int.from_bytes(os.urandom(10), "big")
+        _last_ms = ms
+        _last_random = random_part
+
+    value = (ms << _RANDOM_BITS) | random_part
+    chars = []
+    for _ in range(26):
+        chars.append(_ENCODING[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_id(prefix=None):
+    """ULID com prefixo opcional para identificar o tipo do registro (ex.: "exit_01J...")"""
+    return f"{prefix}_{new_ulid()}" if prefix else new_ulid()
@@ -0,0 +1,273 @@
+import collections
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Quantidade de amostras mantidas por métrica para o cálculo dos percentis
+SAMPLE_SIZE = 1024
+
+# Arquivo gerado pela exportação em JSON (relativo ao diretório de execução, como logs/)
+DUMP_DIR = "logs"
+DUMP_FILE = "metricas.json"
+
+# A coleta fica desligada por padrão; pode ser ligada pela tela de diagnóstico
+# ou iniciando a aplicação com ESTOQUE_INSTRUMENTATION=1
+_enabled = os.environ.get("ESTOQUE_INSTRUMENTATION") == "1"
+
+_lock = threading.Lock()
+_metrics = {}
+_null_context = nullcontext()
+
+
+class _Metric:
+    """Contadores de uma operação medida"""
+
+    __slots__ = ("count", "total", "max", "rows", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.samples = collections.deque(maxlen=SAMPLE_SIZE)
+
+
+def enable(value=True):
+    """Liga (ou desliga) a coleta de métricas"""
+    global _enabled
+    _enabled = bool(value)
+
+
+def is_enabled():
+    """Indica se a coleta de métricas está ligada"""
+    return _enabled
+
+
+def record(name, elapsed, rows=None):
+    """
+    Registra uma execução de `name`.
+
+    Args:
+        name (str): Nome da métrica (ex.: "sql.SELECT products").
+        elapsed (float): Duração em segundos.
+        rows (int, optional): Linhas retornadas ou afetadas.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = _Metric()
+        metric.count += 1
+        metric.total += elapsed
+        if elapsed > metric.max:
+            metric.max = elapsed
+        if rows:
+            metric.rows += rows
+        metric.samples.append(elapsed)
+
+
+def add_rows(name, rows):
+    """Soma linhas lidas a uma métrica já registrada (ex.: fetchall após execute)"""
+    if not _enabled or not rows:
+        return
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is not None:
+            metric.rows += rows
+
+
+def measure(name):
+    """
+    Context manager que mede o tempo do bloco.
+
+    Com a coleta desligada retorna um contexto vazio compartilhado, sem medir nada.
+    """
+    if not _enabled:
+        return _null_context
+    return _measure(name)
+
+
+@contextmanager
+def _measure(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name=None):
+    """
+    Decorador que mede cada chamada da função.
+
+    Args:
+        name (str, optional): Nome da métrica. Padrão é o nome qualificado da
+            função (ex.: "ProductService.get_all_products").
+    """
+    def decorator(func):
+        metric_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(metric_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _percentile(ordered, fraction):
+    """Percentil por posição mais próxima em uma lista já ordenada"""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def snapshot():
+    """
+    Retorna as métricas coletadas, da mais custosa (tempo total) para a menos custosa.
+
+    Returns:
+        list: Dicionários com name, count, total_ms, avg_ms, p50_ms, p95_ms,
+            p99_ms, max_ms e rows. Os percentis consideram as últimas
+            SAMPLE_SIZE execuções de cada métrica.
+    """
+    with _lock:
+        items = [
+            (name, m.count, m.total, m.max, m.rows, sorted(m.samples))
+            for name, m in _metrics.items()
+        ]
+
+    result = []
+    for name, count, total, max_elapsed, rows, samples in items:
+        result.append({
+            "name": name,
+            "count": count,
+            "total_ms": round(total * 1000, 3),
+            "avg_ms": round(total * 1000 / count, 3) if count else 0.0,
+            "p50_ms": round(_percentile(samples, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(samples, 0.95) * 1000, 3),
+            "p99_ms": round(_percentile(samples, 0.99) * 1000, 3),
+            "max_ms": round(max_elapsed * 1000, 3),
+            "rows": rows
+        })
+    result.sort(key=lambda item: item["total_ms"], reverse=True)
+    return result
+
+
+def reset():
+    """Descarta todas as métricas coletadas"""
+    with _lock:
+        _metrics.clear()
+
+
+def dump_json(path=None):
+    """
+    Grava as métricas em um arquivo JSON.
+
+    Args:
+        path (str, optional): Caminho do arquivo. Padrão é logs/metricas.json.
+
+    Returns:
+        str: Caminho do arquivo gerado.
+    """
+    if path is None:
+        os.makedirs(DUMP_DIR, exist_ok=True)
+        path = os.path.join(DUMP_DIR, DUMP_FILE)
+    data = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "enabled": _enabled,
+        "metrics": snapshot()
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+_SQL_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+(?:NOT\s+)?EXISTS)?)\s+[\"'`\[]?(\w+)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=512)
+def sql_metric_name(query):
+    """Agrupa consultas pelo comando e pela primeira tabela (ex.: "sql.SELECT products")"""
+    parts = query.split(None, 1)
+    if not parts:
+        return "sql.?"
+    verb = parts[0].upper()
+    match = _SQL_TABLE_RE.search(query)
+    return f"sql.{verb} {match.group(1)}" if match else f"sql.{verb}"
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor do SQLite que mede execute/executemany e conta as linhas lidas"""
+
+    _metric_name = None
+
+    def execute(self, query, params=()):
+        if not _enabled:
+            return super().execute(query, params)
+        name = self._metric_name = sql_metric_name(query)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, params)
+        finally:
+            # Para INSERT/UPDATE/DELETE, rowcount traz as linhas afetadas;
+            # em SELECT ele vale -1 e as linhas são somadas nos fetch*
+            record(name, time.perf_counter() - start, max(self.rowcount, 0))
+
+    def executemany(self, query, seq_of_params):
+        if not _enabled:
+            return super().executemany(query, seq_of_params)
+        name = self._metric_name = sql_metric_name(query)
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, seq_of_params)
+        finally:
+            record(name, time.perf_counter() - start, max(self.rowcount, 0))
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None and self._metric_name:
+            add_rows(self._metric_name, 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        if self._metric_name:
+            add_rows(self._metric_name, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if self._metric_name:
+            add_rows(self._metric_name, len(rows))
+        return rows
+
+
+class TimedConnection(sqlite3.Connection):
+    """Conexão do SQLite cujos cursores são TimedCursor
+
+    conn.execute/executemany não passam por cursor() na implementação em C,
+    por isso também são redefinidos aqui.
+    """
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, query, params=()):
+        return self.cursor().execute(query, params)
+
+    def executemany(self, query, seq_of_params):
+        return self.cursor().executemany(query, seq_of_params)
@@ -0,0 +1,51 @@
+import heapq
+from datetime import date, datetime
+
+
+def parse_expiry(value):
+    """Converte a validade DD/MM/AAAA em date; valores inválidos ficam por último (date.max)"""
+    if not value:
+        return date.max
+    try:
+        return datetime.strptime(value, "%d/%m/%Y").date()
+    except (ValueError, TypeError):
+        return date.max
+
+
+def plan_fefo(lots, quantity, today=None, include_expired=False):
+    """
+    Distribui uma saída entre lotes, do que vence primeiro para o que vence por último (FEFO).
+
+    Os lotes são organizados em um heap pela validade, e só os necessários
+    para completar a quantidade são retirados dele.
+
+    Args:
+        lots (iterable): Tuplas (id do lote, validade DD/MM/AAAA, saldo).
+        quantity (int): Quantidade total da saída.
+        today (date, optional): Data de referência para lotes vencidos. Padrão é hoje.
+        include_expired (bool, optional): Se False, lotes vencidos não são usados.
+
+    Returns:
+        tuple: (alocações [(id do lote, quantidade)], quantidade que faltou)
+    """
+    today = today or date.today()
+    heap = []
+    for index, (lot_id, expiry, available) in enumerate(lots):
+        available = int(available or 0)
+        if available <= 0:
+            continue
+        expiry_date = parse_expiry(expiry)
+        if not include_expired and expiry_date < today:
+            continue
+        # O índice desempata lotes com a mesma validade pela ordem de leitura
+        heap.append((expiry_date, index, lot_id, available))
+    heapq.heapify(heap)
+
+    allocations = []
+    remaining = int(quantity)
+    while remaining > 0 and heap:
+        _, _, lot_id, available = heapq.heappop(heap)
+        taken = min(available, remaining)
+        allocations.append((lot_id, taken))
+        remaining -= taken
+    return allocations, remaining
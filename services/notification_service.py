@@ -1,18 +1,27 @@
 from datetime import datetime
 import json
+import logging
+from .base_service import BaseService
+from .service_registry import get_service
+from .instrumentation import timed
+from .ids import new_ulid
 
-class NotificationService:
+logger = logging.getLogger(__name__)
+
+class NotificationService(BaseService):
+    # Dias que uma notificação lida permanece na tabela principal
+    RETENTION_DAYS = 30
+    
     def __init__(self, firebase, db):
-        self.firebase = firebase
-        self.db = db
+        super().__init__(firebase, db)
     
     def create_notification(self, notification_type, message, product_id=None):
         """Cria uma nova notificação com tratamento de erros e sincronização"""
         try:
-            # Gerar ID único com timestamp em milissegundos e um número aleatório
-            import random
-            import time
-            notification_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{int(time.time() * 1000) % 1000}_{random.randint(1000, 9999)}"
+            # A data e hora no início mantém a ordem de paginação com as
+            # notificações já gravadas; o ULID garante unicidade e ordem
+            # dentro do mesmo segundo
+            notification_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{new_ulid()}"
             
             # Preparar dados da notificação
             notification = {
@@ -31,7 +40,7 @@ class NotificationService:
             if self.firebase.online_mode:
                 try:
                     self.firebase.db.collection('notifications').document(notification_id).set(notification)
-                    print(f"Notificação criada no Firebase: {message}")
+                    logger.debug("Notificação criada no Firebase: %s", message)
                 except Exception as e:
                     print(f"Erro ao salvar notificação no Firebase: {e}")
                     # Adicionar à fila de sincronização
@@ -39,7 +48,7 @@ class NotificationService:
             else:
                 # Adicionar à fila de sincronização para quando ficar online
                 self.db.add_sync_operation('add', 'notifications', notification_id, notification)
-                print(f"Notificação adicionada à fila de sincronização: {message}")
+                logger.debug("Notificação adicionada à fila de sincronização: %s", message)
             
             return notification
         except Exception as e:
@@ -58,7 +67,7 @@ class NotificationService:
                 notification["date"], 0 if notification["read"] == False else 1, notification["productId"]
             ))
             self.db.conn.commit()
-            print(f"Notificação salva localmente: {notification['message']}")
+            logger.debug("Notificação salva localmente: %s", notification['message'])
             return True
         except Exception as e:
             print(f"Erro ao salvar notificação localmente: {e}")
@@ -159,6 +168,109 @@ class NotificationService:
             self.db.conn.rollback()
             return False
     
+    def mark_all_as_read(self):
+        """Marca todas as notificações não lidas como lidas com um único UPDATE
+        
+        Returns:
+            int: Número de notificações marcadas, ou -1 em caso de erro.
+        """
+        try:
+            cursor = self.db.conn.cursor()
+            cursor.execute('SELECT id FROM notifications WHERE read = 0')
+            notification_ids = [row[0] for row in cursor.fetchall()]
+            
+            if not notification_ids:
+                return 0
+            
+            cursor.execute('UPDATE notifications SET read = 1 WHERE read = 0')
+            self.db.conn.commit()
+            
+            # Uma única escrita em lote (ou uma única operação na fila)
+            self._sync_batch('update', 'notifications', notification_ids, {'read': True})
+            
+            logger.info("%d notificações marcadas como lidas", len(notification_ids))
+            return len(notification_ids)
+        except Exception as e:
+            logger.error("Erro ao marcar todas as notificações como lidas: %s", e)
+            self.db.conn.rollback()
+            return -1
+    
+    def get_notifications_page(self, limit=50, before=None, unread_only=False):
+        """
+        Retorna uma página de notificações, da mais recente para a mais antiga.
+        
+        O ID das notificações começa com a data e hora de criação, então a
+        ordenação e a paginação usam o próprio ID como cursor.
+        
+        Args:
+            limit (int, optional): Tamanho da página. Padrão é 50.
+            before (str, optional): Cursor devolvido pela página anterior.
+            unread_only (bool, optional): Retorna apenas notificações não lidas.
+            
+        Returns:
+            tuple: (lista de notificações, cursor da próxima página ou None)
+        """
+        try:
+            clauses = []
+            params = []
+            
+            if unread_only:
+                clauses.append("read = 0")
+            if before:
+                clauses.append("id < ?")
+                params.append(before)
+            
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            cursor = self.db.conn.cursor()
+            cursor.execute(f'''
+            SELECT id, type, message, date, read, productId FROM notifications
+            {where}
+            ORDER BY id DESC
+            LIMIT ?
+            ''', params + [limit])
+            
+            notifications = self._convert_to_dict(cursor.fetchall())
+            next_cursor = notifications[-1]["id"] if len(notifications) == limit else None
+            return notifications, next_cursor
+        except Exception as e:
+            logger.error("Erro ao buscar página de notificações: %s", e)
+            return [], None
+    
+    def archive_old_notifications(self, days=None):
+        """Move notificações lidas mais antigas que `days` dias para o arquivo
+        
+        Returns:
+            int: Número de notificações arquivadas, ou -1 em caso de erro.
+        """
+        from datetime import timedelta
+        
+        days = self.RETENTION_DAYS if days is None else days
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y%m%d")
+        
+        # A coluna date está em DD/MM/AAAA; comparar como AAAAMMDD
+        date_key = "substr(date, 7, 4) || substr(date, 4, 2) || substr(date, 1, 2)"
+        
+        try:
+            cursor = self.db.conn.cursor()
+            cursor.execute(f'''
+            INSERT OR REPLACE INTO notifications_archive (id, type, message, date, read, productId, archivedAt)
+            SELECT id, type, message, date, read, productId, ?
+            FROM notifications
+            WHERE read = 1 AND {date_key} < ?
+            ''', (datetime.now().isoformat(), cutoff))
+            
+            cursor.execute(f'DELETE FROM notifications WHERE read = 1 AND {date_key} < ?', (cutoff,))
+            archived = cursor.rowcount
+            self.db.conn.commit()
+            
+            if archived:
+                logger.info("%d notificações lidas arquivadas", archived)
+            return archived
+        except Exception as e:
+            logger.error("Erro ao arquivar notificações antigas: %s", e)
+            self.db.conn.rollback()
+            return -1
+    
     def delete_notification(self, notification_id):
         """Exclui uma notificação com tratamento de erros e sincronização"""
         try:
@@ -218,6 +330,7 @@ class NotificationService:
                 continue
         return notifications
     
+    @timed()
     def check_and_create_notifications(self):
         """Verifica condições para criar notificações automáticas"""
         try:
@@ -225,19 +338,14 @@ class NotificationService:
             from services.product_service import ProductService
             from services.settings_service import SettingsService
             
-            # Inicializar serviços
-            product_service = ProductService(self.firebase, self.db)
-            settings_service = SettingsService(self.firebase, self.db)
+            # Obter serviços compartilhados
+            product_service = get_service(self, ProductService)
+            settings_service = get_service(self, SettingsService)
             
-            # Obter configurações
-            settings = settings_service.get_settings()
-            if not settings:
-                print("Configurações não encontradas, usando valores padrão")
-                threshold = 5
-                expiry_days = 30
-            else:
-                threshold = settings.get("notifications", {}).get("lowStockThreshold", 5)
-                expiry_days = settings.get("notifications", {}).get("expiryWarningDays", 30)
+            # Obter limites do instantâneo de configurações em memória
+            settings = settings_service.get_snapshot()
+            threshold = settings.low_stock_threshold
+            expiry_days = settings.expiry_warning_days
             
             # Verificar produtos com estoque baixo
             low_stock_products = product_service.get_low_stock_products(threshold)
@@ -1,16 +1,38 @@
 from datetime import datetime, timedelta
-import json
-import time
-import uuid
+import logging
 from .base_service import BaseService
+from .service_registry import get_service
+from .instrumentation import timed
+from .scan_lookup import ScanLookup
+from .ids import new_id
+from .records import Product
+
+logger = logging.getLogger(__name__)
 
 class ProductService(BaseService):
     """Serviço para gerenciamento de produtos"""
 
+    def __init__(self, firebase, db):
+        super().__init__(firebase, db)
+        # Tabela de códigos de barras/lotes usada pela leitura contínua
+        self.scan_lookup = ScanLookup(self._load_scan_codes)
+
+    # Linha completa do produto com os dados do grupo, na ordem esperada por
+    # _convert_to_dict e _convert_to_records (as colunas são nomeadas porque a ordem física da tabela
+    # varia conforme as migrações aplicadas em cada banco)
+    PRODUCT_SELECT = """
+        SELECT p.id, p.name, p.quantity, p.lot, p.expiry, p.entryDate,
+            p.fabDate, p.exitDate, p.weeklyUsage, p.lastUpdateDate,
+            p.category, p.location, p.group_id, p.manufacturer, p.barcode,
+            g.name, g.icon, g.color
+        FROM products p
+        LEFT JOIN product_groups g ON g.id = p.group_id
+    """
+
     def identify_product_group(self, product_name):
         """Identifica o grupo de um produto com base no nome"""
         from services.group_service import GroupService
-        group_service = GroupService(self.firebase, self.db)
+        group_service = get_service(self, GroupService)
         
         # Normalizar nome do produto (remover acentos, converter para minúsculas)
         import unicodedata
@@ -95,10 +117,10 @@ class ProductService(BaseService):
             
             # Verificar se já existe produto com mesmo nome e validade no grupo
             cursor = self.db.conn.cursor()
-            cursor.execute('''
-            SELECT * FROM products 
-            WHERE group_id = ? AND name = ? AND expiry = ?
-            ''', (group["id"], product_data["name"], product_data["expiry"]))
+            cursor.execute(
+                f"{self.PRODUCT_SELECT} WHERE p.group_id = ? AND p.name = ? AND p.expiry = ?",
+                (group["id"], product_data["name"], product_data["expiry"])
+            )
             
             existing_product = cursor.fetchone()
             
@@ -114,12 +136,26 @@ class ProductService(BaseService):
                 # Se tiver fabricante, atualizar
                 if "manufacturer" in product_data and product_data["manufacturer"]:
                     updated_product["manufacturer"] = product_data["manufacturer"]
+                if product_data.get("barcode"):
+                    updated_product["barcode"] = product_data["barcode"]
+                
+                # Atualizar o saldo e registrar a entrada no histórico na mesma transação
+                with self.transaction():
+                    changed = self._update_product_row(existing_product_dict["id"], updated_product)
+                    if changed is None:
+                        raise ValueError(f"Produto com ID {existing_product_dict['id']} não encontrado")
+                    entry_record = self._register_entry_history(
+                        existing_product_dict["id"], existing_product_dict["name"],
+                        group["id"], int(product_data["quantity"])
+                    )
                 
-                # Atualizar produto existente
-                return self.update_product(existing_product_dict["id"], updated_product)
+                self._publish_product_update(existing_product_dict["id"], updated_product, changed)
+                self.sync_with_firebase('product_history', entry_record["id"], entry_record, 'add')
+                
+                return updated_product
             
             # Gerar ID único
-            product_id = datetime.now().strftime('%Y%m%d%H%M%S')
+            product_id = new_id()
             
             # Preparar dados do produto
             product = {
@@ -133,10 +169,10 @@ class ProductService(BaseService):
                 "exitDate": product_data.get("exitDate", ""),
                 "category": product_data.get("category", ""),
                 "location": product_data.get("location", ""),
-                "weeklyUsage": product_data.get("weeklyUsage", [0] * 7),
                 "lastUpdateDate": self.get_current_date(),
                 "group_id": product_data.get("group_id", ""),
-                "manufacturer": product_data.get("manufacturer", "")
+                "manufacturer": product_data.get("manufacturer", ""),
+                "barcode": (product_data.get("barcode") or "").strip()
             }
             
             # Salvar localmente usando transação
@@ -145,21 +181,34 @@ class ProductService(BaseService):
                 cursor.execute('''
                 INSERT INTO products (
                     id, name, quantity, lot, expiry, entryDate, 
-                    fabDate, exitDate, weeklyUsage, lastUpdateDate,
-                    category, location, group_id, manufacturer
+                    fabDate, exitDate, lastUpdateDate,
+                    category, location, group_id, manufacturer, barcode
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     product["id"], product["name"], product["quantity"],
                     product["lot"], product["expiry"], product["entryDate"],
                     product["fabDate"], product["exitDate"],
-                    json.dumps(product["weeklyUsage"]),
                     product["lastUpdateDate"],
                     product["category"], product["location"],
-                    product["group_id"], product["manufacturer"]
+                    product["group_id"], product["manufacturer"],
+                    product["barcode"]
                 ))
+                
+                # Registrar a entrada no histórico, na mesma transação
+                entry_record = self._register_entry_history(
+                    product["id"], product["name"], product["group_id"], product["quantity"]
+                )
+                
+                # Uso semanal informado no cadastro vai para a série temporal
+                if any(product_data.get("weeklyUsage") or []):
+                    self._write_weekly_usage(product["id"], product_data["weeklyUsage"])
+            
+            if product["barcode"]:
+                self.scan_lookup.invalidate()
             
             # Sincronizar com Firebase
             self.sync_with_firebase('products', product_id, product, 'add')
+            self.sync_with_firebase('product_history', entry_record["id"], entry_record, 'add')
             
             # Criar notificação
             self._create_product_notification(product)
@@ -168,19 +217,15 @@ class ProductService(BaseService):
         except Exception as e:
             return self.log_error("Erro ao adicionar produto", e)
     
+    @timed()
     def get_all_products(self):
-        """Retorna todos os produtos com tratamento de erros"""
+        """Retorna todos os produtos, já com group_id e nome, ícone e cor do grupo"""
         try:
             cursor = self.db.conn.cursor()
-            cursor.execute('''
-            SELECT id, name, quantity, lot, expiry, entryDate, 
-                fabDate, exitDate, weeklyUsage, lastUpdateDate
-            FROM products 
-            ORDER BY name
-            ''')
+            cursor.execute(f"{self.PRODUCT_SELECT} ORDER BY p.name")
             results = cursor.fetchall()
-            products = self._convert_to_dict(results)
-            print(f"get_all_products: {len(products)} produtos encontrados")
+            products = self._convert_to_records(results)
+            logger.debug("get_all_products: %d produtos encontrados", len(products))
             return products
         except Exception as e:
             print(f"Erro ao buscar produtos: {e}")
@@ -190,14 +235,9 @@ class ProductService(BaseService):
             # Tentar novamente com uma nova conexão
             try:
                 cursor = self.db.conn.cursor()
-                cursor.execute('''
-                SELECT id, name, quantity, lot, expiry, entryDate, 
-                    fabDate, exitDate, weeklyUsage, lastUpdateDate
-                FROM products 
-                ORDER BY name
-                ''')
+                cursor.execute(f"{self.PRODUCT_SELECT} ORDER BY p.name")
                 results = cursor.fetchall()
-                products = self._convert_to_dict(results)
+                products = self._convert_to_records(results)
                 print(f"Segunda tentativa: {len(products)} produtos encontrados")
                 return products
             except Exception as e2:
@@ -205,8 +245,15 @@ class ProductService(BaseService):
                 traceback.print_exc()
                 return []
     
+    # Colunas de products editáveis por update_product
+    UPDATABLE_COLUMNS = ("name", "quantity", "lot", "expiry", "fabDate", "exitDate", "category", "location")
+    
     def update_product(self, product_id, updated_product):
-        """Atualiza um produto existente com tratamento de erros e sincronização"""
+        """Atualiza um produto existente com tratamento de erros e sincronização
+        
+        Só as colunas que mudaram são gravadas e enviadas ao Firebase (mescladas
+        no documento). Se nada mudou, não há escrita nem sincronização.
+        """
         try:
             # Validar dados do produto
             valid, _ = self.validate_required_fields(
@@ -215,39 +262,62 @@ class ProductService(BaseService):
             if not valid:
                 return None
             
-            # Garantir que o ID não seja alterado
-            updated_product["id"] = product_id
-            
-            # Atualizar data de última atualização
-            updated_product["lastUpdateDate"] = self.get_current_date()
-            
-            # Atualizar localmente usando transação
+            # Atualizar localmente usando transação; uma mudança de saldo vira
+            # um ajuste no histórico, gravado junto com o produto
+            adjustment_record = None
             with self.transaction():
-                cursor = self.db.conn.cursor()
-                cursor.execute('''
-                UPDATE products SET 
-                    name = ?, quantity = ?, lot = ?, expiry = ?, 
-                    fabDate = ?, exitDate = ?, weeklyUsage = ?, lastUpdateDate = ?,
-                    category = ?, location = ?
-                WHERE id = ?
-                ''', (
-                    updated_product["name"], updated_product["quantity"],
-                    updated_product["lot"], updated_product["expiry"],
-                    updated_product.get("fabDate", ""), updated_product.get("exitDate", ""),
-                    json.dumps(updated_product.get("weeklyUsage", [0] * 7)),
-                    updated_product["lastUpdateDate"],
-                    updated_product.get("category", ""), updated_product.get("location", ""),
-                    product_id
-                ))
+                previous_quantity = self.db.get_stock_quantity("products", product_id)
+                changed = self._update_product_row(product_id, updated_product)
+                if changed and "quantity" in changed:
+                    adjustment_record = self._register_movement_history(
+                        product_id, updated_product["name"], updated_product.get("group_id", ""),
+                        "adjustment", int(changed["quantity"]) - previous_quantity, "Ajuste de quantidade"
+                    )
             
-            # Sincronizar com Firebase
-            self.sync_with_firebase('products', product_id, updated_product, 'update')
+            if changed is None:
+                print(f"Produto com ID {product_id} não encontrado")
+                return None
             
+            self._publish_product_update(product_id, updated_product, changed)
+            if adjustment_record:
+                self.sync_with_firebase('product_history', adjustment_record["id"], adjustment_record, 'add')
             return updated_product
         except Exception as e:
             self.log_error("Erro ao atualizar produto", e)
             return None
     
+    def _update_product_row(self, product_id, updated_product):
+        """Grava as colunas alteradas do produto (sem commit)
+        
+        Deve ser chamado dentro de uma transação. Retorna as colunas gravadas,
+        {} se nada mudou ou None se o produto não existe.
+        """
+        # Garantir que o ID não seja alterado
+        updated_product["id"] = product_id
+        
+        values = {column: updated_product.get(column, "") for column in self.UPDATABLE_COLUMNS}
+        # Sem "barcode" no dicionário, o código atual é mantido
+        if updated_product.get("barcode") is not None:
+            values["barcode"] = updated_product["barcode"].strip()
+        
+        return self.db.update_changed_columns(
+            "products", product_id, values, touch={"lastUpdateDate": self.get_current_date()}
+        )
+    
+    def _publish_product_update(self, product_id, updated_product, changed):
+        """Depois do commit, aplica as colunas gravadas e sincroniza apenas os campos alterados"""
+        if not changed:
+            logger.debug("Produto %s sem alterações; nada gravado", product_id)
+            return
+        
+        updated_product["lastUpdateDate"] = changed["lastUpdateDate"]
+        
+        if changed.keys() & {"name", "lot", "barcode"}:
+            self.scan_lookup.invalidate()
+        
+        # Sincronizar com Firebase apenas os campos alterados
+        self.sync_with_firebase('products', product_id, changed, 'merge')
+    
     def delete_product(self, product_id):
         """Exclui um produto com tratamento de erros e sincronização"""
         try:
@@ -265,7 +335,9 @@ class ProductService(BaseService):
             # Excluir diretamente do banco de dados, sem converter para dicionário
             cursor.execute('DELETE FROM products WHERE id = ?', (product_id,))
             rows_affected = cursor.rowcount
+            cursor.execute('DELETE FROM usage_timeseries WHERE product_id = ?', (product_id,))
             self.db.conn.commit()
+            self.scan_lookup.invalidate()
             print(f"Produto com ID {product_id} excluído localmente. Linhas afetadas: {rows_affected}")
             
             # Verificar se a exclusão foi bem-sucedida
@@ -300,31 +372,50 @@ class ProductService(BaseService):
                 pass
             return False
     
+    def _load_scan_codes(self):
+        """Lê (id, nome, lote, código de barras) de todos os produtos para a ScanLookup"""
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT id, name, lot, barcode FROM products")
+        return cursor.fetchall()
+    
+    def get_product_barcode(self, product_id):
+        """Retorna o código de barras (EAN) cadastrado para o produto, ou ""."""
+        cursor = self.db.conn.cursor()
+        cursor.execute("SELECT barcode FROM products WHERE id = ?", (product_id,))
+        row = cursor.fetchone()
+        return (row[0] or "") if row else ""
+    
+    def lookup_code(self, code):
+        """Resolve um código lido (EAN ou lote); veja ScanLookup.lookup"""
+        return self.scan_lookup.lookup(code)
+    
     def _convert_to_dict(self, rows):
         """Converte resultados do banco de dados em dicionários com tratamento de erros"""
         products = []
         if not rows:
             return products
-            
+        
+        today = self.get_current_date()
         for row in rows:
             try:
                 # Verificar se temos dados suficientes
                 if len(row) < 10:
-                    print(f"Aviso: Linha com dados incompletos: {row}")
+                    logger.warning("Linha com dados incompletos: %s", row)
                     continue
                 
                 # Extrair valores com tratamento de nulos
                 product = {
-                    "id": row[0] or str(uuid.uuid4()),
+                    "id": row[0] or new_id(),
                     "name": row[1] or "Produto sem nome",
                     "quantity": int(row[2]) if row[2] is not None else 0,
                     "lot": row[3] or "",
-                    "expiry": row[4] or self.get_current_date(),
-                    "entryDate": row[5] or self.get_current_date(),
+                    "expiry": row[4] or today,
+                    "entryDate": row[5] or today,
                     "fabDate": row[6] or "",
                     "exitDate": row[7] or "",
-                    "weeklyUsage": json.loads(row[8]) if row[8] else [0] * 7,
-                    "lastUpdateDate": row[9] or self.get_current_date()
+                    "lastUpdateDate": row[9] or today,
+                    # Sempre presente: o dashboard e as telas de grupo agrupam por ele
+                    "group_id": (row[12] or "") if len(row) > 12 else ""
                 }
                 
                 # Adicionar campos opcionais se disponíveis
@@ -332,6 +423,14 @@ class ProductService(BaseService):
                     product["category"] = row[10] or ""
                 if len(row) > 11:
                     product["location"] = row[11] or ""
+                if len(row) > 14:
+                    product["manufacturer"] = row[13] or ""
+                    product["barcode"] = row[14] or ""
+                if len(row) > 17:
+                    # Dados do grupo vindos do JOIN com product_groups
+                    product["group_name"] = row[15] or ""
+                    product["group_icon"] = row[16] or ""
+                    product["group_color"] = row[17] or ""
                 
                 products.append(product)
             except Exception as e:
@@ -340,11 +439,35 @@ class ProductService(BaseService):
         
         return products
     
+    def _convert_to_records(self, rows):
+        """
+        Converte linhas do PRODUCT_SELECT em registros Product imutáveis.
+        
+        Usado nas listas carregadas para o cache (get_all_products e
+        derivadas), em que o mesmo registro é compartilhado entre as listas;
+        os caminhos de escrita continuam usando _convert_to_dict.
+        """
+        products = []
+        today = self.get_current_date()
+        for row in rows:
+            try:
+                products.append(Product(
+                    row[0] or new_id(), row[1] or "Produto sem nome",
+                    int(row[2]) if row[2] is not None else 0, row[3] or "",
+                    row[4] or today, row[5] or today, row[6] or "", row[7] or "",
+                    row[9] or today, row[10] or "", row[11] or "", row[12] or "",
+                    row[13] or "", row[14] or "", row[15] or "", row[16] or "", row[17] or ""
+                ))
+            except Exception as e:
+                self.log_error(f"Erro ao converter produto", e)
+                continue
+        return products
+    
     def _create_product_notification(self, product):
         """Cria notificações relacionadas ao produto"""
         try:
             from services.notification_service import NotificationService
-            notification_service = NotificationService(self.firebase, self.db)
+            notification_service = get_service(self, NotificationService)
             
             # Notificação de produto adicionado
             notification_service.create_notification(
@@ -386,9 +509,9 @@ class ProductService(BaseService):
         """Retorna produtos com estoque abaixo do limiar especificado"""
         try:
             cursor = self.db.conn.cursor()
-            cursor.execute('SELECT * FROM products WHERE quantity <= ? ORDER BY quantity', (threshold,))
+            cursor.execute(f"{self.PRODUCT_SELECT} WHERE p.quantity <= ? ORDER BY p.quantity", (threshold,))
             results = cursor.fetchall()
-            return self._convert_to_dict(results)
+            return self._convert_to_records(results)
         except Exception as e:
             self.log_error("Erro ao buscar produtos com estoque baixo", e)
             return []
@@ -411,25 +534,123 @@ class ProductService(BaseService):
             return []
 
     def get_weekly_usage_data(self):
-        """Retorna dados de uso semanal para todos os produtos"""
+        """Retorna dados de uso semanal dos produtos que tiveram uso nos últimos 7 dias"""
         try:
-            products = self.get_all_products()
-            weekly_data = []
+            totals = self.get_usage_totals(7)
+            if not totals:
+                return []
             
-            for product in products:
-                if "weeklyUsage" in product and product["weeklyUsage"]:
-                    product_data = {
-                        "id": product["id"],
-                        "name": product["name"],
-                        "weeklyUsage": product["weeklyUsage"]
-                    }
-                    weekly_data.append(product_data)
-            
-            return weekly_data
+            cursor = self.db.conn.cursor()
+            cursor.execute(f'''
+            SELECT id, name FROM products
+            WHERE id IN ({','.join('?' for _ in totals)})
+            ORDER BY name
+            ''', list(totals))
+            
+            return [
+                {
+                    "id": product_id,
+                    "name": name,
+                    "weeklyUsage": self.get_weekly_usage(product_id)
+                }
+                for product_id, name in cursor.fetchall()
+            ]
         except Exception as e:
             self.log_error("Erro ao buscar dados de uso semanal", e)
             return []
+    
+    def get_usage_totals(self, days=7, product_ids=None):
+        """
+        Soma o uso de cada produto em uma janela móvel de dias.
+        
+        Args:
+            days (int, optional): Tamanho da janela (7, 30, 90...), incluindo hoje.
+            product_ids (list, optional): Restringe a consulta a estes produtos.
+            
+        Returns:
+            dict: Uso total por ID de produto (apenas produtos com uso no período).
+        """
+        try:
+            cutoff_day = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+            query = "SELECT product_id, SUM(quantity) FROM usage_timeseries WHERE day >= ?"
+            params = [cutoff_day]
+            
+            if product_ids is not None:
+                query += f" AND product_id IN ({','.join('?' for _ in product_ids)})"
+                params.extend(product_ids)
+            
+            query += " GROUP BY product_id HAVING SUM(quantity) > 0"
+            
+            cursor = self.db.conn.cursor()
+            cursor.execute(query, params)
+            return dict(cursor.fetchall())
+        except Exception as e:
+            self.log_error("Erro ao calcular uso por período", e)
+            return {}
+    
+    def get_weekly_usage(self, product_id):
+        """
+        Retorna o uso dos últimos 7 dias de um produto por dia da semana.
+        
+        Returns:
+            list: 7 valores, onde o índice 0 é domingo e o 6 é sábado.
+        """
+        weekly_usage = [0] * 7
+        try:
+            cutoff_day = (datetime.now() - timedelta(days=6)).strftime("%Y-%m-%d")
+            cursor = self.db.conn.cursor()
+            cursor.execute('''
+            SELECT day, quantity FROM usage_timeseries
+            WHERE product_id = ? AND day >= ?
+            ''', (product_id, cutoff_day))
+            
+            for day, quantity in cursor.fetchall():
+                weekday = datetime.strptime(day, "%Y-%m-%d").weekday()
+                weekly_usage[(weekday + 1) % 7] += quantity
+        except Exception as e:
+            self.log_error("Erro ao buscar uso semanal", e)
+        return weekly_usage
+    
+    def get_weekly_usage_rows(self):
+        """Uso diário de todos os produtos nos últimos 7 dias: [(product_id, dia AAAA-MM-DD, quantidade)]"""
+        try:
+            cutoff_day = (datetime.now() - timedelta(days=6)).strftime("%Y-%m-%d")
+            cursor = self.db.conn.cursor()
+            cursor.execute(
+                "SELECT product_id, day, quantity FROM usage_timeseries WHERE day >= ?", (cutoff_day,)
+            )
+            return cursor.fetchall()
+        except Exception as e:
+            self.log_error("Erro ao buscar uso dos últimos 7 dias", e)
+            return []
+    
+    def record_usage(self, product_id, quantity, day=None):
+        """Acumula o uso de um produto no dia (sem commit)"""
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+        INSERT INTO usage_timeseries (product_id, day, quantity) VALUES (?, ?, ?)
+        ON CONFLICT (product_id, day) DO UPDATE SET quantity = quantity + excluded.quantity
+        ''', (product_id, day or datetime.now().strftime("%Y-%m-%d"), int(quantity)))
+    
+    def _write_weekly_usage(self, product_id, usage_data):
+        """Grava os 7 valores de uso semanal nos dias correspondentes da última semana (sem commit)"""
+        today = datetime.now()
+        rows = []
+        for offset in range(7):
+            date = today - timedelta(days=offset)
+            index = (date.weekday() + 1) % 7
+            try:
+                quantity = int(usage_data[index]) if index < len(usage_data) else 0
+            except (ValueError, TypeError):
+                quantity = 0
+            rows.append((product_id, date.strftime("%Y-%m-%d"), quantity))
         
+        cursor = self.db.conn.cursor()
+        cursor.executemany(
+            "INSERT OR REPLACE INTO usage_timeseries (product_id, day, quantity) VALUES (?, ?, ?)",
+            rows
+        )
+    
     def _is_expiring_soon(self, expiry_date_str, days_threshold):
         """Verifica se um produto está próximo da data de validade"""
         try:
@@ -444,225 +665,397 @@ class ProductService(BaseService):
             return False
     
     def update_weekly_usage(self, product_id, usage_data):
-        """Atualiza os dados de uso semanal de um produto"""
+        """Substitui o uso dos últimos 7 dias de um produto (índice 0 = domingo)"""
         try:
-            # Buscar produto atual
-            cursor = self.db.conn.cursor()
-            cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-            product_data = cursor.fetchone()
-            
-            if not product_data:
-                return self.log_error(f"Produto com ID {product_id} não encontrado")
-            
-            # Converter para dicionário
-            product = self._convert_to_dict([product_data])[0]
+            with self.transaction():
+                self._write_weekly_usage(product_id, usage_data)
+                cursor = self.db.conn.cursor()
+                cursor.execute(
+                    "UPDATE products SET lastUpdateDate = ? WHERE id = ?",
+                    (self.get_current_date(), product_id)
+                )
             
-            # Atualizar dados de uso semanal
-            product["weeklyUsage"] = usage_data
+            # Sincronizar com Firebase
+            self.sync_with_firebase('usage_timeseries', product_id, {
+                "productId": product_id,
+                "weeklyUsage": list(usage_data[:7]),
+                "lastUpdateDate": self.get_current_date()
+            }, 'update')
             
-            # Atualizar produto
-            return self.update_product(product_id, product)
+            return True
         except Exception as e:
             self.log_error("Erro ao atualizar uso semanal", e)
             return False
     
-    def register_product_exit(self, product_id, quantity, reason, exit_type="venda"):
-        """Registra a saída de um produto do estoque"""
+    # Colunas devolvidas pelo débito de estoque, na ordem esperada por _convert_to_dict
+    EXIT_COLUMNS = (
+        "id, name, quantity, lot, expiry, entryDate, fabDate, exitDate, weeklyUsage, "
+        "lastUpdateDate, category, location, group_id"
+    )
+    
+    # Colunas aceitas para selecionar os lotes de uma saída FEFO
+    LOT_FILTERS = ("name", "group_id", "barcode")
+    
+    def register_product_exit(self, product_id, quantity, reason, exit_type="venda", idempotency_key=None):
+        """Registra a saída de um produto do estoque
+        
+        O débito (UPDATE condicional), o histórico e as movimentações são gravados
+        em uma única transação. Com `idempotency_key`, uma nova chamada com a
+        mesma chave (ex.: clique duplo) não debita o estoque novamente.
+        
+        Returns:
+            tuple: (sucesso, mensagem)
+        """
         try:
-            print(f"Iniciando registro de saída para produto ID: {product_id}, quantidade: {quantity}, tipo: {exit_type}")
-            
-            # Obter o produto do banco de dados local
-            cursor = self.db.conn.cursor()
-            cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-            product_data = cursor.fetchone()
-            
-            if not product_data:
-                print(f"Produto com ID {product_id} não encontrado")
-                return False, "Produto não encontrado"
-            
-            # Converter para dicionário
-            product = self._convert_to_dict([product_data])[0]
-            current_quantity = int(product.get('quantity', 0))
-            
-            print(f"Produto encontrado: {product.get('name')}, estoque atual: {current_quantity}")
-            
-            # Verificar se há quantidade suficiente
-            if current_quantity < quantity:
-                print(f"Quantidade insuficiente. Disponível: {current_quantity}, solicitado: {quantity}")
-                return False, f"Quantidade insuficiente. Disponível: {current_quantity}"
-            
-            # Atualizar a quantidade
-            new_quantity = current_quantity - quantity
-            product["quantity"] = new_quantity
-            product["lastUpdateDate"] = self.get_current_date()
-            
-            print(f"Nova quantidade após saída: {new_quantity}")
-            
-            # Atualizar o uso semanal APENAS se o tipo for "uso_semanal"
-            weekly_usage = product.get("weeklyUsage", [0] * 7)
-            
-            # Garantir que weekly_usage seja uma lista
-            if not isinstance(weekly_usage, list):
-                try:
-                    import json
-                    weekly_usage = json.loads(weekly_usage)
-                except:
-                    weekly_usage = [0] * 7
-            
-            # Garantir que a lista tenha 7 elementos
-            while len(weekly_usage) < 7:
-                weekly_usage.append(0)
-            
-            # Limitar a 7 elementos se tiver mais
-            weekly_usage = weekly_usage[:7]
-            
-            # Atualizar o uso semanal apenas se o tipo for "uso_semanal"
-            if exit_type == "uso_semanal":
-                try:
-                    # Obter o dia da semana atual (0 = segunda, 6 = domingo)
-                    from datetime import datetime
-                    today = datetime.now().weekday()
-                    # Converter para formato onde 0 = domingo, 6 = sábado
-                    day_index = (today + 1) % 7
-                    
-                    # Adicionar a quantidade à saída do dia atual
-                    try:
-                        current_usage = int(weekly_usage[day_index]) if weekly_usage[day_index] else 0
-                        weekly_usage[day_index] = current_usage + quantity
-                        print(f"Uso semanal atualizado para o dia {day_index}: {weekly_usage[day_index]}")
-                    except (ValueError, TypeError, IndexError):
-                        weekly_usage[day_index] = quantity
-                        print(f"Uso semanal definido para o dia {day_index}: {quantity}")
-                    
-                    print(f"Uso semanal atualizado: {weekly_usage}")
-                except Exception as weekly_error:
-                    print(f"Erro ao atualizar uso semanal: {weekly_error}")
-                    import traceback
-                    traceback.print_exc()
-            else:
-                print(f"Tipo de saída '{exit_type}' não atualiza o uso semanal")
-            
-            # Atualizar o produto no banco de dados com todas as alterações
-            try:
-                cursor.execute('''
-                UPDATE products SET 
-                    quantity = ?,
-                    lastUpdateDate = ?,
-                    weeklyUsage = ?
-                WHERE id = ?
-                ''', (new_quantity, self.get_current_date(), json.dumps(weekly_usage), product_id))
-                
-                self.db.conn.commit()
-                print(f"Produto atualizado no banco de dados com novo estoque e uso semanal")
-                
-                # Verificar se a atualização foi bem-sucedida
-                cursor.execute('SELECT quantity, weeklyUsage FROM products WHERE id = ?', (product_id,))
-                updated_data = cursor.fetchone()
-                if updated_data:
-                    updated_quantity, updated_weekly_usage = updated_data
-                    print(f"Verificação após atualização: Quantidade = {updated_quantity}, Uso semanal = {updated_weekly_usage}")
-                
-            except Exception as update_error:
-                print(f"Erro ao atualizar produto: {update_error}")
-                import traceback
-                traceback.print_exc()
-                return False, f"Erro ao atualizar produto: {str(update_error)}"
-            
-            # Registrar no histórico
-            history_success = self._register_exit_history(product, quantity, reason, exit_type)
-            if not history_success:
-                print("Aviso: Falha ao registrar histórico de saída, mas o estoque foi atualizado")
-            
-            # Adicionar à fila de sincronização
-            try:
-                # Obter o produto atualizado
-                cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-                updated_product_data = cursor.fetchone()
-                updated_product = self._convert_to_dict([updated_product_data])[0]
-                
-                # Sincronizar com Firebase
-                self.sync_with_firebase('products', product_id, updated_product, 'update')
-                print(f"Produto adicionado à fila de sincronização")
-            except Exception as sync_error:
-                print(f"Erro ao adicionar à fila de sincronização: {sync_error}")
-            
-            return True, f"Saída de {quantity} unidades registrada com sucesso"
+            quantity = int(quantity)
+        except (ValueError, TypeError):
+            return False, "Quantidade inválida. Digite um número inteiro."
+        if quantity <= 0:
+            return False, "A quantidade deve ser maior que zero"
+        
+        logger.debug("Registrando saída: produto %s, quantidade %s, tipo %s", product_id, quantity, exit_type)
+        
+        now = datetime.now()
+        movement_id = new_id("exit")
+        conn = self.db.conn
+        try:
+            if idempotency_key:
+                existing = self.db.claim_movement_key(idempotency_key, movement_id)
+                if existing:
+                    conn.rollback()
+                    logger.info("Saída %s já registrada com a chave %s", existing, idempotency_key)
+                    return True, "Saída já registrada"
+            
+            applied = self._apply_lot_exit(product_id, quantity, reason, exit_type, movement_id, now)
+            if applied is None:
+                conn.rollback()
+                available = self.db.get_stock_quantity("products", product_id)
+                if available is None:
+                    print(f"Produto com ID {product_id} não encontrado")
+                    return False, "Produto não encontrado"
+                return False, f"Quantidade insuficiente. Disponível: {available}"
+            product, exit_record = applied
+            
+            conn.commit()
         except Exception as e:
+            conn.rollback()
             print(f"Erro ao registrar saída: {e}")
             import traceback
             traceback.print_exc()
             return False, f"Erro ao registrar saída: {str(e)}"
+        
+        logger.debug("Saída %s registrada; novo estoque: %s", movement_id, product["quantity"])
+        
+        self._publish_exit(
+            [product], [exit_record],
+            f"Saída de {quantity} unidades de '{product.get('name')}' - Motivo: {reason}"
+        )
+        return True, f"Saída de {quantity} unidades registrada com sucesso"
     
-    def _register_exit_history(self, product, quantity, reason, exit_type="venda"):
-        """Registra a saída no histórico"""
-        try:
-            # Criar registro de histórico
-            exit_record = {
-                "id": f"exit_{product['id']}_{int(time.time())}",
-                "productId": product.get("id"),
-                "productName": product.get("name"),
-                "quantity": quantity,
-                "reason": reason,
-                "date": self.get_current_date(),
-                "timestamp": self.get_current_timestamp(),
-                "type": "exit",
-                "exit_type": exit_type  # Novo campo para o tipo de saída
-            }
+    def register_fefo_exit(self, product_name, quantity, reason, exit_type="venda",
+                           idempotency_key=None, group_id=None, include_expired=False):
+        """Registra uma saída distribuída entre os lotes de um produto, na ordem de validade (FEFO)
+        
+        Os lotes são as linhas de `products` com o mesmo nome (ou do mesmo grupo,
+        se `group_id` for informado). Todos os débitos e um registro de histórico
+        por lote são gravados em uma única transação.
+        
+        Args:
+            include_expired (bool, optional): Se True, lotes vencidos também são usados.
             
-            # Verificar se a coluna exit_type existe
-            cursor = self.db.conn.cursor()
-            cursor.execute("PRAGMA table_info(product_history)")
-            columns = cursor.fetchall()
-            column_names = [column[1] for column in columns]
+        Returns:
+            tuple: (sucesso, mensagem, alocações [{"id", "lot", "expiry", "quantity"}])
+        """
+        try:
+            quantity = int(quantity)
+        except (ValueError, TypeError):
+            return False, "Quantidade inválida. Digite um número inteiro.", []
+        if quantity <= 0:
+            return False, "A quantidade deve ser maior que zero", []
+        
+        now = datetime.now()
+        base_id = new_id("exit")
+        lot_filter = ("group_id", group_id) if group_id else ("name", product_name)
+        conn = self.db.conn
+        try:
+            # Reservar a escrita antes de ler os saldos, para que o plano não
+            # fique desatualizado por uma saída feita em outro terminal
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            
+            if idempotency_key:
+                existing = self.db.claim_movement_key(idempotency_key, base_id)
+                if existing:
+                    conn.rollback()
+                    logger.info("Saída %s já registrada com a chave %s", existing, idempotency_key)
+                    return True, "Saída já registrada", []
+            
+            missing, products, exit_records, allocations = self._apply_fefo_exit(
+                lot_filter, quantity, reason, exit_type, base_id, now, include_expired
+            )
+            if missing > 0:
+                conn.rollback()
+                return False, f"Quantidade insuficiente. Disponível: {quantity - missing}", []
             
-            # Salvar no banco de dados
-            with self.transaction():
-                if "exit_type" in column_names:
-                    # Se a coluna existir, incluir no INSERT
-                    cursor.execute('''
-                    INSERT INTO product_history (
-                        id, productId, productName, quantity, reason, date, timestamp, type, exit_type
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        exit_record["id"], exit_record["productId"], exit_record["productName"],
-                        exit_record["quantity"], exit_record["reason"], exit_record["date"],
-                        exit_record["timestamp"], exit_record["type"], exit_record["exit_type"]
-                    ))
-                else:
-                    # Se a coluna não existir, omitir do INSERT
-                    cursor.execute('''
-                    INSERT INTO product_history (
-                        id, productId, productName, quantity, reason, date, timestamp, type
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        exit_record["id"], exit_record["productId"], exit_record["productName"],
-                        exit_record["quantity"], exit_record["reason"], exit_record["date"],
-                        exit_record["timestamp"], exit_record["type"]
-                    ))
-                    
-                    # Tentar adicionar a coluna exit_type
-                    try:
-                        cursor.execute("ALTER TABLE product_history ADD COLUMN exit_type TEXT DEFAULT 'venda'")
-                        print("Coluna exit_type adicionada à tabela product_history")
-                    except:
-                        print("Não foi possível adicionar a coluna exit_type, continuando sem ela")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.exception("Erro ao registrar saída por validade: %s", e)
+            return False, f"Erro ao registrar saída: {str(e)}", []
+        
+        logger.debug("Saída FEFO %s distribuída em %d lote(s)", base_id, len(allocations))
+        
+        name = product_name or products[0].get("name")
+        self._publish_exit(
+            products, exit_records, f"Saída de {quantity} unidades de '{name}' - Motivo: {reason}"
+        )
+        return True, f"Saída de {quantity} unidades registrada em {len(allocations)} lote(s)", allocations
+    
+    def register_exit_batch(self, exits):
+        """Registra várias saídas (ex.: leituras do leitor de código) em uma única transação
+        
+        Cada saída é um dicionário com "quantity", "reason", "exit_type",
+        "idempotency_key" (opcional) e "product_id" (um lote) ou "barcode"
+        (o produto, distribuído entre os lotes por FEFO). Uma saída recusada,
+        por falta de saldo por exemplo, é desfeita sozinha (SAVEPOINT) sem
+        afetar as demais.
+        
+        Returns:
+            list: (sucesso, mensagem) de cada saída, na mesma ordem.
+        """
+        if not exits:
+            return []
+        
+        now = datetime.now()
+        results = []
+        products = []
+        exit_records = []
+        total_quantity = 0
+        conn = self.db.conn
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
             
-            # Sincronizar com Firebase
-            self.sync_with_firebase('product_history', exit_record["id"], exit_record, 'add')
+            for entry in exits:
+                base_id = new_id("exit")
+                quantity = int(entry.get("quantity") or 0)
+                if quantity <= 0:
+                    results.append((False, "A quantidade deve ser maior que zero"))
+                    continue
+                reason = entry.get("reason", "")
+                exit_type = entry.get("exit_type", "venda")
+                
+                conn.execute("SAVEPOINT exit_item")
+                try:
+                    key = entry.get("idempotency_key")
+                    if key and self.db.claim_movement_key(key, base_id):
+                        results.append((True, "Saída já registrada"))
+                    elif entry.get("product_id"):
+                        applied = self._apply_lot_exit(
+                            entry["product_id"], quantity, reason, exit_type, base_id, now
+                        )
+                        if applied is None:
+                            conn.execute("ROLLBACK TO SAVEPOINT exit_item")
+                            available = self.db.get_stock_quantity("products", entry["product_id"])
+                            results.append((False, "Produto não encontrado" if available is None
+                                            else f"Quantidade insuficiente. Disponível: {available}"))
+                        else:
+                            products.append(applied[0])
+                            exit_records.append(applied[1])
+                            total_quantity += quantity
+                            results.append((True, f"Saída de {quantity} unidades registrada"))
+                    else:
+                        missing, debited, records, allocations = self._apply_fefo_exit(
+                            ("barcode", entry.get("barcode")), quantity, reason, exit_type, base_id, now
+                        )
+                        if missing > 0:
+                            conn.execute("ROLLBACK TO SAVEPOINT exit_item")
+                            results.append((False, f"Quantidade insuficiente. Disponível: {quantity - missing}"))
+                        else:
+                            products.extend(debited)
+                            exit_records.extend(records)
+                            total_quantity += quantity
+                            results.append((True, f"Saída de {quantity} unidades registrada em {len(allocations)} lote(s)"))
+                finally:
+                    conn.execute("RELEASE SAVEPOINT exit_item")
+            
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.exception("Erro ao registrar lote de saídas: %s", e)
+            return [(False, f"Erro ao registrar saída: {str(e)}")] * len(exits)
+        
+        logger.debug("Lote de %d saídas registrado (%d lançamentos)", len(exits), len(exit_records))
+        
+        if exit_records:
+            self._publish_exit(
+                products, exit_records,
+                f"Leitura de códigos: {len(exit_records)} saída(s), {total_quantity} unidades"
+            )
+        return results
+    
+    def _apply_lot_exit(self, product_id, quantity, reason, exit_type, movement_id, now):
+        """Debita um lote e grava o histórico na transação atual (sem commit)
+        
+        Returns:
+            tuple: (produto atualizado, registro de histórico), ou None se o lote
+                não existir ou não tiver saldo suficiente.
+        """
+        row = self.db.debit_stock(
+            "products", product_id, quantity, self.EXIT_COLUMNS,
+            {"lastUpdateDate": now.strftime("%d/%m/%Y")}
+        )
+        if row is None:
+            return None
+        
+        product = self._convert_to_dict([row])[0]
+        exit_record = self._insert_exit_history(product, row[12] or "", quantity, reason, exit_type, movement_id, now)
+        
+        # Registrar o uso do dia APENAS se o tipo for "uso_semanal"
+        if exit_type == "uso_semanal":
+            self.record_usage(product_id, quantity, now.strftime("%Y-%m-%d"))
+        return product, exit_record
+    
+    def _apply_fefo_exit(self, lot_filter, quantity, reason, exit_type, base_id, now, include_expired=False):
+        """Distribui a saída entre os lotes em ordem FEFO na transação atual (sem commit)
+        
+        Args:
+            lot_filter (tuple): (coluna, valor) que seleciona os lotes; a coluna
+                deve estar em LOT_FILTERS.
+            
+        Returns:
+            tuple: (quantidade que faltou, produtos debitados, registros de
+                histórico, alocações). Se faltar saldo, nada é debitado.
+        """
+        from services.lot_allocation import plan_fefo
+        
+        column, value = lot_filter
+        if column not in self.LOT_FILTERS:
+            raise ValueError(f"Filtro de lotes inválido: {column}")
+        
+        cursor = self.db.conn.cursor()
+        cursor.execute(
+            f"SELECT id, lot, expiry, quantity FROM products WHERE {column} = ? AND quantity > 0",
+            (value,)
+        )
+        lots = {row[0]: row for row in cursor.fetchall()}
+        
+        plan, missing = plan_fefo(
+            ((lot_id, row[2], row[3]) for lot_id, row in lots.items()),
+            quantity, now.date(), include_expired
+        )
+        if missing > 0:
+            return missing, [], [], []
+        
+        products = []
+        exit_records = []
+        for index, (lot_id, lot_quantity) in enumerate(plan):
+            applied = self._apply_lot_exit(lot_id, lot_quantity, reason, exit_type, f"{base_id}_{index}", now)
+            if applied is None:
+                raise RuntimeError(f"Saldo do lote {lot_id} alterado durante a saída")
+            products.append(applied[0])
+            exit_records.append(applied[1])
+        
+        allocations = [
+            {"id": lot_id, "lot": lots[lot_id][1], "expiry": lots[lot_id][2], "quantity": lot_quantity}
+            for lot_id, lot_quantity in plan
+        ]
+        return 0, products, exit_records, allocations
+    
+    def _publish_exit(self, products, exit_records, message):
+        """Sincroniza os lotes debitados e o histórico e cria a notificação da saída
+        
+        Executado depois do commit: uma falha aqui não desfaz a saída, apenas
+        fica pendente na fila de sincronização.
+        """
+        try:
+            for product in products:
+                self.sync_with_firebase('products', product["id"], product, 'update')
+            for exit_record in exit_records:
+                self.sync_with_firebase('product_history', exit_record["id"], exit_record, 'add')
             
-            # Criar notificação
             from services.notification_service import NotificationService
-            notification_service = NotificationService(self.firebase, self.db)
+            notification_service = get_service(self, NotificationService)
             notification_service.create_notification(
-                "PRODUCT_EXIT",
-                f"Saída de {quantity} unidades de '{product.get('name')}' - Motivo: {reason}",
-                product.get("id")
+                "PRODUCT_EXIT", message, products[0]["id"] if len(products) == 1 else None
             )
-            
-            return True
         except Exception as e:
-            self.log_error("Erro ao registrar histórico de saída", e)
-            return False
+            logger.error("Erro ao sincronizar saída de produto: %s", e)
+    
+    def _register_entry_history(self, product_id, product_name, group_id, quantity, reason="Entrada no estoque"):
+        """Registra a entrada no histórico e nas movimentações de estoque
+        
+        Não faz commit: deve ser chamado dentro da transação que grava o produto.
+        """
+        return self._register_movement_history(product_id, product_name, group_id, "entry", quantity, reason)
+    
+    def _register_movement_history(self, product_id, product_name, group_id, movement_type, quantity, reason):
+        """Registra uma entrada ou um ajuste ("adjustment", com a diferença de saldo) no histórico
+        
+        Não faz commit: deve ser chamado dentro da transação que grava o produto.
+        """
+        entry_record = {
+            "id": new_id(movement_type),
+            "productId": product_id,
+            "productName": product_name,
+            "quantity": quantity,
+            "reason": reason,
+            "date": self.get_current_date(),
+            "timestamp": self.get_current_timestamp(),
+            "type": movement_type,
+            "day": datetime.now().strftime("%Y-%m-%d")
+        }
+        
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+        INSERT INTO product_history (
+            id, productId, productName, quantity, reason, date, timestamp, type, exit_type, day
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)
+        ''', (
+            entry_record["id"], entry_record["productId"], entry_record["productName"],
+            entry_record["quantity"], entry_record["reason"], entry_record["date"],
+            entry_record["timestamp"], entry_record["type"], entry_record["day"]
+        ))
+        
+        self.db.record_stock_movement(
+            "product", product_id, product_name, movement_type, quantity,
+            reason, group_id=group_id, movement_id=entry_record["id"]
+        )
+        
+        return entry_record
+    
+    def _insert_exit_history(self, product, group_id, quantity, reason, exit_type, movement_id, now):
+        """Grava a saída no histórico e nas movimentações de estoque (sem commit)"""
+        exit_record = {
+            "id": movement_id,
+            "productId": product.get("id"),
+            "productName": product.get("name"),
+            "quantity": quantity,
+            "reason": reason,
+            "date": now.strftime("%d/%m/%Y"),
+            "timestamp": now.timestamp(),
+            "type": "exit",
+            "exit_type": exit_type,
+            "day": now.strftime("%Y-%m-%d")
+        }
+        
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+        INSERT INTO product_history (
+            id, productId, productName, quantity, reason, date, timestamp, type, exit_type, day
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            exit_record["id"], exit_record["productId"], exit_record["productName"],
+            exit_record["quantity"], exit_record["reason"], exit_record["date"],
+            exit_record["timestamp"], exit_record["type"], exit_record["exit_type"],
+            exit_record["day"]
+        ))
+        
+        self.db.record_stock_movement(
+            "product", exit_record["productId"], exit_record["productName"], "exit",
+            quantity, reason, exit_type, group_id, exit_record["id"]
+        )
+        return exit_record
    
     def get_product_exits(self, product_id, limit=5, exit_type=None):
         """Obtém o histórico de saídas de um produto"""
@@ -699,25 +1092,15 @@ class ProductService(BaseService):
         """Obtém um produto pelo ID, independentemente do grupo"""
         try:
             cursor = self.db.conn.cursor()
-            cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
+            cursor.execute(f"{self.PRODUCT_SELECT} WHERE p.id = ?", (product_id,))
             product_data = cursor.fetchone()
             
             if not product_data:
                 print(f"Produto com ID {product_id} não encontrado")
                 return None
             
-            # Converter para dicionário
-            product = self._convert_to_dict([product_data])[0]
-            
-            # Obter informações do grupo, se existir
-            if "group_id" in product and product["group_id"]:
-                from services.group_service import GroupService
-                group_service = GroupService(self.firebase, self.db)
-                group = group_service.get_product_group(product["group_id"])
-                if group:
-                    product["group_name"] = group.get("name", "")
-            
-            return product
+            # Converter para dicionário (os dados do grupo vêm do JOIN)
+            return self._convert_to_dict([product_data])[0]
         except Exception as e:
             print(f"Erro ao obter produto: {e}")
             import traceback
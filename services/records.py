@@ -0,0 +1,123 @@
+import sys
+from collections.abc import Mapping
+
+
+class Record(Mapping):
+    """
+    Registro imutável com __slots__ e acesso de dicionário.
+
+    As telas continuam lendo record["name"], record.get("lot", ""), "id" in
+    record, .items() etc., mas cada instância guarda só os valores (sem o
+    dicionário de chaves por item). Como não pode ser alterado, o mesmo
+    registro é compartilhado entre as listas do DataService; quem precisa
+    alterar um item trabalha sobre record.copy(), que devolve um dict comum.
+    """
+
+    __slots__ = ()
+
+    # Campos de texto que se repetem entre registros (datas, grupo, categoria),
+    # compartilhados com sys.intern para guardar uma única cópia de cada valor
+    INTERNED = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.__slots__)
+        # Escrita direta nos slots (o __setattr__ público bloqueia alterações)
+        cls._setters = tuple(
+            (getattr(cls, name).__set__, name in cls.INTERNED) for name in cls.__slots__
+        )
+
+    def __init__(self, *values):
+        """Recebe os valores na ordem de __slots__; campos omitidos ficam vazios ("")"""
+        intern = sys.intern
+        for (set_value, interned), value in zip(self._setters, values):
+            set_value(self, intern(value) if interned and type(value) is str else value)
+        for set_value, _ in self._setters[len(values):]:
+            set_value(self, "")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Cria o registro a partir de um dicionário; chaves desconhecidas são ignoradas"""
+        return cls(*(data.get(name, "") for name in cls.__slots__))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} é imutável; use .copy() para alterar")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} é imutável; use .copy() para alterar")
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self._fields:
+            return getattr(self, key)
+        return default
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        # Registros do mesmo tipo são comparados campo a campo, parando no
+        # primeiro diferente (em geral o id); outros mapeamentos usam Mapping
+        if type(other) is type(self):
+            return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def copy(self):
+        """Retorna um dict comum (alterável) com os mesmos campos"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    # Imutável: cópias (inclusive deepcopy, como na navegação) reutilizam a instância
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.copy()!r})"
+
+
+class Product(Record):
+    """Produto do estoque, como carregado por ProductService.PRODUCT_SELECT"""
+
+    __slots__ = (
+        "id", "name", "quantity", "lot", "expiry", "entryDate", "fabDate", "exitDate",
+        "lastUpdateDate", "category", "location", "group_id", "manufacturer", "barcode",
+        "group_name", "group_icon", "group_color"
+    )
+    INTERNED = (
+        "expiry", "entryDate", "fabDate", "exitDate", "lastUpdateDate", "category",
+        "location", "group_id", "manufacturer", "group_name", "group_icon", "group_color"
+    )
+
+
+class Residue(Record):
+    """Resíduo, com as colunas da tabela residues"""
+
+    __slots__ = (
+        "id", "name", "type", "quantity", "entryDate", "exitDate", "destination",
+        "notes", "group_id", "group_name"
+    )
+    INTERNED = ("type", "entryDate", "exitDate", "destination", "group_id", "group_name")
+
+
+class Group(Record):
+    """Grupo de produtos ou de resíduos"""
+
+    __slots__ = ("id", "name", "description", "icon", "color", "created_at", "last_updated")
+    INTERNED = ("icon", "color")
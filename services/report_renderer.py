@@ -0,0 +1,267 @@
+import html
+import os
+import tempfile
+import webbrowser
+from datetime import datetime
+from string import Template
+
+# Folha de estilos compartilhada por todos os relatórios impressos
+REPORT_STYLESHEET = """
+body { font-family: 'Segoe UI', Arial, sans-serif; margin: 20px; color: #303030; }
+.header { text-align: center; margin-bottom: 20px; padding-bottom: 15px; border-bottom: 1px solid #eee; }
+.no-print { margin-bottom: 20px; text-align: center; }
+.btn { display: inline-block; padding: 8px 14px; background-color: #4A6FFF; color: white; border: none; border-radius: 4px; margin-right: 10px; }
+.stats { display: flex; justify-content: space-between; flex-wrap: wrap; margin-bottom: 20px; }
+.stat-card { border: 1px solid #ddd; border-radius: 8px; padding: 10px; text-align: center; flex: 1; margin: 0 5px 10px 5px; }
+.stat-card p { font-size: 22px; font-weight: bold; margin: 5px 0; }
+.section-title { background-color: #f8f9fd; padding: 10px 15px; border-radius: 8px; font-size: 18px; color: #4A6FFF; }
+.group-header { background-color: #f2f2f2; padding: 10px; margin-top: 20px; }
+.item { border: 1px solid #ddd; padding: 10px; margin-bottom: 5px; }
+.item h3 { margin: 0 0 5px 0; }
+.item p { margin: 2px 0; }
+.card { border: 1px solid #eee; padding: 15px; margin-bottom: 15px; border-radius: 8px; }
+.chart { margin: 20px 0; text-align: center; }
+.chart-bar { display: inline-block; margin: 0 5px; text-align: center; vertical-align: bottom; }
+.bar { background-color: #FF9800; border-radius: 5px 5px 0 0; width: 40px; color: white; }
+table { width: 100%; border-collapse: collapse; margin-bottom: 20px; }
+th, td { border: 1px solid #eee; padding: 8px; text-align: left; }
+th { background-color: #f8f9fd; color: #4A6FFF; font-weight: 600; }
+tr:nth-child(even) { background-color: #f9f9f9; }
+.entry, .normal { border-left: 5px solid #4CAF50; }
+.exit, .critical { border-left: 5px solid #F44336; }
+.adjustment, .warning { border-left: 5px solid #FF9800; }
+.product { border-left: 5px solid #2196F3; }
+.residue { border-left: 5px solid #9C27B0; }
+tr.alert { background-color: #fff0f0; color: #FF6B6B; }
+tr.expiring { background-color: #FFF8E1; color: #FFA502; }
+.page-footer { text-align: right; font-size: 11px; color: #999; margin-top: 10px; }
+.page-break { page-break-after: always; break-after: page; }
+.footer { text-align: center; margin-top: 30px; padding-top: 15px; border-top: 1px solid #eee; font-size: 12px; color: #777; }
+@media print {
+    .no-print { display: none; }
+    button { display: none; }
+    body { font-size: 12px; }
+}
+"""
+
+# Templates pré-compilados (reutilizados por todas as instâncias)
+_DOCUMENT_HEAD = Template(
+    '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="UTF-8">\n'
+    '<title>$title</title>\n<style>$stylesheet</style>\n</head>\n<body>\n'
+    '<div class="header">\n<h1>$title</h1>\n$subtitles</div>\n'
+    '<div class="no-print">\n'
+    '<button class="btn" onclick="window.print()">Imprimir</button>\n'
+    '<button class="btn" onclick="window.close()">Fechar</button>\n'
+    '</div>\n'
+)
+_PARAGRAPH = Template('<p>$text</p>\n')
+_STAT_CARD = Template('<div class="stat-card">\n<h3>$label</h3>\n<p>$value</p>\n</div>\n')
+_SECTION_TITLE = Template('<h2 class="section-title">$title</h2>\n')
+_GROUP_HEADER = Template('<div class="group-header">\n<h2>$title</h2>\n</div>\n')
+_ITEM = Template('<div class="item $css_class">\n<h3>$title</h3>\n$lines</div>\n')
+_TABLE_HEAD = Template('<table>\n<tr>$cells</tr>\n')
+_TABLE_ROW = Template('<tr class="$css_class">$cells</tr>\n')
+_CHART_BAR = Template(
+    '<div class="chart-bar">\n<div class="bar" style="height: ${height}px;">$value</div>\n'
+    '<div>$label</div>\n</div>\n'
+)
+_PAGE_FOOTER = Template('<div class="page-footer">Página $page</div>\n<div class="page-break"></div>\n')
+_DOCUMENT_FOOTER = Template(
+    '<div class="footer">\n<p>Relatório gerado em $generated_at</p>\n</div>\n</body>\n</html>\n'
+)
+
+
+def _escape(value):
+    """Converte um valor para texto seguro em HTML"""
+    return html.escape(str(value if value is not None else ""))
+
+
+class ReportRenderer:
+    """Gera relatórios HTML gravando as linhas no arquivo à medida que são produzidas
+
+    O documento nunca é montado inteiro em memória: cabeçalho, linhas e rodapé
+    são escritos diretamente no arquivo temporário, e as linhas podem vir de
+    qualquer iterável (inclusive geradores sobre cursores do SQLite).
+    """
+
+    def __init__(self, title, subtitles=None, rows_per_page=0):
+        """
+        Args:
+            title (str): Título do relatório.
+            subtitles (list, optional): Linhas exibidas abaixo do título.
+            rows_per_page (int, optional): Se maior que zero, insere uma quebra de
+                página a cada N linhas escritas.
+        """
+        self.title = title
+        self.subtitles = subtitles or []
+        self.rows_per_page = rows_per_page
+        self.path = None
+        self._file = None
+        self._rows_on_page = 0
+        self._page = 1
+        self._in_table = False
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+        return False
+
+    def open(self):
+        """Cria o arquivo temporário e escreve o cabeçalho do documento"""
+        fd, self.path = tempfile.mkstemp(suffix='.html')
+        self._file = os.fdopen(fd, 'w', encoding='utf-8', buffering=64 * 1024)
+        self._file.write(_DOCUMENT_HEAD.substitute(
+            title=_escape(self.title),
+            stylesheet=REPORT_STYLESHEET,
+            subtitles="".join(_PARAGRAPH.substitute(text=_escape(line)) for line in self.subtitles if line)
+        ))
+        return self
+
+    def write_stats(self, stats):
+        """Escreve os cards de estatística. `stats` é uma lista de (rótulo, valor)"""
+        self._file.write('<div class="stats">\n')
+        self._file.writelines(
+            _STAT_CARD.substitute(label=_escape(label), value=_escape(value))
+            for label, value in stats
+        )
+        self._file.write('</div>\n')
+
+    def write_section(self, title):
+        """Escreve o título de uma seção"""
+        self._file.write(_SECTION_TITLE.substitute(title=_escape(title)))
+
+    def write_card(self, lines):
+        """Escreve um card simples com uma linha de texto por parágrafo"""
+        self._file.write('<div class="card">\n')
+        self._file.writelines(_PARAGRAPH.substitute(text=_escape(line)) for line in lines)
+        self._file.write('</div>\n')
+
+    def write_bar_chart(self, title, bars, max_height=100, min_height=20):
+        """Escreve um gráfico de barras simples. `bars` é uma lista de (rótulo, valor)"""
+        bars = list(bars)
+        max_value = max((value for _, value in bars), default=0)
+        self._file.write('<div class="chart">\n')
+        self._file.write(f'<h2>{_escape(title)}</h2>\n')
+        for label, value in bars:
+            height = int((value / max_value) * max_height) if max_value > 0 else 0
+            self._file.write(_CHART_BAR.substitute(
+                height=max(height, min_height), value=_escape(value), label=_escape(label)
+            ))
+        self._file.write('</div>\n')
+
+    def write_items(self, rows, render_item):
+        """Escreve itens em blocos a partir de um iterável
+
+        `render_item(row)` deve retornar (classe_css, título, [linhas]).
+        Retorna o número de itens escritos.
+        """
+        count = 0
+        for row in rows:
+            css_class, title, lines = render_item(row)
+            self._file.write(_ITEM.substitute(
+                css_class=_escape(css_class),
+                title=_escape(title),
+                lines="".join(_PARAGRAPH.substitute(text=_escape(line)) for line in lines)
+            ))
+            count += 1
+            self._count_row()
+        return count
+
+    def write_grouped_items(self, rows, group_key, group_title, render_item):
+        """Escreve itens agrupados por uma chave
+
+        As linhas devem chegar ordenadas pela chave de agrupamento (por exemplo,
+        um cursor com ORDER BY timestamp). Apenas o grupo corrente fica em
+        memória, o que permite exibir a contagem no cabeçalho de cada grupo.
+        `group_title(chave, quantidade)` retorna o texto do cabeçalho.
+        """
+        current_key = None
+        buffer = []
+        count = 0
+        for row in rows:
+            key = group_key(row)
+            if buffer and key != current_key:
+                count += self._flush_group(current_key, buffer, group_title, render_item)
+                buffer = []
+            current_key = key
+            buffer.append(row)
+        if buffer:
+            count += self._flush_group(current_key, buffer, group_title, render_item)
+        return count
+
+    def _flush_group(self, key, rows, group_title, render_item):
+        """Escreve o cabeçalho e os itens de um grupo"""
+        self._file.write(_GROUP_HEADER.substitute(title=_escape(group_title(key, len(rows)))))
+        return self.write_items(rows, render_item)
+
+    def write_table(self, columns, rows, render_row):
+        """Escreve uma tabela a partir de um iterável
+
+        `render_row(row)` deve retornar (classe_css, [células]).
+        Retorna o número de linhas escritas.
+        """
+        header = _TABLE_HEAD.substitute(cells="".join(f"<th>{_escape(c)}</th>" for c in columns))
+        self._file.write(header)
+        self._in_table = True
+        count = 0
+        for row in rows:
+            if not self._in_table:
+                # Reabrir a tabela na nova página
+                self._file.write(header)
+                self._in_table = True
+            css_class, cells = render_row(row)
+            self._file.write(_TABLE_ROW.substitute(
+                css_class=_escape(css_class),
+                cells="".join(f"<td>{_escape(cell)}</td>" for cell in cells)
+            ))
+            count += 1
+            self._count_row()
+        if self._in_table:
+            self._file.write('</table>\n')
+            self._in_table = False
+        return count
+
+    def _count_row(self):
+        """Contabiliza uma linha escrita e insere quebra de página se necessário"""
+        if self.rows_per_page <= 0:
+            return False
+        self._rows_on_page += 1
+        if self._rows_on_page < self.rows_per_page:
+            return False
+        if self._in_table:
+            self._file.write('</table>\n')
+            self._in_table = False
+        self._file.write(_PAGE_FOOTER.substitute(page=self._page))
+        self._page += 1
+        self._rows_on_page = 0
+        return True
+
+    def close(self):
+        """Escreve o rodapé e fecha o arquivo. Retorna o caminho do relatório"""
+        if self._file:
+            self._file.write(_DOCUMENT_FOOTER.substitute(
+                generated_at=datetime.now().strftime('%d/%m/%Y %H:%M')
+            ))
+            self._file.close()
+            self._file = None
+        return self.path
+
+    def _discard(self):
+        """Fecha e remove o arquivo em caso de erro durante a geração"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+    def open_in_browser(self):
+        """Abre o relatório gerado no navegador padrão"""
+        if self.path:
+            webbrowser.open('file://' + self.path)
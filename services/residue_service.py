@@ -2,13 +2,20 @@ from datetime import datetime
 import json
 import time
 import traceback
+import logging
+from .base_service import BaseService
+from .service_registry import get_service
+from .instrumentation import timed
+from .ids import new_id
+from .records import Record, Residue
 
-class ResidueService:
+logger = logging.getLogger(__name__)
+
+class ResidueService(BaseService):
     """Serviço para gerenciamento de resíduos"""
     
     def __init__(self, firebase, db):
-        self.firebase = firebase
-        self.db = db
+        super().__init__(firebase, db)
     
     def add_residue(self, residue_data):
         """Adiciona um novo resíduo com tratamento de erros, sincronização e agrupamento automático"""
@@ -49,12 +56,23 @@ class ResidueService:
                 if "notes" in residue_data and residue_data["notes"]:
                     updated_residue["notes"] = residue_data["notes"]
                 
-                # Atualizar resíduo existente
-                return self.update_residue(existing_residue_dict["id"], updated_residue)
+                # Atualizar o saldo e registrar a entrada nas movimentações na mesma transação
+                self._prepare_residue_update(updated_residue)
+                with self.transaction():
+                    changed = self._update_residue_row(existing_residue_dict["id"], updated_residue)
+                    if changed is None:
+                        raise ValueError(f"Resíduo com ID {existing_residue_dict['id']} não encontrado")
+                    self.db.record_stock_movement(
+                        "residue", existing_residue_dict["id"], existing_residue_dict["name"],
+                        "entry", int(residue_data["quantity"]), "Entrada no estoque",
+                        group_id=updated_residue.get("group_id")
+                    )
+                
+                self._publish_residue_update(existing_residue_dict["id"], changed)
+                return True
             
             # Gerar ID único
-            import uuid
-            residue_id = str(uuid.uuid4())
+            residue_id = new_id()
             
             # Garantir que a data de entrada seja a data atual se não for fornecida
             if "entryDate" not in residue_data or not residue_data["entryDate"]:
@@ -86,6 +104,12 @@ class ResidueService:
                     residue_data["group_id"],
                     residue_data["group_name"]
                 ))
+                
+                # Registrar a entrada nas movimentações de estoque
+                self.db.record_stock_movement(
+                    "residue", residue_id, residue_data["name"], "entry",
+                    residue_data["quantity"], "Entrada no estoque", group_id=residue_data["group_id"]
+                )
                 self.db.conn.commit()
             except Exception as e:
                 print(f"Erro ao inserir resíduo no banco de dados: {e}")
@@ -114,63 +138,78 @@ class ResidueService:
     def update_residue(self, residue_id, residue_data):
         """Atualiza um resíduo existente com tratamento de erros e sincronização"""
         try:
-            # Validar dados do resíduo
-            self._validate_residue_data(residue_data)
-            
-            # Identificar grupo do resíduo
-            from services.group_service import GroupService
-            group_service = GroupService(self.firebase, self.db)
-            group = group_service.get_or_create_residue_group(residue_data["type"])
-            
-            # Adicionar grupo_id e group_name aos dados do resíduo
-            residue_data["group_id"] = group["id"]
-            residue_data["group_name"] = group["name"]
-            
-            # Converter quantidade para inteiro
-            try:
-                residue_data["quantity"] = int(residue_data["quantity"])
-            except (ValueError, TypeError):
-                residue_data["quantity"] = 0
-            
-            # Atualizar no banco de dados local
-            cursor = self.db.conn.cursor()
-            cursor.execute('''
-            UPDATE residues SET
-                name = ?, type = ?, quantity = ?, entryDate = ?, destination = ?,
-                exitDate = ?, notes = ?, group_id = ?, group_name = ?
-            WHERE id = ?
-            ''', (
-                residue_data["name"],
-                residue_data["type"],
-                residue_data["quantity"],
-                residue_data["entryDate"],
-                residue_data.get("destination", ""),
-                residue_data.get("exitDate", ""),
-                residue_data.get("notes", ""),
-                residue_data["group_id"],
-                residue_data["group_name"],
-                residue_id
-            ))
-            self.db.conn.commit()
-            
-            # Sincronizar com Firebase se estiver online
-            if self.firebase.online_mode:
-                try:
-                    self.firebase.db.collection("residues").document(residue_id).update(residue_data)
-                except Exception as e:
-                    print(f"Erro ao sincronizar atualização de resíduo com Firebase: {e}")
-                    # Adicionar à fila de sincronização
-                    self.db.add_sync_operation('update', 'residues', residue_id, residue_data)
-            else:
-                # Adicionar à fila de sincronização
-                self.db.add_sync_operation('update', 'residues', residue_id, residue_data)
+            self._prepare_residue_update(residue_data)
+            
+            # Uma mudança de saldo vira um ajuste nas movimentações, na mesma transação
+            with self.transaction():
+                previous_quantity = self.db.get_stock_quantity("residues", residue_id)
+                changed = self._update_residue_row(residue_id, residue_data)
+                if changed and "quantity" in changed:
+                    self.db.record_stock_movement(
+                        "residue", residue_id, residue_data["name"], "adjustment",
+                        int(changed["quantity"]) - previous_quantity, "Ajuste de quantidade",
+                        group_id=residue_data["group_id"]
+                    )
+            
+            if changed is None:
+                print(f"Resíduo com ID {residue_id} não encontrado")
+                return False
             
+            self._publish_residue_update(residue_id, changed)
             return True
         except Exception as e:
             print(f"Erro ao atualizar resíduo: {e}")
             import traceback
             traceback.print_exc()
             return False
+    
+    def _prepare_residue_update(self, residue_data):
+        """Valida os dados e resolve o grupo do resíduo, antes de abrir a transação
+        
+        O grupo pode ser criado aqui (com commit próprio), por isso não deve
+        ficar dentro da transação que grava o saldo.
+        """
+        self._validate_residue_data(residue_data)
+        
+        # Identificar grupo do resíduo
+        from services.group_service import GroupService
+        group_service = get_service(self, GroupService)
+        group = group_service.get_or_create_residue_group(residue_data["type"])
+        
+        # Adicionar grupo_id e group_name aos dados do resíduo
+        residue_data["group_id"] = group["id"]
+        residue_data["group_name"] = group["name"]
+        
+        # Converter quantidade para inteiro
+        try:
+            residue_data["quantity"] = int(residue_data["quantity"])
+        except (ValueError, TypeError):
+            residue_data["quantity"] = 0
+    
+    def _update_residue_row(self, residue_id, residue_data):
+        """Grava as colunas alteradas do resíduo (sem commit)
+        
+        Deve ser chamado dentro de uma transação. Retorna as colunas gravadas,
+        {} se nada mudou ou None se o resíduo não existe.
+        """
+        return self.db.update_changed_columns("residues", residue_id, {
+            "name": residue_data["name"],
+            "type": residue_data["type"],
+            "quantity": residue_data["quantity"],
+            "entryDate": residue_data["entryDate"],
+            "destination": residue_data.get("destination", ""),
+            "exitDate": residue_data.get("exitDate", ""),
+            "notes": residue_data.get("notes", ""),
+            "group_id": residue_data["group_id"],
+            "group_name": residue_data["group_name"]
+        })
+    
+    def _publish_residue_update(self, residue_id, changed):
+        """Depois do commit, sincroniza apenas os campos alterados"""
+        if not changed:
+            # Nada mudou: sem escrita e sem tráfego de sincronização
+            return
+        self._sync_with_firebase("residues", residue_id, changed, 'merge')
 
     def _validate_residue_data(self, residue_data):
         """Valida os dados do resíduo"""
@@ -203,18 +242,15 @@ class ResidueService:
         
         return result
 
+    @timed()
     def get_all_residues(self):
-        """Obtém todos os resíduos do banco de dados"""
+        """Obtém todos os resíduos do banco de dados, como registros Residue imutáveis"""
         try:
-            # Obter do banco de dados local
+            # Obter do banco de dados local (colunas nomeadas na ordem dos slots)
             cursor = self.db.conn.cursor()
-            cursor.execute("SELECT * FROM residues")
-            rows = cursor.fetchall()
-            
-            # Converter para dicionários
-            residues = self._convert_to_dict(rows)
+            cursor.execute(f"SELECT {', '.join(Residue.__slots__)} FROM residues")
             
-            return residues
+            return [Residue(*row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Erro ao obter todos os resíduos: {e}")
             import traceback
@@ -237,99 +273,125 @@ class ResidueService:
             traceback.print_exc()
             return None
     
-    def register_residue_exit(self, residue_id, exit_quantity, destination, notes=""):
-        """Registra a saída de um resíduo"""
+    def register_residue_exit(self, residue_id, exit_quantity, destination, notes="", idempotency_key=None):
+        """Registra a saída de um resíduo
+        
+        O débito (UPDATE condicional), o histórico e as movimentações são gravados
+        em uma única transação. Com `idempotency_key`, uma nova chamada com a
+        mesma chave (ex.: clique duplo) não debita a quantidade novamente.
+        
+        Returns:
+            tuple: (sucesso, mensagem)
+        """
+        # Validar quantidade
         try:
-            # Validar quantidade
-            try:
-                exit_qty = int(exit_quantity)
-                if exit_qty <= 0:
-                    return False, "A quantidade deve ser maior que zero"
-            except (ValueError, TypeError):
-                return False, "Quantidade inválida. Digite um número inteiro."
-            
-            # Buscar resíduo
-            residue = self.get_residue_by_id(residue_id)
-            
-            if not residue:
-                return False, f"Resíduo com ID {residue_id} não encontrado"
-            
-            # Verificar se há quantidade suficiente
-            if exit_qty > residue.get("quantity", 0):
+            exit_qty = int(exit_quantity)
+        except (ValueError, TypeError):
+            return False, "Quantidade inválida. Digite um número inteiro."
+        if exit_qty <= 0:
+            return False, "A quantidade deve ser maior que zero"
+        
+        now = datetime.now()
+        movement_id = new_id("exit")
+        updates = {"exitDate": now.strftime("%d/%m/%Y"), "destination": destination}
+        if notes:
+            updates["notes"] = notes
+        
+        conn = self.db.conn
+        try:
+            if idempotency_key:
+                existing = self.db.claim_movement_key(idempotency_key, movement_id)
+                if existing:
+                    conn.rollback()
+                    logger.info("Saída %s já registrada com a chave %s", existing, idempotency_key)
+                    return True, "Saída já registrada"
+            
+            row = self.db.debit_stock("residues", residue_id, exit_qty, "*", updates)
+            if row is None:
+                conn.rollback()
+                if self.db.get_stock_quantity("residues", residue_id) is None:
+                    return False, f"Resíduo com ID {residue_id} não encontrado"
                 return False, "Quantidade de saída maior que a disponível"
             
-            # Atualizar quantidade
-            residue["quantity"] = residue.get("quantity", 0) - exit_qty
-            residue["exitDate"] = datetime.now().strftime("%d/%m/%Y")
-            residue["destination"] = destination
-            
-            if notes:
-                residue["notes"] = notes
-            
-            # Atualizar resíduo
-            success = self.update_residue(residue_id, residue)
-            
-            if success:
-                # Registrar no histórico
-                self._register_exit_history(residue, exit_qty, destination, notes)
-                return True, f"Saída de {exit_qty} unidades registrada com sucesso"
-            else:
-                return False, "Erro ao atualizar resíduo"
+            residue = self._convert_to_dict([row])[0]
+            exit_record = self._insert_exit_history(residue, exit_qty, destination, notes, movement_id, now)
+            conn.commit()
         except Exception as e:
+            conn.rollback()
             error_msg = f"Erro ao registrar saída de resíduo: {str(e)}"
             print(error_msg)
             traceback.print_exc()
             return False, error_msg
-    
-    def _register_exit_history(self, residue, quantity, destination, notes=""):
-        """Registra a saída no histórico"""
+        
+        # Sincronização e notificação ficam fora da transação
         try:
-            # Criar registro de histórico
-            exit_record = {
-                "id": f"exit_{residue['id']}_{int(time.time())}",
-                "residueId": residue.get("id"),
-                "residueName": residue.get("name"),
-                "quantity": quantity,
-                "destination": destination,
-                "notes": notes,
-                "date": datetime.now().strftime("%d/%m/%Y"),
-                "timestamp": time.time(),
-                "type": residue.get("type")
-            }
-            
-            # Salvar no histórico local
-            cursor = self.db.conn.cursor()
-            cursor.execute('''
-            INSERT INTO residue_history (
-                id, residueId, residueName, quantity, destination, 
-                notes, date, timestamp, type
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                exit_record["id"], exit_record["residueId"], 
-                exit_record["residueName"], exit_record["quantity"],
-                exit_record["destination"], exit_record["notes"],
-                exit_record["date"], exit_record["timestamp"],
-                exit_record["type"]
-            ))
-            self.db.conn.commit()
-            
-            # Sincronizar com Firebase
+            self._sync_with_firebase('residues', residue_id, residue, 'update')
             self._sync_with_firebase('residue_history', exit_record["id"], exit_record, 'add')
             
-            # Criar notificação
             from services.notification_service import NotificationService
-            notification_service = NotificationService(self.firebase, self.db)
+            notification_service = get_service(self, NotificationService)
             notification_service.create_notification(
                 "RESIDUE_EXIT",
-                f"Saída de {quantity} unidades de '{residue['name']}' registrada",
-                residue["id"]
+                f"Saída de {exit_qty} unidades de '{residue['name']}' registrada",
+                residue_id
             )
-            
-            return True
         except Exception as e:
-            print(f"Erro ao registrar histórico de saída: {e}")
-            traceback.print_exc()
-            return False
+            logger.exception("Erro ao sincronizar saída de resíduo: %s", e)
+        
+        return True, f"Saída de {exit_qty} unidades registrada com sucesso"
+    
+    def _insert_exit_history(self, residue, quantity, destination, notes, movement_id, now):
+        """Grava a saída no histórico e nas movimentações de estoque (sem commit)"""
+        exit_record = {
+            "id": movement_id,
+            "residueId": residue.get("id"),
+            "residueName": residue.get("name"),
+            "quantity": quantity,
+            "destination": destination,
+            "notes": notes,
+            "date": now.strftime("%d/%m/%Y"),
+            "timestamp": now.timestamp(),
+            "type": residue.get("type")
+        }
+        
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+        INSERT INTO residue_history (
+            id, residueId, residueName, quantity, destination, 
+            notes, date, timestamp, type
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            exit_record["id"], exit_record["residueId"], 
+            exit_record["residueName"], exit_record["quantity"],
+            exit_record["destination"], exit_record["notes"],
+            exit_record["date"], exit_record["timestamp"],
+            exit_record["type"]
+        ))
+        
+        self.db.record_stock_movement(
+            "residue", exit_record["residueId"], exit_record["residueName"], "exit",
+            quantity, destination, group_id=residue.get("group_id"), movement_id=exit_record["id"]
+        )
+        return exit_record
+    
+    def _sync_with_firebase(self, collection, doc_id, data, operation):
+        """Envia a alteração ao Firebase ou a adiciona à fila de sincronização
+        
+        Fora a exclusão, os dados são mesclados no documento existente.
+        """
+        if isinstance(data, Record):
+            data = data.copy()
+        if self.firebase.online_mode:
+            try:
+                if operation == 'delete':
+                    self.firebase.db.collection(collection).document(doc_id).delete()
+                else:
+                    self.firebase.db.collection(collection).document(doc_id).set(data, merge=True)
+                return True
+            except Exception as e:
+                logger.error("Erro ao sincronizar %s/%s com Firebase: %s", collection, doc_id, e)
+        self.db.add_sync_operation(operation, collection, doc_id, data)
+        return False
     
     def get_residue_history(self, residue_id=None, days=30):
         """Obtém o histórico de saídas de resíduos"""
@@ -432,7 +494,7 @@ class ResidueService:
     def identify_residue_group(self, residue_name):
         """Identifica o grupo de um resíduo com base no nome"""
         from services.group_service import GroupService
-        group_service = GroupService(self.firebase, self.db)
+        group_service = get_service(self, GroupService)
         
         # Normalizar nome do resíduo (remover acentos, converter para minúsculas)
         import unicodedata
@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScanExitQueue:
+    """
+    Fila de saídas da leitura contínua de códigos de barras.
+
+    `submit` resolve o código na ScanLookup (em memória) e apenas enfileira a
+    saída; uma thread grava as saídas acumuladas em micro-lotes, com uma única
+    transação por lote (ProductService.register_exit_batch), e a sincronização
+    com o Firebase acontece nessa mesma thread. Assim a tela nunca espera pelo
+    SQLite ou pelo Firestore entre duas leituras.
+    """
+
+    # Saídas gravadas por transação, no máximo
+    BATCH_SIZE = 50
+    # Tempo máximo (segundos) que uma leitura espera para ser gravada
+    BATCH_WINDOW = 0.25
+
+    def __init__(self, product_service, on_result=None):
+        """
+        Args:
+            product_service (ProductService): Serviço que registra as saídas.
+            on_result (callable, optional): Chamado na thread de gravação com
+                (saída, sucesso, mensagem) para cada leitura processada.
+        """
+        self.product_service = product_service
+        self.on_result = on_result
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def submit(self, code, quantity=1, reason="Leitura de código de barras", exit_type="venda"):
+        """
+        Enfileira a saída de um código lido.
+
+        Returns:
+            dict: A saída enfileirada (com "name", "code" e "kind"), ou None se o
+                código não corresponder a nenhum produto.
+        """
+        match = self.product_service.lookup_code(code)
+        if match is None:
+            return None
+
+        entry = {
+            "code": match["code"],
+            "kind": match["kind"],
+            "name": match["name"],
+            "quantity": quantity,
+            "reason": reason,
+            "exit_type": exit_type,
+            "idempotency_key": uuid.uuid4().hex
+        }
+        if match["kind"] == "lot":
+            entry["product_id"] = match["product_ids"][0]
+        else:
+            entry["barcode"] = match["code"]
+
+        self._ensure_worker()
+        self._queue.put(entry)
+        return entry
+
+    def pending(self):
+        """Quantidade aproximada de leituras ainda não gravadas"""
+        return self._queue.qsize()
+
+    def close(self, timeout=5):
+        """Grava as leituras pendentes e encerra a thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="scan-exit-queue", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        """Aguarda a primeira leitura e junta as que chegarem dentro da janela do lote"""
+        entry = self._queue.get()
+        if entry is None:
+            return None, True
+        batch = [entry]
+        deadline = time.monotonic() + self.BATCH_WINDOW
+        while len(batch) < self.BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _worker(self):
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._write(batch)
+                if stop:
+                    break
+        finally:
+            # Conexão SQLite desta thread
+            self.product_service.db.close()
+
+    def _write(self, batch):
+        try:
+            results = self.product_service.register_exit_batch(batch)
+        except Exception as e:
+            logger.exception("Erro ao gravar lote de leituras")
+            results = [(False, f"Erro ao registrar saída: {e}")] * len(batch)
+
+        logger.debug("Leitura contínua: lote de %d saída(s) gravado", len(batch))
+        if self.on_result:
+            for entry, (success, message) in zip(batch, results):
+                try:
+                    self.on_result(entry, success, message)
+                except Exception as e:
+                    logger.error("Erro ao exibir resultado da leitura: %s", e)
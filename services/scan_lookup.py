@@ -0,0 +1,77 @@
+import threading
+
+
+def normalize_code(code):
+    """Padroniza o texto lido pelo leitor (sem espaços e em maiúsculas)"""
+    return (code or "").strip().upper()
+
+
+class ScanLookup:
+    """
+    Tabela em memória que resolve um código lido (EAN ou lote) nos produtos correspondentes.
+
+    Um código de barras identifica o produto e pode valer para vários lotes
+    (linhas de `products` com o mesmo nome); um código de lote identifica uma
+    linha específica. A tabela é montada de uma vez a partir de `loader` e
+    descartada por `invalidate()` sempre que o cadastro de produtos muda, de
+    modo que cada leitura custa apenas uma consulta em dicionário.
+    """
+
+    def __init__(self, loader):
+        """
+        Args:
+            loader (callable): Retorna tuplas (id, nome, lote, código de barras) de todos os produtos.
+        """
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._by_barcode = None
+        self._by_lot = None
+
+    def invalidate(self):
+        """Descarta a tabela; ela é recarregada na próxima leitura"""
+        with self._lock:
+            self._by_barcode = None
+            self._by_lot = None
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._by_barcode is not None:
+                return self._by_barcode, self._by_lot
+            by_barcode = {}
+            by_lot = {}
+            for product_id, name, lot, barcode in self._loader():
+                barcode = normalize_code(barcode)
+                if barcode:
+                    entry = by_barcode.setdefault(barcode, (name, []))
+                    entry[1].append(product_id)
+                lot = normalize_code(lot)
+                if lot:
+                    by_lot.setdefault(lot, []).append((product_id, name))
+            self._by_barcode = by_barcode
+            self._by_lot = by_lot
+            return by_barcode, by_lot
+
+    def lookup(self, code):
+        """
+        Resolve um código lido.
+
+        O código de barras tem prioridade; um lote só é aceito se identificar
+        uma única linha de produto.
+
+        Returns:
+            dict: {"kind": "barcode" ou "lot", "code", "name", "product_ids"}, ou None.
+        """
+        code = normalize_code(code)
+        if not code:
+            return None
+        by_barcode, by_lot = self._ensure_loaded()
+
+        entry = by_barcode.get(code)
+        if entry:
+            return {"kind": "barcode", "code": code, "name": entry[0], "product_ids": list(entry[1])}
+
+        lots = by_lot.get(code)
+        if lots and len(lots) == 1:
+            product_id, name = lots[0]
+            return {"kind": "lot", "code": code, "name": name, "product_ids": [product_id]}
+        return None
@@ -0,0 +1,34 @@
+class ServiceRegistry:
+    """Mantém uma única instância de cada serviço durante toda a execução
+
+    Os serviços guardam caches e verificações de tabelas; criá-los a cada
+    chamada descarta esse estado e repete consultas. O registro é criado pelo
+    DataService e cada serviço obtido por ele recebe uma referência ao próprio
+    registro, para que possa acessar os demais sem instanciá-los novamente.
+    """
+
+    def __init__(self, firebase, db):
+        self.firebase = firebase
+        self.db = db
+        self._instances = {}
+
+    def get(self, service_class):
+        """Retorna a instância compartilhada do serviço, criando-a na primeira chamada"""
+        instance = self._instances.get(service_class)
+        if instance is None:
+            instance = service_class(self.firebase, self.db)
+            instance.registry = self
+            self._instances[service_class] = instance
+        return instance
+
+
+def get_service(owner, service_class):
+    """Obtém um serviço a partir de outro serviço
+
+    Usa o registro compartilhado quando o serviço `owner` foi criado por ele;
+    caso contrário (uso isolado, scripts), cria uma instância avulsa.
+    """
+    registry = getattr(owner, 'registry', None)
+    if registry is not None:
+        return registry.get(service_class)
+    return service_class(owner.firebase, owner.db)
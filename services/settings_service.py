@@ -1,12 +1,91 @@
+import copy
 import json
 import traceback
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Settings:
+    """Instantâneo imutável das configurações do usuário
+    
+    Cada atualização gera um novo objeto com `version` incrementada; quem
+    guardou um instantâneo pode compará-lo pela versão em vez de reler o banco.
+    """
+    
+    __slots__ = ("_data", "_version")
+    
+    def __init__(self, data, version=0):
+        object.__setattr__(self, "_data", copy.deepcopy(data))
+        object.__setattr__(self, "_version", version)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings é imutável; use SettingsService.update_settings")
+    
+    @property
+    def version(self):
+        return self._version
+    
+    @property
+    def notifications_enabled(self):
+        return bool(self._data.get("notifications", {}).get("enabled", True))
+    
+    @property
+    def low_stock_threshold(self):
+        return int(self._data.get("notifications", {}).get("lowStockThreshold", 5))
+    
+    @property
+    def expiry_warning_days(self):
+        return int(self._data.get("notifications", {}).get("expiryWarningDays", 30))
+    
+    @property
+    def weekly_report_enabled(self):
+        return bool(self._data.get("weeklyReportEnabled", True))
+    
+    @property
+    def backup_enabled(self):
+        return bool(self._data.get("backupEnabled", True))
+    
+    @property
+    def log_level(self):
+        return str(self._data.get("logLevel", "INFO")).upper()
+    
+    def get(self, key, default=None):
+        """Acesso no estilo dicionário; retorna uma cópia do valor"""
+        return copy.deepcopy(self._data.get(key, default))
+    
+    def to_dict(self):
+        """Retorna uma cópia editável das configurações"""
+        return copy.deepcopy(self._data)
+    
+    def diff(self, other):
+        """Retorna os caminhos ("notifications.lowStockThreshold", ...) que diferem de `other`"""
+        return _changed_paths(self._data, other._data if other else {})
+
+def _changed_paths(new, old, prefix=""):
+    """Compara dois dicionários de configuração e lista os caminhos alterados"""
+    changed = set()
+    for key in set(new) | set(old):
+        path = f"{prefix}{key}"
+        new_value, old_value = new.get(key), old.get(key)
+        if isinstance(new_value, dict) and isinstance(old_value, dict):
+            changed |= _changed_paths(new_value, old_value, path + ".")
+        elif new_value != old_value:
+            changed.add(path)
+    return changed
 
 class SettingsService:
-    """Serviço para gerenciamento de configurações do sistema"""
+    """Serviço para gerenciamento de configurações do sistema
+    
+    As configurações são lidas do banco uma única vez e mantidas como um
+    instantâneo imutável (`Settings`); `update_settings` grava no banco e
+    publica o novo instantâneo para os observadores interessados.
+    """
     
     def __init__(self, firebase, db):
         self.firebase = firebase
         self.db = db
+        self._snapshot = None
+        self._observers = []
         self._init_default_settings()
     
     def _init_default_settings(self):
@@ -59,7 +138,17 @@ class SettingsService:
             traceback.print_exc()
     
     def get_settings(self):
-        """Retorna as configurações do usuário"""
+        """Retorna uma cópia editável das configurações do usuário"""
+        return self.get_snapshot().to_dict()
+    
+    def get_snapshot(self):
+        """Retorna o instantâneo atual das configurações, lendo o banco apenas na primeira vez"""
+        if self._snapshot is None:
+            self._snapshot = Settings(self._load_settings())
+        return self._snapshot
+    
+    def _load_settings(self):
+        """Lê as configurações do banco de dados"""
         try:
             cursor = self.db.conn.cursor()
             cursor.execute('SELECT settings_data FROM settings WHERE id = "user_settings"')
@@ -76,6 +165,39 @@ class SettingsService:
             traceback.print_exc()
             return self.get_default_settings()
     
+    def add_observer(self, callback, paths=None):
+        """
+        Registra uma função chamada quando as configurações mudam.
+        
+        Args:
+            callback (callable): Recebe (novo_instantâneo, instantâneo_anterior, caminhos_alterados).
+            paths (iterable, optional): Caminhos de interesse (ex.: "notifications.lowStockThreshold"
+                ou "notifications"). Se omitido, a função é chamada em qualquer alteração.
+        """
+        self._observers.append((callback, tuple(paths) if paths else None))
+    
+    def _publish(self, settings):
+        """Substitui o instantâneo atual e notifica os observadores afetados"""
+        previous = self.get_snapshot()
+        snapshot = Settings(settings, previous.version + 1)
+        changed = snapshot.diff(previous)
+        self._snapshot = snapshot
+        
+        if not changed:
+            return snapshot
+        
+        logger.info("Configurações alteradas (versão %d): %s", snapshot.version, ', '.join(sorted(changed)))
+        for callback, paths in self._observers:
+            if paths and not any(
+                path == watched or path.startswith(watched + ".") for path in changed for watched in paths
+            ):
+                continue
+            try:
+                callback(snapshot, previous, changed)
+            except Exception as e:
+                logger.exception("Erro ao notificar observador de configurações: %s", e)
+        return snapshot
+    
     def get_default_settings(self):
         """Retorna as configurações padrão"""
         return {
@@ -127,6 +249,9 @@ class SettingsService:
             ''', (json.dumps(settings),))
             self.db.conn.commit()
             
+            # Atualizar o instantâneo em memória (write-through)
+            self._publish(settings)
+            
             print("Configurações atualizadas com sucesso")
             return True
         except Exception as e:
@@ -209,8 +334,7 @@ class SettingsService:
     def get_notification_settings(self):
         """Retorna apenas as configurações de notificações"""
         try:
-            settings = self.get_settings()
-            return settings.get("notifications", {
+            return self.get_snapshot().get("notifications", {
                 "enabled": True,
                 "lowStockThreshold": 5,
                 "expiryWarningDays": 30
@@ -0,0 +1,186 @@
+from datetime import date, datetime
+
+from .lot_allocation import parse_expiry
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy é opcional: sem ele os mesmos agregados são calculados com laços
+    np = None
+
+# Dias da semana da matriz de uso (índice 0 = domingo, como em get_weekly_usage)
+WEEKDAYS = 7
+
+
+def _to_int(value):
+    """Converte quantidades vindas do banco/formulários, tratando valores inválidos como zero"""
+    try:
+        return int(value or 0)
+    except (ValueError, TypeError):
+        return 0
+
+
+class StockColumns:
+    """
+    Instantâneo colunar da lista de produtos em cache.
+
+    Guarda, na mesma ordem de `products`, as colunas usadas pelos agregados
+    das telas (quantidade, estoque mínimo, validade como número do dia e
+    índice do grupo), para que totais por grupo, contagens e o uso semanal
+    sejam calculados com bincount e somas vetorizadas em vez de laços sobre
+    dicionários. Com NumPy instalado as colunas são arrays; sem ele, listas
+    com os mesmos resultados.
+
+    O instantâneo vale para uma lista de produtos: o DataService cria outro
+    quando a lista é substituída. A matriz de uso semanal (7 × N) é carregada
+    à parte e pode ser trocada sem reconstruir as colunas de estoque.
+    """
+
+    def __init__(self, products):
+        self.products = products
+        self.group_ids = []
+        self._group_positions = {}
+        self._product_positions = {}
+
+        quantities, min_stock, expiry_days, group_index = [], [], [], []
+        days_by_expiry = {}
+        for position, product in enumerate(products):
+            self._product_positions[product.get("id")] = position
+            quantities.append(_to_int(product.get("quantity")))
+            min_stock.append(_to_int(product.get("minStock")))
+
+            # As validades se repetem entre produtos: cada data é convertida uma vez
+            expiry = product.get("expiry")
+            day = days_by_expiry.get(expiry)
+            if day is None:
+                day = days_by_expiry[expiry] = parse_expiry(expiry).toordinal()
+            expiry_days.append(day)
+
+            group_id = product.get("group_id") or ""
+            group = self._group_positions.get(group_id)
+            if group is None:
+                group = self._group_positions[group_id] = len(self.group_ids)
+                self.group_ids.append(group_id)
+            group_index.append(group)
+        self._group_totals = None
+
+        if np is not None:
+            self.quantity = np.array(quantities, dtype=np.int64)
+            self.min_stock = np.array(min_stock, dtype=np.int64)
+            self.expiry_day = np.array(expiry_days, dtype=np.int64)
+            self.group_index = np.array(group_index, dtype=np.int64)
+        else:
+            self.quantity = quantities
+            self.min_stock = min_stock
+            self.expiry_day = expiry_days
+            self.group_index = group_index
+        self.weekly_usage = None
+
+    def __len__(self):
+        return len(self.products)
+
+    def total_quantity(self):
+        """Soma das quantidades de todos os produtos"""
+        if np is not None:
+            return int(self.quantity.sum())
+        return sum(self.quantity)
+
+    def group_totals(self):
+        """
+        Agregados por grupo em uma passagem.
+
+        Returns:
+            dict: {group_id: {"count", "quantity", "low_stock"}}, em que
+                low_stock conta os produtos com estoque mínimo definido e
+                quantidade igual ou abaixo dele. Calculado uma vez por
+                instantâneo; o dicionário retornado é compartilhado.
+        """
+        if self._group_totals is not None:
+            return self._group_totals
+        groups = len(self.group_ids)
+        if np is not None:
+            counts = np.bincount(self.group_index, minlength=groups)
+            quantities = np.bincount(self.group_index, weights=self.quantity, minlength=groups)
+            low = (self.min_stock > 0) & (self.quantity <= self.min_stock)
+            low_stock = np.bincount(self.group_index[low], minlength=groups)
+            counts, quantities, low_stock = counts.tolist(), quantities.tolist(), low_stock.tolist()
+        else:
+            counts, quantities, low_stock = [0] * groups, [0] * groups, [0] * groups
+            for group, quantity, minimum in zip(self.group_index, self.quantity, self.min_stock):
+                counts[group] += 1
+                quantities[group] += quantity
+                if minimum > 0 and quantity <= minimum:
+                    low_stock[group] += 1
+        self._group_totals = {
+            group_id: {"count": counts[i], "quantity": int(quantities[i]), "low_stock": low_stock[i]}
+            for i, group_id in enumerate(self.group_ids)
+        }
+        return self._group_totals
+
+    def members(self, group_id):
+        """Posições (em ordem crescente) dos produtos do grupo"""
+        group = self._group_positions.get(group_id or "")
+        if group is None:
+            return []
+        if np is not None:
+            return np.flatnonzero(self.group_index == group).tolist()
+        return [i for i, g in enumerate(self.group_index) if g == group]
+
+    def nearest_expiry(self, positions, limit):
+        """As `limit` posições com validade mais próxima (empate pela ordem da lista)"""
+        if np is not None:
+            positions = np.asarray(positions, dtype=np.int64)
+            order = np.argsort(self.expiry_day[positions], kind="stable")[:limit]
+            return positions[order].tolist()
+        return sorted(positions, key=lambda i: (self.expiry_day[i], i))[:limit]
+
+    def load_weekly_usage(self, rows, today=None):
+        """
+        Monta a matriz de uso dos últimos 7 dias (7 × N, linha 0 = domingo).
+
+        Args:
+            rows (iterable): Tuplas (product_id, dia AAAA-MM-DD, quantidade),
+                como as de ProductService.get_weekly_usage_rows. Produtos que
+                não estão no instantâneo são ignorados.
+            today (date, optional): Último dia da janela. Padrão é hoje.
+        """
+        today = today or date.today()
+        first_day = today.toordinal() - (WEEKDAYS - 1)
+        columns = len(self.products)
+        if np is not None:
+            matrix = np.zeros((WEEKDAYS, columns), dtype=np.int64)
+        else:
+            matrix = [[0] * columns for _ in range(WEEKDAYS)]
+
+        weekdays = {}
+        for product_id, day, quantity in rows:
+            position = self._product_positions.get(product_id)
+            if position is None:
+                continue
+            weekday = weekdays.get(day)
+            if weekday is None:
+                parsed = datetime.strptime(day, "%Y-%m-%d").date()
+                # Fora da janela fica marcado com -1
+                weekday = weekdays[day] = (
+                    (parsed.weekday() + 1) % WEEKDAYS if parsed.toordinal() >= first_day else -1
+                )
+            if weekday >= 0:
+                matrix[weekday][position] += _to_int(quantity)
+        self.weekly_usage = matrix
+
+    def weekly_usage_of(self, product_id):
+        """Uso do produto por dia da semana (0 = domingo), ou None se a matriz ou o produto não existirem"""
+        position = self._product_positions.get(product_id)
+        if self.weekly_usage is None or position is None:
+            return None
+        if np is not None:
+            return self.weekly_usage[:, position].tolist()
+        return [row[position] for row in self.weekly_usage]
+
+    def used_positions(self):
+        """Posições dos produtos com algum uso na matriz semanal"""
+        if self.weekly_usage is None:
+            return []
+        if np is not None:
+            return np.flatnonzero(self.weekly_usage.sum(axis=0)).tolist()
+        return [i for i, column in enumerate(zip(*self.weekly_usage)) if any(column)]
@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Marca o retorno de uma tarefa que foi substituída antes de executar
+_SUPERSEDED = object()
+
+
+class TaskRunner:
+    """
+    Executa chamadas de serviço em um pool de threads, fora da thread da interface.
+
+    O retorno de cada tarefa é entregue a `on_done` (ou a exceção a `on_error`)
+    pelo laço de eventos da página, via page.run_task, de modo que os controles
+    do Flet só são alterados a partir dele. Páginas sem run_task (como a
+    HeadlessPage dos benchmarks) recebem o callback na própria thread da tarefa.
+
+    Tarefas enviadas com a mesma `key` se substituem: a anterior é cancelada se
+    ainda estiver na fila, e o resultado dela é descartado se já estiver
+    rodando. É o caso da pesquisa, em que só a última digitação importa.
+    """
+
+    # Threads do pool; o DatabaseService abre uma conexão SQLite por thread
+    MAX_WORKERS = 4
+
+    def __init__(self, page=None, max_workers=None, on_busy_change=None):
+        """
+        Args:
+            page (ft.Page, optional): Página cujo laço de eventos recebe os callbacks.
+            max_workers (int, optional): Threads do pool. Padrão é MAX_WORKERS.
+            on_busy_change (callable, optional): Chamado com True quando a
+                primeira tarefa é enviada e com False quando a última termina,
+                para exibir e ocultar o indicador de progresso.
+        """
+        self.page = page
+        self.on_busy_change = on_busy_change
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or self.MAX_WORKERS, thread_name_prefix="ui-task"
+        )
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._futures = {}
+        self._pending = 0
+
+    def submit(self, func, *args, on_done=None, on_error=None, key=None, delay=0, **kwargs):
+        """
+        Agenda func(*args, **kwargs) no pool.
+
+        Args:
+            func (callable): Chamada a executar fora da thread da interface.
+            on_done (callable, optional): Recebe o retorno de func.
+            on_error (callable, optional): Recebe a exceção levantada por func.
+                Sem ele, o erro é apenas impresso no console.
+            key (str, optional): Identifica tarefas que se substituem.
+            delay (float, optional): Espera em segundos antes de executar; uma
+                tarefa substituída durante a espera nem chega a rodar.
+
+        Returns:
+            Future: Futuro da tarefa.
+        """
+        generation = previous = None
+        with self._lock:
+            if key is not None:
+                generation = self._generations[key] = self._generations.get(key, 0) + 1
+                previous = self._futures.pop(key, None)
+            self._pending += 1
+            first = self._pending == 1
+        if first:
+            self._notify_busy(True)
+        # Fora do lock: cancelar executa o callback de conclusão na hora
+        if previous is not None:
+            previous.cancel()
+
+        try:
+            future = self._executor.submit(self._run, key, generation, delay, func, args, kwargs)
+        except RuntimeError:
+            # Pool já encerrado (janela fechando)
+            self._finish()
+            raise
+        if key is not None:
+            with self._lock:
+                if self._generations.get(key) == generation:
+                    self._futures[key] = future
+        future.add_done_callback(
+            lambda f: self._deliver(f, key, generation, on_done, on_error)
+        )
+        return future
+
+    def cancel(self, key):
+        """Descarta a tarefa pendente de uma chave (cancelada na fila ou ignorada ao terminar)"""
+        with self._lock:
+            if key in self._generations:
+                self._generations[key] += 1
+            future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        """Encerra o pool, cancelando as tarefas que ainda não começaram"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _is_current(self, key, generation):
+        if key is None:
+            return True
+        with self._lock:
+            return self._generations.get(key) == generation
+
+    def _run(self, key, generation, delay, func, args, kwargs):
+        if delay:
+            time.sleep(delay)
+        if not self._is_current(key, generation):
+            return _SUPERSEDED
+        return func(*args, **kwargs)
+
+    def _deliver(self, future, key, generation, on_done, on_error):
+        """Encaminha o resultado de uma tarefa concluída, se ela ainda for a mais recente"""
+        try:
+            if future.cancelled() or not self._is_current(key, generation):
+                return
+            error = future.exception()
+            if error is None:
+                result = future.result()
+                if result is not _SUPERSEDED and on_done:
+                    self._call_on_page(on_done, result)
+            elif on_error:
+                self._call_on_page(on_error, error)
+            else:
+                logger.error("Erro em tarefa de segundo plano: %s", error, exc_info=error)
+        finally:
+            if key is not None:
+                with self._lock:
+                    if self._futures.get(key) is future:
+                        del self._futures[key]
+            self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._pending -= 1
+            idle = self._pending == 0
+        if idle:
+            self._notify_busy(False)
+
+    def _notify_busy(self, busy):
+        if self.on_busy_change:
+            self._call_on_page(self.on_busy_change, busy)
+
+    def _call_on_page(self, callback, value):
+        """Executa o callback no laço de eventos da página (ou direto, sem run_task)"""
+        run_task = getattr(self.page, "run_task", None)
+        if run_task is None:
+            self._safe_call(callback, value)
+            return
+
+        async def apply():
+            self._safe_call(callback, value)
+
+        try:
+            run_task(apply)
+        except Exception as e:
+            # Laço da página indisponível (sessão encerrada)
+            logger.warning("Não foi possível entregar o resultado à interface: %s", e)
+
+    @staticmethod
+    def _safe_call(callback, value):
+        try:
+            callback(value)
+        except Exception as e:
+            logger.exception("Erro ao aplicar o resultado da tarefa: %s", e)
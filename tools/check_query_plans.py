@@ -0,0 +1,187 @@
+"""Verifica os planos de execução das consultas dos caminhos mais usados
+
+Gera um banco de teste com benchmarks/dataset.py em uma pasta temporária,
+executa as operações de leitura dos serviços (produtos, resíduos, grupos,
+notificações) e das consultas dos relatórios, captura cada comando SQL
+emitido e roda EXPLAIN QUERY PLAN sobre ele.
+
+Um comando que percorre por completo (SCAN) uma das tabelas grandes —
+produtos, históricos, movimentações ou notificações — é considerado uma
+regressão, a menos que esteja em ALLOWED_SCANS (cargas completas feitas de
+propósito). Não depende de tempo de execução, então não oscila como um
+benchmark.
+
+Uso:
+    python tools/check_query_plans.py [--verbose]
+
+Retorna código de saída 1 se encontrar alguma violação.
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Quantidade de produtos do banco de teste (suficiente para o planejador usar os índices)
+FIXTURE_PRODUCTS = 2000
+
+# Tabelas que não podem ser percorridas por completo nos caminhos verificados
+PROTECTED_TABLES = (
+    "products", "product_history", "residue_history", "stock_movements",
+    "daily_movements", "usage_timeseries", "notifications"
+)
+
+# Cargas completas intencionais: (operação, tabela) -> motivo
+ALLOWED_SCANS = {
+    ("get_all_products", "products"): "carga completa do cache do DataService",
+    ("get_low_stock_products", "products"): "filtra a lista carregada por get_all_products",
+    ("get_expiring_products", "products"): "validade em DD/MM/AAAA não é indexável",
+    ("check_and_create_notifications", "products"): "percorre o estoque para gerar os alertas",
+}
+
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+_LIMIT_RE = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+_CHECKED_STATEMENTS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def _operations(data):
+    """Operações verificadas: (nome, função) usando IDs reais do banco de teste"""
+    product = data.stock_products[0] if data.stock_products else {"id": "", "name": ""}
+    residue = data.residues[0] if data.residues else {"id": ""}
+    product_group = data.product_groups[0] if data.product_groups else {"id": ""}
+    residue_group = data.residue_groups[0] if data.residue_groups else {"id": ""}
+    product_ids = [p["id"] for p in data.stock_products[:20]]
+    search = product["name"].split()[0] if product.get("name") else None
+
+    return [
+        # ProductService
+        ("get_all_products", data.product_service.get_all_products),
+        ("get_low_stock_products", lambda: data.product_service.get_low_stock_products(5)),
+        ("get_expiring_products", lambda: data.product_service.get_expiring_products(30)),
+        ("get_product", lambda: data.product_service.get_product(product["id"])),
+        ("get_product_exits", lambda: data.product_service.get_product_exits(product["id"])),
+        ("get_weekly_usage", lambda: data.product_service.get_weekly_usage(product["id"])),
+        ("get_usage_totals", lambda: data.product_service.get_usage_totals(7, product_ids)),
+        ("get_weekly_usage_rows", data.product_service.get_weekly_usage_rows),
+        # ResidueService
+        ("get_all_residues", data.residue_service.get_all_residues),
+        ("get_residue_by_id", lambda: data.residue_service.get_residue_by_id(residue["id"])),
+        ("get_residue_history", lambda: data.residue_service.get_residue_history(residue["id"])),
+        ("get_residue_stats", data.residue_service.get_residue_stats),
+        # GroupService
+        ("list_product_groups", data.group_service.get_all_product_groups),
+        ("list_residue_groups", data.group_service.get_all_residue_groups),
+        ("get_product_group", lambda: data.group_service.get_product_group(product_group["id"])),
+        ("get_residue_group", lambda: data.group_service.get_residue_group(residue_group["id"])),
+        ("get_products_in_group", lambda: data.group_service.get_products_in_group(product_group["id"])),
+        ("get_residues_in_group", lambda: data.group_service.get_residues_in_group(residue_group["id"])),
+        # NotificationService
+        ("get_notifications_page", lambda: data.notification_service.get_notifications_page()),
+        ("get_unread_notifications_page", lambda: data.notification_service.get_notifications_page(unread_only=True)),
+        ("check_and_create_notifications", data.notification_service.check_and_create_notifications),
+        # Consultas dos relatórios
+        ("movement_totals", lambda: data.get_product_movement_totals(days=30)),
+        ("movement_totals_search", lambda: data.get_product_movement_totals(product_name=search, days=30)),
+        ("daily_movement_totals", lambda: data.get_daily_movement_totals(days=30)),
+        ("movement_page", lambda: data.get_product_movement_page(days=30)),
+        ("movement_page_after_cursor", lambda: data.get_product_movement_page(days=30, before=(time.time(), "~"))),
+        ("movement_history", lambda: list(data.iter_product_movement_history(days=30))),
+        ("item_movement_totals", lambda: data.get_item_movement_totals(product_ids, days=30)),
+        ("stock_movement_page", lambda: data.get_stock_movement_page(days=30)),
+        ("stock_movement_summary", lambda: data.get_stock_movement_summary(days=30)),
+        ("entry_movement_page", lambda: data.get_stock_movement_page(movement_type="entry", days=30)),
+    ]
+
+
+def _plan_scans(conn, statement):
+    """Retorna as tabelas protegidas percorridas por completo no plano do comando
+
+    Percorrer um índice na ordem do ORDER BY é aceito quando o comando tem
+    LIMIT, pois a leitura para ao completar a página.
+    """
+    has_limit = bool(_LIMIT_RE.search(statement))
+    scans = []
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}"):
+        detail = row[-1]
+        match = _SCAN_RE.match(detail)
+        if not match or match.group(1) not in PROTECTED_TABLES:
+            continue
+        if has_limit and "USING" in detail and "INDEX" in detail:
+            continue
+        scans.append((match.group(1), detail))
+    return scans
+
+
+def collect_statements(data, operations):
+    """Executa as operações e retorna {operação: [comandos SQL emitidos]}"""
+    statements = {}
+    conn = data.db.conn
+    for name, func in operations:
+        captured = []
+        conn.set_trace_callback(captured.append)
+        try:
+            func()
+        finally:
+            conn.set_trace_callback(None)
+        statements[name] = [
+            sql.strip() for sql in captured
+            if sql.lstrip().split(None, 1)[0].upper() in _CHECKED_STATEMENTS
+        ]
+    return statements
+
+
+def find_violations(data, verbose=False):
+    """Retorna uma lista de (operação, tabela, detalhe do plano, comando) não permitidos"""
+    violations = []
+    conn = data.db.conn
+    for name, statements in collect_statements(data, _operations(data)).items():
+        if verbose:
+            print(f"{name}: {len(statements)} comando(s)")
+        for statement in dict.fromkeys(statements):
+            for table, detail in _plan_scans(conn, statement):
+                if (name, table) in ALLOWED_SCANS:
+                    if verbose:
+                        print(f"  permitido: {detail} ({ALLOWED_SCANS[(name, table)]})")
+                    continue
+                violations.append((name, table, detail, " ".join(statement.split())))
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica os planos das consultas SQL")
+    parser.add_argument("--verbose", action="store_true", help="Lista os comandos verificados")
+    args = parser.parse_args(argv)
+
+    from benchmarks.dataset import create_database
+
+    workdir = tempfile.mkdtemp(prefix="estoque_query_plans_")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        create_database(FIXTURE_PRODUCTS)
+
+        from services.data_service import DataService
+        data = DataService()
+        violations = find_violations(data, args.verbose)
+        data.db.close()
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for name, table, detail, statement in violations:
+        print(f"{name}: {detail}\n    {statement[:200]}")
+    if violations:
+        print(f"{len(violations)} consulta(s) percorrem tabelas inteiras")
+        return 1
+    print("Nenhuma consulta percorre tabelas inteiras nos caminhos verificados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
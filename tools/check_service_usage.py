@@ -0,0 +1,59 @@
+"""Verifica se alguma tela instancia serviços diretamente
+
+As telas devem usar as instâncias compartilhadas do DataService
+(self.data.group_service, self.data.card_config_service, ...). Criar um
+serviço dentro de uma tela descarta os caches e repete consultas a cada
+renderização.
+
+Uso:
+    python tools/check_service_usage.py
+
+Retorna código de saída 1 se encontrar alguma violação.
+"""
+import ast
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCREENS_DIR = os.path.join(ROOT, "screens")
+
+
+def _called_name(node):
+    """Retorna o nome da classe/função chamada, se for possível determiná-lo"""
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def find_violations(directory=SCREENS_DIR):
+    """Retorna uma lista de (arquivo, linha, serviço) com as instanciações encontradas"""
+    violations = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".py"):
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call):
+                name = _called_name(node)
+                if name and name.endswith("Service"):
+                    violations.append((os.path.relpath(path, ROOT), node.lineno, name))
+    return violations
+
+
+def main():
+    violations = find_violations()
+    for path, line, name in violations:
+        print(f"{path}:{line}: {name} instanciado diretamente; use a instância do DataService")
+    if violations:
+        print(f"{len(violations)} violação(ões) encontrada(s)")
+        return 1
+    print("Nenhuma tela instancia serviços diretamente")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
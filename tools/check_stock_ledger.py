@@ -0,0 +1,114 @@
+"""Verifica se os ajustes de saldo chegam ao registro de movimentações
+
+Gera um banco de teste com benchmarks/dataset.py em uma pasta temporária,
+altera a quantidade de um produto e de um resíduo pelos caminhos das telas de
+edição (update_product / update_residue) e confere que:
+
+- cada alteração gravou um "adjustment" com a diferença de saldo em
+  stock_movements;
+- o ajuste do produto aparece no relatório de movimentação (página e totais);
+- a consolidação diária acumulada na gravação é igual à reconstruída por
+  rebuild_daily_movements.
+
+Uso:
+    python tools/check_stock_ledger.py
+
+Retorna código de saída 1 se alguma verificação falhar.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Quantidade de produtos do banco de teste
+FIXTURE_PRODUCTS = 200
+
+# Diferença de saldo aplicada a cada item
+DELTA = 7
+
+
+def _adjustments(conn, kind, item_id):
+    """Quantidades dos ajustes registrados para um item"""
+    rows = conn.execute(
+        "SELECT quantity FROM stock_movements WHERE kind = ? AND item_id = ? AND type = 'adjustment'",
+        (kind, item_id)
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _daily_adjustments(conn):
+    """Linhas de ajuste da consolidação diária, em ordem estável"""
+    return conn.execute(
+        "SELECT item_kind, item_id, day, quantity, count FROM daily_movements "
+        "WHERE type = 'adjustment' ORDER BY item_kind, item_id, day"
+    ).fetchall()
+
+
+def find_failures(data):
+    """Aplica os ajustes e retorna a lista de verificações que falharam"""
+    failures = []
+    conn = data.db.conn
+
+    product = dict(data.stock_products[0])
+    product["quantity"] = int(product["quantity"]) + DELTA
+    if data.product_service.update_product(product["id"], product) is None:
+        return ["update_product falhou"]
+
+    residue = dict(data.residues[0])
+    residue["quantity"] = int(residue["quantity"]) + DELTA
+    if not data.residue_service.update_residue(residue["id"], residue):
+        return ["update_residue falhou"]
+
+    for kind, item_id in (("product", product["id"]), ("residue", residue["id"])):
+        recorded = _adjustments(conn, kind, item_id)
+        if recorded != [DELTA]:
+            failures.append(f"ajuste de {kind} {item_id} em stock_movements: {recorded}")
+
+    page = data.get_product_movement_page(product_name=product["name"], days=1, movement_type="adjustment")
+    if [m["quantity"] for m in page if m["productId"] == product["id"]] != [DELTA]:
+        failures.append("ajuste do produto ausente da página do relatório de movimentação")
+    totals = data.get_product_movement_totals(days=1, movement_type="adjustment")
+    if totals.get("adjustment") != DELTA:
+        failures.append(f"total de ajustes do relatório de movimentação: {totals.get('adjustment')}")
+
+    recorded = _daily_adjustments(conn)
+    if data.db.rebuild_daily_movements() < 0:
+        failures.append("rebuild_daily_movements falhou")
+    elif _daily_adjustments(conn) != recorded:
+        failures.append("consolidação diária dos ajustes difere da reconstruída por rebuild_daily_movements")
+
+    return failures
+
+
+def main(argv=None):
+    from benchmarks.dataset import create_database
+
+    workdir = tempfile.mkdtemp(prefix="estoque_ledger_")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        create_database(FIXTURE_PRODUCTS)
+
+        from services.data_service import DataService
+        data = DataService()
+        failures = find_failures(data)
+        data.db.close()
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(failure)
+    if failures:
+        print(f"{len(failures)} verificação(ões) falharam")
+        return 1
+    print("Ajustes de saldo registrados e consolidados corretamente")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())